@@ -250,70 +250,83 @@ class Comment(TimeStampedModel):
     def _parse_mentions(self):
         """Parse @username and @department mentions from content."""
         from apps.notifications.models import Notification
+        from apps.notifications.services import create_notifications_bulk
         from apps.users.models import Department, User
 
         # Find all @mentions
         mention_pattern = r"@(\w+)"
         mentions = re.findall(mention_pattern, self.content)
+        if not mentions:
+            return
 
-        if mentions:
-            for mention in mentions:
-                # Check if it's a department mention (by code)
-                matching_depts = Department.objects.filter(
-                    models.Q(code__iexact=mention) | models.Q(name__iexact=mention)
-                )
-                for dept in matching_depts:
-                    self.mentioned_departments.add(dept)
-                    # Notify all users in this department
-                    for user in dept.users.filter(is_active=True).exclude(
-                        id=self.author_id
-                    ):
-                        entity_name = self._get_entity_name()
-                        Notification.objects.create(
-                            recipient=user,
-                            notification_type=Notification.Type.MENTION,
-                            title=f"{self.author.full_name} mentioned {dept.name}",
-                            message=f"Your department was mentioned in a comment on {entity_name}: \"{self.content[:100]}{'...' if len(self.content) > 100 else ''}\"",
-                            severity=Notification.Severity.INFO,
-                            related_object_type=(
-                                self.content_type.model if self.content_type else ""
-                            ),
-                            related_object_id=self.object_id,
-                            action_url=(
-                                f"/{self.content_type.model}s/{self.object_id}"
-                                if self.content_type
-                                else ""
-                            ),
-                        )
-
-                # Check if it's a user mention
-                matching_users = User.objects.filter(
-                    models.Q(first_name__iexact=mention)
-                    | models.Q(email__istartswith=f"{mention}@")
+        entity_name = self._get_entity_name()
+        excerpt = f"{self.content[:100]}{'...' if len(self.content) > 100 else ''}"
+        common = {
+            "severity": Notification.Severity.INFO,
+            "related_object_type": (
+                self.content_type.model if self.content_type else ""
+            ),
+            "related_object_id": self.object_id,
+            "action_url": (
+                f"/{self.content_type.model}s/{self.object_id}"
+                if self.content_type
+                else ""
+            ),
+        }
+        notifications = []
+
+        def notify(user, title, message):
+            notifications.append(
+                (
+                    user,
+                    Notification.Type.MENTION,
+                    {
+                        **common,
+                        "title": title,
+                        "message": message,
+                        # Once per comment and user, across edits and mentions
+                        "idempotency_key": f"mention:{self.pk}:{user.pk}",
+                    },
                 )
-                for user in matching_users:
-                    # Add to mentioned_users
-                    self.mentioned_users.add(user)
-
-                    # Send notification (don't notify yourself)
-                    if user.id != self.author_id:
-                        entity_name = self._get_entity_name()
-                        Notification.objects.create(
-                            recipient=user,
-                            notification_type=Notification.Type.MENTION,
-                            title=f"{self.author.full_name} mentioned you",
-                            message=f"You were mentioned in a comment on {entity_name}: \"{self.content[:100]}{'...' if len(self.content) > 100 else ''}\"",
-                            severity=Notification.Severity.INFO,
-                            related_object_type=(
-                                self.content_type.model if self.content_type else ""
-                            ),
-                            related_object_id=self.object_id,
-                            action_url=(
-                                f"/{self.content_type.model}s/{self.object_id}"
-                                if self.content_type
-                                else ""
-                            ),
-                        )
+            )
+
+        for mention in mentions:
+            # Check if it's a department mention (by code)
+            matching_depts = Department.objects.filter(
+                models.Q(code__iexact=mention) | models.Q(name__iexact=mention)
+            )
+            for dept in matching_depts:
+                self.mentioned_departments.add(dept)
+                # Notify all users in this department
+                for user in dept.users.filter(is_active=True).exclude(
+                    id=self.author_id
+                ):
+                    notify(
+                        user,
+                        f"{self.author.full_name} mentioned {dept.name}",
+                        f"Your department was mentioned in a comment on "
+                        f'{entity_name}: "{excerpt}"',
+                    )
+
+            # Check if it's a user mention
+            matching_users = User.objects.filter(
+                models.Q(first_name__iexact=mention)
+                | models.Q(email__istartswith=f"{mention}@")
+            )
+            for user in matching_users:
+                # Add to mentioned_users
+                self.mentioned_users.add(user)
+
+                # Send notification (don't notify yourself)
+                if user.id != self.author_id:
+                    notify(
+                        user,
+                        f"{self.author.full_name} mentioned you",
+                        f"You were mentioned in a comment on "
+                        f'{entity_name}: "{excerpt}"',
+                    )
+
+        create_notifications_bulk(notifications)
 
     def _get_entity_name(self):
         """Get the name of the related entity (contact/corporation)."""
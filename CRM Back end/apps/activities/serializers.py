@@ -8,6 +8,7 @@ from rest_framework import serializers
 
 from apps.activities.models import Activity, Comment, CommentReaction
 from apps.documents.models import DepartmentClientFolder
+from apps.documents.streaming import document_download_url
 from apps.users.models import Department, User
 
 
@@ -351,6 +352,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         if attachments and department_folder:
             import mimetypes
 
+            from apps.documents.encryption import encrypt_upload
             from apps.documents.models import Document
 
             user = self.context["request"].user
@@ -363,15 +365,17 @@ class CommentCreateSerializer(serializers.ModelSerializer):
                     mime_type = guessed or "application/octet-stream"
 
                 # Create document linked to department folder
+                stored, encryption = encrypt_upload(uploaded_file)
                 doc = Document.objects.create(
                     title=uploaded_file.name,
-                    file=uploaded_file,
+                    file=stored,
                     uploaded_by=user,
                     department_folder=department_folder,
                     contact_id=entity_id if entity_type == "contact" else None,
                     corporation_id=entity_id if entity_type == "corporation" else None,
                     file_size=uploaded_file.size,
                     mime_type=mime_type,
+                    **encryption,
                 )
 
                 # Add document reference to comment metadata
@@ -383,7 +387,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
                     {
                         "id": str(doc.id),
                         "title": doc.title,
-                        "file_url": doc.file.url if doc.file else None,
+                        "file_url": document_download_url(doc),
                     }
                 )
             comment.save()
@@ -7,9 +7,31 @@ import logging
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from apps.emails.signals import inbound_messages_synced
+
 logger = logging.getLogger(__name__)
 
 
+def _queue_email_analysis(email_ids):
+    """Queue analysis of inbound emails if the agent has it enabled."""
+    try:
+        from apps.ai_agent.models import AgentConfiguration
+
+        config = AgentConfiguration.get_config()
+
+        if not config.is_active or not config.email_analysis_enabled:
+            return
+
+        from apps.ai_agent.tasks import analyze_email
+
+        for email_id in email_ids:
+            analyze_email.delay(str(email_id))
+            logger.debug(f"Queued email analysis for {email_id}")
+
+    except Exception as e:
+        logger.error(f"Failed to queue email analysis: {e}")
+
+
 @receiver(post_save, sender="emails.EmailMessage")
 def on_email_received(sender, instance, created, **kwargs):
     """
@@ -22,21 +44,15 @@ def on_email_received(sender, instance, created, **kwargs):
     if instance.direction != "inbound":
         return
 
-    try:
-        from apps.ai_agent.models import AgentConfiguration
-
-        config = AgentConfiguration.get_config()
-
-        if not config.is_active or not config.email_analysis_enabled:
-            return
-
-        from apps.ai_agent.tasks import analyze_email
+    _queue_email_analysis([instance.id])
 
-        analyze_email.delay(str(instance.id))
-        logger.debug(f"Queued email analysis for {instance.id}")
 
-    except Exception as e:
-        logger.error(f"Failed to queue email analysis: {e}")
+@receiver(inbound_messages_synced)
+def on_emails_synced(sender, message_ids, **kwargs):
+    """
+    Trigger email analysis for messages bulk-inserted by an IMAP sync.
+    """
+    _queue_email_analysis(message_ids)
 
 
 @receiver(post_save, sender="ai_agent.AgentAction")
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_original_start(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    Appointment.objects.filter(parent_appointment__isnull=False).update(
+        original_start=F("start_datetime")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0005_add_color_field"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="original_start",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="original start"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["parent_appointment", "original_start"],
+                name="idx_appointment_occurrence",
+            ),
+        ),
+        migrations.RunPython(set_original_start, migrations.RunPython.noop),
+    ]
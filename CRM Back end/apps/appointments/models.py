@@ -113,10 +113,18 @@ class Appointment(TimeStampedModel):
     recurrence_config = models.JSONField(
         _("recurrence config"), default=dict, blank=True
     )
+    # Start of the series occurrence a materialized instance stands for
+    original_start = models.DateTimeField(_("original start"), null=True, blank=True)
 
     class Meta:
         db_table = "crm_appointments"
         ordering = ["-start_datetime"]
+        indexes = [
+            models.Index(
+                fields=["parent_appointment", "original_start"],
+                name="idx_appointment_occurrence",
+            ),
+        ]
         verbose_name = _("appointment")
         verbose_name_plural = _("appointments")
 
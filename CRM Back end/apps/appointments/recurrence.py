@@ -1,82 +1,278 @@
 """
-Recurrence generation and management for appointments.
-
-Handles daily, weekly, and monthly patterns with configurable end dates
-and series update/delete operations.
+Recurrence expansion and management for appointments.
+
+A recurring appointment (the series head) stores its pattern: daily,
+weekly or monthly, with an optional end date and ``recurrence_config``.
+Its occurrences are not stored.  ``expand`` generates them for any
+requested window, at the head's local wall-clock time, so a calendar
+costs the same for next week as for next year.
+
+Occurrences are identified by their series and local date.  An
+occurrence that is edited or cancelled is materialized as an instance row
+(``parent_appointment`` = head, ``original_start`` = the occurrence start)
+that replaces the generated one wherever it has moved to.  Deleted
+occurrences are listed in ``recurrence_config["excluded_dates"]``.
+
+The ids of generated occurrences are ``uuid5`` values and can't be turned
+back into a series and date, so the calendar records them in the cache
+(``remember_occurrences``); the detail endpoints then resolve an
+occurrence requested by that id (``resolve_occurrence``), materializing
+it only to edit or delete it.
 """
 
 import datetime
+import uuid
 
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from apps.appointments.models import Appointment
 
+SERIES_PATTERNS = (
+    Appointment.RecurrencePattern.DAILY,
+    Appointment.RecurrencePattern.WEEKLY,
+    Appointment.RecurrencePattern.MONTHLY,
+)
+
+# Series whose end date is further back than this are not expanded into a
+# window (occurrences are assumed to end within a day of their start)
+SERIES_LOOKBACK = datetime.timedelta(days=1)
+
+# How long (seconds) occurrence ids handed out by the calendar resolve
+OCCURRENCE_ID_TIMEOUT = 7 * 24 * 60 * 60
+
+_OCCURRENCE_CACHE_KEY = "appointment_occurrence:{}"
+
+# Fields an occurrence copies from its series head
+_COPIED_FIELDS = (
+    "title",
+    "description",
+    "location",
+    "color",
+    "notes",
+    "contact_id",
+    "assigned_to_id",
+    "created_by_id",
+    "case_id",
+)
+_COPIED_RELATIONS = ("contact", "assigned_to", "created_by", "case")
+
+
+def _excluded_dates(head):
+    return set((head.recurrence_config or {}).get("excluded_dates", []))
 
-def generate_recurring_appointments(parent, days_ahead=30):
-    """
-    Generate recurring instances for the next `days_ahead` days from today.
 
-    Skips dates that already have an instance for the parent.
-    Returns the list of newly created instances.
+def occurrence_id(head, day):
+    """Stable id of the occurrence of *head* on the local date *day*."""
+    return uuid.uuid5(head.pk, day.isoformat())
+
+
+def occurrence_starts(head, start, end):
     """
-    if parent.recurrence_pattern == Appointment.RecurrencePattern.NONE:
+    Starts of the occurrences of *head* that overlap ``[start, end)``,
+    without the head's own first occurrence and excluded dates.
+    """
+    if head.recurrence_pattern not in SERIES_PATTERNS:
         return []
 
-    today = timezone.now().date()
-    end_boundary = today + datetime.timedelta(days=days_ahead)
+    first = timezone.localtime(head.start_datetime)
+    duration = head.end_datetime - head.start_datetime
+    first_day = max(
+        first.date() + datetime.timedelta(days=1),
+        timezone.localtime(start - duration).date(),
+    )
+    last_day = timezone.localtime(end).date()
+    if head.recurrence_end_date and head.recurrence_end_date < last_day:
+        last_day = head.recurrence_end_date
+    if first_day > last_day:
+        return []
 
-    # Respect the recurrence end date if set
-    if parent.recurrence_end_date and parent.recurrence_end_date < end_boundary:
-        end_boundary = parent.recurrence_end_date
+    excluded = _excluded_dates(head)
+    starts = []
+    for day in _compute_dates(head, first_day, last_day):
+        if day.isoformat() in excluded:
+            continue
+        occurrence_start = datetime.datetime.combine(
+            day, first.time(), tzinfo=first.tzinfo
+        )
+        if occurrence_start < end and occurrence_start + duration > start:
+            starts.append(occurrence_start)
+    return starts
+
+
+def build_occurrence(head, original_start):
+    """Unsaved instance for the occurrence of *head* at *original_start*."""
+    instance = Appointment(
+        id=occurrence_id(head, timezone.localtime(original_start).date()),
+        start_datetime=original_start,
+        end_datetime=original_start + (head.end_datetime - head.start_datetime),
+        status=Appointment.Status.SCHEDULED,
+        reminder_at=_compute_reminder(head, original_start),
+        recurrence_pattern=Appointment.RecurrencePattern.NONE,
+        parent_appointment=head,
+        original_start=original_start,
+        **{field: getattr(head, field) for field in _COPIED_FIELDS},
+    )
+    # Share the head's loaded contact / staff / case instead of re-fetching
+    for name in _COPIED_RELATIONS:
+        field = Appointment._meta.get_field(name)
+        if field.is_cached(head):
+            field.set_cached_value(instance, field.get_cached_value(head))
+    return instance
+
+
+def expand(queryset, start, end):
+    """
+    Appointments of *queryset* overlapping ``[start, end)``, with the
+    generated occurrences of its recurring series, ordered by start.
 
-    # Collect existing instance dates to avoid duplicates
-    existing_dates = set(
-        parent.recurring_instances.values_list("start_datetime__date", flat=True)
+    One query for the stored rows and series heads, and one for the
+    materialized instances of those series when there are any.
+    """
+    active_series = Q(
+        parent_appointment__isnull=True,
+        recurrence_pattern__in=SERIES_PATTERNS,
+        start_datetime__lt=end,
+    ) & (
+        Q(recurrence_end_date__isnull=True)
+        | Q(recurrence_end_date__gte=timezone.localdate(start - SERIES_LOOKBACK))
+    )
+    overlapping = Q(start_datetime__lt=end, end_datetime__gt=start)
+    rows = list(queryset.filter(overlapping | active_series))
+
+    appointments = [
+        row for row in rows if row.start_datetime < end and row.end_datetime > start
+    ]
+    heads = [
+        row
+        for row in rows
+        if row.parent_appointment_id is None
+        and row.recurrence_pattern in SERIES_PATTERNS
+    ]
+    if heads:
+        lookback = max(head.end_datetime - head.start_datetime for head in heads)
+        # Materialized occurrences replace the generated ones, even when they
+        # have moved out of the window or fall outside *queryset*
+        materialized = {
+            (head_id, timezone.localtime(original_start).date())
+            for head_id, original_start in Appointment.objects.filter(
+                parent_appointment__in=heads,
+                original_start__gte=start - lookback,
+                original_start__lt=end,
+            ).values_list("parent_appointment_id", "original_start")
+        }
+        for head in heads:
+            for original_start in occurrence_starts(head, start, end):
+                day = timezone.localtime(original_start).date()
+                if (head.pk, day) not in materialized:
+                    appointments.append(build_occurrence(head, original_start))
+
+    appointments.sort(key=lambda appointment: appointment.start_datetime)
+    return appointments
+
+
+def has_conflict(assigned_to, start, end, exclude=None):
+    """
+    Whether *assigned_to* has a stored or generated appointment overlapping
+    ``[start, end)`` other than *exclude* (a pk) that still holds its time.
+    """
+    released = (Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW)
+    return any(
+        appointment.pk != exclude and appointment.status not in released
+        for appointment in expand(
+            Appointment.objects.filter(assigned_to=assigned_to), start, end
+        )
     )
 
-    # Also include the parent's own date
-    existing_dates.add(parent.start_datetime.date())
 
-    dates = _compute_dates(parent, today, end_boundary)
-    duration = parent.end_datetime - parent.start_datetime
+def find_occurrence(head, original_start):
+    """
+    The occurrence of *head* at *original_start*: its stored instance, or
+    an unsaved one from ``build_occurrence``.  ``None`` when the series has
+    no occurrence there.
+    """
+    day = timezone.localtime(original_start).date()
+    existing = _materialized(head, day)
+    if existing:
+        # At most one occurrence a day: another time that day is none
+        return existing if existing.original_start == original_start else None
+
+    starts = occurrence_starts(
+        head, original_start, original_start + datetime.timedelta(microseconds=1)
+    )
+    if original_start not in starts:
+        return None
+    return build_occurrence(head, original_start)
 
-    created = []
-    for d in dates:
-        if d in existing_dates:
-            continue
-        if d <= parent.start_datetime.date():
-            continue
 
-        start_dt = datetime.datetime.combine(
-            d, parent.start_datetime.time(), tzinfo=parent.start_datetime.tzinfo
-        )
+def materialize_occurrence(head, original_start):
+    """
+    The stored instance of the occurrence of *head* at *original_start*,
+    created from the series if needed.  ``None`` when the series has no
+    occurrence there.
+    """
+    instance = find_occurrence(head, original_start)
+    if instance is None or not instance._state.adding:
+        return instance
+    day = timezone.localtime(original_start).date()
+    try:
+        with transaction.atomic():
+            instance.save(force_insert=True)
+    except IntegrityError:
+        # Materialized concurrently: same occurrence id
+        return _materialized(head, day)
+    return instance
+
+
+def remember_occurrences(appointments):
+    """Record the series and start of the generated *appointments*."""
+    cache.set_many(
+        {
+            _OCCURRENCE_CACHE_KEY.format(appointment.pk): (
+                appointment.parent_appointment_id,
+                appointment.original_start,
+            )
+            for appointment in appointments
+            if appointment._state.adding and appointment.original_start
+        },
+        OCCURRENCE_ID_TIMEOUT,
+    )
 
-        # Final check: ensure no duplicate exists for this exact datetime
-        # This handles race conditions and timezone edge cases
-        if Appointment.objects.filter(
-            parent_appointment=parent, start_datetime=start_dt
-        ).exists():
-            continue
 
-        instance = Appointment.objects.create(
-            title=parent.title,
-            description=parent.description,
-            start_datetime=start_dt,
-            end_datetime=start_dt + duration,
-            location=parent.location,
-            status=Appointment.Status.SCHEDULED,
-            contact=parent.contact,
-            assigned_to=parent.assigned_to,
-            created_by=parent.created_by,
-            case=parent.case,
-            reminder_at=_compute_reminder(parent, start_dt),
-            notes=parent.notes,
-            recurrence_pattern=Appointment.RecurrencePattern.NONE,
-            parent_appointment=parent,
-        )
-        created.append(instance)
+def resolve_occurrence(queryset, pk, materialize=True):
+    """
+    The generated occurrence with id *pk* of a series in *queryset*: stored
+    (materialized if needed), or with ``materialize=False`` as found by
+    ``find_occurrence``.  ``None`` when *pk* is not a remembered
+    occurrence id.
+    """
+    entry = cache.get(_OCCURRENCE_CACHE_KEY.format(pk))
+    if entry is None:
+        return None
+    head_id, original_start = entry
+    head = queryset.filter(pk=head_id).first()
+    if head is None:
+        return None
+    if not materialize:
+        return find_occurrence(head, original_start)
+    return materialize_occurrence(head, original_start)
+
+
+def _materialized(head, day):
+    zone = timezone.get_current_timezone()
+    day_start = datetime.datetime.combine(day, datetime.time.min, tzinfo=zone)
+    return head.recurring_instances.filter(
+        original_start__gte=day_start,
+        original_start__lt=day_start + datetime.timedelta(days=1),
+    ).first()
 
-    return created
+
+def _as_stored(parent, instance):
+    if instance._state.adding and instance.original_start:
+        return materialize_occurrence(parent, instance.original_start)
+    return instance
 
 
 def _compute_dates(parent, start_date, end_date):
@@ -84,6 +280,7 @@ def _compute_dates(parent, start_date, end_date):
     dates = []
     config = parent.recurrence_config or {}
     current = start_date
+    first = timezone.localtime(parent.start_datetime)
 
     if parent.recurrence_pattern == Appointment.RecurrencePattern.DAILY:
         while current <= end_date:
@@ -94,14 +291,14 @@ def _compute_dates(parent, start_date, end_date):
         days_of_week = config.get("days_of_week")
         if not days_of_week:
             # Default to same weekday as parent
-            days_of_week = [parent.start_datetime.weekday()]
+            days_of_week = [first.weekday()]
         while current <= end_date:
             if current.weekday() in days_of_week:
                 dates.append(current)
             current += datetime.timedelta(days=1)
 
     elif parent.recurrence_pattern == Appointment.RecurrencePattern.MONTHLY:
-        day_of_month = config.get("day_of_month", parent.start_datetime.day)
+        day_of_month = config.get("day_of_month", first.day)
         month = current.month
         year = current.year
         while True:
@@ -130,18 +327,54 @@ def _compute_reminder(parent, new_start):
     return new_start - offset
 
 
+def materialize_due_reminders(now=None):
+    """
+    Store the generated occurrences whose reminder is due, so that the
+    reminder task can notify about them like any other appointment.
+    Returns the instances created.
+    """
+    now = now or timezone.now()
+    heads = Appointment.objects.filter(
+        parent_appointment__isnull=True,
+        recurrence_pattern__in=SERIES_PATTERNS,
+        reminder_at__isnull=False,
+    ).filter(
+        Q(recurrence_end_date__isnull=True)
+        | Q(recurrence_end_date__gte=timezone.localdate(now))
+    )
+    created = []
+    for head in heads:
+        lead = head.start_datetime - head.reminder_at
+        if lead <= datetime.timedelta(0):
+            continue
+        for original_start in occurrence_starts(head, now, now + lead):
+            if original_start <= now or _materialized(
+                head, timezone.localtime(original_start).date()
+            ):
+                continue
+            instance = materialize_occurrence(head, original_start)
+            if instance:
+                created.append(instance)
+    return created
+
+
 def update_recurring_series(parent, update_type, update_data, from_instance=None):
     """
     Update a recurring series.
 
     update_type: "this_only", "this_and_future", "all"
     update_data: dict of fields to update
-    from_instance: the specific instance being edited (for this_and_future)
+    from_instance: the specific occurrence being edited, stored or generated
+    (for "this_only" and "this_and_future")
     """
+    if from_instance is not None:
+        from_instance = _as_stored(parent, from_instance)
+        if from_instance is None:
+            return []
+
     if update_type == "this_only" and from_instance:
         for key, value in update_data.items():
             setattr(from_instance, key, value)
-        # Detach from series if time changed
         from_instance.save()
         return [from_instance]
 
@@ -154,26 +387,64 @@ def update_recurring_series(parent, update_type, update_data, from_instance=None
         return list(qs) + [parent]
 
     if update_type == "this_and_future" and from_instance:
-        qs = parent.recurring_instances.filter(
-            start_datetime__gte=from_instance.start_datetime
+        if from_instance.pk == parent.pk:
+            return update_recurring_series(parent, "all", update_data)
+        # The occurrence becomes the head of a new series that takes over
+        # the later occurrences
+        split_start = from_instance.original_start or from_instance.start_datetime
+        split_day = timezone.localtime(split_start).date()
+        config = dict(parent.recurrence_config or {})
+        excluded = sorted(_excluded_dates(parent))
+        config["excluded_dates"] = [day for day in excluded if day > str(split_day)]
+        future_ids = list(
+            parent.recurring_instances.filter(original_start__gt=split_start)
+            .exclude(pk=from_instance.pk)
+            .values_list("pk", flat=True)
         )
+
         for key, value in update_data.items():
             setattr(from_instance, key, value)
+        from_instance.parent_appointment = None
+        from_instance.original_start = None
+        from_instance.recurrence_pattern = parent.recurrence_pattern
+        from_instance.recurrence_end_date = parent.recurrence_end_date
+        from_instance.recurrence_config = config
         from_instance.save()
-        qs.exclude(pk=from_instance.pk).update(**update_data)
-        return list(qs)
+        Appointment.objects.filter(pk__in=future_ids).update(
+            parent_appointment=from_instance, **update_data
+        )
+
+        parent.recurrence_end_date = split_day - datetime.timedelta(days=1)
+        parent.recurrence_config = {
+            **(parent.recurrence_config or {}),
+            "excluded_dates": [day for day in excluded if day < str(split_day)],
+        }
+        parent.save(update_fields=["recurrence_end_date", "recurrence_config"])
+        return [from_instance, *Appointment.objects.filter(pk__in=future_ids)]
 
     return []
 
 
 def delete_recurring_series(parent, delete_type, from_instance=None):
     """
-    Delete recurring instances.
+    Delete recurring occurrences.
 
     delete_type: "this_only", "this_and_future", "all"
     """
     if delete_type == "this_only" and from_instance:
-        from_instance.delete()
+        if from_instance.pk == parent.pk:
+            parent.delete()
+            return
+        # Keep the series from generating the occurrence again
+        day = timezone.localtime(
+            from_instance.original_start or from_instance.start_datetime
+        ).date()
+        config = dict(parent.recurrence_config or {})
+        config["excluded_dates"] = sorted(_excluded_dates(parent) | {day.isoformat()})
+        parent.recurrence_config = config
+        parent.save(update_fields=["recurrence_config"])
+        if not from_instance._state.adding:
+            from_instance.delete()
         return
 
     if delete_type == "all":
@@ -182,11 +453,10 @@ def delete_recurring_series(parent, delete_type, from_instance=None):
         return
 
     if delete_type == "this_and_future" and from_instance:
-        parent.recurring_instances.filter(
-            start_datetime__gte=from_instance.start_datetime
-        ).delete()
-        # Update parent's recurrence end to just before this instance
-        parent.recurrence_end_date = (
-            from_instance.start_datetime.date() - datetime.timedelta(days=1)
-        )
+        split_start = from_instance.original_start or from_instance.start_datetime
+        parent.recurring_instances.filter(original_start__gte=split_start).delete()
+        # Update parent's recurrence end to just before this occurrence
+        parent.recurrence_end_date = timezone.localtime(
+            split_start
+        ).date() - datetime.timedelta(days=1)
         parent.save(update_fields=["recurrence_end_date"])
@@ -126,18 +126,10 @@ class AppointmentCreateUpdateSerializer(serializers.ModelSerializer):
         )
         end = data.get("end_datetime", getattr(self.instance, "end_datetime", None))
         if assigned_to and start and end:
-            from apps.appointments.models import Appointment
-
-            overlapping = Appointment.objects.filter(
-                assigned_to=assigned_to,
-                start_datetime__lt=end,
-                end_datetime__gt=start,
-            ).exclude(
-                status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
-            )
-            if self.instance:
-                overlapping = overlapping.exclude(pk=self.instance.pk)
-            if overlapping.exists():
+            from apps.appointments.recurrence import has_conflict
+
+            exclude = self.instance.pk if self.instance else None
+            if has_conflict(assigned_to, start, end, exclude=exclude):
                 raise serializers.ValidationError(
                     {
                         "assigned_to": "This staff member has a conflicting appointment during this time slot."
@@ -169,6 +161,7 @@ class AppointmentCalendarSerializer(serializers.ModelSerializer):
     contact_name = serializers.SerializerMethodField()
     assigned_to_name = serializers.SerializerMethodField()
     color = serializers.SerializerMethodField()
+    is_virtual = serializers.SerializerMethodField()
 
     class Meta:
         model = Appointment
@@ -184,6 +177,8 @@ class AppointmentCalendarSerializer(serializers.ModelSerializer):
             "color",
             "parent_appointment",
             "recurrence_pattern",
+            "original_start",
+            "is_virtual",
         ]
         read_only_fields = fields
 
@@ -203,6 +198,10 @@ class AppointmentCalendarSerializer(serializers.ModelSerializer):
             return obj.color
         return STATUS_COLOR_MAP.get(obj.status, "#3b82f6")
 
+    def get_is_virtual(self, obj):
+        # Generated from the series; materialize it before editing
+        return obj._state.adding
+
 
 class AppointmentQuickCreateSerializer(serializers.ModelSerializer):
     """Minimal fields for quick calendar creation."""
@@ -230,16 +229,9 @@ class AppointmentQuickCreateSerializer(serializers.ModelSerializer):
         # Double-booking prevention
         assigned_to = data.get("assigned_to")
         if assigned_to and start and end:
-            from apps.appointments.models import Appointment
-
-            overlapping = Appointment.objects.filter(
-                assigned_to=assigned_to,
-                start_datetime__lt=end,
-                end_datetime__gt=start,
-            ).exclude(
-                status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
-            )
-            if overlapping.exists():
+            from apps.appointments.recurrence import has_conflict
+
+            if has_conflict(assigned_to, start, end):
                 raise serializers.ValidationError(
                     {
                         "assigned_to": "This staff member has a conflicting appointment during this time slot."
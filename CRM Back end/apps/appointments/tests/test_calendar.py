@@ -1,9 +1,11 @@
 import datetime
+import uuid
 
 import pytest
 from django.core.cache import cache
 from django.utils import timezone
 
+from apps.appointments.models import Appointment
 from tests.factories import AppointmentFactory, ContactFactory
 
 
@@ -118,6 +120,96 @@ class TestCalendarEndpoint:
         ), f"Expected appointments but got empty response. Appointment: {appt.id}, start: {appt.start_datetime}, range: {start_date} to {end_date}"
         assert resp.data[0]["color"] == "#10b981"  # confirmed = green
 
+    def test_recurring_series_expanded_for_far_future(self, authenticated_client):
+        start = timezone.make_aware(datetime.datetime(2026, 1, 5, 10, 0))
+        head = AppointmentFactory(
+            recurrence_pattern="weekly",
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
+        )
+
+        resp = authenticated_client.get(
+            self.URL, {"start_date": "2029-12-30", "end_date": "2030-01-12"}
+        )
+
+        assert resp.status_code == 200
+        assert [a["start_datetime"][:16] for a in resp.data] == [
+            "2029-12-31T10:00",
+            "2030-01-07T10:00",
+        ]
+        assert all(a["is_virtual"] for a in resp.data)
+        assert {a["parent_appointment"] for a in resp.data} == {head.pk}
+
+    def test_virtual_occurrence_id_resolves(self, authenticated_client):
+        start = timezone.make_aware(datetime.datetime(2026, 1, 5, 10, 0))
+        head = AppointmentFactory(
+            recurrence_pattern="weekly",
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
+        )
+        calendar = authenticated_client.get(
+            self.URL, {"start_date": "2026-01-12", "end_date": "2026-01-12"}
+        )
+        (occurrence,) = calendar.data
+        url = f"/api/v1/appointments/{occurrence['id']}/"
+
+        detail = authenticated_client.get(url)
+        assert detail.status_code == 200
+        assert detail.data["id"] == occurrence["id"]
+        # Reading an occurrence doesn't store it
+        assert not Appointment.objects.filter(pk=occurrence["id"]).exists()
+
+        edited = authenticated_client.patch(url, {"title": "Moved"}, format="json")
+        assert edited.status_code == 200
+        stored = Appointment.objects.get(pk=occurrence["id"])
+        assert stored.parent_appointment == head
+        assert stored.title == "Moved"
+        assert stored.original_start == start + datetime.timedelta(days=7)
+
+    def test_deleted_virtual_occurrence_stays_deleted(self, admin_client):
+        start = timezone.make_aware(datetime.datetime(2026, 1, 5, 10, 0))
+        head = AppointmentFactory(
+            recurrence_pattern="weekly",
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
+        )
+        params = {"start_date": "2026-01-12", "end_date": "2026-01-12"}
+        (occurrence,) = admin_client.get(self.URL, params).data
+
+        resp = admin_client.delete(f"/api/v1/appointments/{occurrence['id']}/")
+
+        assert resp.status_code == 204
+        assert admin_client.get(self.URL, params).data == []
+        assert not head.recurring_instances.exists()
+
+    def test_unknown_id_is_not_found(self, authenticated_client):
+        resp = authenticated_client.get(f"/api/v1/appointments/{uuid.uuid4()}/")
+
+        assert resp.status_code == 404
+
+    def test_materialize_occurrence(self, authenticated_client):
+        start = timezone.make_aware(datetime.datetime(2026, 1, 5, 10, 0))
+        head = AppointmentFactory(
+            recurrence_pattern="daily",
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
+        )
+        url = f"/api/v1/appointments/{head.pk}/materialize/"
+        occurrence = start + datetime.timedelta(days=3)
+
+        resp = authenticated_client.post(
+            url, {"original_start": occurrence.isoformat()}, format="json"
+        )
+        invalid = authenticated_client.post(
+            url,
+            {"original_start": (occurrence + datetime.timedelta(hours=2)).isoformat()},
+            format="json",
+        )
+
+        assert resp.status_code == 200
+        assert Appointment.objects.get(pk=resp.data["id"]).original_start == occurrence
+        assert invalid.status_code == 400
+
 
 @pytest.mark.django_db
 class TestQuickCreate:
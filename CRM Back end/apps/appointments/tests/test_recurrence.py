@@ -1,127 +1,136 @@
 import datetime
 
 import pytest
-from django.core.cache import cache
 from django.utils import timezone
 
 from apps.appointments.models import Appointment
 from apps.appointments.recurrence import (
     delete_recurring_series,
-    generate_recurring_appointments,
+    expand,
+    materialize_occurrence,
     update_recurring_series,
 )
 from tests.factories import AppointmentFactory, ContactFactory
 
+# A Monday
+MONDAY = datetime.date(2031, 3, 3)
+
+
+def _at(day, hour=10):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+
+def _series(pattern, first=MONDAY, **kwargs):
+    return AppointmentFactory(
+        contact=ContactFactory(),
+        recurrence_pattern=pattern,
+        start_datetime=_at(first),
+        end_datetime=_at(first, 11),
+        **kwargs,
+    )
+
+
+def _window(head, first, days):
+    return expand(
+        Appointment.objects.filter(pk=head.pk),
+        _at(first, 0),
+        _at(first + datetime.timedelta(days=days), 0),
+    )
+
+
+def _days(appointments):
+    return [timezone.localtime(a.start_datetime).date() for a in appointments]
+
 
 @pytest.mark.django_db
-class TestGenerateRecurring:
-    """Tests for generate_recurring_appointments()."""
-
-    @pytest.fixture(autouse=True)
-    def clear_cache(self):
-        """Clear cache before each test."""
-        cache.clear()
-        yield
-        cache.clear()
-
-    def test_daily_generates_instances(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            recurrence_end_date=None,
-            start_datetime=now - datetime.timedelta(days=1),
-            end_datetime=now - datetime.timedelta(days=1) + datetime.timedelta(hours=1),
-        )
+class TestExpand:
+    """Tests for expand()."""
+
+    def test_daily_occurrences_are_generated(self):
+        head = _series("daily")
 
-        instances = generate_recurring_appointments(parent, days_ahead=7)
-        # Should create instances for the next 7 days (skipping parent's date)
-        assert len(instances) > 0
-        for inst in instances:
-            assert inst.parent_appointment == parent
-            assert inst.recurrence_pattern == "none"
+        occurrences = _window(head, MONDAY, 5)
+
+        assert _days(occurrences) == [
+            MONDAY + datetime.timedelta(days=offset) for offset in range(5)
+        ]
+        assert occurrences[0] == head
+        for occurrence in occurrences[1:]:
+            assert occurrence._state.adding
+            assert occurrence.parent_appointment == head
+            assert occurrence.recurrence_pattern == "none"
+            assert timezone.localtime(occurrence.start_datetime).hour == 10
+        assert not Appointment.objects.exclude(pk=head.pk).exists()
 
     def test_weekly_generates_correct_days(self):
-        contact = ContactFactory()
-        # Start on a known Monday
-        monday = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
-        while monday.weekday() != 0:
-            monday -= datetime.timedelta(days=1)
-
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="weekly",
-            recurrence_config={"days_of_week": [0, 2, 4]},  # Mon, Wed, Fri
-            start_datetime=monday - datetime.timedelta(weeks=1),
-            end_datetime=monday
-            - datetime.timedelta(weeks=1)
-            + datetime.timedelta(hours=1),
-        )
+        head = _series("weekly", recurrence_config={"days_of_week": [0, 2, 4]})
+
+        occurrences = _window(head, MONDAY + datetime.timedelta(days=7), 7)
 
-        instances = generate_recurring_appointments(parent, days_ahead=14)
-        assert len(instances) > 0
-        for inst in instances:
-            assert inst.start_datetime.weekday() in [0, 2, 4]
+        assert [day.weekday() for day in _days(occurrences)] == [0, 2, 4]
 
     def test_monthly_generates_instances(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="monthly",
-            recurrence_config={"day_of_month": 15},
-            start_datetime=now.replace(day=15) - datetime.timedelta(days=60),
-            end_datetime=now.replace(day=15)
-            - datetime.timedelta(days=60)
-            + datetime.timedelta(hours=1),
-        )
+        head = _series("monthly", recurrence_config={"day_of_month": 15})
+
+        occurrences = _window(head, datetime.date(2031, 4, 1), 91)
 
-        instances = generate_recurring_appointments(parent, days_ahead=60)
-        assert len(instances) > 0
-        for inst in instances:
-            assert inst.start_datetime.day == 15
+        assert [day.day for day in _days(occurrences)] == [15, 15, 15]
 
     def test_respects_end_date(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            recurrence_end_date=(now + datetime.timedelta(days=3)).date(),
-            start_datetime=now - datetime.timedelta(days=1),
-            end_datetime=now - datetime.timedelta(days=1) + datetime.timedelta(hours=1),
-        )
+        head = _series("daily", recurrence_end_date=MONDAY + datetime.timedelta(days=3))
+
+        assert _days(_window(head, MONDAY, 30))[-1] == head.recurrence_end_date
+
+    def test_none_pattern_has_no_occurrences(self):
+        appointment = _series("none")
+
+        assert _window(appointment, MONDAY, 30) == [appointment]
+
+    def test_far_future_window_uses_indexed_queries(self, django_assert_num_queries):
+        head = _series("weekly")
+        far = MONDAY + datetime.timedelta(weeks=200)
+
+        with django_assert_num_queries(2):
+            occurrences = _window(head, far, 7)
 
-        instances = generate_recurring_appointments(parent, days_ahead=30)
-        for inst in instances:
-            assert inst.start_datetime.date() <= parent.recurrence_end_date
-
-    def test_no_duplicates(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        # Start the parent further in the past to avoid date boundary issues
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            start_datetime=now - datetime.timedelta(days=7),
-            end_datetime=now - datetime.timedelta(days=7) + datetime.timedelta(hours=1),
+        assert _days(occurrences) == [far]
+
+    def test_materialized_and_excluded_occurrences_replace_generated(self):
+        head = _series("daily")
+        tuesday = MONDAY + datetime.timedelta(days=1)
+        moved = materialize_occurrence(head, _at(tuesday))
+        moved.start_datetime = _at(tuesday + datetime.timedelta(days=10))
+        moved.end_datetime = moved.start_datetime + datetime.timedelta(hours=1)
+        moved.save()
+        delete_recurring_series(
+            head, "this_only", from_instance=_window(head, MONDAY, 3)[1]
         )
 
-        # First call creates instances
-        first_instances = generate_recurring_appointments(parent, days_ahead=5)
-        # Second call with same range should create no new instances
-        instances2 = generate_recurring_appointments(parent, days_ahead=5)
-        # Second call should create no new instances since all dates already exist
-        assert (
-            len(instances2) == 0
-        ), f"Expected 0 new instances, got {len(instances2)}. First call created {len(first_instances)} instances."
+        assert _days(_window(head, MONDAY, 4)) == [
+            MONDAY,
+            MONDAY + datetime.timedelta(days=3),
+        ]
+
+
+@pytest.mark.django_db
+class TestMaterializeOccurrence:
+    """Tests for materialize_occurrence()."""
+
+    def test_keeps_the_occurrence_id(self):
+        head = _series("daily")
+        occurrence = _window(head, MONDAY + datetime.timedelta(days=2), 1)[0]
+
+        stored = materialize_occurrence(head, occurrence.start_datetime)
 
-    def test_none_pattern_no_instances(self):
-        contact = ContactFactory()
-        parent = AppointmentFactory(contact=contact, recurrence_pattern="none")
-        instances = generate_recurring_appointments(parent)
-        assert instances == []
+        assert stored.pk == occurrence.pk
+        assert stored.original_start == occurrence.start_datetime
+        assert materialize_occurrence(head, occurrence.start_datetime) == stored
+
+    def test_rejects_times_outside_the_series(self):
+        head = _series("daily")
+
+        tuesday = MONDAY + datetime.timedelta(days=1)
+        assert materialize_occurrence(head, _at(tuesday, 12)) is None
 
 
 @pytest.mark.django_db
@@ -129,41 +138,40 @@ class TestUpdateRecurringSeries:
     """Tests for update_recurring_series()."""
 
     def test_this_only_updates_single(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            title="Parent",
-            start_datetime=now,
-            end_datetime=now + datetime.timedelta(hours=1),
-        )
-        instances = generate_recurring_appointments(parent, days_ahead=5)
-        instance = instances[0]
+        head = _series("daily", title="Parent")
+        occurrence = _window(head, MONDAY + datetime.timedelta(days=1), 1)[0]
 
         update_recurring_series(
-            parent, "this_only", {"title": "Updated"}, from_instance=instance
+            head, "this_only", {"title": "Updated"}, from_instance=occurrence
         )
-        instance.refresh_from_db()
-        assert instance.title == "Updated"
-        parent.refresh_from_db()
-        assert parent.title == "Parent"
+
+        stored = Appointment.objects.get(parent_appointment=head)
+        assert stored.title == "Updated"
+        head.refresh_from_db()
+        assert head.title == "Parent"
 
     def test_all_updates_series(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            title="Original",
-            start_datetime=now,
-            end_datetime=now + datetime.timedelta(hours=1),
+        head = _series("daily", title="Original")
+
+        update_recurring_series(head, "all", {"title": "All Updated"})
+
+        assert {a.title for a in _window(head, MONDAY, 5)} == {"All Updated"}
+
+    def test_this_and_future_splits_series(self):
+        head = _series("daily", title="Original")
+        thursday = MONDAY + datetime.timedelta(days=3)
+        occurrence = _window(head, thursday, 1)[0]
+
+        update_recurring_series(
+            head, "this_and_future", {"title": "Later"}, from_instance=occurrence
         )
-        generate_recurring_appointments(parent, days_ahead=5)
 
-        update_recurring_series(parent, "all", {"title": "All Updated"})
-        parent.refresh_from_db()
-        assert parent.title == "All Updated"
+        appointments = expand(
+            Appointment.objects.all(),
+            _at(MONDAY, 0),
+            _at(MONDAY + datetime.timedelta(days=6), 0),
+        )
+        assert [a.title for a in appointments] == ["Original"] * 3 + ["Later"] * 3
 
 
 @pytest.mark.django_db
@@ -171,31 +179,31 @@ class TestDeleteRecurringSeries:
     """Tests for delete_recurring_series()."""
 
     def test_this_only_deletes_single(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            start_datetime=now,
-            end_datetime=now + datetime.timedelta(hours=1),
+        head = _series("daily")
+        occurrence = _window(head, MONDAY + datetime.timedelta(days=1), 1)[0]
+
+        delete_recurring_series(head, "this_only", from_instance=occurrence)
+
+        assert _days(_window(head, MONDAY, 3)) == [
+            MONDAY,
+            MONDAY + datetime.timedelta(days=2),
+        ]
+
+    def test_this_and_future_ends_series(self):
+        head = _series("daily")
+        occurrence = materialize_occurrence(
+            head, _at(MONDAY + datetime.timedelta(days=3))
         )
-        instances = generate_recurring_appointments(parent, days_ahead=5)
-        count_before = Appointment.objects.filter(parent_appointment=parent).count()
 
-        delete_recurring_series(parent, "this_only", from_instance=instances[0])
-        count_after = Appointment.objects.filter(parent_appointment=parent).count()
-        assert count_after == count_before - 1
+        delete_recurring_series(head, "this_and_future", from_instance=occurrence)
+
+        assert len(_window(head, MONDAY, 10)) == 3
+        assert not Appointment.objects.filter(parent_appointment=head).exists()
 
     def test_all_deletes_everything(self):
-        contact = ContactFactory()
-        now = timezone.now()
-        parent = AppointmentFactory(
-            contact=contact,
-            recurrence_pattern="daily",
-            start_datetime=now,
-            end_datetime=now + datetime.timedelta(hours=1),
-        )
-        generate_recurring_appointments(parent, days_ahead=5)
+        head = _series("daily")
+        materialize_occurrence(head, _at(MONDAY + datetime.timedelta(days=1)))
+
+        delete_recurring_series(head, "all")
 
-        delete_recurring_series(parent, "all")
-        assert not Appointment.objects.filter(pk=parent.pk).exists()
+        assert not Appointment.objects.exists()
@@ -3,10 +3,8 @@ import datetime
 import pytest
 from django.utils import timezone
 
-from apps.appointments.tasks import (
-    generate_recurring_instances,
-    process_appointment_reminders,
-)
+from apps.appointments.models import Appointment
+from apps.appointments.tasks import process_appointment_reminders
 from apps.notifications.models import Notification
 from tests.factories import AppointmentFactory, ContactFactory, UserFactory
 
@@ -91,36 +89,39 @@ class TestProcessAppointmentReminders:
 
 
 @pytest.mark.django_db
-class TestGenerateRecurringInstances:
-    """Tests for the daily recurring generation task."""
+class TestRecurringReminders:
+    """Reminders for occurrences generated from a recurring series."""
 
-    def test_generates_instances_for_recurring_parents(self):
-        contact = ContactFactory()
+    def test_due_occurrence_is_stored_and_notified(self):
+        user = UserFactory()
         now = timezone.now()
+        start = now - datetime.timedelta(days=2, minutes=-30)
 
-        AppointmentFactory(
-            contact=contact,
+        head = AppointmentFactory(
+            assigned_to=user,
             recurrence_pattern="daily",
-            start_datetime=now - datetime.timedelta(days=1),
-            end_datetime=now - datetime.timedelta(days=1) + datetime.timedelta(hours=1),
+            reminder_at=start - datetime.timedelta(hours=1),
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
         )
 
-        count = generate_recurring_instances()
-        assert count > 0
+        assert process_appointment_reminders() == 1
+        occurrence = Appointment.objects.get(parent_appointment=head)
+        assert occurrence.start_datetime > now
+        assert Notification.objects.filter(related_object_id=occurrence.pk).exists()
+        assert process_appointment_reminders() == 0
 
     def test_skips_expired_recurrence(self):
-        contact = ContactFactory()
         now = timezone.now()
+        start = now - datetime.timedelta(days=10, minutes=-30)
 
         AppointmentFactory(
-            contact=contact,
             recurrence_pattern="daily",
             recurrence_end_date=(now - datetime.timedelta(days=5)).date(),
-            start_datetime=now - datetime.timedelta(days=10),
-            end_datetime=now
-            - datetime.timedelta(days=10)
-            + datetime.timedelta(hours=1),
+            reminder_at=start - datetime.timedelta(hours=1),
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=1),
         )
 
-        count = generate_recurring_instances()
-        assert count == 0
+        assert process_appointment_reminders() == 0
+        assert Appointment.objects.count() == 1
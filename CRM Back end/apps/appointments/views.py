@@ -1,3 +1,8 @@
+from datetime import date, datetime, time, timedelta
+
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -5,6 +10,13 @@ from rest_framework.response import Response
 
 from apps.appointments.filters import AppointmentFilter
 from apps.appointments.models import Appointment, AppointmentPage
+from apps.appointments.recurrence import (
+    delete_recurring_series,
+    expand,
+    materialize_occurrence,
+    remember_occurrences,
+    resolve_occurrence,
+)
 from apps.appointments.serializers import (
     AppointmentCalendarSerializer,
     AppointmentCreateUpdateSerializer,
@@ -18,6 +30,10 @@ from apps.appointments.serializers import (
 from apps.users.permissions import ModulePermission
 
 
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 class AppointmentViewSet(viewsets.ModelViewSet):
     """CRUD for appointments."""
 
@@ -44,9 +60,35 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return AppointmentQuickCreateSerializer
         return AppointmentDetailSerializer
 
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action not in ("retrieve", "update", "partial_update", "destroy"):
+                raise
+        # A generated occurrence from the calendar, stored only to change it
+        instance = resolve_occurrence(
+            self.get_queryset(),
+            self.kwargs["pk"],
+            materialize=self.action != "retrieve",
+        )
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        if instance.parent_appointment_id and instance.original_start:
+            # Keep the series from generating the occurrence again
+            delete_recurring_series(
+                instance.parent_appointment, "this_only", from_instance=instance
+            )
+        else:
+            instance.delete()
+
     @action(detail=False, methods=["get"], url_path="calendar")
     def calendar(self, request):
         """
@@ -66,10 +108,18 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = self.get_queryset().filter(
-            start_datetime__date__lte=end_date,
-            end_datetime__date__gte=start_date,
-        )
+        try:
+            window_start = _local_midnight(date.fromisoformat(start_date))
+            window_end = _local_midnight(
+                date.fromisoformat(end_date) + timedelta(days=1)
+            )
+        except ValueError:
+            return Response(
+                {"detail": "start_date and end_date must be ISO dates."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        qs = self.get_queryset()
 
         # Filter by assigned_to (comma-separated UUIDs)
         assigned_to = request.query_params.get("assigned_to")
@@ -77,10 +127,37 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             user_ids = [uid.strip() for uid in assigned_to.split(",") if uid.strip()]
             qs = qs.filter(assigned_to__id__in=user_ids)
 
-        qs = qs.order_by("start_datetime")
-        serializer = AppointmentCalendarSerializer(qs, many=True)
+        appointments = expand(qs, window_start, window_end)
+        remember_occurrences(appointments)
+        serializer = AppointmentCalendarSerializer(appointments, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["post"], url_path="materialize")
+    def materialize(self, request, pk=None):
+        """
+        Store a generated occurrence of this series so it can be edited or
+        cancelled on its own.
+
+        Body: ``original_start`` — the occurrence start from the calendar.
+        """
+        head = self.get_object()
+        original_start = parse_datetime(str(request.data.get("original_start", "")))
+        if original_start is None:
+            return Response(
+                {"detail": "original_start must be an ISO datetime."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(original_start):
+            original_start = timezone.make_aware(original_start)
+
+        instance = materialize_occurrence(head, original_start)
+        if instance is None:
+            return Response(
+                {"detail": "This series has no occurrence at original_start."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(AppointmentDetailSerializer(instance).data)
+
     @action(detail=False, methods=["post"], url_path="quick-create")
     def quick_create(self, request):
         """Create an appointment with minimal fields."""
@@ -120,3 +197,12 @@ class AppointmentPageViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        if instance.parent_appointment_id and instance.original_start:
+            # Keep the series from generating the occurrence again
+            delete_recurring_series(
+                instance.parent_appointment, "this_only", from_instance=instance
+            )
+        else:
+            instance.delete()
@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from apps.audit.models import (
     AuditLog,
+    AuditLogArchive,
     EncryptedFieldAccessLog,
     LoginHistory,
     SettingsLog,
@@ -43,6 +44,28 @@ class AuditLogAdmin(ReadOnlyAuditAdmin):
     ]
 
 
+@admin.register(AuditLogArchive)
+class AuditLogArchiveAdmin(ReadOnlyAuditAdmin):
+    list_display = ["timestamp", "user", "action", "module", "object_repr"]
+    list_filter = ["action", "module"]
+    search_fields = ["object_repr", "module", "object_id"]
+    raw_id_fields = ["user"]
+    readonly_fields = [
+        "id",
+        "user",
+        "action",
+        "module",
+        "object_id",
+        "object_repr",
+        "changes",
+        "ip_address",
+        "user_agent",
+        "request_path",
+        "timestamp",
+        "archived_at",
+    ]
+
+
 @admin.register(LoginHistory)
 class LoginHistoryAdmin(ReadOnlyAuditAdmin):
     list_display = ["timestamp", "email_attempted", "status", "ip_address", "user"]
@@ -1,3 +1,4 @@
+from apps.audit.recorder import write_entries
 from apps.core.utils import set_current_request
 
 
@@ -5,13 +6,20 @@ class AuditMiddleware:
     """
     Stores the current request in thread-local storage so that audit
     signals can access request metadata (IP, user-agent, etc.).
+
+    Audit entries for changes saved outside a transaction are collected
+    on the request and written in one batch when the response is ready.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
+        request._audit_entries = []
         set_current_request(request)
-        response = self.get_response(request)
-        set_current_request(None)
-        return response
+        try:
+            return self.get_response(request)
+        finally:
+            set_current_request(None)
+            entries, request._audit_entries = request._audit_entries, None
+            write_entries(entries)
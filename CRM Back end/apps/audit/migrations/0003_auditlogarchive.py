@@ -0,0 +1,104 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "audit",
+            "0002_rename_audit_auditl_module_idx_crm_audit_l_module_65785d_idx_and_more",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditLogArchive",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                            ("view", "View"),
+                        ],
+                        max_length=10,
+                        verbose_name="action",
+                    ),
+                ),
+                ("module", models.CharField(max_length=50, verbose_name="module")),
+                (
+                    "object_id",
+                    models.CharField(max_length=50, verbose_name="object ID"),
+                ),
+                (
+                    "object_repr",
+                    models.CharField(
+                        max_length=255, verbose_name="object representation"
+                    ),
+                ),
+                (
+                    "changes",
+                    models.JSONField(blank=True, default=dict, verbose_name="changes"),
+                ),
+                (
+                    "ip_address",
+                    models.GenericIPAddressField(
+                        blank=True, null=True, verbose_name="IP address"
+                    ),
+                ),
+                (
+                    "user_agent",
+                    models.TextField(blank=True, default="", verbose_name="user agent"),
+                ),
+                (
+                    "request_path",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=500,
+                        verbose_name="request path",
+                    ),
+                ),
+                (
+                    "timestamp",
+                    models.DateTimeField(db_index=True, verbose_name="timestamp"),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="archived at"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "archived audit log",
+                "verbose_name_plural": "archived audit logs",
+                "db_table": "crm_audit_logs_archive",
+                "ordering": ["-timestamp"],
+                "indexes": [
+                    models.Index(
+                        fields=["module", "object_id"],
+                        name="crm_audit_l_module_5c3935_idx",
+                    )
+                ],
+            },
+        ),
+    ]
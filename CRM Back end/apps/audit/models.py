@@ -56,6 +56,49 @@ class AuditLog(models.Model):
         return f"[{self.action}] {self.module}/{self.object_id} by {self.user}"
 
 
+class AuditLogArchive(models.Model):
+    """
+    Audit entries older than ``AUDIT_LOG_RETENTION_DAYS``, moved out of
+    ``crm_audit_logs`` by ``archive_audit_logs`` so the live table stays small.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("user"),
+    )
+    action = models.CharField(
+        _("action"), max_length=10, choices=AuditLog.Action.choices
+    )
+    module = models.CharField(_("module"), max_length=50)
+    object_id = models.CharField(_("object ID"), max_length=50)
+    object_repr = models.CharField(_("object representation"), max_length=255)
+    changes = models.JSONField(_("changes"), default=dict, blank=True)
+    ip_address = models.GenericIPAddressField(_("IP address"), null=True, blank=True)
+    user_agent = models.TextField(_("user agent"), blank=True, default="")
+    request_path = models.CharField(
+        _("request path"), max_length=500, blank=True, default=""
+    )
+    timestamp = models.DateTimeField(_("timestamp"), db_index=True)
+    archived_at = models.DateTimeField(_("archived at"), auto_now_add=True)
+
+    class Meta:
+        db_table = "crm_audit_logs_archive"
+        ordering = ["-timestamp"]
+        verbose_name = _("archived audit log")
+        verbose_name_plural = _("archived audit logs")
+        indexes = [
+            models.Index(fields=["module", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"[{self.action}] {self.module}/{self.object_id} (archived)"
+
+
 # ---------------------------------------------------------------------------
 # Login History
 # ---------------------------------------------------------------------------
@@ -0,0 +1,295 @@
+"""
+Audit trail recording.
+
+Audited instances keep a snapshot of their tracked field values from the
+moment they are loaded (``post_init``).  On save the current values are
+compared with that snapshot and only changed fields are recorded, as
+``{"field": [old, new]}``; encrypted fields and passwords are recorded as
+changed without their values.  Saves that change nothing are not logged.
+
+Entries are not inserted one by one inside the audited save:
+
+- inside a transaction they are queued and written with one
+  ``bulk_create`` per savepoint from a ``transaction.on_commit`` callback,
+  so a rolled-back change leaves no entry behind;
+- outside a transaction, during a request, they are written when the
+  request finishes (see ``AuditMiddleware``);
+- otherwise (shell, Celery tasks in autocommit) they are written at once.
+
+Entries of modules listed in ``AUDIT_ASYNC_MODULES`` are handed to the
+``write_audit_entries`` Celery task instead of being inserted in-process.
+"""
+
+import copy
+import datetime
+import decimal
+import hashlib
+import json
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
+
+from apps.core.fields import BlindIndexField, EncryptedCharField, LazyDecryptedValue
+from apps.core.utils import get_client_ip_safe, get_current_request
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "[redacted]"
+
+# Bookkeeping columns that never make an entry on their own
+IGNORED_FIELDS = frozenset({"created_at", "updated_at", "last_login"})
+
+# Secrets recorded as changed, without values
+REDACTED_FIELDS = frozenset({"password"})
+
+SNAPSHOT_ATTR = "_audit_snapshot"
+
+_fields_cache = {}
+
+
+def tracked_fields(model):
+    """
+    ``(fields, mutable)`` for *model*: ``(field, redacted)`` pairs whose
+    changes are recorded, and attnames of JSON fields that can be edited
+    in place.
+    """
+    info = _fields_cache.get(model)
+    if info is None:
+        fields = tuple(
+            (
+                field,
+                isinstance(field, EncryptedCharField) or field.name in REDACTED_FIELDS,
+            )
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in IGNORED_FIELDS
+            and not isinstance(field, BlindIndexField)
+        )
+        mutable = tuple(
+            field.attname
+            for field, _redacted in fields
+            if isinstance(field, models.JSONField)
+        )
+        info = _fields_cache[model] = (fields, mutable)
+    return info
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, FieldFile):
+        return value.name or None
+    if isinstance(value, (dict, list, tuple)):
+        return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+    return str(value)
+
+
+def _file_name(value):
+    # Loaded as the stored name; a FieldFile once the attribute was read
+    if isinstance(value, FieldFile):
+        value = value.name
+    return value or None
+
+
+def _fingerprint(value):
+    """Comparable stand-in for a secret that holds no plaintext."""
+    if not value:
+        return None
+    if isinstance(value, LazyDecryptedValue):
+        # Compare ciphertexts; never decrypt for auditing
+        return "enc:" + value.token
+    return "sha256:" + hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def remember(instance):
+    """
+    Snapshot the loaded values of *instance*.
+
+    A shallow copy of ``__dict__`` keeps this cheap for list views; values
+    are only normalized when a save is diffed.  JSON values are copied so
+    in-place edits still show up as changes.
+    """
+    data = instance.__dict__
+    values = data.copy()
+    values.pop(SNAPSHOT_ATTR, None)
+    for attname in tracked_fields(type(instance))[1]:
+        if attname in values:
+            values[attname] = copy.deepcopy(values[attname])
+    data[SNAPSHOT_ATTR] = values
+
+
+def diff(instance, created):
+    """
+    Tracked changes made by a save of *instance*, as ``{field: [old, new]}``.
+
+    Returns None when an update changed no tracked field, so no entry is
+    needed.  Deferred fields are not compared.
+    """
+    current = instance.__dict__
+    fields = tracked_fields(type(instance))[0]
+    if created:
+        changes = {}
+        for field, redacted in fields:
+            value = current.get(field.attname)
+            if redacted:
+                if value:
+                    changes[field.name] = [None, REDACTED]
+            elif value not in (None, "", [], {}):
+                changes[field.name] = [None, _jsonable(value)]
+        return changes
+
+    before = current.get(SNAPSHOT_ATTR)
+    if before is None:
+        # Prior state unknown; record the update without a diff
+        return {}
+    changes = {}
+    for field, redacted in fields:
+        key = field.attname
+        if key not in current or key not in before:
+            continue
+        old, new = before[key], current[key]
+        if redacted:
+            if _fingerprint(old) != _fingerprint(new):
+                changes[field.name] = [REDACTED, REDACTED]
+            continue
+        if isinstance(field, models.FileField):
+            old, new = _file_name(old), _file_name(new)
+        else:
+            old, new = _jsonable(old), _jsonable(new)
+        if old != new:
+            changes[field.name] = [old, new]
+    return changes or None
+
+
+# ---------------------------------------------------------------------------
+# Entries
+# ---------------------------------------------------------------------------
+
+
+def _request_meta(request):
+    meta = getattr(request, "_audit_meta", None)
+    if meta is None:
+        meta = request._audit_meta = (
+            get_client_ip_safe(request),
+            request.META.get("HTTP_USER_AGENT", ""),
+            request.get_full_path()[:500],
+        )
+    return meta
+
+
+def build_entry(action, module, instance, changes=None):
+    from apps.audit.models import AuditLog
+
+    request = get_current_request()
+    user_id = None
+    ip_address, user_agent, request_path = None, "", ""
+    if request:
+        user = getattr(request, "user", None)
+        if user and user.is_authenticated:
+            user_id = user.pk
+        ip_address, user_agent, request_path = _request_meta(request)
+
+    return AuditLog(
+        user_id=user_id,
+        action=action,
+        module=module,
+        object_id=str(instance.pk),
+        object_repr=str(instance)[:255],
+        changes=changes or {},
+        ip_address=ip_address,
+        user_agent=user_agent,
+        request_path=request_path,
+    )
+
+
+class _Batch:
+    """Entries queued in one savepoint, written by its on-commit callback."""
+
+    __slots__ = ("entries", "savepoint_ids")
+
+    def __init__(self, savepoint_ids):
+        self.entries = []
+        self.savepoint_ids = savepoint_ids
+
+    def __call__(self):
+        if getattr(_pending, "batch", None) is self:
+            _pending.batch = None
+        entries, self.entries = self.entries, []
+        write_entries(entries)
+
+
+_pending = threading.local()
+
+
+def record(entry):
+    """Queue *entry* for writing (see module docstring)."""
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        batch = getattr(_pending, "batch", None)
+        savepoint_ids = tuple(connection.savepoint_ids)
+        if (
+            batch is None
+            or batch.savepoint_ids != savepoint_ids
+            or not _is_registered(connection, batch)
+        ):
+            # A batch per savepoint, so rolling one back drops its entries
+            # together with its callback
+            batch = _pending.batch = _Batch(savepoint_ids)
+            transaction.on_commit(batch)
+        batch.entries.append(entry)
+        return
+
+    request = get_current_request()
+    buffer = getattr(request, "_audit_entries", None) if request else None
+    if buffer is not None:
+        buffer.append(entry)
+        return
+    write_entries([entry])
+
+
+def _is_registered(connection, batch):
+    return any(callback[1] is batch for callback in connection.run_on_commit)
+
+
+def serialize_entry(entry):
+    return {
+        "user_id": str(entry.user_id) if entry.user_id else None,
+        "action": entry.action,
+        "module": entry.module,
+        "object_id": entry.object_id,
+        "object_repr": entry.object_repr,
+        "changes": entry.changes,
+        "ip_address": entry.ip_address,
+        "user_agent": entry.user_agent,
+        "request_path": entry.request_path,
+    }
+
+
+def write_entries(entries):
+    """Insert *entries*; those of async modules go through Celery."""
+    from apps.audit.models import AuditLog
+
+    if not entries:
+        return
+    async_modules = set(settings.AUDIT_ASYNC_MODULES)
+    deferred = [e for e in entries if e.module in async_modules]
+    inline = [e for e in entries if e.module not in async_modules]
+    try:
+        if inline:
+            AuditLog.objects.bulk_create(inline)
+        if deferred:
+            from apps.audit.tasks import write_audit_entries
+
+            write_audit_entries.delay([serialize_entry(e) for e in deferred])
+    except Exception:
+        # The audited change is already committed; never fail the caller
+        logger.exception("Failed to write %d audit entries", len(entries))
@@ -1,44 +1,26 @@
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from apps.core.utils import get_client_ip_safe, get_current_request
+from apps.audit import recorder
+from apps.core.signals import records_imported
 
 # Models to audit — maps model class to module name
 AUDITED_MODELS = {}
 
 
 def _create_audit_log(action, instance, changes=None):
-    from apps.audit.models import AuditLog
-
-    request = get_current_request()
     module = AUDITED_MODELS.get(type(instance))
     if module is None:
         return
+    recorder.record(recorder.build_entry(action, module, instance, changes))
 
-    user = None
-    ip_address = None
-    user_agent = ""
-    request_path = ""
-
-    if request:
-        user = getattr(request, "user", None)
-        if user and not user.is_authenticated:
-            user = None
-        ip_address = get_client_ip_safe(request)
-        user_agent = request.META.get("HTTP_USER_AGENT", "")
-        request_path = request.get_full_path()
-
-    AuditLog.objects.create(
-        user=user,
-        action=action,
-        module=module,
-        object_id=str(instance.pk),
-        object_repr=str(instance)[:255],
-        changes=changes or {},
-        ip_address=ip_address,
-        user_agent=user_agent,
-        request_path=request_path,
-    )
+
+@receiver(post_init)
+def audit_post_init(sender, instance, **kwargs):
+    if sender not in AUDITED_MODELS:
+        return
+
+    recorder.remember(instance)
 
 
 @receiver(post_save)
@@ -46,10 +28,22 @@ def audit_post_save(sender, instance, created, **kwargs):
     if sender not in AUDITED_MODELS:
         return
 
+    changes = recorder.diff(instance, created)
+    # Later saves of the same instance diff against what was just stored
+    recorder.remember(instance)
     if created:
-        _create_audit_log("create", instance)
-    else:
-        _create_audit_log("update", instance)
+        _create_audit_log("create", instance, changes)
+    elif changes is not None:
+        _create_audit_log("update", instance, changes)
+
+
+@receiver(records_imported)
+def audit_records_imported(sender, instances, **kwargs):
+    if sender not in AUDITED_MODELS:
+        return
+
+    for instance in instances:
+        _create_audit_log("create", instance, recorder.diff(instance, True))
 
 
 @receiver(post_delete)
@@ -0,0 +1,61 @@
+"""
+Celery tasks for the audit trail.
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rows moved per archive transaction
+ARCHIVE_BATCH_SIZE = 5000
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def write_audit_entries(self, entries):
+    """Insert audit entries queued for modules in AUDIT_ASYNC_MODULES."""
+    from apps.audit.models import AuditLog
+
+    try:
+        AuditLog.objects.bulk_create([AuditLog(**entry) for entry in entries])
+    except Exception as exc:
+        logger.exception("Failed to write %d audit entries", len(entries))
+        raise self.retry(exc=exc)
+    return len(entries)
+
+
+@shared_task
+def archive_audit_logs():
+    """
+    Move audit entries older than AUDIT_LOG_RETENTION_DAYS into
+    ``crm_audit_logs_archive``, so the indexes of the live table only
+    cover recent history.  Runs daily via Celery Beat.
+    """
+    from apps.audit.models import AuditLog, AuditLogArchive
+
+    cutoff = timezone.now() - timedelta(days=settings.AUDIT_LOG_RETENTION_DAYS)
+    fields = [f.attname for f in AuditLog._meta.concrete_fields]
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                AuditLog.objects.filter(timestamp__lt=cutoff)
+                .order_by("timestamp")
+                .values(*fields)[:ARCHIVE_BATCH_SIZE]
+            )
+            if not rows:
+                break
+            AuditLogArchive.objects.bulk_create(
+                [AuditLogArchive(**row) for row in rows], ignore_conflicts=True
+            )
+            AuditLog.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
+
+    if moved:
+        logger.info(f"Archived {moved} audit log entries older than {cutoff:%Y-%m-%d}")
+    return moved
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.audit import recorder
+from apps.audit.models import AuditLog, AuditLogArchive
+from apps.contacts.models import Contact
+from tests.factories import AuditLogFactory, ContactFactory
+
+
+def _saved_contact(capture, **kwargs):
+    """A freshly loaded contact, its create entry already written."""
+    with capture(execute=True):
+        contact = ContactFactory(**kwargs)
+    return Contact.objects.get(pk=contact.pk)
+
+
+def _entries(contact, action="update"):
+    return AuditLog.objects.filter(
+        module="contacts", object_id=str(contact.pk), action=action
+    )
+
+
+@pytest.mark.django_db
+class TestFieldDiffs:
+    def test_create_records_values(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            contact = ContactFactory(first_name="Ana")
+
+        entry = _entries(contact, "create").get()
+        assert entry.changes["first_name"] == [None, "Ana"]
+        assert "updated_at" not in entry.changes
+
+    def test_update_records_only_changed_fields(
+        self, django_capture_on_commit_callbacks
+    ):
+        contact = _saved_contact(
+            django_capture_on_commit_callbacks, first_name="Ana", last_name="Diaz"
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            contact.first_name = "Anna"
+            contact.save()
+
+        entry = _entries(contact).get()
+        assert entry.changes == {"first_name": ["Ana", "Anna"]}
+
+    def test_noop_save_writes_no_entry(self, django_capture_on_commit_callbacks):
+        contact = _saved_contact(django_capture_on_commit_callbacks)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            contact.save()
+
+        assert not _entries(contact).exists()
+
+    def test_encrypted_field_is_redacted(self, django_capture_on_commit_callbacks):
+        contact = _saved_contact(
+            django_capture_on_commit_callbacks, ssn_last_four="1234"
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            contact.ssn_last_four = "5678"
+            contact.save()
+
+        changes = _entries(contact).get().changes
+        assert changes == {"ssn_last_four": [recorder.REDACTED, recorder.REDACTED]}
+        assert "1234" not in str(changes) and "5678" not in str(changes)
+
+    def test_rolled_back_change_leaves_no_entry(
+        self, django_capture_on_commit_callbacks
+    ):
+        contact = _saved_contact(django_capture_on_commit_callbacks)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    contact.first_name = "Rolled back"
+                    contact.save()
+                    raise RuntimeError
+
+        assert not _entries(contact).exists()
+
+
+@pytest.mark.django_db
+class TestBatchedWrites:
+    def test_transaction_writes_one_batch(self, django_capture_on_commit_callbacks):
+        contacts = [
+            _saved_contact(django_capture_on_commit_callbacks) for _ in range(3)
+        ]
+
+        with mock.patch.object(
+            recorder, "write_entries", wraps=recorder.write_entries
+        ) as write:
+            with django_capture_on_commit_callbacks(execute=True) as callbacks:
+                for index, contact in enumerate(contacts):
+                    contact.first_name = f"Renamed {index}"
+                    contact.save()
+
+        batches = [cb for cb in callbacks if isinstance(cb, recorder._Batch)]
+        assert len(batches) == 1
+        write.assert_called_once()
+        assert len(write.call_args.args[0]) == 3
+        assert AuditLog.objects.filter(module="contacts", action="update").count() == 3
+
+    @override_settings(AUDIT_ASYNC_MODULES=["contacts"])
+    def test_async_modules_go_through_celery(self, django_capture_on_commit_callbacks):
+        contact = _saved_contact(django_capture_on_commit_callbacks)
+
+        with mock.patch("apps.audit.tasks.write_audit_entries.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                contact.first_name = "Queued"
+                contact.save()
+
+        (entries,) = delay.call_args.args
+        assert entries[0]["object_id"] == str(contact.pk)
+        assert entries[0]["changes"]["first_name"][1] == "Queued"
+        assert not _entries(contact).exists()
+
+
+@pytest.mark.django_db
+class TestArchive:
+    @override_settings(AUDIT_LOG_RETENTION_DAYS=30)
+    def test_moves_old_entries(self):
+        from apps.audit.tasks import archive_audit_logs
+
+        old = AuditLogFactory(changes={"status": ["new", "closed"]})
+        recent = AuditLogFactory()
+        AuditLog.objects.filter(pk=old.pk).update(
+            timestamp=timezone.now() - timedelta(days=31)
+        )
+
+        assert archive_audit_logs() == 1
+
+        assert list(AuditLog.objects.values_list("pk", flat=True)) == [recent.pk]
+        archived = AuditLogArchive.objects.get(pk=old.pk)
+        assert archived.changes == {"status": ["new", "closed"]}
+        assert archived.user_id == old.user_id
@@ -0,0 +1,88 @@
+"""
+Working-time arithmetic over ``BusinessHours`` calendars.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Longest stretch searched for working time before giving up
+MAX_SEARCH_DAYS = 366 * 2
+
+
+class BusinessCalendar:
+    """
+    The working intervals and holidays of one ``BusinessHours``, loaded once
+    so that targets can be computed without further queries.
+    """
+
+    def __init__(self, business_hours):
+        try:
+            self.zone = ZoneInfo(business_hours.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            self.zone = ZoneInfo("UTC")
+        self.intervals = defaultdict(list)
+        for day in business_hours.working_days.all():
+            if not day.is_working:
+                continue
+            for interval in day.intervals.all():
+                if interval.end_time > interval.start_time:
+                    self.intervals[day.day_of_week].append(
+                        (interval.start_time, interval.end_time)
+                    )
+        for spans in self.intervals.values():
+            spans.sort()
+        self.holidays = {holiday.date for holiday in business_hours.holidays.all()}
+
+    @classmethod
+    def load(cls, business_hours_id):
+        from apps.business_hours.models import BusinessHours
+
+        business_hours = (
+            BusinessHours.objects.prefetch_related(
+                "working_days__intervals", "holidays"
+            )
+            .filter(pk=business_hours_id)
+            .first()
+        )
+        return cls(business_hours) if business_hours else None
+
+    def _spans(self, day):
+        """UTC ``(start, end)`` working spans of the local *day*."""
+        if day in self.holidays:
+            return []
+        return [
+            (
+                datetime.combine(day, start, tzinfo=self.zone).astimezone(
+                    dt_timezone.utc
+                ),
+                datetime.combine(day, end, tzinfo=self.zone).astimezone(
+                    dt_timezone.utc
+                ),
+            )
+            for start, end in self.intervals.get(day.weekday(), [])
+        ]
+
+    def add_working_time(self, start, duration):
+        """
+        The moment *duration* of working time after *start*.  Falls back to
+        plain elapsed time if the calendar has no working hours.
+        """
+        if not self.intervals or duration <= timedelta(0):
+            return start + duration
+
+        cursor = start.astimezone(dt_timezone.utc)
+        remaining = duration
+        day = cursor.astimezone(self.zone).date()
+        for _ in range(MAX_SEARCH_DAYS):
+            for span_start, span_end in self._spans(day):
+                begin = max(span_start, cursor)
+                if begin >= span_end:
+                    continue
+                available = span_end - begin
+                if remaining <= available:
+                    return (begin + remaining).astimezone(start.tzinfo)
+                remaining -= available
+            day += timedelta(days=1)
+        return start + duration
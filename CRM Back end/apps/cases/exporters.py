@@ -0,0 +1,49 @@
+"""
+CSV / XLSX exporter for tax cases (see ``apps.core.exports``).
+"""
+
+from apps.cases.models import TaxCase
+from apps.core.exports import Column, ModelExporter, full_name
+
+
+class TaxCaseExporter(ModelExporter):
+    model = TaxCase
+    module = "cases"
+    viewset = "apps.cases.views.TaxCaseViewSet"
+    filename = "cases_export"
+    columns = (
+        Column("id"),
+        Column("case_number"),
+        Column("title"),
+        Column("case_type"),
+        Column("fiscal_year"),
+        Column("status"),
+        Column("priority"),
+        Column(
+            "contact",
+            "contact__first_name",
+            "contact__last_name",
+            formatter=full_name,
+        ),
+        Column("corporation", "corporation__name"),
+        Column(
+            "assigned_preparer",
+            "assigned_preparer__first_name",
+            "assigned_preparer__last_name",
+            formatter=full_name,
+        ),
+        Column(
+            "reviewer",
+            "reviewer__first_name",
+            "reviewer__last_name",
+            formatter=full_name,
+        ),
+        Column("estimated_fee"),
+        Column("actual_fee"),
+        Column("due_date"),
+        Column("extension_date"),
+        Column("filed_date"),
+        Column("completed_date"),
+        Column("closed_date"),
+        Column("created_at"),
+    )
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def schedule_open_statuses(apps, schema_editor):
+    # Due immediately: the first check_sla_statuses run applies any pending
+    # transition and stores each row's real next check time.
+    CaseSLAStatus = apps.get_model("cases", "CaseSLAStatus")
+    CaseSLAStatus.objects.filter(is_paused=False).filter(
+        Q(response_met_at__isnull=True, response_breached=False)
+        | Q(resolution_met_at__isnull=True, resolution_breached=False)
+    ).update(next_check_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0006_alter_taxcase_due_date_alter_taxcase_priority_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseslastatus",
+            name="next_check_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="caseslastatus",
+            index=models.Index(
+                condition=models.Q(("next_check_at__isnull", False)),
+                fields=["next_check_at"],
+                name="idx_case_sla_next_check",
+            ),
+        ),
+        migrations.RunPython(schedule_open_statuses, migrations.RunPython.noop),
+    ]
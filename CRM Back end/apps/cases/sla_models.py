@@ -7,6 +7,12 @@ from django.utils import timezone
 
 from apps.core.models import TimeStampedModel
 
+# How long before each target a case SLA becomes "at risk"
+AT_RISK_WINDOWS = {
+    "response": timedelta(hours=1),
+    "resolution": timedelta(hours=2),
+}
+
 
 class SLA(TimeStampedModel):
     """
@@ -228,13 +234,50 @@ class CaseSLAStatus(TimeStampedModel):
     time_to_response = models.DurationField(null=True, blank=True)
     time_to_resolution = models.DurationField(null=True, blank=True)
 
+    # When the next at-risk / breach transition is due; null when none is
+    # pending (paused, met or already breached).  Kept current by save().
+    next_check_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         verbose_name = "Case SLA Status"
         verbose_name_plural = "Case SLA Statuses"
+        indexes = [
+            models.Index(
+                fields=["next_check_at"],
+                condition=models.Q(next_check_at__isnull=False),
+                name="idx_case_sla_next_check",
+            ),
+        ]
 
     def __str__(self):
         return f"SLA Status for case {self.case_id}"
 
+    def save(self, *args, **kwargs):
+        self.next_check_at = self.next_transition_at()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "next_check_at"}
+        super().save(*args, **kwargs)
+
+    def next_transition_at(self):
+        """When the response or resolution status next has to change."""
+        if self.is_paused:
+            return None
+        times = []
+        for sla_type, window in AT_RISK_WINDOWS.items():
+            target = getattr(self, f"{sla_type}_target")
+            if (
+                not target
+                or getattr(self, f"{sla_type}_met_at")
+                or getattr(self, f"{sla_type}_breached")
+            ):
+                continue
+            if getattr(self, f"{sla_type}_status") == self.Status.AT_RISK:
+                times.append(target)
+            else:
+                times.append(target - window)
+        return min(times, default=None)
+
     def calculate_response_status(self):
         """Calculate current response SLA status."""
         if self.response_met_at:
@@ -249,7 +292,7 @@ class CaseSLAStatus(TimeStampedModel):
 
         if time_remaining.total_seconds() < 0:
             return self.Status.BREACHED
-        elif time_remaining.total_seconds() < 3600:  # Less than 1 hour
+        elif time_remaining < AT_RISK_WINDOWS["response"]:
             return self.Status.AT_RISK
         return self.Status.ON_TRACK
 
@@ -267,7 +310,7 @@ class CaseSLAStatus(TimeStampedModel):
 
         if time_remaining.total_seconds() < 0:
             return self.Status.BREACHED
-        elif time_remaining.total_seconds() < 7200:  # Less than 2 hours
+        elif time_remaining < AT_RISK_WINDOWS["resolution"]:
             return self.Status.AT_RISK
         return self.Status.ON_TRACK
 
@@ -3,14 +3,22 @@ SLA Management Services
 """
 
 import logging
+from collections import defaultdict
 from datetime import timedelta
 
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Due SLA statuses locked and advanced per transaction
+TIMER_BATCH_SIZE = 500
+
+# Escalations handed to one process_sla_escalations task
+ESCALATION_BATCH_SIZE = 50
+
 
 def get_sla_for_case(case):
     """
@@ -38,6 +46,35 @@ def get_sla_for_case(case):
     return SLA.objects.filter(is_active=True, is_default=True).first()
 
 
+def get_sla_calendar(sla):
+    """
+    The ``BusinessCalendar`` *sla* targets are counted in: its own business
+    hours, else the default ones; ``None`` for round-the-clock SLAs.
+    """
+    from apps.business_hours.models import BusinessHours
+    from apps.business_hours.services import BusinessCalendar
+
+    if not sla.use_business_hours:
+        return None
+    business_hours_id = sla.business_hours_id
+    if business_hours_id is None:
+        business_hours_id = (
+            BusinessHours.objects.filter(is_default=True, is_active=True)
+            .values_list("pk", flat=True)
+            .first()
+        )
+    if business_hours_id is None:
+        return None
+    return BusinessCalendar.load(business_hours_id)
+
+
+def sla_target(start, hours, calendar=None):
+    """*hours* after *start*, in working time when a *calendar* is given."""
+    if calendar is None:
+        return start + timedelta(hours=hours)
+    return calendar.add_working_time(start, timedelta(hours=hours))
+
+
 def initialize_case_sla(case):
     """
     Initialize SLA tracking for a new case.
@@ -54,9 +91,9 @@ def initialize_case_sla(case):
     response_hours = sla.get_response_time(case.priority)
     resolution_hours = sla.get_resolution_time(case.priority)
 
-    # TODO: If using business hours, calculate actual target considering non-working hours
-    response_target = now + timedelta(hours=response_hours)
-    resolution_target = now + timedelta(hours=resolution_hours)
+    calendar = get_sla_calendar(sla)
+    response_target = sla_target(now, response_hours, calendar)
+    resolution_target = sla_target(now, resolution_hours, calendar)
 
     sla_status, created = CaseSLAStatus.objects.update_or_create(
         case=case,
@@ -164,7 +201,7 @@ def record_sla_breach(case, breach_type, sla_status):
             "breach_duration": breach_duration,
             "case_priority": case.priority,
             "case_status": case.status,
-            "assigned_to": case.assigned_to,
+            "assigned_to": case.assigned_preparer,
         },
     )
 
@@ -201,17 +238,15 @@ def execute_escalation_rule(case, breach, rule):
     """
     recipients = []
 
+    assignee = case.assigned_preparer
+
     # Collect recipients
-    if rule.notify_assignee and case.assigned_to:
-        recipients.append(case.assigned_to.email)
+    if rule.notify_assignee and assignee:
+        recipients.append(assignee.email)
 
-    if (
-        rule.notify_manager
-        and case.assigned_to
-        and hasattr(case.assigned_to, "manager")
-    ):
-        if case.assigned_to.manager:
-            recipients.append(case.assigned_to.manager.email)
+    if rule.notify_manager and assignee and hasattr(assignee, "manager"):
+        if assignee.manager:
+            recipients.append(assignee.manager.email)
 
     for user in rule.notify_users.all():
         recipients.append(user.email)
@@ -237,7 +272,7 @@ def execute_escalation_rule(case, breach, rule):
         body = body.replace("{{case.priority}}", case.priority)
         body = body.replace(
             "{{case.assigned_to}}",
-            str(case.assigned_to) if case.assigned_to else "Unassigned",
+            str(assignee) if assignee else "Unassigned",
         )
         body = body.replace("{{status}}", "breached" if breach else "at risk")
         body = body.replace("{{sla_type}}", breach.breach_type if breach else "SLA")
@@ -261,9 +296,9 @@ def execute_escalation_rule(case, breach, rule):
             logger.error(f"Failed to send escalation email: {e}")
 
     # Handle reassignment
-    if rule.reassign_to and case.assigned_to != rule.reassign_to:
-        case.assigned_to = rule.reassign_to
-        case.save(update_fields=["assigned_to"])
+    if rule.reassign_to and assignee != rule.reassign_to:
+        case.assigned_preparer = rule.reassign_to
+        case.save(update_fields=["assigned_preparer"])
         logger.info(f"Reassigned case {case.id} to {rule.reassign_to}")
 
     # Handle priority change
@@ -289,20 +324,20 @@ def recalculate_sla_targets(case):
     if not sla_status.sla:
         return
 
+    calendar = get_sla_calendar(sla_status.sla)
+
     # Only recalculate if not yet met
     if not sla_status.response_met_at:
         response_hours = sla_status.sla.get_response_time(case.priority)
         sla_status.response_target = (
-            case.created_at
-            + timedelta(hours=response_hours)
+            sla_target(case.created_at, response_hours, calendar)
             + sla_status.total_paused_time
         )
 
     if not sla_status.resolution_met_at:
         resolution_hours = sla_status.sla.get_resolution_time(case.priority)
         sla_status.resolution_target = (
-            case.created_at
-            + timedelta(hours=resolution_hours)
+            sla_target(case.created_at, resolution_hours, calendar)
             + sla_status.total_paused_time
         )
 
@@ -358,7 +393,7 @@ def get_sla_metrics(start_date=None, end_date=None, assigned_to=None):
     if end_date:
         filters["created_at__lte"] = end_date
     if assigned_to:
-        filters["case__assigned_to"] = assigned_to
+        filters["case__assigned_preparer"] = assigned_to
 
     statuses = CaseSLAStatus.objects.filter(**filters)
 
@@ -400,3 +435,217 @@ def get_sla_metrics(start_date=None, end_date=None, assigned_to=None):
         "avg_response_time": str(avg_response) if avg_response else None,
         "avg_resolution_time": str(avg_resolution) if avg_resolution else None,
     }
+
+
+def _due_transitions(sla_status, now):
+    """``(sla_type, new_status)`` transitions of *sla_status* due at *now*."""
+    from .sla_models import AT_RISK_WINDOWS, CaseSLAStatus
+
+    transitions = []
+    for sla_type, window in AT_RISK_WINDOWS.items():
+        target = getattr(sla_status, f"{sla_type}_target")
+        if (
+            not target
+            or getattr(sla_status, f"{sla_type}_met_at")
+            or getattr(sla_status, f"{sla_type}_breached")
+        ):
+            continue
+        if now >= target:
+            transitions.append((sla_type, CaseSLAStatus.Status.BREACHED))
+        elif (
+            now >= target - window
+            and getattr(sla_status, f"{sla_type}_status")
+            != CaseSLAStatus.Status.AT_RISK
+        ):
+            transitions.append((sla_type, CaseSLAStatus.Status.AT_RISK))
+    return transitions
+
+
+def _create_breaches(breached, now):
+    """
+    Bulk-create the ``SLABreach`` records of *breached* ``(sla_status,
+    breach_type)`` pairs that have none yet; returns the new breaches.
+    """
+    from .sla_models import SLABreach
+
+    existing = set(
+        SLABreach.objects.filter(
+            case_id__in={sla_status.case_id for sla_status, _ in breached}
+        ).values_list("case_id", "breach_type")
+    )
+    breaches = []
+    for sla_status, breach_type in breached:
+        if (sla_status.case_id, breach_type) in existing:
+            continue
+        target = getattr(sla_status, f"{breach_type}_target")
+        breaches.append(
+            SLABreach(
+                case_id=sla_status.case_id,
+                sla_id=sla_status.sla_id,
+                breach_type=breach_type,
+                target_time=target,
+                breach_time=now,
+                breach_duration=now - target,
+                case_priority=sla_status.case.priority,
+                case_status=sla_status.case.status,
+                assigned_to_id=sla_status.case.assigned_preparer_id,
+            )
+        )
+    return SLABreach.objects.bulk_create(breaches)
+
+
+def _enqueue_escalations(breach_ids, at_risk):
+    from .sla_tasks import process_sla_escalations
+
+    for i in range(0, len(breach_ids), ESCALATION_BATCH_SIZE):
+        process_sla_escalations.delay(
+            breach_ids=breach_ids[i : i + ESCALATION_BATCH_SIZE]
+        )
+    for i in range(0, len(at_risk), ESCALATION_BATCH_SIZE):
+        process_sla_escalations.delay(at_risk=at_risk[i : i + ESCALATION_BATCH_SIZE])
+
+
+def _advance_batch(now, batch_size):
+    from .sla_models import CaseSLAStatus
+
+    with transaction.atomic():
+        batch = list(
+            CaseSLAStatus.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("case")
+            .filter(next_check_at__lte=now)
+            .order_by("next_check_at")[:batch_size]
+        )
+        updates = defaultdict(list)
+        breached, at_risk = [], []
+        for sla_status in batch:
+            for sla_type, new_status in _due_transitions(sla_status, now):
+                updates[(sla_type, new_status)].append(sla_status.pk)
+                setattr(sla_status, f"{sla_type}_status", new_status)
+                if new_status == CaseSLAStatus.Status.BREACHED:
+                    setattr(sla_status, f"{sla_type}_breached", True)
+                    breached.append((sla_status, sla_type))
+                else:
+                    at_risk.append([str(sla_status.pk), sla_type])
+            sla_status.next_check_at = sla_status.next_transition_at()
+
+        for (sla_type, new_status), ids in updates.items():
+            fields = {f"{sla_type}_status": new_status, "updated_at": now}
+            if new_status == CaseSLAStatus.Status.BREACHED:
+                fields[f"{sla_type}_breached"] = True
+            CaseSLAStatus.objects.filter(pk__in=ids).update(**fields)
+        CaseSLAStatus.objects.bulk_update(batch, ["next_check_at"])
+
+        breach_ids = [str(breach.pk) for breach in _create_breaches(breached, now)]
+        if breach_ids or at_risk:
+            transaction.on_commit(lambda: _enqueue_escalations(breach_ids, at_risk))
+    return len(batch), len(breached), len(at_risk)
+
+
+def advance_sla_timers(now=None, batch_size=TIMER_BATCH_SIZE):
+    """
+    Apply every at-risk / breach transition due by *now*.
+
+    Only statuses whose ``next_check_at`` has passed are read, in batches
+    locked with ``SKIP LOCKED`` so concurrent runs share the work; each
+    kind of transition is one ``UPDATE`` per batch, and the escalations of
+    new breaches and at-risk statuses are queued once the batch commits.
+    """
+    now = now or timezone.now()
+    checked = breaches_found = at_risk_count = 0
+    while True:
+        processed, breaches, at_risk = _advance_batch(now, batch_size)
+        checked += processed
+        breaches_found += breaches
+        at_risk_count += at_risk
+        if processed < batch_size:
+            break
+    return {
+        "checked": checked,
+        "breaches_found": breaches_found,
+        "at_risk": at_risk_count,
+    }
+
+
+def _active_rules(sla_ids, trigger_types):
+    """Active escalation rules of *trigger_types* per SLA id, in order."""
+    from .sla_models import EscalationRule
+
+    rules = defaultdict(list)
+    for rule in (
+        EscalationRule.objects.filter(
+            sla_id__in=sla_ids, is_active=True, trigger_type__in=trigger_types
+        )
+        .select_related("reassign_to")
+        .prefetch_related("notify_users")
+        .order_by("order")
+    ):
+        rules[rule.sla_id].append(rule)
+    return rules
+
+
+def escalate_breaches(breach_ids):
+    """Run the on-breach escalation rules of the given breaches."""
+    from .sla_models import SLABreach
+
+    breaches = list(
+        SLABreach.objects.filter(pk__in=breach_ids, sla__isnull=False).select_related(
+            "case", "case__assigned_preparer"
+        )
+    )
+    rules = _active_rules({breach.sla_id for breach in breaches}, ["on_breach"])
+    executed = 0
+    for breach in breaches:
+        for rule in rules[breach.sla_id]:
+            if rule.applies_to in (breach.breach_type, "both"):
+                execute_escalation_rule(breach.case, breach, rule)
+                executed += 1
+    return executed
+
+
+def _at_risk_rule_due(rule, sla_status, sla_type, now):
+    target = getattr(sla_status, f"{sla_type}_target")
+    if not target:
+        return False
+    start = sla_status.case.created_at
+    if rule.trigger_type == "percentage":
+        # Trigger when X% of time has elapsed
+        total_time = (target - start).total_seconds()
+        elapsed_time = (now - start).total_seconds()
+        percentage_elapsed = (
+            (elapsed_time / total_time) * 100 if total_time > 0 else 100
+        )
+        return percentage_elapsed >= rule.trigger_value
+    # Trigger X hours before breach
+    return (target - now).total_seconds() / 3600 <= rule.trigger_value
+
+
+def escalate_at_risk(at_risk):
+    """
+    Run the percentage / hours-before escalation rules of ``(sla_status_id,
+    sla_type)`` pairs that just became at risk.
+    """
+    from .sla_models import CaseSLAStatus
+
+    statuses = {
+        str(sla_status.pk): sla_status
+        for sla_status in CaseSLAStatus.objects.filter(
+            pk__in={status_id for status_id, _ in at_risk}, sla__isnull=False
+        ).select_related("case", "case__assigned_preparer")
+    }
+    rules = _active_rules(
+        {sla_status.sla_id for sla_status in statuses.values()},
+        ["percentage", "hours_before"],
+    )
+    now = timezone.now()
+    executed = 0
+    for status_id, sla_type in at_risk:
+        sla_status = statuses.get(status_id)
+        if sla_status is None:
+            continue
+        for rule in rules[sla_status.sla_id]:
+            if rule.applies_to in (sla_type, "both") and _at_risk_rule_due(
+                rule, sla_status, sla_type, now
+            ):
+                execute_escalation_rule(sla_status.case, None, rule)
+                executed += 1
+    return executed
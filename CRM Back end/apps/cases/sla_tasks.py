@@ -3,10 +3,8 @@ Celery tasks for SLA management.
 """
 
 import logging
-from datetime import timedelta
 
 from celery import shared_task
-from django.db.models import Q
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -15,128 +13,32 @@ logger = logging.getLogger(__name__)
 @shared_task
 def check_sla_statuses():
     """
-    Periodically check all active case SLA statuses.
-    Updates status and triggers escalations as needed.
-    Runs every 5 minutes.
+    Apply the SLA at-risk / breach transitions that have come due and queue
+    their escalations.  Only statuses whose ``next_check_at`` has passed are
+    read, so the cost follows the number of due transitions rather than the
+    number of open cases.  Runs every minute.
     """
-    from .sla_models import CaseSLAStatus
-    from .sla_services import record_sla_breach
+    from .sla_services import advance_sla_timers
 
-    # Get all active (non-resolved) case SLA statuses
-    active_statuses = (
-        CaseSLAStatus.objects.filter(
-            is_paused=False,
+    result = advance_sla_timers()
+    if result["breaches_found"] or result["at_risk"]:
+        logger.info(
+            f"SLA check: {result['breaches_found']} breaches, "
+            f"{result['at_risk']} at risk"
         )
-        .filter(Q(response_met_at__isnull=True) | Q(resolution_met_at__isnull=True))
-        .select_related("case", "sla")
-    )
+    return result
+
 
-    now = timezone.now()
-    breaches_found = 0
-    at_risk_count = 0
-
-    for sla_status in active_statuses:
-        # Check response SLA
-        if not sla_status.response_met_at and sla_status.response_target:
-            if now > sla_status.response_target and not sla_status.response_breached:
-                # Breach detected
-                sla_status.response_status = "breached"
-                sla_status.response_breached = True
-                sla_status.save()
-                record_sla_breach(sla_status.case, "response", sla_status)
-                breaches_found += 1
-            elif now > sla_status.response_target - timedelta(hours=1):
-                # At risk
-                if sla_status.response_status != "at_risk":
-                    sla_status.response_status = "at_risk"
-                    sla_status.save()
-                    at_risk_count += 1
-                    # Trigger at-risk escalation
-                    check_at_risk_escalation(sla_status, "response")
-
-        # Check resolution SLA
-        if not sla_status.resolution_met_at and sla_status.resolution_target:
-            if (
-                now > sla_status.resolution_target
-                and not sla_status.resolution_breached
-            ):
-                # Breach detected
-                sla_status.resolution_status = "breached"
-                sla_status.resolution_breached = True
-                sla_status.save()
-                record_sla_breach(sla_status.case, "resolution", sla_status)
-                breaches_found += 1
-            elif now > sla_status.resolution_target - timedelta(hours=2):
-                # At risk
-                if sla_status.resolution_status != "at_risk":
-                    sla_status.resolution_status = "at_risk"
-                    sla_status.save()
-                    at_risk_count += 1
-                    check_at_risk_escalation(sla_status, "resolution")
-
-    if breaches_found > 0 or at_risk_count > 0:
-        logger.info(f"SLA check: {breaches_found} breaches, {at_risk_count} at risk")
-
-    return {
-        "checked": active_statuses.count(),
-        "breaches_found": breaches_found,
-        "at_risk": at_risk_count,
-    }
-
-
-def check_at_risk_escalation(sla_status, sla_type):
+@shared_task
+def process_sla_escalations(breach_ids=None, at_risk=None):
     """
-    Check and trigger at-risk escalation rules.
+    Run the escalation rules of new breaches and of ``[sla_status_id,
+    sla_type]`` pairs that became at risk.  Queued by ``check_sla_statuses``.
     """
-    from .sla_models import EscalationRule
-    from .sla_services import execute_escalation_rule
-
-    if not sla_status.sla:
-        return
-
-    # Find applicable at-risk rules
-    rules = EscalationRule.objects.filter(
-        sla=sla_status.sla,
-        is_active=True,
-        trigger_type__in=["percentage", "hours_before"],
-        applies_to__in=[sla_type, "both"],
-    ).order_by("order")
-
-    now = timezone.now()
-
-    for rule in rules:
-        should_trigger = False
-
-        if sla_type == "response":
-            target = sla_status.response_target
-            start = sla_status.case.created_at
-        else:
-            target = sla_status.resolution_target
-            start = sla_status.case.created_at
-
-        if not target:
-            continue
-
-        total_time = (target - start).total_seconds()
-        elapsed_time = (now - start).total_seconds()
-        remaining_time = (target - now).total_seconds()
-
-        if rule.trigger_type == "percentage":
-            # Trigger when X% of time has elapsed
-            percentage_elapsed = (
-                (elapsed_time / total_time) * 100 if total_time > 0 else 100
-            )
-            if percentage_elapsed >= rule.trigger_value:
-                should_trigger = True
-
-        elif rule.trigger_type == "hours_before":
-            # Trigger X hours before breach
-            hours_remaining = remaining_time / 3600
-            if hours_remaining <= rule.trigger_value:
-                should_trigger = True
-
-        if should_trigger:
-            execute_escalation_rule(sla_status.case, None, rule)
+    from .sla_services import escalate_at_risk, escalate_breaches
+
+    executed = escalate_breaches(breach_ids or []) + escalate_at_risk(at_risk or [])
+    return {"escalations": executed}
 
 
 @shared_task
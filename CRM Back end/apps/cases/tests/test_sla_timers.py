@@ -0,0 +1,110 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from apps.business_hours.models import BusinessHours, WorkingDay, WorkingInterval
+from apps.business_hours.services import BusinessCalendar
+from apps.cases.sla_models import SLA, CaseSLAStatus, EscalationRule, SLABreach
+from apps.cases.sla_services import advance_sla_timers, recalculate_sla_targets
+from tests.factories import TaxCaseFactory
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _status(sla, response_in, resolution_in=timedelta(days=5)):
+    now = timezone.now()
+    return CaseSLAStatus.objects.create(
+        case=TaxCaseFactory(),
+        sla=sla,
+        response_target=now + response_in,
+        resolution_target=now + resolution_in,
+    )
+
+
+def _business_hours():
+    hours = BusinessHours.objects.create(name="Office", timezone="America/New_York")
+    for weekday in range(5):
+        day = WorkingDay.objects.create(business_hours=hours, day_of_week=weekday)
+        WorkingInterval.objects.create(
+            working_day=day, start_time=time(9), end_time=time(17)
+        )
+    return hours
+
+
+@pytest.mark.django_db
+class TestSLATimers:
+    def test_due_transitions_applied_and_breaches_escalated(
+        self, django_capture_on_commit_callbacks
+    ):
+        sla = SLA.objects.create(name="Standard", use_business_hours=False)
+        EscalationRule.objects.create(
+            sla=sla,
+            name="Breach",
+            trigger_type="on_breach",
+            notify_assignee=False,
+            notify_emails="lead@example.com",
+        )
+        breached = _status(sla, timedelta(minutes=-5))
+        at_risk = _status(sla, timedelta(minutes=30))
+        on_track = _status(sla, timedelta(hours=6))
+        next_check = on_track.next_check_at
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = advance_sla_timers()
+
+        assert result == {"checked": 2, "breaches_found": 1, "at_risk": 1}
+        breached.refresh_from_db()
+        at_risk.refresh_from_db()
+        on_track.refresh_from_db()
+        assert breached.response_status == "breached" and breached.response_breached
+        assert at_risk.response_status == "at_risk"
+        assert at_risk.next_check_at == at_risk.response_target
+        assert on_track.next_check_at == next_check
+        assert SLABreach.objects.filter(case=breached.case).count() == 1
+        assert mail.outbox[0].to == ["lead@example.com"]
+
+        # Nothing is due any more
+        assert advance_sla_timers()["checked"] == 0
+
+    def test_paused_statuses_are_not_scheduled(self):
+        sla = SLA.objects.create(name="Standard", use_business_hours=False)
+        sla_status = _status(sla, timedelta(hours=3))
+
+        sla_status.pause("Waiting on client")
+        assert sla_status.next_check_at is None
+
+        sla_status.resume()
+        assert sla_status.next_check_at == (
+            sla_status.response_target - timedelta(hours=1)
+        )
+
+
+@pytest.mark.django_db
+class TestBusinessHoursTargets:
+    def test_working_time_skips_nights_and_weekends(self):
+        calendar = BusinessCalendar.load(_business_hours().pk)
+        friday = datetime(2026, 3, 6, 16, 0, tzinfo=NEW_YORK)
+
+        target = calendar.add_working_time(friday, timedelta(hours=3))
+
+        assert target == datetime(2026, 3, 9, 11, 0, tzinfo=NEW_YORK)
+
+    def test_targets_are_counted_in_business_hours(self):
+        hours = _business_hours()
+        sla = SLA.objects.create(
+            name="Office hours", business_hours=hours, response_time_medium=40
+        )
+        case = TaxCaseFactory(priority="medium")
+        sla_status = CaseSLAStatus.objects.create(case=case, sla=sla)
+
+        recalculate_sla_targets(case)
+
+        sla_status.refresh_from_db()
+        assert sla_status.response_target == BusinessCalendar.load(
+            hours.pk
+        ).add_working_time(case.created_at, timedelta(hours=40))
+        # A working week, not 40 elapsed hours
+        assert sla_status.response_target - case.created_at > timedelta(days=4)
@@ -15,6 +15,7 @@ from apps.cases.serializers import (
     TaxCaseTransitionSerializer,
 )
 from apps.cases.services import transition_case_status
+from apps.core.exports import export_queryset_response
 from apps.users.permissions import ModulePermission
 
 
@@ -33,6 +34,7 @@ class TaxCaseViewSet(viewsets.ModelViewSet):
     POST   /{id}/transition/         transition case status
     GET    /{id}/notes/              list notes for a case
     POST   /{id}/notes/              add a note to a case
+    GET    /export_csv/              export filtered cases (CSV / XLSX)
     """
 
     permission_classes = [IsAuthenticated, ModulePermission]
@@ -96,6 +98,12 @@ class TaxCaseViewSet(viewsets.ModelViewSet):
             )
         return super().partial_update(request, *args, **kwargs)
 
+    @action(detail=False, methods=["get"], url_path="export_csv")
+    def export_csv(self, request):
+        """Export the filtered cases (see ``ContactViewSet.export_csv``)."""
+        qs = self.filter_queryset(self.get_queryset())
+        return export_queryset_response(request, "cases", qs)
+
     @action(detail=True, methods=["post"], url_path="transition")
     def transition(self, request, pk=None):
         """Transition the case to a new workflow status."""
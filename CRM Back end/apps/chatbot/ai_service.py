@@ -290,63 +290,11 @@ def get_available_slots(start_date: datetime, end_date: datetime = None) -> list
         - date: Date string (YYYY-MM-DD)
         - time: Time string (HH:MM)
         - end_time: Time string (HH:MM)
+        - staff_id: Assigned staff UUID string, or None
     """
-    from apps.appointments.models import Appointment
-    from apps.chatbot.models import ChatbotAppointmentSlot
-
-    if end_date is None:
-        end_date = start_date + timedelta(days=7)
-
-    slots = ChatbotAppointmentSlot.objects.filter(is_active=True)
-    available = []
-
-    current_date = start_date.date() if hasattr(start_date, "date") else start_date
-    now = timezone.now()
-
-    while current_date <= (end_date.date() if hasattr(end_date, "date") else end_date):
-        day_of_week = current_date.weekday()
-
-        for slot in slots.filter(day_of_week=day_of_week):
-            # Generate time slots within the slot's time range
-            slot_duration = timedelta(minutes=slot.slot_duration_minutes)
-            current_time = datetime.combine(current_date, slot.start_time)
-            end_time = datetime.combine(current_date, slot.end_time)
-
-            while current_time + slot_duration <= end_time:
-                slot_end_time = current_time + slot_duration
-
-                # Skip past times for today
-                slot_aware = timezone.make_aware(current_time)
-                if slot_aware <= now:
-                    current_time = slot_end_time
-                    continue
-
-                # Check if there are existing appointments at this time
-                existing_count = Appointment.objects.filter(
-                    start_datetime__date=current_date,
-                    start_datetime__time=current_time.time(),
-                    status__in=["scheduled", "confirmed"],
-                ).count()
+    from apps.chatbot.availability import available_slots
 
-                if existing_count < slot.max_appointments:
-                    available.append(
-                        {
-                            "date": current_date.isoformat(),
-                            "time": current_time.strftime("%H:%M"),
-                            "end_time": slot_end_time.strftime("%H:%M"),
-                            "staff_id": (
-                                str(slot.assigned_staff_id)
-                                if slot.assigned_staff_id
-                                else None
-                            ),
-                        }
-                    )
-
-                current_time = slot_end_time
-
-        current_date += timedelta(days=1)
-
-    return available
+    return available_slots(start_date, end_date)
 
 
 def book_appointment(
@@ -366,6 +314,8 @@ def book_appointment(
             - message: Confirmation or error message
     """
     from apps.appointments.models import Appointment
+    from apps.appointments.recurrence import expand
+    from apps.chatbot.availability import RELEASED_STATUSES
     from apps.chatbot.models import ChatbotAppointmentSlot
 
     try:
@@ -392,11 +342,16 @@ def book_appointment(
         # Check availability
         slot_datetime = timezone.make_aware(datetime.combine(date, time))
 
-        existing_count = Appointment.objects.filter(
-            start_datetime__date=date,
-            start_datetime__time=time,
-            status__in=["scheduled", "confirmed"],
-        ).count()
+        end_datetime = slot_datetime + timedelta(minutes=slot.slot_duration_minutes)
+
+        existing_count = sum(
+            appointment.status not in RELEASED_STATUSES
+            for appointment in expand(
+                Appointment.objects.filter(assigned_to=slot.assigned_staff_id),
+                slot_datetime,
+                end_datetime,
+            )
+        )
 
         if existing_count >= slot.max_appointments:
             return {
@@ -405,9 +360,6 @@ def book_appointment(
                 "message": "This time slot is no longer available. Please choose another time.",
             }
 
-        # Calculate end time
-        end_datetime = slot_datetime + timedelta(minutes=slot.slot_duration_minutes)
-
         # Create the appointment
         service_labels = {
             "tax_preparation": "Tax Preparation",
@@ -5,3 +5,8 @@ class ChatbotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.chatbot"
     verbose_name = "Chatbot"
+
+    def ready(self):
+        from apps.chatbot.availability import register_availability_signals
+
+        register_availability_signals()
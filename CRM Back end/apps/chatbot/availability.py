@@ -0,0 +1,317 @@
+"""
+Appointment availability for chatbot and portal booking.
+
+Active ``ChatbotAppointmentSlot`` templates are expanded into bookable
+slots per staff member and local day.  A slot's free capacity is its
+``max_appointments`` less the appointments of the same staff member that
+overlap it (slots without staff are booked without an assignee, so they
+share the unassigned appointments).  Overlaps are counted against the
+sorted start and end times of the staff member's appointments, so a whole
+window costs one query for the templates and one for the appointments
+(plus one for the edited occurrences when recurring series are involved).
+
+The free slots of each ``(staff, day)`` are cached.  Saving or deleting an
+appointment drops the entries of the days it touched, before and after the
+change; template and recurring series changes replace the cache version.
+Writes that bypass signals are picked up when the entries expire
+(``CHATBOT_AVAILABILITY_CACHE_TIMEOUT``), and ``book_appointment`` checks
+the database again before booking.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from apps.core.versioned_cache import bump_version, current_version
+
+# Appointments that no longer hold their time
+RELEASED_STATUSES = ("cancelled", "no_show")
+
+# Cache key part of the slots without assigned staff
+UNASSIGNED = "unassigned"
+
+VERSION_CACHE_KEY = "chatbot_availability_version"
+_DAY_CACHE_KEY = "chatbot_availability:{version}:{staff}:{day}"
+
+# ``(assigned_to_id, start_datetime, end_datetime)`` as last loaded / saved
+_SNAPSHOT_ATTR = "_availability_snapshot"
+
+
+def _staff_key(staff_id):
+    return str(staff_id) if staff_id else UNASSIGNED
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+
+class _Bookings:
+    """Sorted start and end times of one staff member's appointments."""
+
+    def __init__(self, intervals):
+        self.starts = sorted(start for start, _ in intervals)
+        self.ends = sorted(end for _, end in intervals)
+
+    def overlapping(self, start, end):
+        """Number of appointments overlapping ``[start, end)``."""
+        # Every appointment that ended by *start* also began before *end*
+        return bisect_left(self.starts, end) - bisect_right(self.ends, start)
+
+
+_NO_BOOKINGS = _Bookings([])
+
+
+def _free_slots(templates, day, bookings, zone):
+    """``(start, end)`` of the slots of *day* with capacity left."""
+    free = []
+    for start_time, end_time, duration, capacity in templates:
+        if duration <= 0:
+            continue
+        step = timedelta(minutes=duration)
+        cursor = datetime.combine(day, start_time, tzinfo=zone)
+        close = datetime.combine(day, end_time, tzinfo=zone)
+        while cursor + step <= close:
+            if bookings.overlapping(cursor, cursor + step) < capacity:
+                free.append((cursor, cursor + step))
+            cursor += step
+    free.sort()
+    return free
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def _templates():
+    """Active templates as ``{staff_id: {weekday: [template, ...]}}``."""
+    from apps.chatbot.models import ChatbotAppointmentSlot
+
+    templates = defaultdict(lambda: defaultdict(list))
+    rows = ChatbotAppointmentSlot.objects.filter(is_active=True).values_list(
+        "assigned_staff_id",
+        "day_of_week",
+        "start_time",
+        "end_time",
+        "slot_duration_minutes",
+        "max_appointments",
+    )
+    for staff_id, weekday, start_time, end_time, duration, capacity in rows:
+        templates[staff_id][weekday].append((start_time, end_time, duration, capacity))
+    return templates
+
+
+def _bookings(staff_ids, first_day, last_day, zone):
+    """
+    ``{staff_id: _Bookings}`` of the appointments overlapping the days,
+    including generated occurrences of recurring series.
+    """
+    from apps.appointments.models import Appointment
+    from apps.appointments.recurrence import expand
+
+    window_start = datetime.combine(first_day, time.min, tzinfo=zone)
+    window_end = datetime.combine(last_day + timedelta(days=1), time.min, tzinfo=zone)
+    staff = Q(assigned_to_id__in=[pk for pk in staff_ids if pk])
+    if None in staff_ids:
+        staff |= Q(assigned_to__isnull=True)
+    appointments = expand(Appointment.objects.filter(staff), window_start, window_end)
+    intervals = defaultdict(list)
+    for appointment in appointments:
+        if appointment.status not in RELEASED_STATUSES:
+            intervals[appointment.assigned_to_id].append(
+                (appointment.start_datetime, appointment.end_datetime)
+            )
+    return {staff_id: _Bookings(spans) for staff_id, spans in intervals.items()}
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def available_slots(start_date, end_date=None, now=None):
+    """
+    Free slots from *start_date* through *end_date* (inclusive local days,
+    a week by default) that start after *now*, ordered by time.
+
+    Returns dicts with ``date`` (YYYY-MM-DD), ``time`` and ``end_time``
+    (HH:MM) and ``staff_id`` (``None`` for unassigned slots).
+    """
+    first_day = _as_date(start_date)
+    last_day = _as_date(end_date) if end_date else first_day + timedelta(days=7)
+    now = now or timezone.now()
+    zone = timezone.get_current_timezone()
+
+    templates = _templates()
+    days = [
+        first_day + timedelta(days=offset)
+        for offset in range((last_day - first_day).days + 1)
+    ]
+    version = current_version(VERSION_CACHE_KEY)
+    keys = {
+        _DAY_CACHE_KEY.format(
+            version=version, staff=_staff_key(staff_id), day=day.isoformat()
+        ): (staff_id, day)
+        for staff_id, weekdays in templates.items()
+        for day in days
+        if day.weekday() in weekdays
+    }
+
+    free = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in free]
+    if missing:
+        pending = [keys[key] for key in missing]
+        bookings = _bookings(
+            {staff_id for staff_id, _ in pending},
+            min(day for _, day in pending),
+            max(day for _, day in pending),
+            zone,
+        )
+        computed = {
+            key: _free_slots(
+                templates[staff_id][day.weekday()],
+                day,
+                bookings.get(staff_id, _NO_BOOKINGS),
+                zone,
+            )
+            for key, (staff_id, day) in zip(missing, pending)
+        }
+        cache.set_many(computed, settings.CHATBOT_AVAILABILITY_CACHE_TIMEOUT)
+        free.update(computed)
+
+    results = []
+    for key, (staff_id, day) in keys.items():
+        for start, end in free[key]:
+            if start <= now:
+                continue
+            results.append(
+                {
+                    "date": day.isoformat(),
+                    "time": start.strftime("%H:%M"),
+                    "end_time": end.strftime("%H:%M"),
+                    "staff_id": str(staff_id) if staff_id else None,
+                }
+            )
+    results.sort(key=lambda slot: (slot["date"], slot["time"], slot["staff_id"] or ""))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Invalidation
+# ---------------------------------------------------------------------------
+
+
+def invalidate_availability():
+    """Drop every cached day, e.g. after the slot templates change."""
+    bump_version(VERSION_CACHE_KEY)
+
+
+def invalidate_days(staff_id, start, end):
+    """Drop the cached days of *staff_id* that ``[start, end]`` touches."""
+    zone = timezone.get_current_timezone()
+    version = current_version(VERSION_CACHE_KEY)
+    day = timezone.localtime(start, zone).date()
+    last_day = timezone.localtime(max(start, end), zone).date()
+    keys = []
+    while day <= last_day:
+        keys.append(
+            _DAY_CACHE_KEY.format(
+                version=version, staff=_staff_key(staff_id), day=day.isoformat()
+            )
+        )
+        day += timedelta(days=1)
+    cache.delete_many(keys)
+
+
+def _snapshot(instance):
+    values = instance.__dict__
+    fields = ("assigned_to_id", "start_datetime", "end_datetime")
+    if any(field not in values for field in (*fields, "recurrence_pattern")):
+        return None
+    if values["recurrence_pattern"] != "none":
+        # A series head: its occurrences touch an open-ended range of days
+        return None
+    if values["start_datetime"] is None or values["end_datetime"] is None:
+        return ()
+    return tuple(values[field] for field in fields)
+
+
+def _invalidate(snapshots):
+    for snapshot in snapshots:
+        if snapshot is None:
+            # Deferred fields or a series: the affected days are unknown
+            invalidate_availability()
+            return
+    for snapshot in set(snapshots):
+        if snapshot:
+            invalidate_days(*snapshot)
+
+
+def _appointment_loaded(sender, instance, **kwargs):
+    setattr(instance, _SNAPSHOT_ATTR, _snapshot(instance))
+
+
+def _appointment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshots = [_snapshot(instance)]
+    if not kwargs.get("created", False):
+        snapshots.append(getattr(instance, _SNAPSHOT_ATTR, None))
+    _invalidate(snapshots)
+    if transaction.get_connection().in_atomic_block:
+        # Drop anything computed from the pre-commit state in the meantime
+        transaction.on_commit(lambda: _invalidate(snapshots))
+    setattr(instance, _SNAPSHOT_ATTR, snapshots[0])
+
+
+def _templates_changed(sender, **kwargs):
+    invalidate_availability()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(invalidate_availability)
+
+
+def register_availability_signals():
+    """
+    Connect the cache invalidation receivers.  Called from
+    ``ChatbotConfig.ready()``.
+    """
+    from apps.appointments.models import Appointment
+    from apps.chatbot.models import ChatbotAppointmentSlot
+
+    post_init.connect(
+        _appointment_loaded,
+        sender=Appointment,
+        dispatch_uid="availability_appointment_loaded",
+    )
+    post_save.connect(
+        _appointment_changed,
+        sender=Appointment,
+        dispatch_uid="availability_appointment_saved",
+    )
+    post_delete.connect(
+        _appointment_changed,
+        sender=Appointment,
+        dispatch_uid="availability_appointment_deleted",
+    )
+    post_save.connect(
+        _templates_changed,
+        sender=ChatbotAppointmentSlot,
+        dispatch_uid="availability_slot_saved",
+    )
+    post_delete.connect(
+        _templates_changed,
+        sender=ChatbotAppointmentSlot,
+        dispatch_uid="availability_slot_deleted",
+    )
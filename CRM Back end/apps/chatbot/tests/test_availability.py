@@ -0,0 +1,136 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.chatbot.ai_service import book_appointment
+from apps.chatbot.availability import available_slots
+from tests.factories import (
+    AppointmentFactory,
+    ChatbotAppointmentSlotFactory,
+    ContactFactory,
+    UserFactory,
+)
+
+# A Monday well in the future
+MONDAY = date(2030, 1, 7)
+
+
+def _at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+def _times(slots, staff=None):
+    return [
+        slot["time"]
+        for slot in slots
+        if slot["staff_id"] == (str(staff.pk) if staff else None)
+    ]
+
+
+@pytest.mark.django_db
+class TestAvailableSlots:
+    def test_overlapping_appointments_use_capacity(self):
+        staff = UserFactory()
+        ChatbotAppointmentSlotFactory(
+            assigned_staff=staff, start_time=time(9), end_time=time(11)
+        )
+        # Starts between slot boundaries: blocks 9:00 and 9:30
+        AppointmentFactory(
+            assigned_to=staff,
+            start_datetime=_at(MONDAY, 9, 15),
+            end_datetime=_at(MONDAY, 9, 45),
+        )
+        AppointmentFactory(
+            assigned_to=staff,
+            start_datetime=_at(MONDAY, 10),
+            end_datetime=_at(MONDAY, 10, 30),
+            status="cancelled",
+        )
+        # Another staff member's time does not count
+        AppointmentFactory(
+            start_datetime=_at(MONDAY, 10, 30), end_datetime=_at(MONDAY, 11)
+        )
+
+        slots = available_slots(MONDAY, MONDAY)
+
+        assert _times(slots, staff) == ["10:00", "10:30"]
+
+    def test_capacity_and_past_slots(self):
+        ChatbotAppointmentSlotFactory(
+            start_time=time(9), end_time=time(10), max_appointments=2
+        )
+        AppointmentFactory(
+            assigned_to=None,
+            start_datetime=_at(MONDAY, 9),
+            end_datetime=_at(MONDAY, 9, 30),
+        )
+
+        assert _times(available_slots(MONDAY, MONDAY)) == ["09:00", "09:30"]
+        assert _times(available_slots(MONDAY, MONDAY, now=_at(MONDAY, 9))) == ["09:30"]
+
+    def test_cache_is_invalidated_by_bookings(self, django_assert_num_queries):
+        staff = UserFactory()
+        ChatbotAppointmentSlotFactory(
+            assigned_staff=staff, start_time=time(9), end_time=time(10)
+        )
+        available_slots(MONDAY, MONDAY)
+        with django_assert_num_queries(1):
+            assert _times(available_slots(MONDAY, MONDAY), staff) == ["09:00", "09:30"]
+
+        appointment = AppointmentFactory(
+            assigned_to=staff,
+            start_datetime=_at(MONDAY, 9),
+            end_datetime=_at(MONDAY, 9, 30),
+        )
+        assert _times(available_slots(MONDAY, MONDAY), staff) == ["09:30"]
+
+        appointment.start_datetime = _at(MONDAY + timedelta(days=7), 9)
+        appointment.end_datetime = _at(MONDAY + timedelta(days=7), 9, 30)
+        appointment.save()
+        assert _times(available_slots(MONDAY, MONDAY), staff) == ["09:00", "09:30"]
+
+    def test_booking_rejects_overlaps(self):
+        staff = UserFactory()
+        ChatbotAppointmentSlotFactory(
+            assigned_staff=staff, start_time=time(9), end_time=time(11)
+        )
+        AppointmentFactory(
+            assigned_to=staff,
+            start_datetime=_at(MONDAY, 9, 15),
+            end_datetime=_at(MONDAY, 9, 45),
+        )
+        contact = ContactFactory()
+
+        taken = book_appointment(contact, MONDAY.isoformat(), "09:30", "general")
+        booked = book_appointment(contact, MONDAY.isoformat(), "10:00", "general")
+
+        assert taken["success"] is False
+        assert booked["success"] is True
+        assert _times(available_slots(MONDAY, MONDAY), staff) == ["10:30"]
+
+
+@pytest.mark.django_db
+class TestAvailabilityBenchmark:
+    def test_thirty_days_of_ten_staff(self, django_assert_num_queries):
+        staff = UserFactory.create_batch(10)
+        for member in staff:
+            for weekday in range(5):
+                ChatbotAppointmentSlotFactory(
+                    assigned_staff=member, day_of_week=weekday
+                )
+            AppointmentFactory(
+                assigned_to=member,
+                start_datetime=_at(MONDAY, 9),
+                end_datetime=_at(MONDAY, 10),
+            )
+        end = MONDAY + timedelta(days=29)
+
+        # Templates and appointments, however many days and staff
+        with django_assert_num_queries(2):
+            slots = available_slots(MONDAY, end)
+        with django_assert_num_queries(1):
+            assert available_slots(MONDAY, end) == slots
+
+        # 22 weekdays x 16 half hours x 10 staff, less 2 booked per staff
+        assert len(slots) == 22 * 16 * 10 - 2 * 10
@@ -0,0 +1,41 @@
+"""
+CSV / XLSX exporter for contacts (see ``apps.core.exports``).
+"""
+
+from apps.contacts.models import Contact
+from apps.core.exports import Column, ModelExporter, full_name
+
+
+class ContactExporter(ModelExporter):
+    model = Contact
+    module = "contacts"
+    viewset = "apps.contacts.views.ContactViewSet"
+    filename = "contacts_export"
+    columns = (
+        Column("id"),
+        Column("salutation"),
+        Column("first_name"),
+        Column("last_name"),
+        Column("email"),
+        Column("phone"),
+        Column("mobile"),
+        Column("date_of_birth"),
+        Column("ssn_last_four", sensitive=True),
+        Column("street_address"),
+        Column("city"),
+        Column("state"),
+        Column("zip_code"),
+        Column("country"),
+        Column("status"),
+        Column("source"),
+        Column("primary_corporation", "primary_corporation__name"),
+        Column(
+            "assigned_to",
+            "assigned_to__first_name",
+            "assigned_to__last_name",
+            formatter=full_name,
+        ),
+        Column("description"),
+        Column("tags"),
+        Column("created_at"),
+    )
@@ -2,6 +2,9 @@ import django_filters
 from django.db.models import Q
 
 from apps.contacts.models import Contact, ContactStar
+from apps.contacts.search import corporations_of, with_related
+from apps.core.search import MIN_QUERY_LENGTH, search_ids
+from apps.corporations.models import Corporation
 
 
 class ContactFilter(django_filters.FilterSet):
@@ -63,72 +66,40 @@ class ContactFilter(django_filters.FilterSet):
 
     def filter_search_with_related(self, queryset, name, value):
         """
-        Search contacts by name, email, phone, or corporation name.
-        If include_related=true, also include contacts that share corporations
-        or are linked via reports_to.
+        Search contacts by name, email, phone, or corporation name through
+        the search index.  If include_related=true, also include contacts
+        that share corporations or are linked via reports_to.
         """
-        if not value or len(value) < 2:
+        if not value or len(value) < MIN_QUERY_LENGTH:
             return queryset
 
         include_related = self.data.get("include_related", "").lower() == "true"
 
         # Direct matches on contact fields and corporation name
+        corporation_ids = search_ids("corporations", value)
         direct_q = (
-            Q(first_name__icontains=value)
-            | Q(last_name__icontains=value)
-            | Q(email__icontains=value)
-            | Q(phone__icontains=value)
-            | Q(corporations__name__icontains=value)
-            | Q(primary_corporation__name__icontains=value)
+            Q(pk__in=search_ids("contacts", value))
+            | Q(primary_corporation__in=corporation_ids)
+            | Q(
+                pk__in=Contact.corporations.through.objects.filter(
+                    corporation__in=corporation_ids
+                ).values("contact")
+            )
         )
 
         if not include_related:
-            return queryset.filter(direct_q).distinct()
-
-        # Find direct matches first
-        direct_matches = queryset.filter(direct_q).distinct()
-        direct_ids = set(direct_matches.values_list("id", flat=True))
-
-        # Collect corporation IDs from direct matches
-        corp_ids = set()
-        for contact in direct_matches.prefetch_related("corporations"):
-            if contact.primary_corporation_id:
-                corp_ids.add(contact.primary_corporation_id)
-            for corp in contact.corporations.all():
-                corp_ids.add(corp.id)
-
-        # Also find corporations by name directly
-        from apps.corporations.models import Corporation
-
-        matching_corps = Corporation.objects.filter(
-            Q(name__icontains=value) | Q(legal_name__icontains=value)
+            return queryset.filter(direct_q)
+
+        # Expand in the same statement: contacts of the matched corporations
+        # and of the direct matches' corporations, plus reports_to links
+        direct_ids = queryset.filter(direct_q).values("pk")
+        return with_related(
+            queryset,
+            direct_ids,
+            Corporation.objects.filter(
+                Q(pk__in=corporation_ids) | Q(pk__in=corporations_of(direct_ids))
+            ).values("pk"),
         )
-        for corp in matching_corps:
-            corp_ids.add(corp.id)
-
-        # Collect all related contact IDs
-        all_contact_ids = set(direct_ids)
-
-        # Add contacts that report to found contacts
-        for contact in direct_matches:
-            if contact.reports_to_id:
-                all_contact_ids.add(contact.reports_to_id)
-
-        # Add contacts that are reported to by found contacts
-        reporting_ids = Contact.objects.filter(
-            reports_to_id__in=direct_ids
-        ).values_list("id", flat=True)
-        all_contact_ids.update(reporting_ids)
-
-        # Add all contacts from the same corporations
-        if corp_ids:
-            contacts_in_corps = Contact.objects.filter(
-                Q(corporations__id__in=corp_ids)
-                | Q(primary_corporation_id__in=corp_ids)
-            ).values_list("id", flat=True)
-            all_contact_ids.update(contacts_in_corps)
-
-        return queryset.filter(id__in=all_contact_ids).distinct()
 
     def filter_is_starred(self, queryset, name, value):
         """
@@ -0,0 +1,64 @@
+"""
+CSV importer for contacts (see ``apps.core.imports``).
+"""
+
+from django.db.models.functions import Lower
+
+from apps.contacts.models import Contact
+from apps.contacts.serializers import ContactImportSerializer
+from apps.core.imports import CSVImporter
+
+EMAIL = "email"
+NAME_PHONE = "name_phone"
+
+
+class ContactImporter(CSVImporter):
+    """
+    Skips rows whose email matches an existing contact (case-insensitive),
+    or whose first name, last name and phone all do.
+    """
+
+    model = Contact
+    serializer_class = ContactImportSerializer
+
+    def dedup_keys(self, data):
+        keys = []
+        if data.get("email"):
+            email = data["email"].lower()
+            keys.append(((EMAIL, email), f"Duplicate email: {data['email']}"))
+        if data.get("phone"):
+            name_phone = (
+                data.get("first_name", "").lower(),
+                data.get("last_name", "").lower(),
+                data["phone"],
+            )
+            keys.append(((NAME_PHONE, name_phone), "Duplicate name+phone"))
+        return keys
+
+    def find_existing(self, keys):
+        emails = [value for kind, value in keys if kind == EMAIL]
+        name_phones = {value for kind, value in keys if kind == NAME_PHONE}
+        found = {}
+        if emails:
+            for email, pk in (
+                Contact.objects.annotate(email_lower=Lower("email"))
+                .filter(email_lower__in=emails)
+                .order_by("created_at")
+                .values_list("email_lower", "pk")
+            ):
+                found.setdefault((EMAIL, email), pk)
+        if name_phones:
+            for first, last, phone, pk in (
+                Contact.objects.filter(phone__in={p for _, _, p in name_phones})
+                .order_by("created_at")
+                .values_list(Lower("first_name"), Lower("last_name"), "phone", "pk")
+            ):
+                key = (first, last, phone)
+                if key in name_phones:
+                    found.setdefault((NAME_PHONE, key), pk)
+        return found
+
+    def prepare(self, instances):
+        numbers = Contact.next_contact_numbers(len(instances))
+        for instance, number in zip(instances, numbers):
+            instance.contact_number = number
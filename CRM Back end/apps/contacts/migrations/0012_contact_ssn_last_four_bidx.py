@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0011_change_social_url_fields_to_charfield"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="ssn_last_four_bidx",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                max_length=64,
+                verbose_name="SSN last four blind index",
+            ),
+        ),
+    ]
@@ -3,7 +3,7 @@ import uuid
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from apps.core.fields import EncryptedCharField
+from apps.core.fields import BlindIndexField, EncryptedCharField
 from apps.core.models import TimeStampedModel
 
 
@@ -178,6 +178,10 @@ class Contact(TimeStampedModel):
         default="",
         help_text=_("Last four digits of SSN. Encrypted at rest."),
     )
+    ssn_last_four_bidx = BlindIndexField(
+        _("SSN last four blind index"),
+        source_field="ssn_last_four",
+    )
 
     # -- Lead & Source Information --
     lead_source = models.CharField(
@@ -528,19 +532,26 @@ class Contact(TimeStampedModel):
 
     def save(self, *args, **kwargs):
         if not self.contact_number:
-            # Generate contact number like CON0001, CON0002, etc.
-            last_contact = Contact.objects.order_by("-contact_number").first()
-            if last_contact and last_contact.contact_number:
-                try:
-                    last_num = int(last_contact.contact_number.replace("CON", ""))
-                    new_num = last_num + 1
-                except ValueError:
-                    new_num = 1
-            else:
-                new_num = 1
-            self.contact_number = f"CON{new_num:04d}"
+            self.contact_number = Contact.next_contact_numbers(1)[0]
         super().save(*args, **kwargs)
 
+    @classmethod
+    def next_contact_numbers(cls, count):
+        """Generate the next ``count`` contact numbers (CON0001, CON0002, ...)."""
+        last_number = (
+            cls.objects.order_by("-contact_number")
+            .values_list("contact_number", flat=True)
+            .first()
+        )
+        if last_number:
+            try:
+                last_num = int(last_number.replace("CON", ""))
+            except ValueError:
+                last_num = 0
+        else:
+            last_num = 0
+        return [f"CON{num:04d}" for num in range(last_num + 1, last_num + count + 1)]
+
     @property
     def full_name(self):
         parts = []
@@ -0,0 +1,76 @@
+"""
+Search indexing of contacts (see ``apps.core.search``) and expansion of
+search results to related contacts.
+"""
+
+from django.db.models import Q
+
+from apps.contacts.models import Contact
+from apps.core.search import SearchSource
+
+
+class ContactSearch(SearchSource):
+    model = Contact
+    module = "contacts"
+    fields = (
+        "contact_number",
+        "first_name",
+        "last_name",
+        "email",
+        "secondary_email",
+        "phone",
+        "mobile",
+        "home_phone",
+    )
+
+    def title(self, obj):
+        return f"{obj.first_name} {obj.last_name}".strip()
+
+    def texts(self, obj):
+        return [obj.contact_number, obj.email, obj.secondary_email]
+
+    def phones(self, obj):
+        return [obj.phone, obj.mobile, obj.home_phone]
+
+
+def with_related(queryset, contact_ids, corporation_ids):
+    """
+    *queryset* narrowed to *contact_ids* plus related contacts: whom they
+    report to, their direct reports, and every contact of the corporations
+    in *corporation_ids*.
+
+    Ids may be lists or subqueries; the result is a single statement.
+    """
+    through = Contact.corporations.through
+    return queryset.filter(
+        Q(pk__in=contact_ids)
+        | Q(
+            pk__in=Contact.objects.filter(
+                pk__in=contact_ids, reports_to__isnull=False
+            ).values("reports_to")
+        )
+        | Q(reports_to__in=contact_ids)
+        | Q(primary_corporation__in=corporation_ids)
+        | Q(
+            pk__in=through.objects.filter(corporation__in=corporation_ids).values(
+                "contact"
+            )
+        )
+    )
+
+
+def corporations_of(contact_ids):
+    """Subquery of the ids of the corporations linked to *contact_ids*."""
+    from apps.corporations.models import Corporation
+
+    through = Contact.corporations.through
+    return Corporation.objects.filter(
+        Q(
+            pk__in=Contact.objects.filter(
+                pk__in=contact_ids, primary_corporation__isnull=False
+            ).values("primary_corporation")
+        )
+        | Q(
+            pk__in=through.objects.filter(contact__in=contact_ids).values("corporation")
+        )
+    ).values("pk")
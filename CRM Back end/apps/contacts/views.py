@@ -1,10 +1,5 @@
-import csv
-import io
-
-from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import Exists, OuterRef, Q
-from django.http import HttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
@@ -16,13 +11,13 @@ from apps.contacts.models import Contact, ContactStar, ContactTag, ContactTagAss
 from apps.contacts.serializers import (
     ContactCreateUpdateSerializer,
     ContactDetailSerializer,
-    ContactImportSerializer,
     ContactListSerializer,
     ContactTagAssignmentSerializer,
     ContactTagSerializer,
     WizardCreateSerializer,
 )
-from apps.core.validators import validate_csv_import
+from apps.core.exports import export_queryset_response
+from apps.core.imports import import_csv_response
 from apps.users.permissions import ModulePermission
 
 
@@ -153,96 +148,14 @@ class ContactViewSet(viewsets.ModelViewSet):
             date_of_birth, street_address, city, state, zip_code,
             country, status, source, description, tags
 
-        Returns a summary with counts of created and errored rows.
+        Returns a summary with counts of created and errored rows.  Files
+        over ``IMPORT_SYNC_MAX_ROWS`` rows (or ``async=true``) are imported
+        in the background: the response is 202 with an import job id to
+        poll at ``/api/v1/imports/<id>/``.
 
         Limits: Max 10MB file size, max 10000 rows.
         """
-        csv_file = request.FILES.get("file")
-        if not csv_file:
-            return Response(
-                {"detail": "No file uploaded. Provide a 'file' field."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Validate file size and format
-        try:
-            decoded, _row_count = validate_csv_import(csv_file)
-        except DjangoValidationError as e:
-            return Response(
-                {"detail": str(e.message)},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        reader = csv.DictReader(io.StringIO(decoded))
-
-        created_count = 0
-        errors = []
-        skipped = []
-
-        for row_number, row in enumerate(reader, start=2):  # row 1 is header
-            # Normalise keys: strip whitespace, lowercase
-            cleaned = {
-                k.strip().lower().replace(" ", "_"): v.strip()
-                for k, v in row.items()
-                if k
-            }
-
-            serializer = ContactImportSerializer(data=cleaned)
-            if not serializer.is_valid():
-                errors.append({"row": row_number, "errors": serializer.errors})
-                continue
-
-            data = serializer.validated_data
-
-            # Dedup by email
-            if data.get("email"):
-                match = Contact.objects.filter(email__iexact=data["email"]).first()
-                if match:
-                    skipped.append(
-                        {
-                            "row": row_number,
-                            "reason": f"Duplicate email: {data['email']}",
-                            "matched_id": str(match.id),
-                        }
-                    )
-                    continue
-
-            # Dedup by name + phone
-            if data.get("phone"):
-                match = Contact.objects.filter(
-                    first_name__iexact=data.get("first_name", ""),
-                    last_name__iexact=data.get("last_name", ""),
-                    phone=data["phone"],
-                ).first()
-                if match:
-                    skipped.append(
-                        {
-                            "row": row_number,
-                            "reason": "Duplicate name+phone",
-                            "matched_id": str(match.id),
-                        }
-                    )
-                    continue
-
-            Contact.objects.create(
-                created_by=request.user,
-                **data,
-            )
-            created_count += 1
-
-        return Response(
-            {
-                "created": created_count,
-                "skipped": skipped,
-                "errors": errors,
-                "total_processed": created_count + len(errors) + len(skipped),
-            },
-            status=(
-                status.HTTP_201_CREATED
-                if created_count
-                else status.HTTP_400_BAD_REQUEST
-            ),
-        )
+        return import_csv_response(request, "contacts")
 
     @action(detail=True, methods=["get"], url_path="emails")
     def emails(self, request, pk=None):
@@ -381,72 +294,12 @@ class ContactViewSet(viewsets.ModelViewSet):
         """
         Export the current (filtered) queryset as a downloadable CSV file.
         Respects any active query-string filters / search.
+
+        ``?columns=`` selects columns, ``?file_format=xlsx`` switches
+        format and ``?async=true`` writes the file in the background.
         """
         qs = self.filter_queryset(self.get_queryset())
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="contacts_export.csv"'
-
-        writer = csv.writer(response)
-
-        # Header row
-        header = [
-            "id",
-            "salutation",
-            "first_name",
-            "last_name",
-            "email",
-            "phone",
-            "mobile",
-            "date_of_birth",
-            "ssn_last_four",
-            "street_address",
-            "city",
-            "state",
-            "zip_code",
-            "country",
-            "status",
-            "source",
-            "primary_corporation",
-            "assigned_to",
-            "description",
-            "tags",
-            "created_at",
-        ]
-        writer.writerow(header)
-
-        for contact in qs.iterator(chunk_size=1000):
-            writer.writerow(
-                [
-                    str(contact.id),
-                    contact.salutation,
-                    contact.first_name,
-                    contact.last_name,
-                    contact.email,
-                    contact.phone,
-                    contact.mobile,
-                    contact.date_of_birth.isoformat() if contact.date_of_birth else "",
-                    contact.ssn_last_four,
-                    contact.street_address,
-                    contact.city,
-                    contact.state,
-                    contact.zip_code,
-                    contact.country,
-                    contact.status,
-                    contact.source,
-                    (
-                        contact.primary_corporation.name
-                        if contact.primary_corporation
-                        else ""
-                    ),
-                    contact.assigned_to.get_full_name() if contact.assigned_to else "",
-                    contact.description,
-                    contact.tags,
-                    contact.created_at.isoformat(),
-                ]
-            )
-
-        return response
+        return export_queryset_response(request, "contacts", qs)
 
     # ------------------------------------------------------------------
     # Client Portal Messages
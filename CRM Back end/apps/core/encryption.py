@@ -7,6 +7,8 @@ If the setting is not configured, a warning is logged and values are
 stored in plaintext (for development convenience).
 """
 
+import hashlib
+import hmac
 import logging
 
 from cryptography.fernet import Fernet, InvalidToken
@@ -18,6 +20,10 @@ logger = logging.getLogger(__name__)
 _NOT_INITIALIZED = object()
 _fernet_instance = _NOT_INITIALIZED
 _warning_shown = False
+_blind_index_key = None
+
+# Every Fernet token starts with the base64 form of its 0x80 version byte
+FERNET_TOKEN_PREFIX = "gAAAAA"
 
 
 def _get_fernet():
@@ -90,6 +96,79 @@ def decrypt_value(token: str) -> str:
         return token
 
 
+def encrypt_bytes(data: bytes) -> bytes:
+    """
+    Encrypt a binary payload (e.g. a compressed blob) into a Fernet token.
+    Returns the original bytes if encryption is not configured.
+    """
+    fernet = _get_fernet()
+    if fernet is None or not data:
+        return data
+    return fernet.encrypt(data)
+
+
+def decrypt_bytes(token: bytes) -> bytes:
+    """
+    Decrypt a payload produced by ``encrypt_bytes``.
+    Returns it unchanged if it isn't a token or encryption is not configured.
+    """
+    fernet = _get_fernet()
+    if fernet is None or not token:
+        return token
+    try:
+        return fernet.decrypt(token)
+    except InvalidToken:
+        # Stored before encryption was enabled
+        return token
+
+
+def is_encrypted_token(value: str) -> bool:
+    """
+    Whether ``value`` looks like a Fernet token produced by ``encrypt_value``.
+    Plaintext left over from before encryption was enabled does not.
+    """
+    return (
+        bool(value)
+        and _get_fernet() is not None
+        and value.startswith(FERNET_TOKEN_PREFIX)
+    )
+
+
+def _get_blind_index_key() -> bytes:
+    """
+    Return the HMAC key for blind indexes.
+
+    ``settings.BLIND_INDEX_KEY`` is used when set; otherwise a key is derived
+    from ``FIELD_ENCRYPTION_KEY`` (or ``SECRET_KEY`` in development) so the
+    index never reuses the encryption key directly.
+    """
+    global _blind_index_key
+
+    if _blind_index_key is None:
+        key = getattr(settings, "BLIND_INDEX_KEY", "") or (
+            "blind-index:"
+            + (getattr(settings, "FIELD_ENCRYPTION_KEY", "") or settings.SECRET_KEY)
+        )
+        _blind_index_key = hashlib.sha256(key.encode()).digest()
+    return _blind_index_key
+
+
+def blind_index(plaintext: str) -> str:
+    """
+    Return a deterministic HMAC-SHA256 digest of ``plaintext``.
+
+    Stored next to an encrypted column, it allows exact-match lookups and
+    duplicate detection without decrypting.  Surrounding whitespace is
+    ignored; empty values map to an empty string.
+    """
+    if not plaintext:
+        return ""
+    value = str(plaintext).strip()
+    if not value:
+        return ""
+    return hmac.new(_get_blind_index_key(), value.encode(), hashlib.sha256).hexdigest()
+
+
 def generate_encryption_key() -> str:
     """Generate a new Fernet key suitable for FIELD_ENCRYPTION_KEY."""
     return Fernet.generate_key().decode()
@@ -0,0 +1,375 @@
+"""
+Streaming CSV / XLSX export of module data.
+
+An exporter declares the columns a module can export; each column is one
+or more ``values_list`` lookups (``assigned_to__first_name``, ...) plus an
+optional formatter, so rows are read as tuples without instantiating
+models or following foreign keys, and encrypted columns are only
+decrypted when they are requested.  Rows are fetched in keyset-paginated
+chunks (``pk > last``), never holding more than ``CHUNK_SIZE`` rows, and
+written with the streaming writers of ``apps.reports.exports``.
+
+Clients pick columns with ``?columns=a,b,c`` and the format with
+``?file_format=xlsx``.  Sensitive columns (SSN, EIN) are masked unless
+the user has ``can_export`` on the module.  With ``async=true`` the export
+runs in ``run_export_job`` instead: the job keeps the request's filter,
+search and ordering parameters, and the worker rebuilds the queryset
+through the module's viewset as the user who started it.  The file is
+written to storage, and a short-lived, single-use signed token from
+``download-token`` downloads it (the same semantics as
+``DocumentDownloadToken``).
+"""
+
+import datetime
+import decimal
+import logging
+import secrets
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.text import slugify
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from apps.core.fields import LazyDecryptedValue
+from apps.reports.exports import (
+    EXPORT_FORMATS,
+    export_response,
+    iter_csv,
+    iter_xlsx,
+)
+from apps.users.permissions import has_action_permission
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per keyset query
+CHUNK_SIZE = 2000
+
+# Module name -> exporter class
+EXPORTERS = {
+    "contacts": "apps.contacts.exporters.ContactExporter",
+    "corporations": "apps.corporations.exporters.CorporationExporter",
+    "cases": "apps.cases.exporters.TaxCaseExporter",
+    "invoices": "apps.inventory.exporters.InvoiceExporter",
+    "reports": "apps.reports.exporters.ReportExporter",
+}
+
+# Cell written for a sensitive column the user may not export
+MASKED_VALUE = "****"
+
+# Query parameters of the export itself, not of the queryset
+EXPORT_PARAMS = ("columns", "file_format", "async", "format")
+
+DOWNLOAD_TOKEN_SALT = "apps.core.exports.download"
+_USED_TOKEN_KEY = "export_download_token_used:{}"
+
+
+def get_exporter(module):
+    return import_string(EXPORTERS[module])
+
+
+def to_cell(value):
+    """Plain CSV / XLSX cell value for a database value."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, LazyDecryptedValue)):
+        return str(value)
+    return value
+
+
+def full_name(first_name, last_name):
+    """``User.get_full_name`` / ``Contact`` style name from two lookups."""
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+class Column:
+    """
+    An exportable column read from one or more ``values_list`` lookups.
+    ``sensitive`` columns are masked for users without ``can_export``.
+    """
+
+    def __init__(self, name, *lookups, formatter=None, sensitive=False):
+        self.name = name
+        self.lookups = lookups or (name,)
+        self.formatter = formatter
+        self.sensitive = sensitive
+
+
+class Exporter(ABC):
+    """
+    Base exporter.  Subclasses implement ``job_rows``; those that can run
+    as a background ``ExportJob`` set ``background``.
+    """
+
+    module = None
+    filename = "export"
+    background = False
+
+    def __init__(self, column_names=None, user=None):
+        self.column_names = column_names or []
+        self.user = user
+
+    @abstractmethod
+    def job_rows(self, job):
+        """``(header, rows)`` for a background ``ExportJob``."""
+
+
+class ModelExporter(Exporter):
+    """
+    Exports a queryset of ``model``.  ``columns`` lists every exportable
+    ``Column`` in default order; ``viewset`` is the dotted path of the
+    module's viewset, which rebuilds the queryset of background jobs.
+    """
+
+    model = None
+    viewset = None
+    columns = ()
+
+    def __init__(self, column_names=None, user=None):
+        self.user = user
+        self.reveal_sensitive = user is not None and has_action_permission(
+            user, self.module, "export"
+        )
+        by_name = {column.name: column for column in self.columns}
+        if column_names:
+            unknown = [name for name in column_names if name not in by_name]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}.")
+            self.selected = [by_name[name] for name in column_names]
+        else:
+            self.selected = list(self.columns)
+
+    @property
+    def background(self):
+        return self.viewset is not None
+
+    @property
+    def header(self):
+        return [column.name for column in self.selected]
+
+    def rows(self, queryset):
+        """Yield the selected cells for every row of *queryset*."""
+        lookups, slices = [], []
+        for column in self.selected:
+            start = len(lookups) + 1  # after the pk
+            lookups.extend(column.lookups)
+            masked = column.sensitive and not self.reveal_sensitive
+            slices.append((column.formatter, start, len(lookups) + 1, masked))
+
+        qs = queryset.prefetch_related(None).order_by("pk").values_list("pk", *lookups)
+        last_pk = None
+        while True:
+            page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            chunk = list(page[:CHUNK_SIZE])
+            for row in chunk:
+                cells = []
+                for formatter, start, end, masked in slices:
+                    if masked:
+                        # Never decrypted: LazyDecryptedValue is truthy by token
+                        value = MASKED_VALUE if any(row[start:end]) else None
+                    elif formatter:
+                        value = formatter(*row[start:end])
+                    else:
+                        value = row[start]
+                    cells.append(to_cell(value))
+                yield cells
+            if len(chunk) < CHUNK_SIZE:
+                return
+            last_pk = chunk[-1][0]
+
+    def job_rows(self, job):
+        view = _job_view(self.viewset, job.created_by, job.params.get("query", {}))
+        return self.header, self.rows(view.filter_queryset(view.get_queryset()))
+
+
+def _job_view(viewset, user, query):
+    """
+    An instance of the *viewset* class (dotted path) handling an
+    ``export_csv`` request of *user* with the query parameters *query*
+    (``{name: [values]}``).
+    """
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(mutable=True)
+    for name, values in query.items():
+        http_request.GET.setlist(name, values)
+    request = Request(http_request)
+    request.user = user
+    return import_string(viewset)(
+        request=request,
+        args=(),
+        kwargs={},
+        format_kwarg=None,
+        action="export_csv",
+    )
+
+
+def _requested_columns(request):
+    columns = request.query_params.get("columns", "")
+    return [name.strip() for name in columns.split(",") if name.strip()]
+
+
+def _run_async(request):
+    return str(request.query_params.get("async", "")).lower() in ("1", "true")
+
+
+def _queryset_params(request):
+    """The request's filter / search / ordering parameters, as JSON."""
+    return {
+        name: request.query_params.getlist(name)
+        for name in request.query_params
+        if name not in EXPORT_PARAMS
+    }
+
+
+def start_export_job(request, module, file_format, columns=None, params=None):
+    """Create an ``ExportJob`` and queue it once the request commits."""
+    from apps.core.models import ExportJob
+    from apps.core.tasks import run_export_job
+
+    job = ExportJob.objects.create(
+        module=module,
+        file_format=file_format,
+        columns=columns or [],
+        params=params or {},
+        created_by=request.user,
+    )
+    transaction.on_commit(lambda: run_export_job.delay(str(job.pk)))
+    return Response(
+        {
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_url": f"/api/v1/exports/{job.pk}/",
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def export_queryset_response(request, module, queryset):
+    """
+    Export *queryset* (already filtered by the view) with *module*'s
+    exporter: streamed, or as a background job with ``async=true``.  The
+    job rebuilds the queryset from the request's query parameters.
+    """
+    file_format = request.query_params.get("file_format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        return Response(
+            {"detail": f"file_format must be one of {', '.join(EXPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    columns = _requested_columns(request)
+    try:
+        exporter = get_exporter(module)(columns, user=request.user)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if _run_async(request):
+        if not exporter.background:
+            return Response(
+                {"detail": "This module cannot be exported in the background."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return start_export_job(
+            request,
+            module,
+            file_format,
+            columns=columns,
+            params={"query": _queryset_params(request)},
+        )
+    return export_response(
+        exporter.filename, exporter.header, exporter.rows(queryset), file_format
+    )
+
+
+# ---------------------------------------------------------------------------
+# Background exports
+# ---------------------------------------------------------------------------
+
+
+def run_export(job):
+    """Write *job*'s export file to storage; returns the row count."""
+    from apps.core.models import ExportJob
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.Status.RUNNING, started_at=timezone.now()
+    )
+    exporter = get_exporter(job.module)(job.columns, user=job.created_by)
+    row_count = 0
+
+    def counted(rows):
+        nonlocal row_count
+        for row in rows:
+            row_count += 1
+            yield row
+
+    try:
+        header, rows = exporter.job_rows(job)
+        if job.file_format == "xlsx":
+            content = iter_xlsx(header, counted(rows), sheet_name=exporter.filename)
+        else:
+            content = (line.encode() for line in iter_csv(header, counted(rows)))
+        with tempfile.TemporaryFile() as spool:
+            for piece in content:
+                spool.write(piece)
+            spool.seek(0)
+            name = f"{slugify(exporter.filename) or 'export'}.{job.file_format}"
+            job.file.save(name, File(spool), save=False)
+    except Exception as e:
+        logger.exception(f"Export job {job.pk} failed")
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.Status.FAILED,
+            error_message=str(e),
+            completed_at=timezone.now(),
+        )
+        raise
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.Status.COMPLETED,
+        file=job.file.name,
+        row_count=row_count,
+        completed_at=timezone.now(),
+    )
+    return row_count
+
+
+def make_download_token(job, user):
+    """Signed token downloading *job*'s file once, by *user*, for a few minutes."""
+    return signing.dumps(
+        {"job": str(job.pk), "user": str(user.pk), "nonce": secrets.token_hex(16)},
+        salt=DOWNLOAD_TOKEN_SALT,
+    )
+
+
+def token_expiry():
+    return timedelta(minutes=settings.EXPORT_DOWNLOAD_TOKEN_MINUTES)
+
+
+def redeem_download_token(token, job):
+    """
+    Return the id of the user *token* was issued to, consuming it.
+
+    Raises ``signing.BadSignature`` if the token is invalid, expired,
+    already used, or issued for another job.
+    """
+    max_age = token_expiry()
+    payload = signing.loads(token, salt=DOWNLOAD_TOKEN_SALT, max_age=max_age)
+    if payload.get("job") != str(job.pk):
+        raise signing.BadSignature("Token is not valid for this export.")
+    if not cache.add(
+        _USED_TOKEN_KEY.format(payload["nonce"]), 1, int(max_age.total_seconds()) + 60
+    ):
+        raise signing.BadSignature("Token has already been used.")
+    return payload["user"]
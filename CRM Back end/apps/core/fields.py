@@ -2,9 +2,134 @@
 Custom Django model fields with transparent encryption.
 """
 
+from functools import lru_cache
+
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import Promise
+
+from apps.core.encryption import (
+    blind_index,
+    decrypt_value,
+    encrypt_value,
+    is_encrypted_token,
+)
+
+_UNRESOLVED = object()
+
+
+class LazyDecryptedValue(Promise):
+    """
+    Ciphertext loaded from the database, decrypted on first use.
+
+    Model instances keep it in ``__dict__`` and hand out the plaintext as a
+    plain ``str`` (see ``DecryptedAttribute``), so list views and exports
+    that never touch an encrypted column don't pay for a Fernet decrypt per
+    row.  ``values()`` rows get the proxy itself; any string operation -
+    ``str()``, comparison, ``len()``, string methods, DRF/JSON serialization
+    (which handle ``Promise``) - resolves and caches the plaintext.
+    """
+
+    __slots__ = ("token", "_value")
+
+    def __init__(self, token):
+        self.token = token
+        self._value = _UNRESOLVED
+
+    @property
+    def is_resolved(self):
+        return self._value is not _UNRESOLVED
+
+    def resolve(self):
+        if self._value is _UNRESOLVED:
+            self._value = decrypt_value(self.token)
+        return self._value
+
+    def __str__(self):
+        return self.resolve()
+
+    def __repr__(self):
+        return repr(self.resolve())
+
+    def __html__(self):
+        return self.resolve()
+
+    def __bool__(self):
+        return bool(self.token)
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __contains__(self, item):
+        return str(item) in self.resolve()
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __eq__(self, other):
+        if isinstance(other, Promise):
+            other = str(other)
+        return self.resolve() == other
+
+    def __lt__(self, other):
+        return self.resolve() < str(other)
+
+    def __le__(self, other):
+        return self.resolve() <= str(other)
+
+    def __gt__(self, other):
+        return self.resolve() > str(other)
+
+    def __ge__(self, other):
+        return self.resolve() >= str(other)
+
+    def __hash__(self):
+        return hash(self.resolve())
+
+    def __add__(self, other):
+        return self.resolve() + str(other)
+
+    def __radd__(self, other):
+        return str(other) + self.resolve()
+
+    def __mod__(self, other):
+        return self.resolve() % other
+
+    def __format__(self, format_spec):
+        return format(self.resolve(), format_spec)
+
+    def __getattr__(self, name):
+        # Delegate str methods (strip, upper, startswith, ...); other probes
+        # such as ``hasattr(value, "resolve_expression")`` must not decrypt
+        if name.startswith("_") or not hasattr(str, name):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __reduce__(self):
+        # Pickle as ciphertext so cached instances stay encrypted
+        return (LazyDecryptedValue, (self.token,))
 
-from apps.core.encryption import decrypt_value, encrypt_value
+
+class DecryptedAttribute(DeferredAttribute):
+    """
+    Model attribute of an ``EncryptedCharField``: reading it returns the
+    decrypted ``str``, while the instance keeps the ``LazyDecryptedValue``
+    so an untouched value is saved and audited as its ciphertext.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, LazyDecryptedValue):
+            return value.resolve()
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
 
 
 class EncryptedCharField(models.CharField):
@@ -15,19 +140,90 @@ class EncryptedCharField(models.CharField):
     The encrypted value is stored as a Fernet token (base64), which is
     longer than the plaintext.  Make sure ``max_length`` is large enough
     to hold the encrypted form (typically ~120+ chars for short inputs).
+
+    Values read from the database are only decrypted when the attribute is
+    read.  Saving a value that was never read writes the stored token back
+    unchanged.
     """
 
+    descriptor_class = DecryptedAttribute
+
+    def pre_save(self, model_instance, add):
+        # The stored value, which may still be the undecrypted proxy
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
     def get_prep_value(self, value):
         """Encrypt before writing to DB."""
+        if isinstance(value, LazyDecryptedValue):
+            if not value.is_resolved and is_encrypted_token(value.token):
+                return value.token
+            value = value.resolve()
         value = super().get_prep_value(value)
         if value:
             return encrypt_value(value)
         return value
 
     def from_db_value(self, value, expression, connection):
-        """Decrypt when reading from DB."""
+        """Defer decryption until the value is used."""
         if value:
-            return decrypt_value(value)
+            return LazyDecryptedValue(value)
+        return value
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        # Report as a regular CharField in migrations
+        path = "django.db.models.CharField"
+        return name, path, args, kwargs
+
+
+class BlindIndexField(models.CharField):
+    """
+    Opt-in companion column holding an HMAC blind index of an
+    ``EncryptedCharField``, so equality lookups and duplicate detection can
+    use an indexed query instead of decrypting every row::
+
+        ein = EncryptedCharField(...)
+        ein_bidx = BlindIndexField(source_field="ein")
+
+        Corporation.objects.filter(ein_bidx=blind_index(value))
+
+    The index is recomputed on save, also when ``update_fields`` names only
+    the source field (``TimeStampedModel.save`` adds the index column, see
+    ``with_blind_indexes``).  Rows written before the column existed are
+    filled in by the ``backfill_blind_indexes`` management command.
+    """
+
+    def __init__(self, *args, source_field=None, **kwargs):
+        self.source_field = source_field
+        kwargs.setdefault("max_length", 64)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("db_index", True)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def compute(self, model_instance):
+        """Return the blind index for the instance's current source value."""
+        return blind_index(getattr(model_instance, self.source_field))
+
+    def pre_save(self, model_instance, add):
+        if self.source_field in model_instance.__dict__:
+            # The stored value, which may still be the undecrypted proxy
+            source = model_instance.__dict__[self.source_field]
+        else:
+            source = getattr(model_instance, self.source_field)
+        current = getattr(model_instance, self.attname)
+        if (
+            isinstance(source, LazyDecryptedValue)
+            and not source.is_resolved
+            and current
+        ):
+            # Untouched since it was loaded, so the stored index still matches
+            return current
+        value = blind_index(source)
+        setattr(model_instance, self.attname, value)
         return value
 
     def deconstruct(self):
@@ -35,3 +231,27 @@ class EncryptedCharField(models.CharField):
         # Report as a regular CharField in migrations
         path = "django.db.models.CharField"
         return name, path, args, kwargs
+
+
+@lru_cache(maxsize=None)
+def _blind_index_fields(model):
+    return tuple(
+        (field.source_field, field.name)
+        for field in model._meta.concrete_fields
+        if isinstance(field, BlindIndexField)
+    )
+
+
+def with_blind_indexes(model, update_fields):
+    """
+    *update_fields* plus the blind index columns of the encrypted fields it
+    names, so a partial save never leaves an index stale.
+    """
+    extra = [
+        name
+        for source, name in _blind_index_fields(model)
+        if source in update_fields and name not in update_fields
+    ]
+    if not extra:
+        return update_fields
+    return [*update_fields, *extra]
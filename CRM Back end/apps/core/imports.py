@@ -0,0 +1,258 @@
+"""
+CSV import engine shared by the module ``import_csv`` actions.
+
+Rows are parsed and validated in one streaming pass and handled in chunks
+of ``CHUNK_SIZE``.  For each chunk the importer preloads the existing
+records matching the chunk's dedup keys (normalized email, name + phone,
+EIN blind index, ...) with a few ``IN`` queries, skips duplicates - also
+against rows accepted earlier in the same file - and inserts the rest with
+one ``bulk_create``.
+
+``bulk_create`` sends no ``post_save``; instead ``records_imported`` is
+sent once per chunk with the new instances, so receivers (audit trail,
+marketing automation) handle a chunk at a time.
+
+Small files are imported inline by the view.  Larger ones, or requests
+with ``async=true``, become an ``ImportJob`` run by ``run_import_job``;
+clients poll ``/api/v1/imports/<id>/`` for progress and the result.
+"""
+
+import csv
+import io
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.signals import records_imported
+from apps.core.validators import validate_csv_import
+
+logger = logging.getLogger(__name__)
+
+# Rows validated, deduplicated and inserted together
+CHUNK_SIZE = 500
+
+# Module name -> importer class
+IMPORTERS = {
+    "contacts": "apps.contacts.importers.ContactImporter",
+    "corporations": "apps.corporations.importers.CorporationImporter",
+}
+
+
+def get_importer(module):
+    return import_string(IMPORTERS[module])
+
+
+def normalize_row(row):
+    """Normalise header keys (trimmed, lowercase, underscores) and values."""
+    return {
+        k.strip().lower().replace(" ", "_"): (v or "").strip()
+        for k, v in row.items()
+        if k
+    }
+
+
+class CSVImporter:
+    """
+    Base importer.  Subclasses set ``model`` and ``serializer_class`` and
+    implement ``dedup_keys`` / ``find_existing``.
+    """
+
+    model = None
+    serializer_class = None
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, user):
+        self.user = user
+        # Dedup key -> id of the row it matched, existing or imported
+        self.seen = {}
+
+    # -- hooks ---------------------------------------------------------
+    def dedup_keys(self, data):
+        """``[(key, reason)]`` identifying duplicates of *data*, in priority order."""
+        return []
+
+    def find_existing(self, keys):
+        """Map each of *keys* that matches a stored record to its id."""
+        return {}
+
+    def build(self, data):
+        return self.model(created_by=self.user, **data)
+
+    def prepare(self, instances):
+        """Fill values ``save()`` would compute, before ``bulk_create``."""
+
+    # -- engine --------------------------------------------------------
+    def run(self, content, progress=None):
+        """
+        Import the CSV text *content*.
+
+        Returns ``{"created", "skipped", "errors", "total_processed"}``;
+        *progress* is called with the processed row count after each chunk.
+        """
+        result = {"created": 0, "skipped": [], "errors": []}
+        processed = 0
+        chunk = []
+        reader = csv.DictReader(io.StringIO(content))
+        for row_number, row in enumerate(reader, start=2):  # row 1 is header
+            serializer = self.serializer_class(data=normalize_row(row))
+            if serializer.is_valid():
+                chunk.append((row_number, serializer.validated_data))
+            else:
+                result["errors"].append(
+                    {"row": row_number, "errors": serializer.errors}
+                )
+            processed += 1
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, result)
+                chunk = []
+                if progress:
+                    progress(processed, result)
+        if chunk:
+            self._import_chunk(chunk, result)
+        if progress:
+            progress(processed, result)
+
+        result["total_processed"] = processed
+        return result
+
+    def _import_chunk(self, chunk, result):
+        keyed = [(row, data, self.dedup_keys(data)) for row, data in chunk]
+        unseen = {
+            key for _, _, keys in keyed for key, _ in keys if key not in self.seen
+        }
+        if unseen:
+            self.seen.update(self.find_existing(unseen))
+
+        instances = []
+        for row_number, data, keys in keyed:
+            duplicate = next(
+                ((key, reason) for key, reason in keys if key in self.seen), None
+            )
+            if duplicate:
+                key, reason = duplicate
+                result["skipped"].append(
+                    {
+                        "row": row_number,
+                        "reason": reason,
+                        "matched_id": str(self.seen[key]),
+                    }
+                )
+                continue
+            instance = self.build(data)
+            for key, _ in keys:
+                self.seen[key] = instance.pk
+            instances.append(instance)
+
+        if not instances:
+            return
+        with transaction.atomic():
+            self.prepare(instances)
+            self.model.objects.bulk_create(instances)
+            records_imported.send(
+                sender=self.model, instances=instances, user=self.user
+            )
+        result["created"] += len(instances)
+
+
+def run_import(job, content):
+    """Run *job* (an ``ImportJob``) over the CSV text *content*."""
+    from django.utils import timezone
+
+    from apps.core.models import ImportJob
+
+    def progress(processed, result):
+        ImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=processed,
+            created_count=result["created"],
+            skipped_count=len(result["skipped"]),
+            error_count=len(result["errors"]),
+        )
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.Status.RUNNING, started_at=timezone.now()
+    )
+    try:
+        importer = get_importer(job.module)(job.created_by)
+        result = importer.run(content, progress=progress)
+    except Exception as e:
+        logger.exception(f"Import job {job.pk} failed")
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.Status.FAILED,
+            error_message=str(e),
+            completed_at=timezone.now(),
+        )
+        raise
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.Status.COMPLETED,
+        result=result,
+        completed_at=timezone.now(),
+    )
+    return result
+
+
+def import_csv_response(request, module):
+    """
+    Handle an ``import_csv`` upload for *module*.
+
+    Files of up to ``IMPORT_SYNC_MAX_ROWS`` rows are imported inline and
+    answered with the summary (201, or 400 if nothing was created).
+    Larger files, or ``async=true``, start an ``ImportJob`` and answer 202
+    with its id and status URL.
+    """
+    from apps.core.models import ImportJob
+    from apps.core.tasks import run_import_job
+
+    csv_file = request.FILES.get("file")
+    if not csv_file:
+        return Response(
+            {"detail": "No file uploaded. Provide a 'file' field."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Validate file size and format
+    try:
+        decoded, row_count = validate_csv_import(csv_file)
+    except DjangoValidationError as e:
+        return Response(
+            {"detail": str(e.message)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    run_async = str(request.data.get("async", "")).lower() in ("1", "true")
+    if not run_async and row_count <= settings.IMPORT_SYNC_MAX_ROWS:
+        result = get_importer(module)(request.user).run(decoded)
+        return Response(
+            result,
+            status=(
+                status.HTTP_201_CREATED
+                if result["created"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    job = ImportJob(
+        module=module,
+        filename=csv_file.name[:255],
+        total_rows=row_count,
+        created_by=request.user,
+    )
+    # Stored with the job so the task message only carries its id
+    job.file.save("import.csv", ContentFile(decoded.encode("utf-8")), save=False)
+    job.save()
+    job_id = str(job.pk)
+    transaction.on_commit(lambda: run_import_job.delay(job_id))
+    return Response(
+        {
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_url": f"/api/v1/imports/{job.pk}/",
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
@@ -0,0 +1,82 @@
+"""
+Management command to fill in blind-index columns for encrypted fields.
+
+Usage:
+    python manage.py backfill_blind_indexes
+    python manage.py backfill_blind_indexes --batch-size 500
+    python manage.py backfill_blind_indexes --model contacts.Contact --rebuild
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.fields import BlindIndexField
+
+
+def blind_index_fields(model):
+    return [f for f in model._meta.concrete_fields if isinstance(f, BlindIndexField)]
+
+
+class Command(BaseCommand):
+    help = "Compute missing blind indexes for encrypted fields in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows read and updated per batch (default: 1000).",
+        )
+        parser.add_argument(
+            "--model",
+            type=str,
+            default="",
+            help="Restrict to one model, as app_label.ModelName.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute every index, e.g. after changing BLIND_INDEX_KEY.",
+        )
+
+    def handle(self, *args, **options):
+        if options["model"]:
+            try:
+                models = [apps.get_model(options["model"])]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+        else:
+            models = [m for m in apps.get_models() if blind_index_fields(m)]
+
+        for model in models:
+            fields = blind_index_fields(model)
+            if not fields:
+                raise CommandError(f"{model._meta.label} has no blind index fields.")
+            for field in fields:
+                updated = self._backfill(
+                    model, field, options["batch_size"], options["rebuild"]
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{model._meta.label}.{field.name}: {updated} rows updated"
+                    )
+                )
+
+    def _backfill(self, model, field, batch_size, rebuild):
+        qs = model._default_manager.exclude(**{field.source_field: ""})
+        if not rebuild:
+            qs = qs.filter(**{field.attname: ""})
+        qs = qs.only("pk", field.source_field, field.attname).order_by("pk")
+
+        updated = 0
+        last_pk = None
+        while True:
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                return updated
+            for obj in batch:
+                setattr(obj, field.attname, field.compute(obj))
+            model._default_manager.bulk_update(batch, [field.attname])
+            updated += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,69 @@
+"""
+Management command to (re)build the full-text search index.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --module contacts --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import SearchDocument
+from apps.core.search import (
+    INDEX_BATCH_SIZE,
+    SEARCH_SOURCES,
+    get_source,
+    index_objects,
+)
+
+
+class Command(BaseCommand):
+    help = "Index every searchable record and drop entries of deleted ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=INDEX_BATCH_SIZE,
+            help=f"Records indexed per batch (default: {INDEX_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--module",
+            type=str,
+            default="",
+            help=f"Restrict to one module: {', '.join(SEARCH_SOURCES)}.",
+        )
+
+    def handle(self, *args, **options):
+        if options["module"]:
+            if options["module"] not in SEARCH_SOURCES:
+                raise CommandError(f"Unknown module: {options['module']}")
+            modules = [options["module"]]
+        else:
+            modules = list(SEARCH_SOURCES)
+
+        for module in modules:
+            indexed = self._index(module, options["batch_size"])
+            source = get_source(module)
+            removed, _ = (
+                SearchDocument.objects.filter(module=module)
+                .exclude(object_id__in=source.model._default_manager.values("pk"))
+                .delete()
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{module}: {indexed} records indexed, {removed} stale entries removed"
+                )
+            )
+
+    def _index(self, module, batch_size):
+        qs = get_source(module).queryset().order_by("pk")
+        indexed = 0
+        last_pk = None
+        while True:
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                return indexed
+            indexed += index_objects(module, batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,88 @@
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# Created on PostgreSQL only; SQLite (tests, local development) searches
+# SearchDocument.content without an index.
+POSTGRES_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS crm_search_documents_vector_gin "
+    "ON crm_search_documents USING gin (vector)",
+    "CREATE INDEX IF NOT EXISTS crm_search_documents_content_trgm "
+    "ON crm_search_documents USING gin (content gin_trgm_ops)",
+]
+
+DROP_POSTGRES_INDEXES = [
+    "DROP INDEX IF EXISTS crm_search_documents_content_trgm",
+    "DROP INDEX IF EXISTS crm_search_documents_vector_gin",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in POSTGRES_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in DROP_POSTGRES_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_exportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("module", models.CharField(max_length=30, verbose_name="module")),
+                ("object_id", models.UUIDField(verbose_name="object id")),
+                (
+                    "title",
+                    models.CharField(
+                        blank=True, default="", max_length=255, verbose_name="title"
+                    ),
+                ),
+                (
+                    "content",
+                    models.TextField(blank=True, default="", verbose_name="content"),
+                ),
+                (
+                    "vector",
+                    django.contrib.postgres.search.SearchVectorField(
+                        blank=True, null=True, verbose_name="search vector"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+            ],
+            options={
+                "verbose_name": "search document",
+                "verbose_name_plural": "search documents",
+                "db_table": "crm_search_documents",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("module", "object_id"), name="uniq_search_document"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
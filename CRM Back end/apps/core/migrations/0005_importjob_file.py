@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="file",
+            field=models.FileField(
+                blank=True, upload_to="imports/%Y/%m/", verbose_name="file"
+            ),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_importjob_file"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="exportjob",
+            name="query",
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+from apps.core.search import SEARCH_SOURCES, get_source
+
+BATCH_SIZE = 500
+
+
+def index_existing_records(apps, schema_editor):
+    # Records saved before 0004 have no search document; later writes are
+    # indexed by the search signals.  ``rebuild_search_index`` does the same
+    # job by hand.
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    full_text = schema_editor.connection.vendor == "postgresql"
+    for module in SEARCH_SOURCES:
+        source = get_source(module)
+        model = apps.get_model(source.model._meta.label)
+        qs = model._default_manager.only("pk", *source.fields).order_by("pk")
+        last_pk = None
+        while True:
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:BATCH_SIZE])
+            if not batch:
+                break
+            documents = []
+            for obj in batch:
+                title, content = source.document(obj)
+                documents.append(
+                    SearchDocument(
+                        module=module, object_id=obj.pk, title=title, content=content
+                    )
+                )
+            SearchDocument.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=["module", "object_id"],
+                update_fields=["title", "content", "updated_at"],
+            )
+            if full_text:
+                SearchDocument.objects.filter(
+                    module=module, object_id__in=[obj.pk for obj in batch]
+                ).update(
+                    vector=SearchVector("title", weight="A", config=source.config)
+                    + SearchVector("content", weight="B", config=source.config)
+                )
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_remove_exportjob_query"),
+        ("contacts", "0012_contact_ssn_last_four_bidx"),
+        ("corporations", "0010_corporation_ein_bidx"),
+        ("emails", "0003_account_imap_checkpoint"),
+        ("knowledge_base", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_records, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 import uuid
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from apps.core.fields import with_blind_indexes
+
 
 class TimeStampedModel(models.Model):
     """Abstract base for all CRM entities."""
@@ -15,6 +18,13 @@ class TimeStampedModel(models.Model):
         abstract = True
         ordering = ["-created_at"]
 
+    def save(self, *args, **kwargs):
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = with_blind_indexes(
+                type(self), kwargs["update_fields"]
+            )
+        super().save(*args, **kwargs)
+
 
 class Backup(TimeStampedModel):
     """
@@ -137,3 +147,132 @@ class Backup(TimeStampedModel):
                 return f"{size:.1f} {unit}"
             size /= 1024
         return f"{size:.1f} TB"
+
+
+class ImportJob(TimeStampedModel):
+    """
+    A CSV import run in the background by ``run_import_job``.
+
+    ``file`` holds the uploaded CSV until the job has run.  Counters are
+    updated after every chunk so clients can poll progress; ``result``
+    holds the final summary (created / skipped / errors).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
+    module = models.CharField(_("module"), max_length=50)
+    filename = models.CharField(_("filename"), max_length=255, blank=True, default="")
+    file = models.FileField(_("file"), upload_to="imports/%Y/%m/", blank=True)
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    total_rows = models.PositiveIntegerField(_("total rows"), default=0)
+    processed_rows = models.PositiveIntegerField(_("processed rows"), default=0)
+    created_count = models.PositiveIntegerField(_("created"), default=0)
+    skipped_count = models.PositiveIntegerField(_("skipped"), default=0)
+    error_count = models.PositiveIntegerField(_("errors"), default=0)
+    result = models.JSONField(_("result"), default=dict, blank=True)
+    error_message = models.TextField(_("error message"), blank=True, default="")
+    created_by = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="import_jobs",
+        verbose_name=_("created by"),
+    )
+    started_at = models.DateTimeField(_("started at"), null=True, blank=True)
+    completed_at = models.DateTimeField(_("completed at"), null=True, blank=True)
+
+    class Meta:
+        db_table = "crm_import_jobs"
+        ordering = ["-created_at"]
+        verbose_name = _("import job")
+        verbose_name_plural = _("import jobs")
+
+    def __str__(self):
+        return f"{self.module} import ({self.get_status_display()})"
+
+
+class ExportJob(TimeStampedModel):
+    """
+    An export written to storage by ``run_export_job``; downloaded with a
+    signed token from the ``download-token`` action.  ``params`` holds what
+    the exporter needs to rebuild its rows (the module's query parameters,
+    or the report id).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
+    module = models.CharField(_("module"), max_length=50)
+    file_format = models.CharField(_("file format"), max_length=10, default="csv")
+    columns = models.JSONField(_("columns"), default=list, blank=True)
+    params = models.JSONField(_("parameters"), default=dict, blank=True)
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    file = models.FileField(_("file"), upload_to="exports/%Y/%m/", blank=True)
+    row_count = models.PositiveIntegerField(_("row count"), default=0)
+    error_message = models.TextField(_("error message"), blank=True, default="")
+    created_by = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+        verbose_name=_("created by"),
+    )
+    started_at = models.DateTimeField(_("started at"), null=True, blank=True)
+    completed_at = models.DateTimeField(_("completed at"), null=True, blank=True)
+
+    class Meta:
+        db_table = "crm_export_jobs"
+        ordering = ["-created_at"]
+        verbose_name = _("export job")
+        verbose_name_plural = _("export jobs")
+
+    def __str__(self):
+        return f"{self.module} export ({self.get_status_display()})"
+
+
+class SearchDocument(models.Model):
+    """
+    Search index entry of one record (see ``apps.core.search``).
+
+    The GIN indexes on ``vector`` and ``content`` (trigram) are created by
+    migration on PostgreSQL only and are not declared in ``Meta``.
+    """
+
+    module = models.CharField(_("module"), max_length=30)
+    object_id = models.UUIDField(_("object id"))
+    title = models.CharField(_("title"), max_length=255, blank=True, default="")
+    # Lowercased searchable text
+    content = models.TextField(_("content"), blank=True, default="")
+    # Weighted tsvector of title + content; PostgreSQL only
+    vector = SearchVectorField(_("search vector"), null=True, blank=True)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        db_table = "crm_search_documents"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["module", "object_id"], name="uniq_search_document"
+            )
+        ]
+        verbose_name = _("search document")
+        verbose_name_plural = _("search documents")
+
+    def __str__(self):
+        return f"{self.module}: {self.title}"
@@ -8,6 +8,8 @@ access to other users' data by manipulating IDs in URLs.
 
 from rest_framework.permissions import BasePermission
 
+from apps.users.services.permission_matrix import is_admin_user, user_role_slug
+
 
 class IsOwnerOrAdmin(BasePermission):
     """
@@ -29,12 +31,7 @@ class IsOwnerOrAdmin(BasePermission):
         user = request.user
 
         # Superusers and admins bypass IDOR checks
-        if user.is_superuser:
-            return True
-
-        from apps.users.models import Role
-
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        if is_admin_user(user):
             return True
 
         # Get the owner field name from the view or use defaults
@@ -80,12 +77,7 @@ class IsOwnerOrReadOnly(BasePermission):
         user = request.user
 
         # Superusers and admins can write
-        if user.is_superuser:
-            return True
-
-        from apps.users.models import Role
-
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        if is_admin_user(user):
             return True
 
         # Check ownership for write operations
@@ -129,12 +121,7 @@ class HasRelatedObjectAccess(BasePermission):
         user = request.user
 
         # Superusers bypass
-        if user.is_superuser:
-            return True
-
-        from apps.users.models import Role
-
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        if is_admin_user(user):
             return True
 
         related_checks = getattr(view, "related_object_checks", [])
@@ -173,12 +160,7 @@ class CanAccessContact(BasePermission):
     def has_object_permission(self, request, view, obj):
         user = request.user
 
-        if user.is_superuser:
-            return True
-
-        from apps.users.models import Role
-
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        if is_admin_user(user):
             return True
 
         # Owner check
@@ -215,7 +197,7 @@ class CanAccessCase(BasePermission):
 
         from apps.users.models import Role
 
-        if user.role and user.role.slug in [
+        if user_role_slug(user) in [
             Role.RoleSlug.ADMIN,
             Role.RoleSlug.MANAGER,
         ]:
@@ -249,12 +231,7 @@ class CanAccessDocument(BasePermission):
     def has_object_permission(self, request, view, obj):
         user = request.user
 
-        if user.is_superuser:
-            return True
-
-        from apps.users.models import Role
-
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        if is_admin_user(user):
             return True
 
         # Uploader check
@@ -0,0 +1,272 @@
+"""
+Full-text search over CRM records.
+
+Each searchable model has a ``SearchSource`` that turns an instance into a
+``SearchDocument``: a title and a lowercased text blob (names, emails,
+phone numbers with and without punctuation, bodies).  Documents are kept
+current by ``post_save`` / ``post_delete`` receivers and the bulk-insert
+signals (``records_imported``, ``inbound_messages_synced``); the
+``rebuild_search_index`` command backfills them.
+
+On PostgreSQL a document also stores a weighted ``tsvector`` (title A,
+text B) with a GIN index, and the text has a trigram GIN index, so both
+word queries and partial names / phone numbers (``LIKE '%...%'``) are
+index lookups.  Results are ranked with ``ts_rank`` plus trigram
+similarity of the title.  Other databases (SQLite in tests) match the
+text with ``LIKE`` and rank title matches first.
+"""
+
+import logging
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connection
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Shorter queries match too much to be useful
+MIN_QUERY_LENGTH = 2
+
+# Longest text indexed per record (long email bodies are truncated)
+CONTENT_MAX_LENGTH = 50_000
+
+# Records indexed per statement by the backfill
+INDEX_BATCH_SIZE = 500
+
+# Module name -> search source class
+SEARCH_SOURCES = {
+    "contacts": "apps.contacts.search.ContactSearch",
+    "corporations": "apps.corporations.search.CorporationSearch",
+    "emails": "apps.emails.search.EmailMessageSearch",
+    "articles": "apps.knowledge_base.search.ArticleSearch",
+}
+
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def get_source(module):
+    return import_string(SEARCH_SOURCES[module])()
+
+
+def digits(value):
+    return _NON_DIGITS_RE.sub("", value or "")
+
+
+def _normalize(query):
+    return " ".join(query.split()).lower()
+
+
+def uses_full_text():
+    return connection.vendor == "postgresql"
+
+
+class SearchSource(ABC):
+    """
+    How one model is indexed.  Subclasses set ``model`` and ``fields`` (the
+    fields read by ``title`` / ``texts`` / ``phones``) and implement
+    ``title``.
+    """
+
+    module = None
+    model = None
+    fields = ()
+    # PostgreSQL text search configuration
+    config = "simple"
+
+    @abstractmethod
+    def title(self, obj):
+        """The record's display title, weighted above the other text."""
+
+    def texts(self, obj):
+        """Further text to match, in no particular order."""
+        return []
+
+    def phones(self, obj):
+        """Phone numbers, also indexed as bare digits."""
+        return []
+
+    def queryset(self):
+        return self.model._default_manager.only("pk", *self.fields)
+
+    def document(self, obj):
+        """``(title, content)`` of *obj*'s search document."""
+        title = self.title(obj) or ""
+        parts = [title, *self.texts(obj)]
+        for phone in self.phones(obj):
+            parts.append(phone)
+            number = digits(phone)
+            if number != phone:
+                parts.append(number)
+        content = " ".join(str(part) for part in parts if part)
+        return title[:255], content[:CONTENT_MAX_LENGTH].lower()
+
+
+def _vector(config):
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("title", weight="A", config=config) + SearchVector(
+        "content", weight="B", config=config
+    )
+
+
+# ---------------------------------------------------------------------------
+# Indexing
+# ---------------------------------------------------------------------------
+
+
+def index_objects(module, objects):
+    """Create or refresh the search documents of *objects*."""
+    from apps.core.models import SearchDocument
+
+    source = get_source(module)
+    documents = []
+    for obj in objects:
+        title, content = source.document(obj)
+        documents.append(
+            SearchDocument(
+                module=module, object_id=obj.pk, title=title, content=content
+            )
+        )
+    if not documents:
+        return 0
+
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["module", "object_id"],
+        update_fields=["title", "content", "updated_at"],
+    )
+    if uses_full_text():
+        SearchDocument.objects.filter(
+            module=module, object_id__in=[doc.object_id for doc in documents]
+        ).update(vector=_vector(source.config))
+    return len(documents)
+
+
+def remove_objects(module, object_ids):
+    from apps.core.models import SearchDocument
+
+    SearchDocument.objects.filter(module=module, object_id__in=object_ids).delete()
+
+
+_module_by_model = {}
+
+
+def _indexed_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    module = _module_by_model[sender]
+    if update_fields is not None and not (
+        set(update_fields) & set(get_source(module).fields)
+    ):
+        return
+    index_objects(module, [instance])
+
+
+def _indexed_deleted(sender, instance, **kwargs):
+    remove_objects(_module_by_model[sender], [instance.pk])
+
+
+def _indexed_imported(sender, instances, **kwargs):
+    module = _module_by_model.get(sender)
+    if module:
+        index_objects(module, instances)
+
+
+def _indexed_emails_synced(sender, message_ids, **kwargs):
+    source = get_source("emails")
+    index_objects("emails", source.queryset().filter(pk__in=message_ids))
+
+
+def register_search_signals():
+    from apps.core.signals import records_imported
+    from apps.emails.signals import inbound_messages_synced
+
+    for module in SEARCH_SOURCES:
+        model = get_source(module).model
+        _module_by_model[model] = module
+        post_save.connect(
+            _indexed_saved, sender=model, dispatch_uid=f"search_index_{module}"
+        )
+        post_delete.connect(
+            _indexed_deleted, sender=model, dispatch_uid=f"search_remove_{module}"
+        )
+    records_imported.connect(_indexed_imported, dispatch_uid="search_index_imported")
+    inbound_messages_synced.connect(
+        _indexed_emails_synced, dispatch_uid="search_index_emails_synced"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Querying
+# ---------------------------------------------------------------------------
+
+
+def matches(module, query):
+    """``SearchDocument`` rows of *module* matching *query*, with ``rank``."""
+    from apps.core.models import SearchDocument
+
+    text = _normalize(query)
+    condition = Q(content__contains=text)
+    number = digits(text)
+    if len(number) >= 4 and number != text:
+        condition |= Q(content__contains=number)
+
+    if uses_full_text():
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            TrigramWordSimilarity,
+        )
+
+        ts_query = SearchQuery(
+            text, config=get_source(module).config, search_type="websearch"
+        )
+        condition |= Q(vector=ts_query)
+        rank = SearchRank(F("vector"), ts_query) + TrigramWordSimilarity(text, "title")
+    else:
+        rank = Case(
+            When(title__istartswith=text, then=Value(2.0)),
+            When(title__icontains=text, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return SearchDocument.objects.filter(condition, module=module).annotate(rank=rank)
+
+
+def search_ids(module, query):
+    """Subquery of the ids of *module* records matching *query*."""
+    return matches(module, query).values("object_id")
+
+
+def filter_queryset(queryset, module, query):
+    """*queryset* narrowed to records matching *query*, in its own order."""
+    if len(query.strip()) < MIN_QUERY_LENGTH:
+        return queryset
+    return queryset.filter(pk__in=search_ids(module, query))
+
+
+def ranked(queryset, module, query):
+    """
+    *queryset* narrowed to records matching *query*, best match first;
+    the rank is available as ``search_rank``.
+    """
+    found = matches(module, query)
+    rank = found.filter(object_id=OuterRef("pk")).values("rank")[:1]
+    return (
+        queryset.filter(pk__in=found.values("object_id"))
+        .annotate(search_rank=Subquery(rank, output_field=FloatField()))
+        .order_by("-search_rank", "-pk")
+    )
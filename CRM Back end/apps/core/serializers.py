@@ -1,10 +1,10 @@
 """
-Serializers for backup and restore operations.
+Serializers for backup / restore operations and import jobs.
 """
 
 from rest_framework import serializers
 
-from apps.core.models import Backup
+from apps.core.models import Backup, ExportJob, ImportJob
 
 
 class _UserSummarySerializer(serializers.Serializer):
@@ -167,3 +167,63 @@ class BackupTaskStatusSerializer(serializers.Serializer):
     status = serializers.CharField()
     result = serializers.DictField(required=False, allow_null=True)
     error = serializers.CharField(required=False, allow_null=True)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Progress and result of a background CSV import.
+    """
+
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "module",
+            "filename",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "created_count",
+            "skipped_count",
+            "error_count",
+            "result",
+            "error_message",
+            "created_at",
+            "started_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Percentage of rows processed (0-100)."""
+        if obj.status == ImportJob.Status.COMPLETED:
+            return 100
+        if not obj.total_rows:
+            return 0
+        return min(100, round(obj.processed_rows * 100 / obj.total_rows))
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Status of a background export; download the file through
+    ``download-token`` once it is completed.
+    """
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "module",
+            "file_format",
+            "columns",
+            "status",
+            "row_count",
+            "error_message",
+            "created_at",
+            "started_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,10 @@
+"""
+Signals sent by the core app.
+"""
+
+from django.dispatch import Signal
+
+# Sent once per chunk by the CSV import engine (apps.core.imports), whose
+# bulk_create skips post_save.  Arguments: ``instances`` (the new model
+# instances, all of the sender model), ``user`` (the importing user).
+records_imported = Signal()
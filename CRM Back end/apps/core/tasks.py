@@ -1,5 +1,5 @@
 """
-Celery tasks for backup and restore operations.
+Celery tasks for backup / restore operations and CSV import / export jobs.
 """
 
 import logging
@@ -143,3 +143,93 @@ def cleanup_old_backups(days: int = 30) -> dict:
             logger.warning(f"Could not delete backup {backup.id}: {e}")
 
     return {"deleted_backups": deleted_count}
+
+
+@shared_task
+def run_import_job(job_id: str) -> dict:
+    """
+    Run a background CSV import (see ``apps.core.imports``).
+
+    The CSV is read from the job's ``file``, which is deleted once the job
+    has run.  Not retried: a failed job is marked failed and can be
+    re-uploaded; rows it already inserted are then skipped as duplicates.
+    """
+    from django.utils import timezone
+
+    from apps.core.imports import run_import
+    from apps.core.models import ImportJob
+
+    try:
+        job = ImportJob.objects.select_related("created_by").get(id=job_id)
+    except ImportJob.DoesNotExist:
+        logger.error(f"Import job not found: {job_id}")
+        return {"status": "error", "message": "Import job not found"}
+
+    try:
+        try:
+            with job.file.open("rb") as f:
+                csv_content = f.read().decode("utf-8")
+        except (OSError, ValueError) as e:
+            logger.error(f"Import job {job_id}: upload unreadable: {e}")
+            ImportJob.objects.filter(pk=job.pk).update(
+                status=ImportJob.Status.FAILED,
+                error_message="The uploaded file is no longer available.",
+                completed_at=timezone.now(),
+            )
+            return {"status": "error", "message": "Upload unavailable"}
+        result = run_import(job, csv_content)
+    finally:
+        if job.file:
+            job.file.delete(save=False)
+            ImportJob.objects.filter(pk=job.pk).update(file="")
+    logger.info(
+        f"Import job {job_id} ({job.module}): {result['created']} created, "
+        f"{len(result['skipped'])} skipped, {len(result['errors'])} errors"
+    )
+    return {
+        "status": "completed",
+        "created": result["created"],
+        "skipped": len(result["skipped"]),
+        "errors": len(result["errors"]),
+    }
+
+
+@shared_task
+def run_export_job(job_id: str) -> dict:
+    """Write a background export file (see ``apps.core.exports``)."""
+    from apps.core.exports import run_export
+    from apps.core.models import ExportJob
+
+    try:
+        job = ExportJob.objects.get(id=job_id)
+    except ExportJob.DoesNotExist:
+        logger.error(f"Export job not found: {job_id}")
+        return {"status": "error", "message": "Export job not found"}
+
+    row_count = run_export(job)
+    logger.info(f"Export job {job_id} ({job.module}): {row_count} rows")
+    return {"status": "completed", "row_count": row_count}
+
+
+@shared_task
+def cleanup_export_jobs() -> dict:
+    """Delete export jobs and their files after ``EXPORT_RETENTION_HOURS``."""
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    from apps.core.models import ExportJob
+
+    cutoff = timezone.now() - timedelta(hours=settings.EXPORT_RETENTION_HOURS)
+    deleted_count = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).iterator():
+        try:
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
+            deleted_count += 1
+        except Exception as e:
+            logger.warning(f"Could not delete export job {job.id}: {e}")
+
+    return {"deleted_exports": deleted_count}
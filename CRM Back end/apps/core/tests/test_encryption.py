@@ -1,14 +1,22 @@
+import pickle
+from io import StringIO
+from unittest import mock
+
 import pytest
 from cryptography.fernet import Fernet
+from django.core.management import call_command
 from django.db import connection
 
 import apps.core.encryption as encryption_module
+from apps.contacts.models import Contact
 from apps.core.encryption import (
     _NOT_INITIALIZED,
+    blind_index,
     decrypt_value,
     encrypt_value,
     generate_encryption_key,
 )
+from apps.corporations.models import Corporation
 from tests.factories import ContactFactory, CorporationFactory
 
 pytestmark = pytest.mark.django_db
@@ -186,3 +194,155 @@ class TestEncryptedCharField:
             cursor.execute("SELECT ssn_last_four FROM crm_contacts LIMIT 1")
             raw_value = cursor.fetchone()[0]
         assert raw_value == "1234"
+
+
+def _enable_encryption(settings):
+    settings.FIELD_ENCRYPTION_KEY = Fernet.generate_key().decode()
+    encryption_module._fernet_instance = _NOT_INITIALIZED
+
+
+class TestLazyDecryption:
+    """Encrypted values are only decrypted when they are used."""
+
+    def test_loaded_value_is_not_decrypted_until_used(self, settings):
+        _enable_encryption(settings)
+        contact = ContactFactory(ssn_last_four="1234")
+
+        with mock.patch(
+            "apps.core.fields.decrypt_value", wraps=decrypt_value
+        ) as decrypt:
+            loaded = Contact.objects.get(pk=contact.pk)
+            assert decrypt.call_count == 0
+            assert loaded.ssn_last_four == "1234"
+            assert str(loaded.ssn_last_four) == "1234"
+            assert decrypt.call_count == 1
+
+    def test_proxy_behaves_like_a_string(self, settings):
+        _enable_encryption(settings)
+        corp = CorporationFactory(ein="12-3456789")
+        ein = Corporation.objects.get(pk=corp.pk).ein
+
+        assert ein
+        assert len(ein) == 10
+        assert ein.startswith("12-")
+        assert "345" in ein
+        assert f"EIN {ein}" == "EIN 12-3456789"
+        assert {ein: 1}["12-3456789"] == 1
+        assert pickle.loads(pickle.dumps(ein)) == "12-3456789"
+
+    def test_attribute_is_a_plain_string(self, settings):
+        _enable_encryption(settings)
+        contact = ContactFactory(ssn_last_four="1234")
+
+        value = Contact.objects.get(pk=contact.pk).ssn_last_four
+
+        assert type(value) is str
+        assert value == "1234"
+
+    def test_saving_untouched_value_keeps_ciphertext(self, settings):
+        _enable_encryption(settings)
+        contact = ContactFactory(ssn_last_four="1234")
+        raw_before = (
+            Contact.objects.filter(pk=contact.pk)
+            .values_list("ssn_last_four", flat=True)[0]
+            .token
+        )
+
+        loaded = Contact.objects.get(pk=contact.pk)
+        loaded.first_name = "Renamed"
+        with mock.patch("apps.core.fields.encrypt_value") as encrypt:
+            loaded.save()
+        encrypt.assert_not_called()
+
+        raw_after = (
+            Contact.objects.filter(pk=contact.pk)
+            .values_list("ssn_last_four", flat=True)[0]
+            .token
+        )
+        assert raw_after == raw_before
+
+
+class TestBlindIndex:
+    """Exact-match lookups on encrypted columns through their blind index."""
+
+    def test_blind_index_is_deterministic(self):
+        assert blind_index("12-3456789") == blind_index(" 12-3456789 ")
+        assert blind_index("12-3456789") != blind_index("12-3456788")
+        assert blind_index("") == ""
+
+    def test_index_written_on_save_and_matches(self, settings):
+        _enable_encryption(settings)
+        corp = CorporationFactory(ein="12-3456789")
+        CorporationFactory(ein="98-7654321")
+
+        matches = Corporation.objects.filter(ein_bidx=blind_index("12-3456789"))
+        assert list(matches.values_list("pk", flat=True)) == [corp.pk]
+
+    def test_index_follows_value_changes(self, settings):
+        _enable_encryption(settings)
+        contact = ContactFactory(ssn_last_four="1234")
+        contact.ssn_last_four = "5678"
+        contact.save()
+        contact.refresh_from_db()
+        assert contact.ssn_last_four_bidx == blind_index("5678")
+
+        contact.ssn_last_four = ""
+        contact.save()
+        contact.refresh_from_db()
+        assert contact.ssn_last_four_bidx == ""
+
+    def test_index_follows_partial_saves(self, settings):
+        _enable_encryption(settings)
+        contact = ContactFactory(ssn_last_four="1234")
+
+        contact.ssn_last_four = "5678"
+        contact.save(update_fields=["ssn_last_four"])
+
+        contact.refresh_from_db()
+        assert contact.ssn_last_four_bidx == blind_index("5678")
+
+    def test_backfill_command_fills_missing_indexes(self, settings):
+        _enable_encryption(settings)
+        corps = [CorporationFactory(ein=f"12-345678{i}") for i in range(5)]
+        Corporation.objects.update(ein_bidx="")
+
+        out = StringIO()
+        call_command(
+            "backfill_blind_indexes",
+            "--model",
+            "corporations.Corporation",
+            "--batch-size",
+            "2",
+            stdout=out,
+        )
+
+        assert "5 rows updated" in out.getvalue()
+        for i, corp in enumerate(corps):
+            corp.refresh_from_db()
+            assert corp.ein_bidx == blind_index(f"12-345678{i}")
+
+
+class TestDecryptCostBenchmark:
+    """
+    Fernet decrypts per contact list request.
+
+    Before lazy decryption every row decrypted ``ssn_last_four`` while being
+    loaded, although the list serializer never shows it (one decrypt per
+    row).  Now the list view decrypts nothing.
+    """
+
+    ROWS = 50
+
+    def test_list_view_decrypts_nothing(self, settings, admin_client):
+        _enable_encryption(settings)
+        for i in range(self.ROWS):
+            ContactFactory(ssn_last_four=f"{1000 + i}")
+
+        with mock.patch(
+            "apps.core.fields.decrypt_value", wraps=decrypt_value
+        ) as decrypt:
+            resp = admin_client.get("/api/v1/contacts/", {"page_size": self.ROWS})
+        assert resp.status_code == 200
+        assert len(resp.data["results"]) == self.ROWS
+        # Was one decrypt per row
+        assert decrypt.call_count == 0
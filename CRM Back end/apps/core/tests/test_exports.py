@@ -0,0 +1,184 @@
+import csv
+import io
+from unittest import mock
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.core import exports
+from apps.core.models import ExportJob
+from tests.factories import ContactFactory, CorporationFactory
+
+CONTACTS_EXPORT = "/api/v1/contacts/export_csv/"
+
+
+def _rows(response):
+    content = b"".join(response.streaming_content).decode()
+    return list(csv.reader(io.StringIO(content)))
+
+
+@pytest.mark.django_db
+class TestExportQueryset:
+    def test_selected_columns_in_requested_order(self, authenticated_client):
+        ContactFactory(first_name="Ana", last_name="Diaz", email="ana@example.com")
+
+        resp = authenticated_client.get(
+            f"{CONTACTS_EXPORT}?columns=email,first_name,assigned_to"
+        )
+
+        assert resp.status_code == status.HTTP_200_OK
+        header, row = _rows(resp)
+        assert header == ["email", "first_name", "assigned_to"]
+        assert row[:2] == ["ana@example.com", "Ana"]
+        assert row[2]  # assigned user's full name
+
+    def test_unknown_column_is_rejected(self, authenticated_client):
+        resp = authenticated_client.get(f"{CONTACTS_EXPORT}?columns=email,password")
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in resp.data["detail"]
+
+    def test_encrypted_column_only_decrypted_when_selected(self, admin_client):
+        ContactFactory(ssn_last_four="1234")
+
+        with mock.patch(
+            "apps.core.fields.decrypt_value", side_effect=lambda token: "1234"
+        ) as decrypt:
+            _rows(admin_client.get(f"{CONTACTS_EXPORT}?columns=id,email"))
+            assert decrypt.call_count == 0
+
+            rows = _rows(admin_client.get(f"{CONTACTS_EXPORT}?columns=ssn_last_four"))
+            assert decrypt.call_count == 1
+        assert rows[1] == ["1234"]
+
+    def test_sensitive_columns_masked_without_export_permission(
+        self, authenticated_client
+    ):
+        ContactFactory(ssn_last_four="1234")
+        CorporationFactory(ein="12-3456789")
+
+        with mock.patch("apps.core.fields.decrypt_value") as decrypt:
+            contacts = _rows(
+                authenticated_client.get(f"{CONTACTS_EXPORT}?columns=ssn_last_four")
+            )
+            corporations = _rows(
+                authenticated_client.get(
+                    "/api/v1/corporations/export_csv/?columns=name,ein"
+                )
+            )
+
+        decrypt.assert_not_called()
+        assert contacts[1] == [exports.MASKED_VALUE]
+        assert corporations[1][1] == exports.MASKED_VALUE
+
+    def test_rows_are_read_in_keyset_chunks(
+        self, authenticated_client, monkeypatch, django_assert_max_num_queries
+    ):
+        monkeypatch.setattr(exports, "CHUNK_SIZE", 2)
+        contacts = ContactFactory.create_batch(5)
+
+        resp = authenticated_client.get(f"{CONTACTS_EXPORT}?columns=id")
+        with django_assert_max_num_queries(3):
+            rows = _rows(resp)
+
+        assert [row[0] for row in rows[1:]] == sorted(str(c.pk) for c in contacts)
+
+    def test_xlsx_format(self, authenticated_client):
+        ContactFactory()
+
+        resp = authenticated_client.get(f"{CONTACTS_EXPORT}?file_format=xlsx")
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert b"".join(resp.streaming_content).startswith(b"PK")
+
+
+@pytest.mark.django_db
+class TestExportJob:
+    def test_async_export_and_single_use_download(
+        self,
+        authenticated_client,
+        preparer_user,
+        settings,
+        tmp_path,
+        django_capture_on_commit_callbacks,
+    ):
+        settings.MEDIA_ROOT = str(tmp_path)
+        ContactFactory(email="ana@example.com")
+        ContactFactory(email="bo@example.com")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = authenticated_client.get(
+                f"{CONTACTS_EXPORT}?async=true&columns=email"
+            )
+
+        assert resp.status_code == status.HTTP_202_ACCEPTED
+        job = ExportJob.objects.get(pk=resp.data["job_id"])
+        assert job.status == ExportJob.Status.COMPLETED
+        assert job.row_count == 2
+        assert job.created_by == preparer_user
+
+        token_resp = authenticated_client.post(
+            f"/api/v1/exports/{job.pk}/download-token/"
+        )
+        assert token_resp.status_code == status.HTTP_200_OK
+        url = token_resp.data["download_url"]
+
+        anonymous = APIClient()
+        download = anonymous.get(url)
+        assert download.status_code == status.HTTP_200_OK
+        content = b"".join(download.streaming_content).decode()
+        assert sorted(content.split()[1:]) == ["ana@example.com", "bo@example.com"]
+
+        assert anonymous.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_job_applies_the_request_filters(
+        self,
+        authenticated_client,
+        settings,
+        tmp_path,
+        django_capture_on_commit_callbacks,
+    ):
+        settings.MEDIA_ROOT = str(tmp_path)
+        ContactFactory(email="ana@example.com", status="active", ssn_last_four="1234")
+        ContactFactory(email="bo@example.com", status="inactive")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = authenticated_client.get(
+                f"{CONTACTS_EXPORT}?async=true&status=active"
+                "&columns=email,ssn_last_four"
+            )
+
+        job = ExportJob.objects.get(pk=resp.data["job_id"])
+        assert job.params == {"query": {"status": ["active"]}}
+        assert job.row_count == 1
+        with job.file.open("rb") as f:
+            rows = list(csv.reader(io.StringIO(f.read().decode())))
+        # Masked as in the streamed export: the preparer lacks can_export
+        assert rows == [["email", "ssn_last_four"], ["ana@example.com", "****"]]
+
+    def test_exporter_without_background_support_refuses_async(
+        self, authenticated_client, monkeypatch
+    ):
+        from apps.contacts.exporters import ContactExporter
+
+        monkeypatch.setattr(ContactExporter, "viewset", None)
+
+        resp = authenticated_client.get(f"{CONTACTS_EXPORT}?async=true")
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ExportJob.objects.exists()
+
+    def test_other_users_cannot_see_job(self, authenticated_client, admin_user):
+        job = ExportJob.objects.create(
+            module="contacts", file_format="csv", created_by=admin_user
+        )
+
+        resp = authenticated_client.get(f"/api/v1/exports/{job.pk}/")
+
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_download_with_malformed_id_is_not_found(self):
+        resp = APIClient().get("/api/v1/exports/not-a-uuid/download/?token=x")
+
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
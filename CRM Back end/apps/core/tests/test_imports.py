@@ -0,0 +1,174 @@
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+
+from apps.contacts.importers import ContactImporter
+from apps.contacts.models import Contact
+from apps.core.models import ImportJob
+from apps.corporations.importers import CorporationImporter
+from tests.factories import ContactFactory, CorporationFactory
+
+
+def _csv(header, rows):
+    return "\n".join([header] + rows)
+
+
+@pytest.mark.django_db
+class TestContactImporter:
+    def test_dedups_against_database_and_file(self, preparer_user):
+        existing = ContactFactory(email="Known@Example.com")
+        content = _csv(
+            "first_name,last_name,email,phone",
+            [
+                "Known,Person,known@example.com,",
+                "Ana,Diaz,ana@example.com,555-0100",
+                "Ana,Diaz,other@example.com,555-0100",
+                "Bo,Li,ANA@example.com,",
+            ],
+        )
+
+        result = ContactImporter(preparer_user).run(content)
+
+        assert result["created"] == 1
+        assert result["total_processed"] == 4
+        reasons = [(s["row"], s["reason"]) for s in result["skipped"]]
+        assert reasons == [
+            (2, "Duplicate email: known@example.com"),
+            (4, "Duplicate name+phone"),
+            (5, "Duplicate email: ANA@example.com"),
+        ]
+        assert result["skipped"][0]["matched_id"] == str(existing.pk)
+        created = Contact.objects.get(email="ana@example.com")
+        assert result["skipped"][1]["matched_id"] == str(created.pk)
+        assert created.created_by == preparer_user
+        assert created.contact_number
+
+    def test_invalid_rows_are_reported(self, preparer_user):
+        content = _csv("first_name,last_name,email", ["Ana,,bad-email"])
+
+        result = ContactImporter(preparer_user).run(content)
+
+        assert result["created"] == 0
+        assert result["errors"][0]["row"] == 2
+        assert set(result["errors"][0]["errors"]) == {"last_name", "email"}
+
+    def test_query_count_does_not_grow_per_row(
+        self, preparer_user, django_assert_max_num_queries
+    ):
+        rows = [f"First{i},Last{i},user{i}@example.com,555-{i:04d}" for i in range(200)]
+        content = _csv("first_name,last_name,email,phone", rows)
+
+        # Per-row lookups and inserts would take 600+ queries; the margin
+        # covers bulk_create batching on backends with low parameter limits
+        with django_assert_max_num_queries(40):
+            result = ContactImporter(preparer_user).run(content)
+
+        assert result["created"] == 200
+        numbers = set(Contact.objects.values_list("contact_number", flat=True))
+        assert len(numbers) == 200
+
+    def test_audit_entries_written_per_chunk(
+        self, preparer_user, django_capture_on_commit_callbacks
+    ):
+        from apps.audit.models import AuditLog
+
+        content = _csv("first_name,last_name", ["Ana,Diaz", "Bo,Li"])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ContactImporter(preparer_user).run(content)
+
+        assert AuditLog.objects.filter(module="contacts", action="create").count() == 2
+
+
+@pytest.mark.django_db
+class TestCorporationImporter:
+    def test_dedups_by_ein_and_name(self, preparer_user):
+        CorporationFactory(name="Existing Corp", ein="12-3456789")
+        content = _csv(
+            "name,entity_type,ein",
+            ["Other Corp,llc,12-3456789", "existing corp,llc,", "New Corp,llc,"],
+        )
+
+        result = CorporationImporter(preparer_user).run(content)
+
+        assert result["created"] == 1
+        assert [s["reason"] for s in result["skipped"]] == [
+            "Duplicate EIN: 12-3456789",
+            "Duplicate name: existing corp",
+        ]
+
+
+@pytest.mark.django_db
+class TestImportJobs:
+    def test_large_import_runs_as_job(
+        self,
+        authenticated_client,
+        django_capture_on_commit_callbacks,
+        settings,
+        tmp_path,
+    ):
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = _csv(
+            "first_name,last_name,email",
+            [f"First{i},Last{i},user{i}@example.com" for i in range(5)],
+        )
+        upload = SimpleUploadedFile(
+            "contacts.csv", content.encode("utf-8"), content_type="text/csv"
+        )
+
+        with override_settings(IMPORT_SYNC_MAX_ROWS=2):
+            with django_capture_on_commit_callbacks(execute=True):
+                resp = authenticated_client.post(
+                    "/api/v1/contacts/import_csv/",
+                    {"file": upload},
+                    format="multipart",
+                )
+
+        assert resp.status_code == status.HTTP_202_ACCEPTED
+        job = ImportJob.objects.get(pk=resp.data["job_id"])
+        assert job.status == ImportJob.Status.COMPLETED
+        assert job.created_count == 5
+        # The stored upload is removed once the job has run
+        assert not job.file
+        assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+        resp = authenticated_client.get(f"/api/v1/imports/{job.pk}/")
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["progress"] == 100
+        assert resp.data["result"]["created"] == 5
+
+    def test_task_message_carries_only_the_job_id(
+        self,
+        authenticated_client,
+        django_capture_on_commit_callbacks,
+        settings,
+        tmp_path,
+    ):
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = _csv("first_name,last_name,email", ["Ann,Lee,ann@example.com"])
+        upload = SimpleUploadedFile(
+            "contacts.csv", content.encode("utf-8"), content_type="text/csv"
+        )
+
+        with mock.patch("apps.core.tasks.run_import_job.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                resp = authenticated_client.post(
+                    "/api/v1/contacts/import_csv/",
+                    {"file": upload, "async": "true"},
+                    format="multipart",
+                )
+
+        delay.assert_called_once_with(resp.data["job_id"])
+        job = ImportJob.objects.get(pk=resp.data["job_id"])
+        with job.file.open("rb") as f:
+            assert f.read().decode("utf-8") == content
+
+    def test_jobs_are_private(self, authenticated_client, admin_user):
+        job = ImportJob.objects.create(module="contacts", created_by=admin_user)
+
+        resp = authenticated_client.get(f"/api/v1/imports/{job.pk}/")
+
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,158 @@
+from importlib import import_module
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+
+from apps.contacts.importers import ContactImporter
+from apps.contacts.models import Contact
+from apps.core.models import SearchDocument
+from apps.core.search import SearchSource, filter_queryset
+from tests.factories import (
+    ContactFactory,
+    CorporationFactory,
+    EmailMessageFactory,
+    KBArticleFactory,
+)
+
+SEARCH_URL = "/api/v1/search/"
+CONTACTS_URL = "/api/v1/contacts/"
+
+
+def _ids(results):
+    return {str(item["id"]) for item in results}
+
+
+class TestSearchSource:
+    def test_title_is_required(self):
+        class Untitled(SearchSource):
+            model = Contact
+
+        with pytest.raises(TypeError):
+            Untitled()
+
+
+@pytest.mark.django_db
+class TestIndexing:
+    def test_saves_and_deletes_keep_documents_current(self):
+        contact = ContactFactory(first_name="Marisol", last_name="Quintero")
+        doc = SearchDocument.objects.get(module="contacts", object_id=contact.pk)
+        assert doc.title == "Marisol Quintero"
+
+        contact.last_name = "Ibarra"
+        contact.save()
+        doc.refresh_from_db()
+        assert "ibarra" in doc.content and "quintero" not in doc.content
+
+        contact.delete()
+        assert not SearchDocument.objects.filter(object_id=contact.pk).exists()
+
+    def test_unindexed_update_fields_skip_reindexing(self):
+        contact = ContactFactory()
+
+        with mock.patch("apps.core.search.index_objects") as index:
+            contact.status = "inactive"
+            contact.save(update_fields=["status"])
+
+        index.assert_not_called()
+
+    def test_bulk_imports_are_indexed(self, preparer_user):
+        ContactImporter(preparer_user).run(
+            "first_name,last_name,email\nZora,Okafor,zora@example.com"
+        )
+
+        contact = Contact.objects.get(email="zora@example.com")
+        assert SearchDocument.objects.filter(object_id=contact.pk).exists()
+
+    def test_rebuild_command_indexes_and_prunes(self):
+        contact = ContactFactory(first_name="Evander")
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(
+            module="contacts", object_id=CorporationFactory().pk, title="stale"
+        )
+
+        call_command("rebuild_search_index", "--module", "contacts", stdout=mock.Mock())
+
+        assert list(
+            SearchDocument.objects.filter(module="contacts").values_list(
+                "object_id", flat=True
+            )
+        ) == [contact.pk]
+
+    def test_migration_indexes_existing_records(self):
+        contact = ContactFactory(first_name="Evander", phone="(555) 010-2030")
+        article = KBArticleFactory(title="Amended returns")
+        SearchDocument.objects.all().delete()
+        migration = import_module("apps.core.migrations.0007_backfill_search_index")
+
+        migration.index_existing_records(apps, mock.Mock(connection=connection))
+
+        doc = SearchDocument.objects.get(module="contacts", object_id=contact.pk)
+        assert "evander" in doc.content and "5550102030" in doc.content
+        assert SearchDocument.objects.filter(
+            module="articles", object_id=article.pk, title="Amended returns"
+        ).exists()
+
+
+@pytest.mark.django_db
+class TestMatching:
+    def test_partial_names_and_phone_digits(self):
+        match = ContactFactory(first_name="Bartholomew", phone="(555) 010-2030")
+        ContactFactory(first_name="Other", phone="555-999-0000")
+
+        by_name = filter_queryset(Contact.objects.all(), "contacts", "tholo")
+        by_phone = filter_queryset(Contact.objects.all(), "contacts", "5550102030")
+
+        assert list(by_name) == [match]
+        assert list(by_phone) == [match]
+
+    def test_contact_search_includes_related(self, authenticated_client):
+        corp = CorporationFactory(name="Halvorsen Freight")
+        manager = ContactFactory(first_name="Manager")
+        match = ContactFactory(first_name="Ingrid", reports_to=manager)
+        report = ContactFactory(first_name="Report", reports_to=match)
+        colleague = ContactFactory(first_name="Colleague")
+        corp.contacts.add(match, colleague)
+        ContactFactory(first_name="Unrelated")
+
+        direct = authenticated_client.get(f"{CONTACTS_URL}?search=ingrid")
+        related = authenticated_client.get(
+            f"{CONTACTS_URL}?search=ingrid&include_related=true"
+        )
+        by_corporation = authenticated_client.get(f"{CONTACTS_URL}?search=halvorsen")
+
+        assert _ids(direct.data["results"]) == {str(match.pk)}
+        assert _ids(related.data["results"]) == {
+            str(c.pk) for c in (manager, match, report, colleague)
+        }
+        assert _ids(by_corporation.data["results"]) == {
+            str(match.pk),
+            str(colleague.pk),
+        }
+
+
+@pytest.mark.django_db
+class TestGlobalSearch:
+    def test_ranked_results_across_modules(self, admin_client):
+        exact = ContactFactory(first_name="Rosalind", last_name="Ashby")
+        partial = ContactFactory(first_name="Ann", last_name="Rosalindsdottir")
+        email = EmailMessageFactory(subject="Rosalind engagement letter")
+        article = KBArticleFactory(title="Working with Rosalind")
+
+        resp = admin_client.get(f"{SEARCH_URL}?q=rosalind&include_related=false")
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert [c["id"] for c in resp.data["contacts"]] == [
+            str(exact.pk),
+            str(partial.pk),
+        ]
+        assert _ids(resp.data["emails"]) == {str(email.pk)}
+        assert _ids(resp.data["articles"]) == {str(article.pk)}
+
+    def test_short_query_returns_nothing(self, admin_client):
+        resp = admin_client.get(f"{SEARCH_URL}?q=r")
+
+        assert resp.data["contacts"] == [] and resp.data["emails"] == []
@@ -0,0 +1,8 @@
+from rest_framework.routers import DefaultRouter
+
+from apps.core.views import ExportJobViewSet
+
+router = DefaultRouter()
+router.register("", ExportJobViewSet, basename="export-job")
+
+urlpatterns = router.urls
@@ -0,0 +1,8 @@
+from rest_framework.routers import DefaultRouter
+
+from apps.core.views import ImportJobViewSet
+
+router = DefaultRouter()
+router.register("", ImportJobViewSet, basename="import-job")
+
+urlpatterns = router.urls
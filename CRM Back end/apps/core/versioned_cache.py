@@ -0,0 +1,72 @@
+"""
+Version tokens in the shared cache.
+
+Data derived once and reused across requests (compiled IP rules, the
+permission matrix, the workflow rule index, cached visibility sets and
+KPI payloads) is tied to a random token stored under a cache key.
+Changing the source data replaces the token with ``bump_version``;
+cache keys that embed ``current_version`` then stop matching, and
+``VersionedValue`` rebuilds its per-process copy on the next check.
+"""
+
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+# How often (seconds) a process re-reads the shared version token of a
+# ``VersionedValue``.  Changes made in the same process are visible
+# immediately.
+VERSION_CHECK_INTERVAL = 5
+
+
+def current_version(key):
+    """The token stored under *key*, creating one if there is none yet."""
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_version(key):
+    """Replace the token under *key*, outdating everything built on it."""
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+class VersionedValue:
+    """
+    A per-process value built by *build* and rebuilt once the token under
+    *key* changes.
+    """
+
+    def __init__(self, key, build):
+        self.key = key
+        self.build = build
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """Return the value, rebuilding it if the version changed."""
+        now = time.monotonic()
+        value = self._value
+        if value is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return value
+
+        version = current_version(self.key)
+        with self._lock:
+            if self._value is None or self._version != version:
+                self._value = self.build()
+                self._version = version
+            self._checked_at = now
+            return self._value
+
+    def invalidate(self):
+        """Publish a new version so every process rebuilds its value."""
+        bump_version(self.key)
+        with self._lock:
+            self._value = None
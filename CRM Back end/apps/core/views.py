@@ -2,35 +2,49 @@ import hashlib
 from pathlib import Path
 
 from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.http import FileResponse
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.core.models import Backup
+from apps.core.encryption import blind_index
+from apps.core.exports import (
+    make_download_token,
+    redeem_download_token,
+    token_expiry,
+)
+from apps.core.models import Backup, ExportJob, ImportJob
+from apps.core.search import MIN_QUERY_LENGTH, ranked
 from apps.core.serializers import (
     BackupCreateSerializer,
     BackupDetailSerializer,
     BackupListSerializer,
     BackupTaskStatusSerializer,
+    ExportJobSerializer,
+    ImportJobSerializer,
     RestoreBackupSerializer,
 )
-from apps.users.permissions import IsAdminRole
+from apps.users.permissions import IsAdminRole, has_view_permission
 
 
 class GlobalSearchView(APIView):
     """
-    Global search across contacts, corporations, and cases.
+    Ranked search across contacts, corporations, cases, emails and
+    knowledge base articles (see ``apps.core.search``).
 
-    Includes related entities:
+    Includes related entities (``include_related``, default true):
     - When finding a contact, includes their corporations
     - When finding a corporation, includes its contacts
     - Contacts related via reports_to are also included
+
+    Emails are only searched for users who may view the emails module.
     """
 
     permission_classes = [IsAuthenticated]
@@ -41,71 +55,106 @@ class GlobalSearchView(APIView):
             request.query_params.get("include_related", "true").lower() == "true"
         )
 
-        if len(q) < 2:
-            return Response({"contacts": [], "corporations": [], "cases": []})
+        if len(q) < MIN_QUERY_LENGTH:
+            return Response(
+                {
+                    "contacts": [],
+                    "corporations": [],
+                    "cases": [],
+                    "emails": [],
+                    "articles": [],
+                }
+            )
 
         from apps.cases.models import TaxCase
         from apps.cases.serializers import TaxCaseListSerializer
         from apps.contacts.models import Contact
+        from apps.contacts.search import corporations_of, with_related
         from apps.contacts.serializers import ContactListSerializer
         from apps.corporations.models import Corporation
         from apps.corporations.serializers import CorporationListSerializer
-
-        # Direct matches
-        direct_contacts = Contact.objects.filter(
-            Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(phone__icontains=q)
-        ).prefetch_related("corporations")[:10]
-
-        direct_corporations = Corporation.objects.filter(
-            Q(name__icontains=q) | Q(legal_name__icontains=q) | Q(ein__icontains=q)
-        )[:10]
+        from apps.emails.models import EmailMessage
+        from apps.emails.serializers import EmailMessageListSerializer
+        from apps.knowledge_base.models import Article
+        from apps.knowledge_base.serializers import ArticleListSerializer
+
+        # Direct matches, best first
+        contact_ids = list(
+            ranked(Contact.objects.all(), "contacts", q).values_list("pk", flat=True)[
+                :10
+            ]
+        )
+        # EIN is encrypted; only an exact match can use its blind index
+        corp_ids = list(
+            Corporation.objects.filter(ein_bidx=blind_index(q)).values_list(
+                "pk", flat=True
+            )[:1]
+        )
+        corp_ids += [
+            pk
+            for pk in ranked(Corporation.objects.all(), "corporations", q).values_list(
+                "pk", flat=True
+            )[:10]
+            if pk not in corp_ids
+        ]
 
         cases = TaxCase.objects.filter(
             Q(case_number__icontains=q) | Q(title__icontains=q)
         )[:5]
 
-        # Collect all contact and corporation IDs
-        contact_ids = set(c.id for c in direct_contacts)
-        corp_ids = set(c.id for c in direct_corporations)
-
+        all_contact_ids, all_corp_ids = contact_ids, corp_ids
         if include_related:
-            # Get corporations related to found contacts
-            for contact in direct_contacts:
-                for corp in contact.corporations.all():
-                    corp_ids.add(corp.id)
-
-            # Get contacts related to found corporations
-            for corp in direct_corporations:
-                related_contacts = Contact.objects.filter(corporations=corp)[:5]
-                for c in related_contacts:
-                    contact_ids.add(c.id)
-
-            # Get contacts related via reports_to (both directions)
-            for contact in direct_contacts:
-                # Contacts that this contact reports to
-                if contact.reports_to_id:
-                    contact_ids.add(contact.reports_to_id)
-                # Contacts that report to this contact
-                reporting_contacts = Contact.objects.filter(reports_to=contact)[:5]
-                for c in reporting_contacts:
-                    contact_ids.add(c.id)
-
-        # Fetch all related entities
-        all_contacts = Contact.objects.filter(id__in=contact_ids).prefetch_related(
+            # One query each: related contacts, and the found contacts' corporations
+            related_ids = with_related(
+                Contact.objects.all(), contact_ids, corp_ids
+            ).values_list("pk", flat=True)[:50]
+            all_contact_ids = contact_ids + [
+                pk for pk in related_ids if pk not in contact_ids
+            ]
+            all_corp_ids = corp_ids + [
+                pk
+                for pk in Corporation.objects.filter(
+                    pk__in=corporations_of(contact_ids)
+                ).values_list("pk", flat=True)[:15]
+                if pk not in corp_ids
+            ]
+
+        # Fetch all entities, keeping direct matches first
+        all_contact_ids = all_contact_ids[:15]
+        contacts = Contact.objects.filter(id__in=all_contact_ids).prefetch_related(
             "corporations", "primary_corporation"
-        )[:15]
-        all_corporations = Corporation.objects.filter(id__in=corp_ids)[:15]
+        )
+        contacts = sorted(contacts, key=lambda c: all_contact_ids.index(c.pk))
+        all_corp_ids = all_corp_ids[:15]
+        corporations = sorted(
+            Corporation.objects.filter(id__in=all_corp_ids),
+            key=lambda c: all_corp_ids.index(c.pk),
+        )
+
+        emails = []
+        if has_view_permission(request.user, "emails"):
+            emails = ranked(
+                EmailMessage.objects.select_related(
+                    "contact", "assigned_to"
+                ).prefetch_related("attachments"),
+                "emails",
+                q,
+            )[:5]
+        articles = ranked(
+            Article.objects.filter(status=Article.Status.PUBLISHED).select_related(
+                "category", "author"
+            ),
+            "articles",
+            q,
+        )[:5]
 
         return Response(
             {
-                "contacts": ContactListSerializer(all_contacts, many=True).data,
-                "corporations": CorporationListSerializer(
-                    all_corporations, many=True
-                ).data,
+                "contacts": ContactListSerializer(contacts, many=True).data,
+                "corporations": CorporationListSerializer(corporations, many=True).data,
                 "cases": TaxCaseListSerializer(cases, many=True).data,
+                "emails": EmailMessageListSerializer(emails, many=True).data,
+                "articles": ArticleListSerializer(articles, many=True).data,
             }
         )
 
@@ -365,3 +414,95 @@ class BackupViewSet(viewsets.ModelViewSet):
             response_data["detail"] = "Backup uploaded and restore started."
 
         return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress and results of background CSV imports started by the user.
+
+    - **list**:     the user's import jobs, newest first.
+    - **retrieve**: status, counters and (once completed) the summary.
+    """
+
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["module", "status"]
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(created_by=self.request.user)
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Background exports started by the user (``export_csv?async=true``).
+
+    - **list**:           the user's export jobs, newest first.
+    - **retrieve**:       status and row count.
+    - **download-token**  ``POST /exports/<pk>/download-token/`` -- short-lived,
+      single-use token for a completed export.
+    - **download**        ``GET /exports/<pk>/download/?token=...`` -- the file.
+    """
+
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["module", "status"]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(created_by=self.request.user)
+
+    @action(detail=True, methods=["post"], url_path="download-token")
+    def download_token(self, request, pk=None):
+        """Generate a single-use download token (expires in a few minutes)."""
+        job = self.get_object()
+        if job.status != ExportJob.Status.COMPLETED or not job.file:
+            return Response(
+                {"detail": "Export is not completed."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        token = make_download_token(job, request.user)
+        return Response(
+            {
+                "token": token,
+                "expires_at": (timezone.now() + token_expiry()).isoformat(),
+                "download_url": f"/api/v1/exports/{job.id}/download/?token={token}",
+            }
+        )
+
+    @action(
+        detail=True, methods=["get"], url_path="download", permission_classes=[AllowAny]
+    )
+    def download(self, request, pk=None):
+        """
+        Stream the export file.  Requires a token from ``download-token``;
+        JWTs are never accepted in the URL.
+        """
+        token = request.query_params.get("token")
+        if not token:
+            return Response(
+                {
+                    "detail": "Authentication required. Use download-token endpoint to get a secure token."
+                },
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        try:
+            job = ExportJob.objects.get(pk=pk)
+        except (ExportJob.DoesNotExist, ValidationError, ValueError):
+            return Response(
+                {"detail": "Export not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            user_id = redeem_download_token(token, job)
+        except signing.BadSignature:
+            return Response(
+                {"detail": "Download token is invalid, expired or already used."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        if user_id != str(job.created_by_id) or not job.file:
+            return Response(
+                {"detail": "Export not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=job.file.name.rsplit("/", 1)[-1],
+        )
@@ -0,0 +1,49 @@
+"""
+CSV / XLSX exporter for corporations (see ``apps.core.exports``).
+"""
+
+from apps.core.exports import Column, ModelExporter, full_name
+from apps.corporations.models import Corporation
+
+
+class CorporationExporter(ModelExporter):
+    model = Corporation
+    module = "corporations"
+    viewset = "apps.corporations.views.CorporationViewSet"
+    filename = "corporations_export"
+    columns = (
+        Column("id"),
+        Column("name"),
+        Column("legal_name"),
+        Column("entity_type"),
+        Column("ein", sensitive=True),
+        Column("state_id"),
+        Column("street_address"),
+        Column("city"),
+        Column("state"),
+        Column("zip_code"),
+        Column("country"),
+        Column("phone"),
+        Column("fax"),
+        Column("email"),
+        Column("website"),
+        Column("industry"),
+        Column("annual_revenue"),
+        Column("fiscal_year_end"),
+        Column("date_incorporated"),
+        Column("status"),
+        Column(
+            "primary_contact",
+            "primary_contact__first_name",
+            "primary_contact__last_name",
+            formatter=full_name,
+        ),
+        Column(
+            "assigned_to",
+            "assigned_to__first_name",
+            "assigned_to__last_name",
+            formatter=full_name,
+        ),
+        Column("description"),
+        Column("created_at"),
+    )
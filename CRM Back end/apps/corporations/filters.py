@@ -1,5 +1,8 @@
 import django_filters
+from django.db.models import Q
 
+from apps.core.encryption import blind_index
+from apps.core.search import MIN_QUERY_LENGTH, search_ids
 from apps.corporations.models import Corporation
 
 
@@ -11,7 +14,8 @@ class CorporationFilter(django_filters.FilterSet):
         - entity_type  (exact match)
         - status       (exact match)
         - assigned_to  (exact UUID match)
-        - search       (handled via SearchFilter on the viewset)
+        - search       name, legal name, email or phone via the search
+                       index; exact EIN via its blind index
     """
 
     entity_type = django_filters.CharFilter(
@@ -25,7 +29,18 @@ class CorporationFilter(django_filters.FilterSet):
     assigned_to = django_filters.UUIDFilter(
         field_name="assigned_to__id",
     )
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Corporation
-        fields = ["entity_type", "status", "assigned_to"]
+        fields = ["entity_type", "status", "assigned_to", "search"]
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if len(value) < MIN_QUERY_LENGTH:
+            return queryset
+        return queryset.filter(
+            Q(pk__in=search_ids("corporations", value))
+            # EIN is encrypted; only an exact match can use its blind index
+            | Q(ein_bidx=blind_index(value))
+        )
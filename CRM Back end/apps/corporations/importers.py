@@ -0,0 +1,53 @@
+"""
+CSV importer for corporations (see ``apps.core.imports``).
+"""
+
+from django.db.models.functions import Lower
+
+from apps.core.encryption import blind_index
+from apps.core.imports import CSVImporter
+from apps.corporations.models import Corporation
+from apps.corporations.serializers import CorporationImportSerializer
+
+EIN = "ein"
+NAME = "name"
+
+
+class CorporationImporter(CSVImporter):
+    """
+    Skips rows whose EIN matches an existing corporation (on the blind
+    index; the column is encrypted) or whose name does, case-insensitively.
+    """
+
+    model = Corporation
+    serializer_class = CorporationImportSerializer
+
+    def dedup_keys(self, data):
+        keys = []
+        if data.get("ein"):
+            keys.append(
+                ((EIN, blind_index(data["ein"])), f"Duplicate EIN: {data['ein']}")
+            )
+        keys.append(((NAME, data["name"].lower()), f"Duplicate name: {data['name']}"))
+        return keys
+
+    def find_existing(self, keys):
+        digests = [value for kind, value in keys if kind == EIN]
+        names = [value for kind, value in keys if kind == NAME]
+        found = {}
+        if digests:
+            for digest, pk in (
+                Corporation.objects.filter(ein_bidx__in=digests)
+                .order_by("created_at")
+                .values_list("ein_bidx", "pk")
+            ):
+                found.setdefault((EIN, digest), pk)
+        if names:
+            for name, pk in (
+                Corporation.objects.annotate(name_lower=Lower("name"))
+                .filter(name_lower__in=names)
+                .order_by("created_at")
+                .values_list("name_lower", "pk")
+            ):
+                found.setdefault((NAME, name), pk)
+        return found
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corporations", "0009_add_multi_corporation_support"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="corporation",
+            name="ein_bidx",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                max_length=64,
+                verbose_name="EIN blind index",
+            ),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from apps.core.fields import EncryptedCharField
+from apps.core.fields import BlindIndexField, EncryptedCharField
 from apps.core.models import TimeStampedModel
 
 
@@ -143,6 +143,10 @@ class Corporation(TimeStampedModel):
         default="",
         help_text=_("Employer Identification Number. Encrypted at rest."),
     )
+    ein_bidx = BlindIndexField(
+        _("EIN blind index"),
+        source_field="ein",
+    )
     state_id = models.CharField(
         _("state ID"),
         max_length=50,
@@ -0,0 +1,24 @@
+"""
+Search indexing of corporations (see ``apps.core.search``).
+
+The EIN is encrypted and never indexed; exact EIN lookups use its blind
+index instead.
+"""
+
+from apps.core.search import SearchSource
+from apps.corporations.models import Corporation
+
+
+class CorporationSearch(SearchSource):
+    model = Corporation
+    module = "corporations"
+    fields = ("name", "legal_name", "email", "phone", "secondary_phone")
+
+    def title(self, obj):
+        return obj.name
+
+    def texts(self, obj):
+        return [obj.legal_name, obj.email]
+
+    def phones(self, obj):
+        return [obj.phone, obj.secondary_phone]
@@ -20,6 +20,7 @@ def notify_closed_corporation_access(
     Creates in-app notifications for all users with is_admin=True or is_manager=True.
     """
     from apps.notifications.models import Notification
+    from apps.notifications.services import create_notifications_bulk
     from apps.users.models import User
 
     try:
@@ -53,19 +54,20 @@ def notify_closed_corporation_access(
         action_url = f"/corporations/{corporation_id}"
 
         # Create notifications for each manager/admin
-        notifications_created = 0
-        for user in managers_admins:
-            Notification.objects.create(
-                recipient=user,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                severity=severity,
-                related_object_type="corporation",
-                related_object_id=corporation_id,
-                action_url=action_url,
+        payload = {
+            "title": title,
+            "message": message,
+            "severity": severity,
+            "related_object_type": "corporation",
+            "related_object_id": corporation_id,
+            "action_url": action_url,
+        }
+        notifications_created = len(
+            create_notifications_bulk(
+                (user_id, notification_type, payload)
+                for user_id in managers_admins.values_list("id", flat=True)
             )
-            notifications_created += 1
+        )
 
         logger.info(
             "Created %d notifications for access to %s corporation %s by %s",
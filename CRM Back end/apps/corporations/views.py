@@ -1,8 +1,3 @@
-import csv
-import io
-
-from django.core.exceptions import ValidationError as DjangoValidationError
-from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -10,14 +5,14 @@ from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.core.validators import validate_csv_import
+from apps.core.exports import export_queryset_response
+from apps.core.imports import import_csv_response
 from apps.corporations.filters import CorporationFilter
 from apps.corporations.models import Corporation
 from apps.corporations.serializers import (
     ClientStatusChangeSerializer,
     CorporationCreateUpdateSerializer,
     CorporationDetailSerializer,
-    CorporationImportSerializer,
     CorporationListSerializer,
 )
 from apps.users.permissions import ModulePermission
@@ -40,7 +35,8 @@ class CorporationViewSet(viewsets.ModelViewSet):
 
     queryset = Corporation.objects.all()
     filterset_class = CorporationFilter
-    search_fields = ["name", "legal_name", "ein"]
+    # Note: search is handled by CorporationFilter.filter_search
+    search_fields = []
     ordering_fields = [
         "name",
         "entity_type",
@@ -272,161 +268,17 @@ class CorporationViewSet(viewsets.ModelViewSet):
         Bulk-create corporations from an uploaded CSV file.
         Dedup: skip rows that match an existing EIN or name.
 
+        Large files run in the background (see ``ContactViewSet.import_csv``).
+
         Limits: Max 10MB file size, max 10000 rows.
         """
-        csv_file = request.FILES.get("file")
-        if not csv_file:
-            return Response(
-                {"detail": "No file uploaded. Provide a 'file' field."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Validate file size and format
-        try:
-            decoded, _row_count = validate_csv_import(csv_file)
-        except DjangoValidationError as e:
-            return Response(
-                {"detail": str(e.message)},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        reader = csv.DictReader(io.StringIO(decoded))
-        created_count = 0
-        errors = []
-        skipped = []
-
-        for row_number, row in enumerate(reader, start=2):
-            cleaned = {
-                k.strip().lower().replace(" ", "_"): v.strip()
-                for k, v in row.items()
-                if k
-            }
-
-            serializer = CorporationImportSerializer(data=cleaned)
-            if not serializer.is_valid():
-                errors.append({"row": row_number, "errors": serializer.errors})
-                continue
-
-            data = serializer.validated_data
-            # Dedup by EIN
-            if data.get("ein"):
-                match = Corporation.objects.filter(ein=data["ein"]).first()
-                if match:
-                    skipped.append(
-                        {
-                            "row": row_number,
-                            "reason": f"Duplicate EIN: {data['ein']}",
-                            "matched_id": str(match.id),
-                        }
-                    )
-                    continue
-
-            # Dedup by name
-            match = Corporation.objects.filter(name__iexact=data["name"]).first()
-            if match:
-                skipped.append(
-                    {
-                        "row": row_number,
-                        "reason": f"Duplicate name: {data['name']}",
-                        "matched_id": str(match.id),
-                    }
-                )
-                continue
-
-            Corporation.objects.create(created_by=request.user, **data)
-            created_count += 1
-
-        return Response(
-            {
-                "created": created_count,
-                "skipped": skipped,
-                "errors": errors,
-                "total_processed": created_count + len(errors) + len(skipped),
-            },
-            status=(
-                status.HTTP_201_CREATED
-                if created_count
-                else status.HTTP_400_BAD_REQUEST
-            ),
-        )
+        return import_csv_response(request, "corporations")
 
     @action(detail=False, methods=["get"], url_path="export_csv")
     def export_csv(self, request):
-        """Export the current (filtered) queryset as a downloadable CSV file."""
+        """
+        Export the current (filtered) queryset as a downloadable CSV file
+        (see ``ContactViewSet.export_csv`` for columns / format / async).
+        """
         qs = self.filter_queryset(self.get_queryset())
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            'attachment; filename="corporations_export.csv"'
-        )
-
-        writer = csv.writer(response)
-        header = [
-            "id",
-            "name",
-            "legal_name",
-            "entity_type",
-            "ein",
-            "state_id",
-            "street_address",
-            "city",
-            "state",
-            "zip_code",
-            "country",
-            "phone",
-            "fax",
-            "email",
-            "website",
-            "industry",
-            "annual_revenue",
-            "fiscal_year_end",
-            "date_incorporated",
-            "status",
-            "primary_contact",
-            "assigned_to",
-            "description",
-            "created_at",
-        ]
-        writer.writerow(header)
-
-        for corp in qs.iterator():
-            writer.writerow(
-                [
-                    str(corp.id),
-                    corp.name,
-                    corp.legal_name,
-                    corp.entity_type,
-                    corp.ein,
-                    corp.state_id,
-                    corp.street_address,
-                    corp.city,
-                    corp.state,
-                    corp.zip_code,
-                    corp.country,
-                    corp.phone,
-                    corp.fax,
-                    corp.email,
-                    corp.website,
-                    corp.industry,
-                    str(corp.annual_revenue) if corp.annual_revenue else "",
-                    corp.fiscal_year_end,
-                    (
-                        corp.date_incorporated.isoformat()
-                        if corp.date_incorporated
-                        else ""
-                    ),
-                    corp.status,
-                    (
-                        corp.primary_contact.first_name
-                        + " "
-                        + corp.primary_contact.last_name
-                        if corp.primary_contact
-                        else ""
-                    ),
-                    corp.assigned_to.get_full_name() if corp.assigned_to else "",
-                    corp.description,
-                    corp.created_at.isoformat(),
-                ]
-            )
-
-        return response
+        return export_queryset_response(request, "corporations", qs)
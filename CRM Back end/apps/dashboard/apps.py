@@ -5,3 +5,8 @@ class DashboardConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.dashboard"
     verbose_name = "Dashboard & Preferences"
+
+    def ready(self):
+        from apps.dashboard.kpis import register_kpi_signals
+
+        register_kpi_signals()
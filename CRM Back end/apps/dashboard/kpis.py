@@ -0,0 +1,589 @@
+"""
+Incrementally maintained dashboard KPIs.
+
+Case counts and fees are rolled up per local creation day and month
+(``CaseRollup``, by status / type / fiscal year / preparer), and contact
+and corporation counts per creation day (``RecordCountRollup``).  The
+``post_save`` / ``post_delete`` / ``records_imported`` receivers apply
+every change as a delta to the affected rows.  ``reconcile_kpi_rollups``
+recomputes the recent days every night, which also repairs writes that
+bypass signals (``QuerySet.update``, raw SQL); ``rebuild_kpi_rollups``
+backfills the whole history.
+
+Reads combine month rows for whole past months, day rows for the edges of
+the range and a live aggregate of the records created today, so a year
+of dashboard data is a few indexed reads of a small table.  Ranges are
+whole local days.
+
+Finished payloads are cached with ``cached``: keys carry a version that is
+replaced whenever a source model changes, and the current day, so results
+never outlive the data they were computed from.
+"""
+
+import hashlib
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from apps.core.versioned_cache import bump_version, current_version
+
+ZERO = Decimal("0.00")
+
+# CaseRollup dimension -> TaxCase field it is read from
+CASE_DIMENSIONS = {
+    "status": "status",
+    "case_type": "case_type",
+    "fiscal_year": "fiscal_year",
+    "preparer_id": "assigned_preparer_id",
+}
+
+# Time buckets ``case_totals`` can group by
+TIME_BUCKETS = ("month", "week")
+
+# RecordCountRollup entity -> counted model
+RECORD_ENTITIES = {
+    "contacts": "contacts.Contact",
+    "corporations": "corporations.Corporation",
+}
+
+# Models whose writes invalidate cached KPI payloads
+KPI_SOURCE_MODELS = [
+    "cases.TaxCase",
+    "contacts.Contact",
+    "corporations.Corporation",
+    "appointments.Appointment",
+    "tasks.Task",
+    "forecasts.SalesQuota",
+    "forecasts.ForecastEntry",
+]
+
+VERSION_CACHE_KEY = "dashboard_kpi_version"
+_RESULT_CACHE_KEY = "dashboard_kpi:{name}:{version}:{today}:{params}"
+
+# Dimensions of a TaxCase as last loaded / saved
+_SNAPSHOT_ATTR = "_kpi_snapshot"
+
+
+def _models():
+    from apps.dashboard.models import CaseRollup, RecordCountRollup
+
+    return CaseRollup, RecordCountRollup
+
+
+def _day_start(day):
+    """Aware datetime of local midnight at the start of *day*."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+
+def _case_snapshot(instance):
+    """
+    ``(day, dimensions, estimated_fee, actual_fee)`` of a case, or ``None``
+    when any of the fields was not loaded.
+    """
+    values = instance.__dict__
+    fields = ["created_at", *CASE_DIMENSIONS.values(), "estimated_fee", "actual_fee"]
+    if any(field not in values for field in fields) or values["created_at"] is None:
+        return None
+    dimensions = (
+        values["status"],
+        values["case_type"],
+        values["fiscal_year"],
+        str(values["assigned_preparer_id"] or ""),
+    )
+    return (
+        timezone.localdate(values["created_at"]),
+        dimensions,
+        values["estimated_fee"] or ZERO,
+        values["actual_fee"] or ZERO,
+    )
+
+
+def _apply_case_delta(day, dimensions, count, estimated, actual):
+    CaseRollup, _ = _models()
+    increments = {
+        "case_count": F("case_count") + count,
+        "estimated_fee": F("estimated_fee") + estimated,
+        "actual_fee": F("actual_fee") + actual,
+    }
+    for period, start in (
+        (CaseRollup.Period.DAY, day),
+        (CaseRollup.Period.MONTH, _month_start(day)),
+    ):
+        lookup = dict(
+            zip(CASE_DIMENSIONS, dimensions), period=period, period_start=start
+        )
+        if CaseRollup.objects.filter(**lookup).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                CaseRollup.objects.create(
+                    **lookup,
+                    case_count=count,
+                    estimated_fee=estimated,
+                    actual_fee=actual,
+                )
+        except IntegrityError:
+            # Created concurrently
+            CaseRollup.objects.filter(**lookup).update(**increments)
+
+
+def _apply_record_delta(entity, day, count):
+    _, RecordCountRollup = _models()
+    increment = {"record_count": F("record_count") + count}
+    if RecordCountRollup.objects.filter(entity=entity, day=day).update(**increment):
+        return
+    try:
+        with transaction.atomic():
+            RecordCountRollup.objects.create(entity=entity, day=day, record_count=count)
+    except IntegrityError:
+        RecordCountRollup.objects.filter(entity=entity, day=day).update(**increment)
+
+
+def _recount_case_day(pk):
+    """Recompute the rollups of the day *pk* was created on."""
+    from apps.cases.models import TaxCase
+
+    created_at = (
+        TaxCase.objects.filter(pk=pk).values_list("created_at", flat=True).first()
+    )
+    if created_at is not None:
+        day = timezone.localdate(created_at)
+        rebuild_case_rollups(day, day)
+
+
+def _case_loaded(sender, instance, **kwargs):
+    setattr(instance, _SNAPSHOT_ATTR, _case_snapshot(instance))
+
+
+def _case_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, _SNAPSHOT_ATTR, None)
+    new = _case_snapshot(instance)
+    if new is None or (old is None and not created):
+        # Deferred fields: the previous or current values are unknown
+        _recount_case_day(instance.pk)
+    elif old != new:
+        if old is not None:
+            _apply_case_delta(old[0], old[1], -1, -old[2], -old[3])
+        _apply_case_delta(new[0], new[1], 1, new[2], new[3])
+    setattr(instance, _SNAPSHOT_ATTR, new)
+
+
+def _case_deleted(sender, instance, **kwargs):
+    old = getattr(instance, _SNAPSHOT_ATTR, None)
+    if old is None:
+        old = _case_snapshot(instance)
+    if old is not None:
+        _apply_case_delta(old[0], old[1], -1, -old[2], -old[3])
+    elif instance.__dict__.get("created_at"):
+        day = timezone.localdate(instance.created_at)
+        rebuild_case_rollups(day, day)
+
+
+def _record_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _apply_record_delta(
+            _entity_by_model[sender], timezone.localdate(instance.created_at), 1
+        )
+
+
+def _record_deleted(sender, instance, **kwargs):
+    if instance.__dict__.get("created_at"):
+        _apply_record_delta(
+            _entity_by_model[sender], timezone.localdate(instance.created_at), -1
+        )
+
+
+def _records_imported(sender, instances, **kwargs):
+    from apps.cases.models import TaxCase
+
+    if sender is TaxCase:
+        deltas = defaultdict(lambda: [0, ZERO, ZERO])
+        for instance in instances:
+            snapshot = _case_snapshot(instance)
+            if snapshot is None:
+                continue
+            delta = deltas[snapshot[:2]]
+            delta[0] += 1
+            delta[1] += snapshot[2]
+            delta[2] += snapshot[3]
+            setattr(instance, _SNAPSHOT_ATTR, snapshot)
+        for (day, dimensions), (count, estimated, actual) in deltas.items():
+            _apply_case_delta(day, dimensions, count, estimated, actual)
+    elif sender in _entity_by_model:
+        days = Counter(
+            timezone.localdate(instance.created_at)
+            for instance in instances
+            if instance.created_at
+        )
+        for day, count in days.items():
+            _apply_record_delta(_entity_by_model[sender], day, count)
+    if sender in _source_models:
+        _source_changed(sender)
+
+
+def invalidate_kpis():
+    """Publish a new version so every cached KPI payload is recomputed."""
+    bump_version(VERSION_CACHE_KEY)
+
+
+def _source_changed(sender, **kwargs):
+    invalidate_kpis()
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and not _invalidation_registered(connection):
+        # Drop anything computed from the pre-commit state in the meantime;
+        # once per transaction, however many rows it writes
+        transaction.on_commit(invalidate_kpis)
+
+
+def _invalidation_registered(connection):
+    return any(entry[1] is invalidate_kpis for entry in connection.run_on_commit)
+
+
+_entity_by_model = {}
+_source_models = set()
+
+
+def register_kpi_signals():
+    """
+    Connect the rollup and cache receivers.  Called from
+    ``DashboardConfig.ready()``.
+    """
+    from apps.cases.models import TaxCase
+    from apps.core.signals import records_imported
+
+    post_init.connect(_case_loaded, sender=TaxCase, dispatch_uid="kpi_case_loaded")
+    post_save.connect(_case_saved, sender=TaxCase, dispatch_uid="kpi_case_saved")
+    post_delete.connect(_case_deleted, sender=TaxCase, dispatch_uid="kpi_case_deleted")
+    for entity, label in RECORD_ENTITIES.items():
+        model = apps.get_model(label)
+        _entity_by_model[model] = entity
+        post_save.connect(
+            _record_saved, sender=model, dispatch_uid=f"kpi_{entity}_saved"
+        )
+        post_delete.connect(
+            _record_deleted, sender=model, dispatch_uid=f"kpi_{entity}_deleted"
+        )
+    for label in KPI_SOURCE_MODELS:
+        model = apps.get_model(label)
+        _source_models.add(model)
+        post_save.connect(
+            _source_changed, sender=model, dispatch_uid=f"kpi_changed_{label}"
+        )
+        post_delete.connect(
+            _source_changed, sender=model, dispatch_uid=f"kpi_deleted_{label}"
+        )
+    records_imported.connect(_records_imported, dispatch_uid="kpi_records_imported")
+
+
+# ---------------------------------------------------------------------------
+# Rebuilds
+# ---------------------------------------------------------------------------
+
+
+def _aggregate_cases(period, bucket, start, end):
+    """``CaseRollup`` rows of the cases created in ``[start, end)``."""
+    from apps.cases.models import TaxCase
+
+    CaseRollup, _ = _models()
+    rows = (
+        TaxCase.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values(*CASE_DIMENSIONS.values(), bucket=bucket)
+        .annotate(
+            count=Count("id"),
+            estimated=Sum("estimated_fee"),
+            actual=Sum("actual_fee"),
+        )
+        .order_by()
+    )
+    return [
+        CaseRollup(
+            period=period,
+            period_start=row["bucket"],
+            status=row["status"],
+            case_type=row["case_type"],
+            fiscal_year=row["fiscal_year"],
+            preparer_id=str(row["assigned_preparer_id"] or ""),
+            case_count=row["count"],
+            estimated_fee=row["estimated"] or ZERO,
+            actual_fee=row["actual"] or ZERO,
+        )
+        for row in rows
+    ]
+
+
+def rebuild_case_rollups(start, end):
+    """
+    Recompute the ``CaseRollup`` day rows of the local days *start* to *end*
+    and the month rows of every month they touch.
+    """
+    CaseRollup, _ = _models()
+    month_from, month_to = _month_start(start), _next_month(end)
+    with transaction.atomic():
+        CaseRollup.objects.filter(
+            period=CaseRollup.Period.DAY, period_start__range=(start, end)
+        ).delete()
+        CaseRollup.objects.filter(
+            period=CaseRollup.Period.MONTH,
+            period_start__gte=month_from,
+            period_start__lt=month_to,
+        ).delete()
+        rows = _aggregate_cases(
+            CaseRollup.Period.DAY,
+            TruncDate("created_at"),
+            _day_start(start),
+            _day_start(end + timedelta(days=1)),
+        )
+        rows += _aggregate_cases(
+            CaseRollup.Period.MONTH,
+            TruncMonth("created_at", output_field=DateField()),
+            _day_start(month_from),
+            _day_start(month_to),
+        )
+        CaseRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_record_rollups(start, end):
+    """Recompute the ``RecordCountRollup`` rows of the local days *start* to *end*."""
+    _, RecordCountRollup = _models()
+    rows = []
+    with transaction.atomic():
+        RecordCountRollup.objects.filter(day__range=(start, end)).delete()
+        for entity, label in RECORD_ENTITIES.items():
+            counts = (
+                apps.get_model(label)
+                .objects.filter(
+                    created_at__gte=_day_start(start),
+                    created_at__lt=_day_start(end + timedelta(days=1)),
+                )
+                .values(day=TruncDate("created_at"))
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            rows += [
+                RecordCountRollup(
+                    entity=entity, day=row["day"], record_count=row["count"]
+                )
+                for row in counts
+            ]
+        RecordCountRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def reconcile(days=None):
+    """
+    Recompute the rollups of the last *days* local days (and the months
+    they touch) from the source tables.
+    """
+    if days is None:
+        days = settings.KPI_RECONCILE_DAYS
+    today = timezone.localdate()
+    start = today - timedelta(days=days)
+    case_rows = rebuild_case_rollups(start, today)
+    record_rows = rebuild_record_rollups(start, today)
+    invalidate_kpis()
+    return case_rows, record_rows
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+
+def _rollup_periods(start, end):
+    """
+    ``CaseRollup`` filter covering the local days *start* to *end*: month
+    rows for whole months, day rows for the rest.  *start* may be ``None``
+    (all history).
+    """
+    CaseRollup, _ = _models()
+    day, month = CaseRollup.Period.DAY, CaseRollup.Period.MONTH
+    month_to = _month_start(end + timedelta(days=1))
+    if start is None:
+        month_from = None
+    else:
+        month_from = start if start.day == 1 else _next_month(start)
+        if month_from >= month_to:
+            return Q(period=day, period_start__range=(start, end))
+
+    condition = Q(period=month, period_start__lt=month_to)
+    if month_from is not None:
+        condition &= Q(period_start__gte=month_from)
+        if start < month_from:
+            condition |= Q(
+                period=day, period_start__gte=start, period_start__lt=month_from
+            )
+    if month_to <= end:
+        condition |= Q(period=day, period_start__range=(month_to, end))
+    return condition
+
+
+def _live_filters(filters):
+    """*filters* on rollup dimensions, translated to ``TaxCase`` lookups."""
+    translated = {}
+    for lookup, value in filters.items():
+        name, _, rest = lookup.partition("__")
+        field = CASE_DIMENSIONS[name]
+        translated[f"{field}__{rest}" if rest else field] = value
+    return translated
+
+
+def _grouped(queryset, names, expressions, **measures):
+    """*measures* of *queryset* per distinct *names* / *expressions*."""
+    if not names and not expressions:
+        return [queryset.aggregate(**measures)]
+    return queryset.values(*names, **expressions).annotate(**measures).order_by()
+
+
+def case_totals(start=None, end=None, group_by=(), **filters):
+    """
+    Count, estimated and actual fees of the cases created on the local days
+    *start* to *end* (``None``: since the beginning / through today).
+
+    *group_by* names rollup dimensions (``status``, ``case_type``,
+    ``fiscal_year``, ``preparer_id``) and at most one time bucket
+    (``month`` or ``week``, the bucket's first day).  *filters* are lookups
+    on the dimensions, e.g. ``status__in=[...]``.  Returns one dict per
+    group with the grouped values plus ``count``, ``estimated`` and
+    ``actual``; empty groups are left out.
+    """
+    from apps.cases.models import TaxCase
+
+    CaseRollup, _ = _models()
+    today = timezone.localdate()
+    if end is None or end > today:
+        end = today
+    if start is not None and start > end:
+        return []
+
+    dimensions = [name for name in group_by if name not in TIME_BUCKETS]
+    buckets = [name for name in group_by if name in TIME_BUCKETS]
+    totals = defaultdict(lambda: [0, ZERO, ZERO])
+
+    def add(key, count, estimated, actual):
+        total = totals[key]
+        total[0] += count or 0
+        total[1] += estimated or ZERO
+        total[2] += actual or ZERO
+
+    yesterday = today - timedelta(days=1)
+    if start is None or start <= yesterday:
+        past_end = min(end, yesterday)
+        if buckets == ["week"]:
+            # Weeks straddle months: day rows only
+            rows = CaseRollup.objects.filter(
+                period=CaseRollup.Period.DAY, period_start__lte=past_end
+            )
+            if start is not None:
+                rows = rows.filter(period_start__gte=start)
+        else:
+            rows = CaseRollup.objects.filter(_rollup_periods(start, past_end))
+        truncate = {"month": TruncMonth, "week": TruncWeek}
+        rows = _grouped(
+            rows.filter(**filters),
+            dimensions,
+            {name: truncate[name]("period_start") for name in buckets},
+            count=Sum("case_count"),
+            estimated=Sum("estimated_fee"),
+            actual=Sum("actual_fee"),
+        )
+        for row in rows:
+            key = tuple(row[name] for name in group_by)
+            add(key, row["count"], row["estimated"], row["actual"])
+
+    if end == today:
+        fields = [CASE_DIMENSIONS[name] for name in dimensions]
+        live = _grouped(
+            TaxCase.objects.filter(
+                created_at__gte=_day_start(today), **_live_filters(filters)
+            ),
+            fields,
+            {},
+            count=Count("id"),
+            estimated=Sum("estimated_fee"),
+            actual=Sum("actual_fee"),
+        )
+        bucket_starts = {
+            "month": _month_start(today),
+            "week": today - timedelta(days=today.weekday()),
+        }
+        for row in live:
+            values = dict(zip(dimensions, (row[field] for field in fields)))
+            if "preparer_id" in values:
+                values["preparer_id"] = str(values["preparer_id"] or "")
+            values.update({name: bucket_starts[name] for name in buckets})
+            key = tuple(values[name] for name in group_by)
+            add(key, row["count"], row["estimated"], row["actual"])
+
+    return [
+        dict(zip(group_by, key), count=count, estimated=estimated, actual=actual)
+        for key, (count, estimated, actual) in totals.items()
+        if count
+    ]
+
+
+def record_totals():
+    """Current number of records of each ``RECORD_ENTITIES`` entity."""
+    _, RecordCountRollup = _models()
+    today = timezone.localdate()
+    today_start = _day_start(today)
+    counts = dict(
+        RecordCountRollup.objects.filter(day__lt=today)
+        .values("entity")
+        .annotate(total=Sum("record_count"))
+        .order_by()
+        .values_list("entity", "total")
+    )
+    for entity, label in RECORD_ENTITIES.items():
+        created_today = (
+            apps.get_model(label).objects.filter(created_at__gte=today_start).count()
+        )
+        counts[entity] = (counts.get(entity) or 0) + created_today
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+
+def cached(name, params, compute):
+    """
+    ``compute()``, cached per *name* and *params* (user scope, date range,
+    filters) until a source record changes or the local day ends.
+    """
+    key = _RESULT_CACHE_KEY.format(
+        name=name,
+        version=current_version(VERSION_CACHE_KEY),
+        today=timezone.localdate().isoformat(),
+        params=hashlib.md5(repr(params).encode()).hexdigest(),
+    )
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, settings.KPI_CACHE_TIMEOUT)
+    return result
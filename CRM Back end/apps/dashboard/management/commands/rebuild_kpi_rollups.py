@@ -0,0 +1,65 @@
+"""
+Management command to (re)build the dashboard KPI rollups.
+
+Usage:
+    python manage.py rebuild_kpi_rollups
+    python manage.py rebuild_kpi_rollups --days 90
+"""
+
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.dashboard.kpis import (
+    RECORD_ENTITIES,
+    invalidate_kpis,
+    rebuild_case_rollups,
+    rebuild_record_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute the case and record count rollups behind the dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=0,
+            help="Only recompute the last N days (default: all history).",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["days"]:
+            start = today - timedelta(days=options["days"])
+        else:
+            start = self._first_day() or today
+
+        case_rows = record_rows = 0
+        # One year per statement keeps the grouped reads bounded
+        for year in range(start.year, today.year + 1):
+            year_start = max(start, date(year, 1, 1))
+            year_end = min(today, date(year, 12, 31))
+            case_rows += rebuild_case_rollups(year_start, year_end)
+            record_rows += rebuild_record_rollups(year_start, year_end)
+        invalidate_kpis()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {case_rows} case rollups and {record_rows} record "
+                f"rollups since {start.isoformat()}"
+            )
+        )
+
+    def _first_day(self):
+        labels = ["cases.TaxCase", *RECORD_ENTITIES.values()]
+        firsts = [
+            apps.get_model(label).objects.aggregate(first=Min("created_at"))["first"]
+            for label in labels
+        ]
+        firsts = [value for value in firsts if value is not None]
+        return timezone.localdate(min(firsts)) if firsts else None
@@ -0,0 +1,128 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0005_add_ui_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CaseRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")],
+                        max_length=5,
+                        verbose_name="period",
+                    ),
+                ),
+                ("period_start", models.DateField(verbose_name="period start")),
+                ("status", models.CharField(max_length=25, verbose_name="status")),
+                (
+                    "case_type",
+                    models.CharField(max_length=30, verbose_name="case type"),
+                ),
+                (
+                    "fiscal_year",
+                    models.PositiveIntegerField(verbose_name="fiscal year"),
+                ),
+                (
+                    "preparer_id",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=36,
+                        verbose_name="preparer id",
+                    ),
+                ),
+                (
+                    "case_count",
+                    models.IntegerField(default=0, verbose_name="case count"),
+                ),
+                (
+                    "estimated_fee",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="estimated fee",
+                    ),
+                ),
+                (
+                    "actual_fee",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="actual fee",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "case rollup",
+                "verbose_name_plural": "case rollups",
+                "db_table": "crm_kpi_case_rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["period", "period_start"],
+                        name="idx_kpi_case_rollup_period",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "period",
+                            "period_start",
+                            "status",
+                            "case_type",
+                            "fiscal_year",
+                            "preparer_id",
+                        ),
+                        name="uniq_kpi_case_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="RecordCountRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("entity", models.CharField(max_length=20, verbose_name="entity")),
+                ("day", models.DateField(verbose_name="day")),
+                (
+                    "record_count",
+                    models.IntegerField(default=0, verbose_name="record count"),
+                ),
+            ],
+            options={
+                "verbose_name": "record count rollup",
+                "verbose_name_plural": "record count rollups",
+                "db_table": "crm_kpi_record_rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entity", "day"), name="uniq_kpi_record_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+RECORD_ENTITIES = {
+    "contacts": ("contacts", "Contact"),
+    "corporations": ("corporations", "Corporation"),
+}
+
+
+def build_rollups(apps, schema_editor):
+    # The rollups start out empty; without this the dashboard reports zero
+    # for everything created before the upgrade.  Same result as
+    # ``rebuild_kpi_rollups`` with no arguments.
+    TaxCase = apps.get_model("cases", "TaxCase")
+    CaseRollup = apps.get_model("dashboard", "CaseRollup")
+    RecordCountRollup = apps.get_model("dashboard", "RecordCountRollup")
+
+    CaseRollup.objects.all().delete()
+    RecordCountRollup.objects.all().delete()
+
+    rows = []
+    for period, bucket in (
+        ("day", TruncDate("created_at")),
+        ("month", TruncMonth("created_at", output_field=DateField())),
+    ):
+        totals = (
+            TaxCase.objects.filter(created_at__isnull=False)
+            .values(
+                "status",
+                "case_type",
+                "fiscal_year",
+                "assigned_preparer_id",
+                bucket=bucket,
+            )
+            .annotate(
+                count=Count("id"),
+                estimated=Sum("estimated_fee"),
+                actual=Sum("actual_fee"),
+            )
+            .order_by()
+        )
+        rows += [
+            CaseRollup(
+                period=period,
+                period_start=row["bucket"],
+                status=row["status"],
+                case_type=row["case_type"],
+                fiscal_year=row["fiscal_year"],
+                preparer_id=str(row["assigned_preparer_id"] or ""),
+                case_count=row["count"],
+                estimated_fee=row["estimated"] or 0,
+                actual_fee=row["actual"] or 0,
+            )
+            for row in totals
+        ]
+    CaseRollup.objects.bulk_create(rows, batch_size=1000)
+
+    rows = []
+    for entity, (app_label, model_name) in RECORD_ENTITIES.items():
+        counts = (
+            apps.get_model(app_label, model_name)
+            .objects.filter(created_at__isnull=False)
+            .values(day=TruncDate("created_at"))
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        rows += [
+            RecordCountRollup(entity=entity, day=row["day"], record_count=row["count"])
+            for row in counts
+        ]
+    RecordCountRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0006_kpi_rollups"),
+        ("cases", "0007_caseslastatus_next_check_at"),
+        ("contacts", "0012_contact_ssn_last_four_bidx"),
+        ("corporations", "0010_corporation_ein_bidx"),
+    ]
+
+    operations = [
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
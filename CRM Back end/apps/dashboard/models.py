@@ -255,3 +255,83 @@ class StickyNote(models.Model):
 
     def __str__(self):
         return self.title or f"Note {self.id}"
+
+
+# ---------------------------------------------------------------------------
+# KPI rollups
+# ---------------------------------------------------------------------------
+class CaseRollup(models.Model):
+    """
+    Count and fee totals of the cases created in one local day or month,
+    per combination of status, type, fiscal year and preparer.  Kept
+    current by ``apps.dashboard.kpis``.
+    """
+
+    class Period(models.TextChoices):
+        DAY = "day", _("Day")
+        MONTH = "month", _("Month")
+
+    period = models.CharField(_("period"), max_length=5, choices=Period.choices)
+    # Creation day, or the first day of the creation month
+    period_start = models.DateField(_("period start"))
+    status = models.CharField(_("status"), max_length=25)
+    case_type = models.CharField(_("case type"), max_length=30)
+    fiscal_year = models.PositiveIntegerField(_("fiscal year"))
+    # Assigned preparer's id; empty when unassigned
+    preparer_id = models.CharField(
+        _("preparer id"), max_length=36, blank=True, default=""
+    )
+    case_count = models.IntegerField(_("case count"), default=0)
+    estimated_fee = models.DecimalField(
+        _("estimated fee"), max_digits=14, decimal_places=2, default=0
+    )
+    actual_fee = models.DecimalField(
+        _("actual fee"), max_digits=14, decimal_places=2, default=0
+    )
+
+    class Meta:
+        db_table = "crm_kpi_case_rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "period",
+                    "period_start",
+                    "status",
+                    "case_type",
+                    "fiscal_year",
+                    "preparer_id",
+                ],
+                name="uniq_kpi_case_rollup",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["period", "period_start"], name="idx_kpi_case_rollup_period"
+            ),
+        ]
+        verbose_name = _("case rollup")
+        verbose_name_plural = _("case rollups")
+
+    def __str__(self):
+        return f"{self.period} {self.period_start}: {self.case_count} cases"
+
+
+class RecordCountRollup(models.Model):
+    """Number of contacts / corporations created on one local day, net of deletions."""
+
+    entity = models.CharField(_("entity"), max_length=20)
+    day = models.DateField(_("day"))
+    record_count = models.IntegerField(_("record count"), default=0)
+
+    class Meta:
+        db_table = "crm_kpi_record_rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entity", "day"], name="uniq_kpi_record_rollup"
+            )
+        ]
+        verbose_name = _("record count rollup")
+        verbose_name_plural = _("record count rollups")
+
+    def __str__(self):
+        return f"{self.entity} {self.day}: {self.record_count}"
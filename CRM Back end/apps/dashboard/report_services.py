@@ -5,7 +5,6 @@ Provides data for the dedicated report pages with support for
 date filtering, grouping, and CSV export.
 """
 
-import csv
 from decimal import Decimal
 
 from django.db.models import Count, DecimalField, F, Q, Sum
@@ -15,9 +14,11 @@ from django.db.models.functions import (
     TruncQuarter,
     TruncYear,
 )
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
+from apps.reports.exports import CSV_CONTENT_TYPE, iter_csv
+
 
 def _get_models():
     from apps.cases.models import TaxCase
@@ -260,14 +261,11 @@ def get_contact_acquisition(date_from=None, date_to=None):
 # ---------------------------------------------------------------------------
 def export_to_csv(data, columns, filename="report.csv"):
     """
-    Convert a list of dicts to a CSV HttpResponse.
+    Stream a list of dicts as a CSV download.
     """
-    response = HttpResponse(content_type="text/csv")
+    rows = ([row.get(col, "") for col in columns] for row in data)
+    response = StreamingHttpResponse(
+        iter_csv(columns, rows), content_type=CSV_CONTENT_TYPE
+    )
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.DictWriter(response, fieldnames=columns)
-    writer.writeheader()
-    for row in data:
-        writer.writerow({col: row.get(col, "") for col in columns})
-
     return response
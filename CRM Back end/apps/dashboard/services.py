@@ -4,14 +4,24 @@ Dashboard aggregation services.
 All heavy ORM queries live here so that views stay thin.
 Models from sibling apps are imported lazily to avoid circular imports and to
 gracefully handle the case where those apps are not yet fully migrated.
+
+Case and record counts are read from the KPI rollups (``apps.dashboard.kpis``)
+instead of scanning the source tables; date ranges are whole local days.
 """
 
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-from django.db.models import Count, DecimalField, F, Q, Sum, Value
-from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models import Count, F, Q
 from django.utils import timezone
 
+from apps.dashboard import kpis
+
+ACTIVE_CASE_STATUSES = ["new", "in_progress", "under_review"]
+
+# Dimensions the range widgets are computed from, in one rollup read
+RANGE_GROUP_BY = ("status", "case_type", "preparer_id", "month")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -28,25 +38,40 @@ def _get_models():
     return TaxCase, Contact, Corporation
 
 
+def _local_day(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
 def _parse_date_range(date_from=None, date_to=None):
     """
-    Return a (start, end) datetime tuple.  Falls back to the current
+    Return a (start, end) tuple of local dates.  Falls back to the current
     calendar year if either bound is ``None``.
     """
-    now = timezone.now()
-    if date_from is None:
-        date_from = now.replace(
-            month=1, day=1, hour=0, minute=0, second=0, microsecond=0
-        )
-    if date_to is None:
-        date_to = now
-    return date_from, date_to
+    today = timezone.localdate()
+    start = _local_day(date_from) if date_from else today.replace(month=1, day=1)
+    end = _local_day(date_to) if date_to else today
+    return start, end
+
+
+def _range_rows(date_from=None, date_to=None):
+    """Rollup totals of the cases created in the range, by ``RANGE_GROUP_BY``."""
+    start, end = _parse_date_range(date_from, date_to)
+    return kpis.case_totals(start, end, group_by=RANGE_GROUP_BY)
+
+
+def _sum_by(rows, field, measure="count"):
+    totals = defaultdict(int)
+    for row in rows:
+        totals[row[field]] += row[measure]
+    return totals
 
 
 # ---------------------------------------------------------------------------
 # Stat cards
 # ---------------------------------------------------------------------------
-def get_dashboard_stats(date_from=None, date_to=None):
+def get_dashboard_stats(date_from=None, date_to=None, rows=None):
     """
     Return high-level KPI numbers for the stat cards on top of the dashboard.
 
@@ -54,184 +79,159 @@ def get_dashboard_stats(date_from=None, date_to=None):
         total_contacts, total_corporations, active_cases,
         cases_filed_this_month, total_estimated_revenue
     """
-    TaxCase, Contact, Corporation = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
 
-    now = timezone.now()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    total_contacts = Contact.objects.count()
-    total_corporations = Corporation.objects.count()
-
-    active_cases = TaxCase.objects.filter(
-        status__in=["new", "in_progress", "under_review"],
-    ).count()
-
-    cases_filed_this_month = TaxCase.objects.filter(
-        created_at__gte=month_start,
-        created_at__lte=now,
-    ).count()
-
-    total_estimated_revenue = TaxCase.objects.filter(
-        created_at__gte=date_from,
-        created_at__lte=date_to,
-    ).aggregate(
-        total=Coalesce(Sum("estimated_fee"), Value(0), output_field=DecimalField()),
-    )[
-        "total"
-    ]
+    today = timezone.localdate()
+    records = kpis.record_totals()
+    active = kpis.case_totals(status__in=ACTIVE_CASE_STATUSES)
+    this_month = kpis.case_totals(today.replace(day=1), today)
 
     return {
-        "total_contacts": total_contacts,
-        "total_corporations": total_corporations,
-        "active_cases": active_cases,
-        "cases_filed_this_month": cases_filed_this_month,
-        "total_estimated_revenue": float(total_estimated_revenue),
+        "total_contacts": records["contacts"],
+        "total_corporations": records["corporations"],
+        "active_cases": sum(row["count"] for row in active),
+        "cases_filed_this_month": sum(row["count"] for row in this_month),
+        "total_estimated_revenue": float(
+            sum((row["estimated"] for row in rows), kpis.ZERO)
+        ),
     }
 
 
 # ---------------------------------------------------------------------------
 # Cases by status (pie / bar)
 # ---------------------------------------------------------------------------
-def get_cases_by_status(date_from=None, date_to=None):
+def get_cases_by_status(date_from=None, date_to=None, rows=None):
     """
     Return a list of ``{"status": ..., "count": ...}`` dicts.
     """
-    TaxCase, *_ = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
 
-    return list(
-        TaxCase.objects.filter(
-            created_at__gte=date_from,
-            created_at__lte=date_to,
-        )
-        .values("status")
-        .annotate(count=Count("id"))
-        .order_by("status")
-    )
+    counts = _sum_by(rows, "status")
+    return [
+        {"status": status, "count": counts[status]}
+        for status in sorted(counts)
+        if counts[status]
+    ]
 
 
 # ---------------------------------------------------------------------------
 # Revenue pipeline (line / area)
 # ---------------------------------------------------------------------------
-def get_revenue_pipeline(date_from=None, date_to=None):
+def get_revenue_pipeline(date_from=None, date_to=None, rows=None):
     """
     Return a list of ``{"month": ..., "estimated": ..., "actual": ...}`` dicts,
     one entry per calendar month in the requested range.
     """
-    TaxCase, *_ = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
-
-    rows = (
-        TaxCase.objects.filter(
-            created_at__gte=date_from,
-            created_at__lte=date_to,
-        )
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(
-            estimated=Coalesce(
-                Sum("estimated_fee"), Value(0), output_field=DecimalField()
-            ),
-            actual=Coalesce(Sum("actual_fee"), Value(0), output_field=DecimalField()),
-        )
-        .order_by("month")
-    )
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
 
+    estimated = _sum_by(rows, "month", "estimated")
+    actual = _sum_by(rows, "month", "actual")
     return [
         {
-            "month": row["month"].strftime("%Y-%m"),
-            "estimated": float(row["estimated"]),
-            "actual": float(row["actual"]),
+            "month": month.strftime("%Y-%m"),
+            "estimated": float(estimated[month]),
+            "actual": float(actual[month]),
         }
-        for row in rows
+        for month in sorted(estimated)
     ]
 
 
 # ---------------------------------------------------------------------------
 # Cases by preparer (bar)
 # ---------------------------------------------------------------------------
-def get_cases_by_preparer(date_from=None, date_to=None):
+def get_cases_by_preparer(date_from=None, date_to=None, rows=None):
     """
     Return a list of ``{"preparer_name": ..., "count": ...}`` dicts.
     """
-    TaxCase, *_ = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
+    from apps.users.models import User
 
-    rows = (
-        TaxCase.objects.filter(
-            created_at__gte=date_from,
-            created_at__lte=date_to,
-            assigned_preparer__isnull=False,
-        )
-        .values(
-            preparer_first=F("assigned_preparer__first_name"),
-            preparer_last=F("assigned_preparer__last_name"),
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
+
+    counts = _sum_by(rows, "preparer_id")
+    counts.pop("", None)
+    names = {
+        str(user["id"]): f"{user['first_name']} {user['last_name']}".strip()
+        for user in User.objects.filter(pk__in=list(counts)).values(
+            "id", "first_name", "last_name"
         )
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
+    }
 
-    return [
-        {
-            "preparer_name": f"{row['preparer_first']} {row['preparer_last']}".strip(),
-            "count": row["count"],
-        }
-        for row in rows
+    result = [
+        {"preparer_name": names[preparer_id], "count": count}
+        for preparer_id, count in counts.items()
+        if count and preparer_id in names
     ]
+    result.sort(key=lambda row: -row["count"])
+    return result
 
 
 # ---------------------------------------------------------------------------
 # Cases by type (pie)
 # ---------------------------------------------------------------------------
-def get_cases_by_type(date_from=None, date_to=None):
+def get_cases_by_type(date_from=None, date_to=None, rows=None):
     """
     Return a list of ``{"case_type": ..., "count": ...}`` dicts.
     """
-    TaxCase, *_ = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
-
-    return list(
-        TaxCase.objects.filter(
-            created_at__gte=date_from,
-            created_at__lte=date_to,
-        )
-        .values("case_type")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
+
+    counts = _sum_by(rows, "case_type")
+    result = [
+        {"case_type": case_type, "count": count}
+        for case_type, count in counts.items()
+        if count
+    ]
+    result.sort(key=lambda row: -row["count"])
+    return result
 
 
 # ---------------------------------------------------------------------------
 # Monthly filings (line / bar)
 # ---------------------------------------------------------------------------
-def get_monthly_filings(date_from=None, date_to=None):
+def get_monthly_filings(date_from=None, date_to=None, rows=None):
     """
     Return a list of ``{"month": ..., "count": ...}`` dicts.
     """
-    TaxCase, *_ = _get_models()
-    date_from, date_to = _parse_date_range(date_from, date_to)
-
-    rows = (
-        TaxCase.objects.filter(
-            created_at__gte=date_from,
-            created_at__lte=date_to,
-        )
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(count=Count("id"))
-        .order_by("month")
-    )
+    if rows is None:
+        rows = _range_rows(date_from, date_to)
 
+    counts = _sum_by(rows, "month")
     return [
-        {
-            "month": row["month"].strftime("%Y-%m"),
-            "count": row["count"],
-        }
-        for row in rows
+        {"month": month.strftime("%Y-%m"), "count": counts[month]}
+        for month in sorted(counts)
+        if counts[month]
     ]
 
 
+# ---------------------------------------------------------------------------
+# All range widgets
+# ---------------------------------------------------------------------------
+def get_dashboard_kpis(date_from=None, date_to=None):
+    """
+    Return the stat cards and every case widget of the dashboard, computed
+    from one rollup read of the range and cached until the data changes.
+    """
+    start, end = _parse_date_range(date_from, date_to)
+
+    def compute():
+        rows = _range_rows(start, end)
+        return {
+            "stats": get_dashboard_stats(rows=rows),
+            "cases_by_status": get_cases_by_status(rows=rows),
+            "revenue_pipeline": get_revenue_pipeline(rows=rows),
+            "cases_by_preparer": get_cases_by_preparer(rows=rows),
+            "cases_by_type": get_cases_by_type(rows=rows),
+            "monthly_filings": get_monthly_filings(rows=rows),
+            "cases_by_fiscal_year": get_cases_by_fiscal_year(),
+        }
+
+    return kpis.cached("dashboard", ("all", start, end), compute)
+
+
 # ---------------------------------------------------------------------------
 # Upcoming deadlines (table)
 # ---------------------------------------------------------------------------
@@ -375,13 +375,11 @@ def get_cases_by_fiscal_year():
     """
     Return a list of ``{"fiscal_year": ..., "count": ...}`` dicts.
     """
-    TaxCase, *_ = _get_models()
-
-    return list(
-        TaxCase.objects.values("fiscal_year")
-        .annotate(count=Count("id"))
-        .order_by("-fiscal_year")
-    )
+    rows = kpis.case_totals(group_by=("fiscal_year",))
+    return [
+        {"fiscal_year": row["fiscal_year"], "count": row["count"]}
+        for row in sorted(rows, key=lambda row: -row["fiscal_year"])
+    ]
 
 
 # ---------------------------------------------------------------------------
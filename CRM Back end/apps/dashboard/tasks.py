@@ -0,0 +1,21 @@
+"""
+Celery tasks for the dashboard KPI rollups.
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_kpi_rollups(days=None) -> dict:
+    """Recompute the KPI rollups of the last ``KPI_RECONCILE_DAYS`` days."""
+    from apps.dashboard.kpis import reconcile
+
+    case_rows, record_rows = reconcile(days)
+    logger.info(
+        f"Reconciled KPI rollups: {case_rows} case rows, {record_rows} record rows"
+    )
+    return {"case_rows": case_rows, "record_rows": record_rows}
@@ -0,0 +1,161 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+
+from apps.cases.models import TaxCase
+from apps.dashboard import kpis
+from apps.dashboard.models import CaseRollup, RecordCountRollup
+from apps.dashboard.services import get_dashboard_kpis
+from apps.forecasts.models import SalesQuota
+from apps.forecasts.services import get_quarter_summaries, get_totals
+from tests.factories import ContactFactory, TaxCaseFactory, UserFactory
+
+DASHBOARD_URL = "/api/v1/dashboard/"
+
+
+def _backdate(case, days):
+    TaxCase.objects.filter(pk=case.pk).update(
+        created_at=timezone.now() - timedelta(days=days)
+    )
+
+
+def _count(**filters):
+    return sum(row["count"] for row in kpis.case_totals(**filters))
+
+
+@pytest.mark.django_db
+class TestRollups:
+    def test_saves_and_deletes_apply_deltas(self):
+        case = TaxCaseFactory(status="new", estimated_fee=Decimal("100.00"))
+        today = timezone.localdate()
+
+        def day_row(status):
+            return CaseRollup.objects.get(
+                period=CaseRollup.Period.DAY, period_start=today, status=status
+            )
+
+        assert day_row("new").case_count == 1
+        assert day_row("new").estimated_fee == Decimal("100.00")
+
+        case.status = "in_progress"
+        case.save()
+        assert day_row("new").case_count == 0
+        assert day_row("in_progress").case_count == 1
+
+        case.delete()
+        assert day_row("in_progress").case_count == 0
+        assert day_row("in_progress").estimated_fee == 0
+
+    def test_past_rollups_and_live_today_match_source(self):
+        for days in (70, 40, 33, 3, 1):
+            _backdate(TaxCaseFactory(), days)
+        kpis.reconcile(days=80)
+        TaxCaseFactory()
+        today = timezone.localdate()
+
+        for start in (None, today - timedelta(days=75), today - timedelta(days=35)):
+            for end in (today - timedelta(days=2), today):
+                source = TaxCase.objects.filter(created_at__date__lte=end)
+                if start:
+                    source = source.filter(created_at__date__gte=start)
+                assert _count(start=start, end=end) == source.count()
+
+    def test_reconcile_repairs_bypassed_updates(self):
+        case = TaxCaseFactory(status="new")
+        _backdate(case, 5)
+        TaxCase.objects.filter(pk=case.pk).update(status="completed")
+
+        kpis.reconcile(days=10)
+
+        assert _count(status__in=["new"]) == 0
+        assert _count(status__in=["completed"]) == 1
+
+    def test_migration_backfills_like_the_rebuild_command(self):
+        for days in (0, 3, 40):
+            _backdate(TaxCaseFactory(estimated_fee=Decimal("100.00")), days)
+        ContactFactory()
+        call_command("rebuild_kpi_rollups", stdout=StringIO())
+        fields = [f.name for f in CaseRollup._meta.fields if f.name != "id"]
+        expected_cases = set(CaseRollup.objects.values_list(*fields))
+        expected_records = set(
+            RecordCountRollup.objects.values_list("entity", "day", "record_count")
+        )
+        migration = import_module("apps.dashboard.migrations.0007_backfill_kpi_rollups")
+
+        migration.build_rollups(apps, None)
+
+        assert set(CaseRollup.objects.values_list(*fields)) == expected_cases
+        assert (
+            set(RecordCountRollup.objects.values_list("entity", "day", "record_count"))
+            == expected_records
+        )
+
+
+@pytest.mark.django_db
+class TestCachedResults:
+    def test_dashboard_results_cached_until_write(
+        self, authenticated_client, django_assert_num_queries
+    ):
+        get_dashboard_kpis()
+        with django_assert_num_queries(0):
+            get_dashboard_kpis()
+
+        before = authenticated_client.get(DASHBOARD_URL)
+        TaxCaseFactory(status="new")
+        after = authenticated_client.get(DASHBOARD_URL)
+
+        assert before.status_code == status.HTTP_200_OK
+        assert after.data["stats"]["active_cases"] == (
+            before.data["stats"]["active_cases"] + 1
+        )
+
+    def test_one_commit_invalidation_per_transaction(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks() as callbacks:
+            TaxCaseFactory.create_batch(3)
+
+        assert [cb for cb in callbacks if cb is kpis.invalidate_kpis] == [
+            kpis.invalidate_kpis
+        ]
+
+
+@pytest.mark.django_db
+class TestForecastSummaries:
+    def test_totals_are_the_sum_of_the_quarters(self):
+        user = UserFactory()
+        year = timezone.localdate().year
+        SalesQuota.objects.create(
+            user=user, fiscal_year=year, quarter=2, amount=Decimal("500.00")
+        )
+        TaxCaseFactory(
+            assigned_preparer=user,
+            status="completed",
+            completed_date=date(year, 5, 10),
+            actual_fee=Decimal("120.00"),
+        )
+        TaxCaseFactory(
+            assigned_preparer=user, status="new", estimated_fee=Decimal("80.00")
+        )
+        TaxCaseFactory(status="new", estimated_fee=Decimal("999.00"))
+
+        quarters = get_quarter_summaries([user.pk], year)
+        totals = get_totals([user.pk], year, summaries=quarters)
+
+        current = (timezone.localdate().month - 1) // 3
+        assert quarters[1]["closed_won"] == Decimal("120.00")
+        assert quarters[1]["gap"] == Decimal("380.00")
+        assert quarters[current]["pipeline"] == Decimal("80.00")
+        assert totals == {
+            "quota": Decimal("500.00"),
+            "closed_won": Decimal("120.00"),
+            "gap": Decimal("380.00"),
+            "pipeline": Decimal("80.00"),
+        }
@@ -23,14 +23,8 @@ from apps.dashboard.serializers import (
 from apps.dashboard.services import (
     get_appointments_today,
     get_avg_waiting_for_documents_days,
-    get_cases_by_fiscal_year,
-    get_cases_by_preparer,
-    get_cases_by_status,
-    get_cases_by_type,
-    get_dashboard_stats,
+    get_dashboard_kpis,
     get_missing_docs,
-    get_monthly_filings,
-    get_revenue_pipeline,
     get_tasks_by_user,
     get_upcoming_deadlines,
 )
@@ -56,34 +50,28 @@ class DashboardView(APIView):
         if raw_to:
             date_to = parse_datetime(raw_to)
 
-        stats = get_dashboard_stats(date_from=date_from, date_to=date_to)
-        cases_by_status = get_cases_by_status(date_from=date_from, date_to=date_to)
-        revenue_pipeline = get_revenue_pipeline(date_from=date_from, date_to=date_to)
-        cases_by_preparer = get_cases_by_preparer(date_from=date_from, date_to=date_to)
-        cases_by_type = get_cases_by_type(date_from=date_from, date_to=date_to)
-        monthly_filings = get_monthly_filings(date_from=date_from, date_to=date_to)
+        kpis = get_dashboard_kpis(date_from=date_from, date_to=date_to)
         upcoming_deadlines = TaxCaseListSerializer(
             get_upcoming_deadlines(), many=True
         ).data
         appointments_today = get_appointments_today()
         missing_docs = get_missing_docs()
         tasks_by_user = get_tasks_by_user()
-        cases_by_fiscal_year = get_cases_by_fiscal_year()
         avg_waiting_docs = get_avg_waiting_for_documents_days()
 
         return Response(
             {
-                "stats": stats,
-                "cases_by_status": cases_by_status,
-                "revenue_pipeline": revenue_pipeline,
-                "cases_by_preparer": cases_by_preparer,
-                "cases_by_type": cases_by_type,
-                "monthly_filings": monthly_filings,
+                "stats": kpis["stats"],
+                "cases_by_status": kpis["cases_by_status"],
+                "revenue_pipeline": kpis["revenue_pipeline"],
+                "cases_by_preparer": kpis["cases_by_preparer"],
+                "cases_by_type": kpis["cases_by_type"],
+                "monthly_filings": kpis["monthly_filings"],
                 "upcoming_deadlines": upcoming_deadlines,
                 "appointments_today": appointments_today,
                 "missing_docs": missing_docs,
                 "tasks_by_user": tasks_by_user,
-                "cases_by_fiscal_year": cases_by_fiscal_year,
+                "cases_by_fiscal_year": kpis["cases_by_fiscal_year"],
                 "avg_waiting_docs": avg_waiting_docs,
             },
             status=status.HTTP_200_OK,
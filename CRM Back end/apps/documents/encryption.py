@@ -8,17 +8,39 @@ Architecture:
 - Master key: Stored in environment variable (DOCUMENT_ENCRYPTION_KEY)
 - Document keys: Random per-document, encrypted with master key, stored in DB
 - Files: Encrypted with document key before storage
+
+File formats:
+- v1: the whole file as a single Fernet token.  Still readable, but it has
+  to be decrypted in memory in one piece.
+- v2: chunked AES-256-GCM container.  A 17-byte header (magic, version,
+  segment size, 7-byte nonce prefix) is followed by fixed 64 KB plaintext
+  segments, each sealed with its own nonce (prefix + segment index + a
+  final-segment flag) and the header as associated data.  Files are
+  encrypted and decrypted one segment at a time, and a byte range can be
+  served by seeking straight to the segments that cover it.
+  ``reencrypt_documents`` converts v1 files.
+
+v1 used the document key as a Fernet key.  v2 never uses it directly: the
+AES-GCM key is derived from it with HKDF, so a document converted from v1
+keeps its key id without one key serving two ciphers.
 """
 
 import base64
+import io
 import logging
 import os
 import secrets
-from typing import Optional, Tuple
+import struct
+import tempfile
+from typing import BinaryIO, Iterator, Optional, Tuple
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +63,47 @@ class DecryptionError(DocumentEncryptionError):
     pass
 
 
+# --- v2 chunked container ---------------------------------------------------
+CONTAINER_MAGIC = b"EJDC"
+CONTAINER_VERSION = 2
+CHUNK_SIZE = 64 * 1024
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = 16
+_HEADER = struct.Struct(f">4sBI{NONCE_PREFIX_SIZE}s")
+HEADER_SIZE = _HEADER.size
+
+# Encrypted uploads are spooled to disk once they exceed this size
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    """Read up to ``size`` bytes, looping over short reads."""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+
+def _chunk_nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    return prefix + struct.pack(">I?", index, last)
+
+
+def _container_cipher(raw_key: bytes) -> AESGCM:
+    """AES-GCM cipher of the v2 container, keyed by HKDF from ``raw_key``."""
+    key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"crm-document-container-v2",
+    ).derive(raw_key)
+    return AESGCM(key)
+
+
 class DocumentEncryptionService:
     """
     Service for encrypting and decrypting document files at rest.
@@ -158,6 +221,120 @@ class DocumentEncryptionService:
         except Exception as e:
             raise EncryptionKeyError(f"Failed to retrieve document key: {e}")
 
+    # --- v2 streaming ----------------------------------------------------
+
+    def encrypt_stream(
+        self, source: BinaryIO, raw_key: bytes, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Encrypt ``source`` into the v2 container, yielding it piece by piece.
+
+        Only two plaintext segments are held in memory at a time, since each
+        segment is sealed once it is known whether another one follows.
+        """
+        aesgcm = _container_cipher(raw_key)
+        header = _HEADER.pack(
+            CONTAINER_MAGIC,
+            CONTAINER_VERSION,
+            chunk_size,
+            secrets.token_bytes(NONCE_PREFIX_SIZE),
+        )
+        prefix = header[-NONCE_PREFIX_SIZE:]
+        yield header
+
+        index = 0
+        current = _read_exact(source, chunk_size)
+        while True:
+            following = _read_exact(source, chunk_size) if current else b""
+            last = not following
+            yield aesgcm.encrypt(_chunk_nonce(prefix, index, last), current, header)
+            if last:
+                return
+            current = following
+            index += 1
+
+    def iter_decrypted(
+        self,
+        stream: BinaryIO,
+        key_id: str,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """
+        Yield the plaintext of an encrypted file, optionally only the
+        inclusive byte range ``start``..``end``.
+
+        v2 files are decrypted segment by segment starting at the segment
+        that contains ``start``; v1 files are decrypted in one piece.
+        """
+        raw_key = self.get_document_key(key_id)
+        head = _read_exact(stream, HEADER_SIZE)
+        if not head.startswith(CONTAINER_MAGIC):
+            yield from self._iter_legacy(head + stream.read(), raw_key, start, end)
+            return
+
+        _magic, version, chunk_size, prefix = _HEADER.unpack(head)
+        if version != CONTAINER_VERSION:
+            raise DecryptionError(f"Unsupported container version: {version}")
+
+        size = self.plaintext_size(stream)
+        if end is None or end >= size:
+            end = size - 1
+        if start > end:
+            return
+
+        sealed_size = chunk_size + TAG_SIZE
+        last_index = max(size - 1, 0) // chunk_size
+        index = start // chunk_size
+        stream.seek(HEADER_SIZE + index * sealed_size)
+        aesgcm = _container_cipher(raw_key)
+        position = index * chunk_size
+        while position <= end:
+            sealed = _read_exact(stream, sealed_size)
+            try:
+                plaintext = aesgcm.decrypt(
+                    _chunk_nonce(prefix, index, index == last_index), sealed, head
+                )
+            except InvalidTag:
+                raise DecryptionError(
+                    "Failed to decrypt file - corrupted, truncated or wrong key"
+                )
+            yield plaintext[max(start - position, 0) : end - position + 1]
+            position += len(plaintext)
+            index += 1
+
+    def _iter_legacy(
+        self, token: bytes, raw_key: bytes, start: int, end: Optional[int]
+    ) -> Iterator[bytes]:
+        try:
+            plaintext = Fernet(base64.urlsafe_b64encode(raw_key)).decrypt(token)
+        except InvalidToken:
+            raise DecryptionError("Failed to decrypt file - corrupted or wrong key")
+        stop = len(plaintext) if end is None else end + 1
+        for offset in range(start, stop, CHUNK_SIZE):
+            yield plaintext[offset : min(offset + CHUNK_SIZE, stop)]
+
+    @staticmethod
+    def is_chunked(stream: BinaryIO) -> bool:
+        """Whether ``stream`` holds a v2 container.  Leaves it at offset 0."""
+        stream.seek(0)
+        head = _read_exact(stream, len(CONTAINER_MAGIC))
+        stream.seek(0)
+        return head == CONTAINER_MAGIC
+
+    @staticmethod
+    def plaintext_size(stream: BinaryIO) -> int:
+        """Return the plaintext size of a v2 container without decrypting."""
+        stream.seek(0)
+        head = _read_exact(stream, HEADER_SIZE)
+        chunk_size = _HEADER.unpack(head)[2]
+        stream.seek(0, os.SEEK_END)
+        body = stream.tell() - HEADER_SIZE
+        chunks = max(-(-body // (chunk_size + TAG_SIZE)), 1)
+        return body - chunks * TAG_SIZE
+
+    # --- whole-file helpers ----------------------------------------------
+
     def encrypt_file(self, content: bytes) -> Tuple[bytes, str]:
         """
         Encrypt file content.
@@ -168,14 +345,8 @@ class DocumentEncryptionService:
         Returns:
             Tuple of (encrypted_content, key_id)
         """
-        # Generate a new key for this document
         raw_key, key_id = self.generate_document_key()
-
-        # Create Fernet cipher with document key
-        doc_fernet = Fernet(base64.urlsafe_b64encode(raw_key))
-
-        # Encrypt the content
-        encrypted_content = doc_fernet.encrypt(content)
+        encrypted_content = b"".join(self.encrypt_stream(io.BytesIO(content), raw_key))
 
         logger.info(
             "Encrypted document",
@@ -189,7 +360,7 @@ class DocumentEncryptionService:
 
     def decrypt_file(self, encrypted_content: bytes, key_id: str) -> bytes:
         """
-        Decrypt file content.
+        Decrypt file content (v1 or v2).
 
         Args:
             encrypted_content: The encrypted file bytes
@@ -199,53 +370,53 @@ class DocumentEncryptionService:
             The decrypted file bytes
         """
         try:
-            # Get the document key
-            raw_key = self.get_document_key(key_id)
-
-            # Create Fernet cipher with document key
-            doc_fernet = Fernet(base64.urlsafe_b64encode(raw_key))
-
-            # Decrypt the content
-            decrypted_content = doc_fernet.decrypt(encrypted_content)
-
-            logger.info(
-                "Decrypted document",
-                extra={
-                    "encrypted_size": len(encrypted_content),
-                    "decrypted_size": len(decrypted_content),
-                },
+            decrypted_content = b"".join(
+                self.iter_decrypted(io.BytesIO(encrypted_content), key_id)
             )
-
-            return decrypted_content
-
-        except InvalidToken:
-            raise DecryptionError("Failed to decrypt file - corrupted or wrong key")
-        except EncryptionKeyError:
+        except (EncryptionKeyError, DecryptionError):
             raise
         except Exception as e:
             raise DecryptionError(f"Failed to decrypt file: {e}")
 
-    def encrypt_django_file(self, django_file) -> Tuple[ContentFile, str]:
+        logger.info(
+            "Decrypted document",
+            extra={
+                "encrypted_size": len(encrypted_content),
+                "decrypted_size": len(decrypted_content),
+            },
+        )
+
+        return decrypted_content
+
+    def encrypt_django_file(
+        self, django_file, key_id: Optional[str] = None
+    ) -> Tuple[File, str]:
         """
-        Encrypt a Django UploadedFile.
+        Encrypt a Django UploadedFile into a v2 container.
+
+        The ciphertext is written to a spooled temporary file segment by
+        segment, so large uploads are never held in memory in full.
 
         Args:
             django_file: Django file object (from request.FILES)
+            key_id: Existing document key to reuse (e.g. when re-encrypting)
 
         Returns:
-            Tuple of (ContentFile with encrypted content, key_id)
+            Tuple of (File with encrypted content, key_id)
         """
-        # Read the file content
-        content = django_file.read()
+        if key_id:
+            raw_key = self.get_document_key(key_id)
+        else:
+            raw_key, key_id = self.generate_document_key()
+
+        django_file.seek(0)
+        spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        for piece in self.encrypt_stream(django_file, raw_key):
+            spooled.write(piece)
+        spooled.seek(0)
         django_file.seek(0)  # Reset file pointer
 
-        # Encrypt
-        encrypted_content, key_id = self.encrypt_file(content)
-
-        # Create new ContentFile with encrypted content
-        encrypted_file = ContentFile(encrypted_content, name=django_file.name)
-
-        return encrypted_file, key_id
+        return File(spooled, name=django_file.name), key_id
 
 
 # Singleton instance
@@ -268,6 +439,20 @@ def is_encryption_enabled() -> bool:
     return bool(key)
 
 
+def encrypt_upload(uploaded_file) -> Tuple[File, dict]:
+    """
+    Prepare an uploaded file for storage on a ``Document``.
+
+    Returns the file to save and the encryption fields to set with it: the
+    v2 container and its key id when document encryption is configured,
+    otherwise the upload unchanged.
+    """
+    if not is_encryption_enabled():
+        return uploaded_file, {"is_encrypted": False, "encryption_key_id": ""}
+    encrypted, key_id = get_encryption_service().encrypt_django_file(uploaded_file)
+    return encrypted, {"is_encrypted": True, "encryption_key_id": key_id}
+
+
 def generate_encryption_key() -> str:
     """
     Generate a new random encryption key for configuration.
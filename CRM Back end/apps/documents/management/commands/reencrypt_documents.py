@@ -0,0 +1,99 @@
+"""
+Management command to convert v1 (single Fernet token) encrypted documents
+to the v2 chunked container.
+
+Usage:
+    python manage.py reencrypt_documents
+    python manage.py reencrypt_documents --batch-size 50
+    python manage.py reencrypt_documents --dry-run
+"""
+
+import io
+
+from django.core.management.base import BaseCommand
+
+from apps.documents.encryption import (
+    DocumentEncryptionError,
+    get_encryption_service,
+)
+from apps.documents.models import Document
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt v1 encrypted documents into the chunked v2 format."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Documents loaded per batch (default: 100).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many documents still use the v1 format.",
+        )
+
+    def handle(self, *args, **options):
+        service = get_encryption_service()
+        qs = (
+            Document.objects.filter(is_encrypted=True)
+            .exclude(file="")
+            .only("pk", "file", "encryption_key_id")
+            .order_by("pk")
+        )
+
+        converted = skipped = failed = 0
+        last_pk = None
+        while True:
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[: options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for document in batch:
+                try:
+                    if self._is_chunked(service, document):
+                        skipped += 1
+                        continue
+                    if not options["dry_run"]:
+                        self._convert(service, document)
+                    converted += 1
+                except (DocumentEncryptionError, OSError) as exc:
+                    failed += 1
+                    self.stderr.write(f"Document {document.pk}: {exc}")
+
+        verb = "Would convert" if options["dry_run"] else "Converted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {converted} documents "
+                f"({skipped} already v2, {failed} failed)."
+            )
+        )
+
+    @staticmethod
+    def _is_chunked(service, document):
+        with document.file.open("rb") as stream:
+            return service.is_chunked(stream)
+
+    @staticmethod
+    def _convert(service, document):
+        # v1 blobs can only be decrypted whole; the new file is written
+        # segment by segment with the document's existing key.
+        with document.file.open("rb") as stream:
+            plaintext = service.decrypt_file(stream.read(), document.encryption_key_id)
+
+        source = io.BytesIO(plaintext)
+        source.name = document.file.name
+        encrypted, _key_id = service.encrypt_django_file(
+            source, key_id=document.encryption_key_id
+        )
+
+        old_name = document.file.name
+        storage = document.file.storage
+        new_name = storage.save(old_name, encrypted)
+        Document.objects.filter(pk=document.pk).update(file=new_name)
+        if new_name != old_name:
+            storage.delete(old_name)
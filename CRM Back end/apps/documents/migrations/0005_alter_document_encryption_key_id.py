@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "documents",
+            "0004_departmentclientfolder_document_department_folder_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="document",
+            name="encryption_key_id",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Identifier for the encryption key used.",
+                max_length=255,
+                verbose_name="encryption key ID",
+            ),
+        ),
+    ]
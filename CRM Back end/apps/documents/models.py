@@ -238,7 +238,7 @@ class Document(TimeStampedModel):
     is_encrypted = models.BooleanField(_("encrypted"), default=False)
     encryption_key_id = models.CharField(
         _("encryption key ID"),
-        max_length=64,
+        max_length=255,
         blank=True,
         default="",
         help_text=_("Identifier for the encryption key used."),
@@ -8,6 +8,7 @@ from apps.documents.models import (
     DocumentLink,
     DocumentTag,
 )
+from apps.documents.streaming import document_download_url
 
 
 # ---------------------------------------------------------------------------
@@ -287,6 +288,8 @@ class DocumentListSerializer(serializers.ModelSerializer):
 
 
 class DocumentDetailSerializer(serializers.ModelSerializer):
+    # The download endpoint, which decrypts; not the stored file's media URL
+    file = serializers.SerializerMethodField()
     contact = _ContactSummarySerializer(read_only=True)
     corporation = _CorporationSummarySerializer(read_only=True)
     case = _CaseSummarySerializer(read_only=True)
@@ -322,6 +325,9 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def get_file(self, obj):
+        return document_download_url(obj)
+
 
 class DocumentCreateUpdateSerializer(serializers.ModelSerializer):
     file = serializers.FileField(required=False)
@@ -0,0 +1,142 @@
+"""
+Streaming document downloads with HTTP Range support.
+
+Plain files are read in fixed-size blocks from the requested offset.
+Encrypted files are decrypted segment by segment by
+``DocumentEncryptionService.iter_decrypted``, which seeks straight to the
+segment containing the first requested byte, so neither a full download nor
+a range request loads the whole file into memory.
+"""
+
+import re
+
+from django.http import FileResponse, HttpResponse
+
+from apps.documents.encryption import (
+    CHUNK_SIZE,
+    CONTAINER_MAGIC,
+    get_encryption_service,
+)
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single-range ``Range`` header against a body of ``size`` bytes.
+
+    Returns ``(start, end)`` (inclusive), ``None`` when the header is absent
+    or not a single byte range (the full body is served), or ``False`` when
+    the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _iter_plain(stream, start, end):
+    stream.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            data = stream.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+    finally:
+        stream.close()
+
+
+def _iter_encrypted(stream, key_id, start, end):
+    try:
+        yield from get_encryption_service().iter_decrypted(
+            stream, key_id, start=start, end=end
+        )
+    finally:
+        stream.close()
+
+
+def _content_size(document, stream):
+    """Size of the document's plaintext, or None if it is unknown."""
+    if not document.is_encrypted:
+        return document.file.size
+    stream.seek(0)
+    if stream.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC:
+        return get_encryption_service().plaintext_size(stream)
+    # v1 Fernet blobs only reveal their size once fully decrypted
+    return None
+
+
+def document_content(document):
+    """The whole plaintext of ``document``'s file, as bytes."""
+    stream = document.file.open("rb")
+    if not document.is_encrypted:
+        try:
+            return stream.read()
+        finally:
+            stream.close()
+    return b"".join(_iter_encrypted(stream, document.encryption_key_id, 0, None))
+
+
+def document_download_url(document):
+    """
+    API path that streams ``document``'s plaintext.  Media URLs of the
+    stored file are never handed out: the file may be encrypted.
+    """
+    if not document.file:
+        return None
+    return f"/api/v1/documents/{document.id}/download/"
+
+
+def document_file_response(request, document, content_type):
+    """
+    Build a streaming ``FileResponse`` for ``document``, honouring a
+    ``Range`` request header with a 206 / 416 response.
+    """
+    stream = document.file.open("rb")
+    size = _content_size(document, stream)
+
+    if size is None:
+        # Legacy v1 blob: stream it whole, without range support
+        stream.seek(0)
+        return FileResponse(
+            _iter_encrypted(stream, document.encryption_key_id, 0, None),
+            content_type=content_type,
+        )
+
+    byte_range = parse_range_header(request.META.get("HTTP_RANGE"), size)
+    if byte_range is False:
+        stream.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    if document.is_encrypted:
+        stream.seek(0)
+        content = _iter_encrypted(stream, document.encryption_key_id, start, end)
+    else:
+        content = _iter_plain(stream, start, end)
+
+    response = FileResponse(content, content_type=content_type)
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Length"] = str(max(end - start + 1, 0))
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
@@ -0,0 +1,212 @@
+import base64
+import io
+import os
+from io import StringIO
+
+import pytest
+from cryptography.fernet import Fernet
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+import apps.documents.encryption as encryption_module
+from apps.documents.encryption import (
+    CHUNK_SIZE,
+    CONTAINER_MAGIC,
+    DecryptionError,
+    generate_encryption_key,
+    get_encryption_service,
+)
+from apps.documents.models import Document
+from apps.documents.streaming import document_content, parse_range_header
+from apps.portal.auth import create_portal_tokens
+from tests.factories import ClientPortalAccessFactory, DocumentFactory
+
+BASE = "/api/v1/documents/"
+
+
+@pytest.fixture
+def service(settings):
+    settings.DOCUMENT_ENCRYPTION_KEY = generate_encryption_key()
+    encryption_module._encryption_service = None
+    yield get_encryption_service()
+    encryption_module._encryption_service = None
+
+
+def _encrypt(service, content):
+    source = io.BytesIO(content)
+    source.name = "scan.pdf"
+    encrypted, key_id = service.encrypt_django_file(source)
+    return encrypted.read(), key_id
+
+
+def _v1_blob(service, content):
+    raw_key, key_id = service.generate_document_key()
+    return Fernet(base64.urlsafe_b64encode(raw_key)).encrypt(content), key_id
+
+
+class TestChunkedContainer:
+    @pytest.mark.parametrize(
+        "size", [0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 3 * CHUNK_SIZE + 17]
+    )
+    def test_roundtrip(self, service, size):
+        content = os.urandom(size)
+        blob, key_id = _encrypt(service, content)
+        assert service.decrypt_file(blob, key_id) == content
+        assert service.plaintext_size(io.BytesIO(blob)) == size
+
+    def test_range_decrypts_only_covering_segments(self, service):
+        content = os.urandom(4 * CHUNK_SIZE)
+        blob, key_id = _encrypt(service, content)
+        start, end = 2 * CHUNK_SIZE - 10, 2 * CHUNK_SIZE + 10
+
+        # Corrupt the first segment: a range after it must not touch it
+        damaged = bytearray(blob)
+        damaged[40] ^= 0xFF
+        stream = io.BytesIO(bytes(damaged))
+        data = b"".join(service.iter_decrypted(stream, key_id, start=start, end=end))
+        assert data == content[start : end + 1]
+
+    def test_tampering_is_detected(self, service):
+        blob, key_id = _encrypt(service, os.urandom(CHUNK_SIZE * 2))
+        damaged = bytearray(blob)
+        damaged[-1] ^= 0xFF
+        with pytest.raises(DecryptionError):
+            service.decrypt_file(bytes(damaged), key_id)
+
+    def test_truncation_is_detected(self, service):
+        blob, key_id = _encrypt(service, os.urandom(CHUNK_SIZE * 2))
+        with pytest.raises(DecryptionError):
+            service.decrypt_file(blob[: -(CHUNK_SIZE + 16)], key_id)
+
+    def test_v1_blobs_stay_readable(self, service):
+        content = os.urandom(CHUNK_SIZE + 5)
+        blob, key_id = _v1_blob(service, content)
+        assert service.decrypt_file(blob, key_id) == content
+        data = b"".join(
+            service.iter_decrypted(io.BytesIO(blob), key_id, start=3, end=9)
+        )
+        assert data == content[3:10]
+
+
+class TestParseRangeHeader:
+    def test_ranges(self):
+        assert parse_range_header("bytes=0-99", 1000) == (0, 99)
+        assert parse_range_header("bytes=900-", 1000) == (900, 999)
+        assert parse_range_header("bytes=-100", 1000) == (900, 999)
+        assert parse_range_header("bytes=0-5000", 1000) == (0, 999)
+        assert parse_range_header("bytes=1000-", 1000) is False
+        assert parse_range_header("bytes=0-1,5-9", 1000) is None
+        assert parse_range_header(None, 1000) is None
+
+
+@pytest.mark.django_db
+class TestEncryptedDownload:
+    def _document(self, service, content, v1=False):
+        if v1:
+            blob, key_id = _v1_blob(service, content)
+        else:
+            blob, key_id = _encrypt(service, content)
+        doc = DocumentFactory(is_encrypted=True)
+        doc.file.save("scan.pdf", ContentFile(blob), save=False)
+        doc.encryption_key_id = key_id
+        doc.save()
+        return doc
+
+    def test_download_streams_plaintext(self, service, admin_client):
+        content = os.urandom(3 * CHUNK_SIZE + 100)
+        doc = self._document(service, content)
+
+        resp = admin_client.get(f"{BASE}{doc.id}/download/")
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.streaming
+        assert resp["Accept-Ranges"] == "bytes"
+        assert b"".join(resp.streaming_content) == content
+
+    def test_range_request_returns_partial_content(self, service, admin_client):
+        content = os.urandom(3 * CHUNK_SIZE + 100)
+        doc = self._document(service, content)
+
+        start, end = CHUNK_SIZE + 7, 2 * CHUNK_SIZE + 7
+        resp = admin_client.get(
+            f"{BASE}{doc.id}/download/", HTTP_RANGE=f"bytes={start}-{end}"
+        )
+        assert resp.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert resp["Content-Range"] == f"bytes {start}-{end}/{len(content)}"
+        assert resp["Content-Length"] == str(end - start + 1)
+        assert b"".join(resp.streaming_content) == content[start : end + 1]
+
+    def test_unsatisfiable_range(self, service, admin_client):
+        doc = self._document(service, b"short")
+        resp = admin_client.get(f"{BASE}{doc.id}/download/", HTTP_RANGE="bytes=10-")
+        assert resp.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    def test_plain_document_range(self, admin_client):
+        doc = DocumentFactory()
+        doc.file.save("notes.txt", ContentFile(b"0123456789"), save=True)
+        resp = admin_client.get(f"{BASE}{doc.id}/download/", HTTP_RANGE="bytes=2-4")
+        assert resp.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b"".join(resp.streaming_content) == b"234"
+
+    def test_portal_download_streams_plaintext(self, service):
+        content = os.urandom(CHUNK_SIZE + 5)
+        doc = self._document(service, content)
+        access = ClientPortalAccessFactory()
+        Document.objects.filter(pk=doc.pk).update(contact=access.contact)
+        token = create_portal_tokens(access)["access"]
+
+        resp = APIClient().get(
+            f"/api/v1/portal/documents/{doc.id}/download/",
+            {"token": token},
+            HTTP_RANGE="bytes=0-9",
+        )
+
+        assert resp.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b"".join(resp.streaming_content) == content[:10]
+
+    def test_document_content_is_plaintext(self, service):
+        content = os.urandom(2 * CHUNK_SIZE + 11)
+        doc = self._document(service, content)
+        assert document_content(doc) == content
+
+    def test_detail_exposes_download_path_not_media_url(self, service, admin_client):
+        doc = self._document(service, b"secret")
+        resp = admin_client.get(f"{BASE}{doc.id}/")
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["file"] == f"{BASE}{doc.id}/download/"
+
+    def test_upload_is_stored_encrypted(self, service, admin_client):
+        content = b"%PDF-1.4\n" + os.urandom(100)
+        upload = SimpleUploadedFile("scan.pdf", content, "application/pdf")
+
+        resp = admin_client.post(
+            BASE, {"title": "Scan", "doc_type": "other", "file": upload}
+        )
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        doc = Document.objects.get(pk=resp.data["id"])
+        assert doc.is_encrypted
+        with doc.file.open("rb") as stream:
+            assert stream.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+        download = admin_client.get(f"{BASE}{doc.id}/download/")
+        assert b"".join(download.streaming_content) == content
+
+    def test_reencrypt_command_converts_v1(self, service, admin_client):
+        content = os.urandom(2 * CHUNK_SIZE + 3)
+        doc = self._document(service, content, v1=True)
+
+        out = StringIO()
+        call_command("reencrypt_documents", "--batch-size", "1", stdout=out)
+        assert "Converted 1 documents" in out.getvalue()
+
+        doc.refresh_from_db()
+        with doc.file.open("rb") as stream:
+            assert service.is_chunked(stream)
+        resp = admin_client.get(f"{BASE}{doc.id}/download/")
+        assert b"".join(resp.streaming_content) == content
+
+        out = StringIO()
+        call_command("reencrypt_documents", stdout=out)
+        assert "Converted 0 documents (1 already v2" in out.getvalue()
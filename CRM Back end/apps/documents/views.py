@@ -4,7 +4,6 @@ from urllib.parse import quote
 
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Count, Q
-from django.http import FileResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.clickjacking import xframe_options_exempt
 from rest_framework import status, viewsets
@@ -15,6 +14,7 @@ from rest_framework.response import Response
 
 from apps.core.throttling import FileUploadRateThrottle
 from apps.core.validators import validate_file_type
+from apps.documents.encryption import encrypt_upload
 from apps.documents.filters import DocumentFilter, DocumentLinkFilter
 from apps.documents.models import (
     Document,
@@ -37,6 +37,7 @@ from apps.documents.serializers import (
     DocumentTagCreateUpdateSerializer,
     DocumentTagSerializer,
 )
+from apps.documents.streaming import document_file_response
 from apps.users.permissions import ModulePermission
 
 logger = logging.getLogger(__name__)
@@ -203,6 +204,17 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     f"Document upload rejected for user {self.request.user.id}: {e.message}"
                 )
                 raise
+            extra["file"], encryption = encrypt_upload(uploaded_file)
+            extra.update(encryption)
+        serializer.save(**extra)
+
+    def perform_update(self, serializer):
+        uploaded_file = self.request.FILES.get("file")
+        extra = {}
+        if uploaded_file:
+            extra["file_size"] = uploaded_file.size
+            extra["file"], encryption = encrypt_upload(uploaded_file)
+            extra.update(encryption)
         serializer.save(**extra)
 
     # ---- custom actions --------------------------------------------------
@@ -320,10 +332,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
             # Try to detect from filename
             guessed = mimetypes.guess_type(document.file.name)[0]
             content_type = guessed or "application/octet-stream"
-        response = FileResponse(
-            document.file.open("rb"),
-            content_type=content_type,
-        )
+        # Streams plaintext (decrypting segment by segment) and honours Range
+        response = document_file_response(request, document, content_type)
         # SECURITY: Properly sanitize filename for HTTP headers
         # Use RFC 5987 encoding to handle special characters safely
         filename = document.file.name.split("/")[-1]
@@ -412,6 +422,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 or mimetypes.guess_type(uploaded_file.name)[0]
                 or "application/octet-stream"
             )
+            extra["file"], encryption = encrypt_upload(uploaded_file)
+            extra.update(encryption)
         doc = serializer.save(**extra)
         return Response(
             DocumentDetailSerializer(doc).data,
@@ -443,14 +455,16 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 or mimetypes.guess_type(f.name)[0]
                 or "application/octet-stream"
             )
+            stored, encryption = encrypt_upload(f)
             doc = Document.objects.create(
                 title=f.name,
-                file=f,
+                file=stored,
                 doc_type=doc_type,
                 file_size=f.size,
                 mime_type=mime,
                 uploaded_by=request.user,
                 folder_id=folder_id,
+                **encryption,
             )
             created.append(doc)
 
@@ -1,6 +1,6 @@
 import django_filters
-from django.db import models
 
+from apps.core.search import filter_queryset
 from apps.emails.models import EmailMessage, EmailSyncLog, EmailThread
 
 
@@ -22,11 +22,8 @@ class EmailMessageFilter(django_filters.FilterSet):
         fields = []
 
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            models.Q(subject__icontains=value)
-            | models.Q(from_address__icontains=value)
-            | models.Q(body_text__icontains=value)
-        )
+        """Subject, addresses and body, through the search index."""
+        return filter_queryset(queryset, "emails", value)
 
 
 class EmailThreadFilter(django_filters.FilterSet):
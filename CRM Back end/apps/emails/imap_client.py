@@ -8,7 +8,9 @@ import email
 import email.utils
 import imaplib
 import logging
+import re
 import smtplib
+import tempfile
 from datetime import datetime, timezone
 from email.header import decode_header
 from email.message import Message
@@ -18,6 +20,25 @@ from email.mime.text import MIMEText
 
 logger = logging.getLogger(__name__)
 
+# UIDs whose sizes are looked up per RFC822.SIZE command
+SIZE_LOOKUP_BATCH = 500
+
+# Messages per UID FETCH command, and the most message bytes one command
+# may return
+FETCH_BATCH_SIZE = 50
+FETCH_BATCH_BYTES = 8 * 1024 * 1024
+
+# Messages larger than this are downloaded in FETCH_CHUNK_BYTES pieces into
+# a spooled temporary file instead of one literal
+LARGE_MESSAGE_BYTES = 4 * 1024 * 1024
+FETCH_CHUNK_BYTES = 1024 * 1024
+
+# Attachment bodies larger than this are spooled to disk
+ATTACHMENT_SPOOL_BYTES = 1024 * 1024
+
+_UID_RE = re.compile(rb"UID (\d+)")
+_SIZE_RE = re.compile(rb"RFC822\.SIZE (\d+)")
+
 
 def _decode_header_value(value: str | None) -> str:
     """Decode an RFC 2047 encoded header into a plain string."""
@@ -73,7 +94,9 @@ def _get_text_body(msg: Message) -> str:
 def _get_attachments(msg: Message) -> list[dict]:
     """Extract attachment info from a MIME message.
 
-    Returns list of dicts: {filename, mime_type, data (bytes), size}.
+    Returns list of dicts: {filename, mime_type, file, size}, where ``file``
+    is a spooled temporary file holding the decoded body (on disk once it
+    exceeds ATTACHMENT_SPOOL_BYTES).
     """
     attachments = []
     if not msg.is_multipart():
@@ -92,17 +115,55 @@ def _get_attachments(msg: Message) -> list[dict]:
         data = part.get_payload(decode=True)
         if data is None:
             continue
+        spool = tempfile.SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_BYTES)
+        spool.write(data)
+        spool.seek(0)
         attachments.append(
             {
                 "filename": filename,
                 "mime_type": part.get_content_type(),
-                "data": data,
+                "file": spool,
                 "size": len(data),
             }
         )
+        # Release the decoded copy held by the MIME tree
+        part.set_payload(None)
     return attachments
 
 
+def _uid_set(uids) -> str:
+    """Compact IMAP sequence set for sorted *uids* ("1:3,7,9:10")."""
+    ranges = []
+    for uid in uids:
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+
+
+def _plan_batches(sizes: dict[int, int]):
+    """Group UIDs into fetch batches bounded by count and total size."""
+    batch, batch_bytes = [], 0
+    for uid in sorted(sizes):
+        size = sizes[uid]
+        if size > LARGE_MESSAGE_BYTES:
+            if batch:
+                yield batch
+            batch, batch_bytes = [], 0
+            yield [uid]
+            continue
+        if batch and (
+            len(batch) >= FETCH_BATCH_SIZE or batch_bytes + size > FETCH_BATCH_BYTES
+        ):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(uid)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
 class ParsedEmail:
     """Structured representation of a parsed IMAP email."""
 
@@ -133,6 +194,11 @@ class ParsedEmail:
             )
         }
 
+    def close(self):
+        """Release the temporary files holding attachment bodies."""
+        for attachment in self.attachments:
+            attachment["file"].close()
+
 
 class IMAPClient:
     """Wraps imaplib for fetching new emails from an account."""
@@ -145,6 +211,7 @@ class IMAPClient:
         self.use_ssl = use_ssl
         self.username = username
         self.password = password
+        self.uidvalidity: int | None = None
         self._conn: imaplib.IMAP4 | None = None
 
     def connect(self):
@@ -165,38 +232,105 @@ class IMAPClient:
                 )
             self._conn = None
 
-    def fetch_new_messages(self, since_uid: str = "") -> list[ParsedEmail]:
-        """Fetch messages from INBOX. If since_uid is given, fetch only newer."""
+    def select_inbox(self) -> int:
+        """Select INBOX and return its UIDVALIDITY (0 if not reported)."""
         if not self._conn:
             raise RuntimeError("Not connected. Call connect() first.")
-
-        self._conn.select("INBOX")
-
-        if since_uid:
-            # Fetch UIDs greater than the last known UID
-            search_criteria = f"(UID {int(since_uid) + 1}:*)"
-        else:
-            search_criteria = "ALL"
-
-        status, data = self._conn.uid("search", None, search_criteria)
+        status, _data = self._conn.select("INBOX")
         if status != "OK":
+            raise imaplib.IMAP4.error("Could not select INBOX")
+        _typ, data = self._conn.response("UIDVALIDITY")
+        try:
+            self.uidvalidity = int(data[0])
+        except (TypeError, ValueError, IndexError):
+            self.uidvalidity = 0
+        return self.uidvalidity
+
+    def fetch_new_messages(self, since_uid: int = 0):
+        """
+        Yield messages from INBOX with a UID above *since_uid*, oldest first.
+
+        Messages are fetched with one ``UID FETCH`` per batch of up to
+        FETCH_BATCH_SIZE messages / FETCH_BATCH_BYTES bytes, so a large
+        mailbox is never held in memory at once.  A fetch that fails or
+        comes back incomplete raises ``imaplib.IMAP4.error`` instead of
+        skipping the message, so callers never checkpoint past it.
+        """
+        if not self._conn:
+            raise RuntimeError("Not connected. Call connect() first.")
+        if self.uidvalidity is None:
+            self.select_inbox()
+
+        since_uid = int(since_uid or 0)
+        uids = self._search_uids(since_uid)
+        for start in range(0, len(uids), SIZE_LOOKUP_BATCH):
+            sizes = self._message_sizes(uids[start : start + SIZE_LOOKUP_BATCH])
+            for batch in _plan_batches(sizes):
+                if len(batch) == 1 and sizes[batch[0]] > LARGE_MESSAGE_BYTES:
+                    yield self._fetch_large(batch[0], sizes[batch[0]])
+                    continue
+                yield from self._fetch_batch(batch)
+
+    def _search_uids(self, since_uid: int) -> list[int]:
+        criteria = f"(UID {since_uid + 1}:*)" if since_uid else "ALL"
+        status, data = self._conn.uid("search", None, criteria)
+        if status != "OK" or not data or not data[0]:
             return []
+        # "n:*" always matches the highest UID, even when it is below n
+        return sorted(uid for uid in map(int, data[0].split()) if uid > since_uid)
 
-        uid_list = data[0].split()
-        if not uid_list:
-            return []
-
-        results = []
-        for uid_bytes in uid_list:
-            uid_str = uid_bytes.decode()
-            status, msg_data = self._conn.uid("fetch", uid_str, "(RFC822)")
-            if status != "OK" or not msg_data or not msg_data[0]:
+    def _message_sizes(self, uids: list[int]) -> dict[int, int]:
+        status, data = self._conn.uid("fetch", _uid_set(uids), "(RFC822.SIZE)")
+        sizes = {}
+        if status != "OK":
+            return sizes
+        for item in data:
+            line = item[0] if isinstance(item, tuple) else item
+            if not isinstance(line, bytes):
                 continue
-            raw_email = msg_data[0][1]
-            msg = email.message_from_bytes(raw_email)
-            results.append(ParsedEmail(uid=uid_str, msg=msg))
+            uid_match, size_match = _UID_RE.search(line), _SIZE_RE.search(line)
+            if uid_match and size_match:
+                sizes[int(uid_match.group(1))] = int(size_match.group(1))
+        return sizes
 
-        return results
+    def _fetch_batch(self, uids: list[int]):
+        status, data = self._conn.uid("fetch", _uid_set(uids), "(UID RFC822)")
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"Could not fetch UIDs {_uid_set(uids)}")
+        messages = {}
+        for item in data or []:
+            if not isinstance(item, tuple) or len(item) < 2:
+                continue
+            uid_match = _UID_RE.search(item[0])
+            if not uid_match:
+                continue
+            messages[int(uid_match.group(1))] = email.message_from_bytes(item[1])
+        missing = [uid for uid in uids if uid not in messages]
+        if missing:
+            raise imaplib.IMAP4.error(f"Server did not return UIDs {_uid_set(missing)}")
+        for uid in uids:
+            yield ParsedEmail(uid=str(uid), msg=messages[uid])
+
+    def _fetch_large(self, uid: int, size: int):
+        """Download one large message in pieces and parse it from disk."""
+        with tempfile.SpooledTemporaryFile(max_size=FETCH_CHUNK_BYTES) as spool:
+            offset = 0
+            while offset < size:
+                status, data = self._conn.uid(
+                    "fetch", str(uid), f"(BODY[]<{offset}.{FETCH_CHUNK_BYTES}>)"
+                )
+                chunk = next(
+                    (item[1] for item in data or [] if isinstance(item, tuple)), b""
+                )
+                if status != "OK" or not chunk:
+                    raise imaplib.IMAP4.error(
+                        f"Incomplete fetch of UID {uid}: {offset} of {size} bytes"
+                    )
+                spool.write(chunk)
+                offset += len(chunk)
+            spool.seek(0)
+            msg = email.message_from_binary_file(spool)
+        return ParsedEmail(uid=str(uid), msg=msg)
 
     def __enter__(self):
         self.connect()
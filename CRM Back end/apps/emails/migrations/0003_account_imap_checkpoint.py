@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+def seed_last_uid(apps, schema_editor):
+    """Start the checkpoint at the highest UID already synced per account."""
+    EmailAccount = apps.get_model("emails", "EmailAccount")
+    EmailMessage = apps.get_model("emails", "EmailMessage")
+
+    for account in EmailAccount.objects.all():
+        uids = (
+            EmailMessage.objects.filter(account=account, direction="inbound")
+            .exclude(imap_uid="")
+            .values_list("imap_uid", flat=True)
+        )
+        last_uid = max(
+            (int(uid) for uid in uids.iterator() if uid.isdigit()), default=0
+        )
+        if last_uid:
+            EmailAccount.objects.filter(pk=account.pk).update(imap_last_uid=last_uid)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("emails", "0002_email_settings_singleton"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailaccount",
+            name="imap_uidvalidity",
+            field=models.PositiveBigIntegerField(
+                blank=True, null=True, verbose_name="IMAP UIDVALIDITY"
+            ),
+        ),
+        migrations.AddField(
+            model_name="emailaccount",
+            name="imap_last_uid",
+            field=models.PositiveBigIntegerField(
+                default=0, verbose_name="last synced IMAP UID"
+            ),
+        ),
+        migrations.RunPython(seed_last_uid, migrations.RunPython.noop),
+    ]
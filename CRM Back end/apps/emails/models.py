@@ -33,6 +33,11 @@ class EmailAccount(TimeStampedModel):
     sync_interval_minutes = models.PositiveIntegerField(
         _("sync interval (minutes)"), default=5
     )
+    # IMAP sync checkpoint: UIDs are only comparable within one UIDVALIDITY
+    imap_uidvalidity = models.PositiveBigIntegerField(
+        _("IMAP UIDVALIDITY"), null=True, blank=True
+    )
+    imap_last_uid = models.PositiveBigIntegerField(_("last synced IMAP UID"), default=0)
 
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -0,0 +1,24 @@
+"""
+Search indexing of email messages (see ``apps.core.search``).
+"""
+
+from apps.core.search import SearchSource
+from apps.emails.models import EmailMessage
+
+
+class EmailMessageSearch(SearchSource):
+    model = EmailMessage
+    module = "emails"
+    fields = ("subject", "from_address", "to_addresses", "cc_addresses", "body_text")
+    config = "english"
+
+    def title(self, obj):
+        return obj.subject
+
+    def texts(self, obj):
+        return [
+            obj.from_address,
+            *(obj.to_addresses or []),
+            *(obj.cc_addresses or []),
+            obj.body_text,
+        ]
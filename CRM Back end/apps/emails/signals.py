@@ -0,0 +1,10 @@
+"""
+Signals sent by the email app.
+"""
+
+from django.dispatch import Signal
+
+# Sent after an IMAP sync batch is stored with bulk_create, which skips
+# post_save.  Arguments: ``account``, ``message_ids`` (the new inbound
+# EmailMessage ids).
+inbound_messages_synced = Signal()
@@ -5,15 +5,24 @@ Celery tasks for email sync, send, and notification checks.
 import logging
 import re
 from datetime import timedelta
+from itertools import islice
 
 from celery import shared_task
+from django.core.files import File
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
 from django.utils import timezone
 
 from apps.emails.imap_client import IMAPClient
+from apps.emails.signals import inbound_messages_synced
 
 logger = logging.getLogger(__name__)
 
+# Parsed messages stored per transaction during IMAP sync
+SYNC_BATCH_SIZE = 50
+
 
 def _normalize_subject(subject: str) -> str:
     """Strip Re:/Fwd: prefixes for thread matching."""
@@ -22,66 +31,217 @@ def _normalize_subject(subject: str) -> str:
     ).strip()
 
 
-def _find_or_create_thread(parsed, account):
-    """Find an existing thread by In-Reply-To / References, or create a new one."""
-    from apps.emails.models import EmailMessage, EmailThread
-
-    # Try matching by In-Reply-To
+def _reference_ids(parsed):
+    """Message-IDs a message replies to, most specific first."""
     if parsed.in_reply_to:
-        existing = (
-            EmailMessage.objects.filter(
-                message_id=parsed.in_reply_to, thread__isnull=False
-            )
-            .select_related("thread")
-            .first()
-        )
-        if existing:
-            return existing.thread
-
-    # Try matching by References header
-    if parsed.references:
-        ref_ids = parsed.references.split()
-        for ref_id in reversed(ref_ids):
-            ref_id = ref_id.strip()
-            if ref_id:
-                existing = (
-                    EmailMessage.objects.filter(message_id=ref_id, thread__isnull=False)
-                    .select_related("thread")
-                    .first()
-                )
-                if existing:
-                    return existing.thread
+        yield parsed.in_reply_to
+    for ref_id in reversed((parsed.references or "").split()):
+        ref_id = ref_id.strip()
+        if ref_id:
+            yield ref_id
+
+
+def _save_attachment_file(att):
+    """Store an attachment body and return its storage name."""
+    from apps.emails.models import EmailAttachment
+
+    field = EmailAttachment._meta.get_field("file")
+    name = field.generate_filename(None, att["filename"])
+    content = File(att["file"]) if "file" in att else ContentFile(att["data"])
+    return field.storage.save(name, content, max_length=field.max_length)
+
+
+def _delete_attachment_files(names):
+    """Remove attachment bodies stored for a batch that was not saved."""
+    from apps.emails.models import EmailAttachment
+
+    storage = EmailAttachment._meta.get_field("file").storage
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("Could not delete orphaned attachment %s", name)
+
 
-    # Fallback: match by normalized subject
-    normalized = _normalize_subject(parsed.subject)
-    if normalized:
-        thread = EmailThread.objects.filter(
-            subject=normalized,
-            messages__account=account,
-        ).first()
-        if thread:
-            return thread
+def _refresh_thread_stats(thread_ids):
+    """Recompute count, last message time and contact of threads in one UPDATE."""
+    from apps.emails.models import EmailMessage, EmailThread
+
+    messages = EmailMessage.objects.filter(thread=OuterRef("pk")).order_by()
+    EmailThread.objects.filter(pk__in=thread_ids).update(
+        message_count=Subquery(
+            messages.values("thread").annotate(n=Count("pk")).values("n")
+        ),
+        last_message_at=Subquery(
+            messages.annotate(at=Coalesce("sent_at", "created_at"))
+            .order_by("-at")
+            .values("at")[:1]
+        ),
+        contact=Coalesce(
+            F("contact"),
+            Subquery(
+                messages.filter(contact__isnull=False)
+                .order_by("created_at")
+                .values("contact")[:1]
+            ),
+        ),
+        updated_at=timezone.now(),
+    )
 
-    # Create new thread
-    return EmailThread.objects.create(subject=_normalize_subject(parsed.subject))
 
+def store_messages(account, batch):
+    """
+    Store a batch of parsed inbound messages for ``account``.
 
-def _auto_link_contact(from_address: str):
-    """Try to find a Contact by email address."""
+    Duplicates, threads and contacts are resolved with one query each for
+    the whole batch, rows are written with ``bulk_create`` and the touched
+    threads' stats are refreshed in a single UPDATE.  Attachment bodies are
+    stored first and deleted again if the batch fails.  Returns the number
+    of messages created.
+    """
+    from apps.cases.models import TaxCase
     from apps.contacts.models import Contact
+    from apps.emails.models import EmailAttachment, EmailMessage, EmailThread
+
+    unique = {}
+    for parsed in batch:
+        if parsed.message_id and parsed.message_id not in unique:
+            unique[parsed.message_id] = parsed
+    existing = set(
+        EmailMessage.objects.filter(message_id__in=unique).values_list(
+            "message_id", flat=True
+        )
+    )
+    parsed_list = [p for mid, p in unique.items() if mid not in existing]
+    if not parsed_list:
+        return 0
+
+    # Threads of the messages these reply to
+    ref_ids = {ref_id for p in parsed_list for ref_id in _reference_ids(p)}
+    thread_by_message = (
+        dict(
+            EmailMessage.objects.filter(
+                message_id__in=ref_ids, thread__isnull=False
+            ).values_list("message_id", "thread_id")
+        )
+        if ref_ids
+        else {}
+    )
 
-    return Contact.objects.filter(email__iexact=from_address).first()
+    # Fallback: latest thread of this account with the same subject
+    subjects = {_normalize_subject(p.subject) for p in parsed_list} - {""}
+    thread_by_subject = {}
+    if subjects:
+        for subject, thread_id in (
+            EmailThread.objects.filter(subject__in=subjects, messages__account=account)
+            .order_by("-last_message_at")
+            .values_list("subject", "id")
+        ):
+            thread_by_subject.setdefault(subject, thread_id)
+
+    # Contacts by sender address, with their latest case
+    addresses = {p.from_address[0].lower() for p in parsed_list if p.from_address}
+    contacts = {}
+    if addresses:
+        latest_case = (
+            TaxCase.objects.filter(contact=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("pk")[:1]
+        )
+        for address, contact_id, case_id in (
+            Contact.objects.annotate(
+                address=Lower("email"), latest_case_id=Subquery(latest_case)
+            )
+            .filter(address__in=addresses)
+            .values_list("address", "pk", "latest_case_id")
+        ):
+            contacts.setdefault(address, (contact_id, case_id))
+
+    new_threads, messages = [], []
+    for parsed in parsed_list:
+        subject = _normalize_subject(parsed.subject)
+        thread_id = next(
+            (
+                thread_by_message[ref_id]
+                for ref_id in _reference_ids(parsed)
+                if ref_id in thread_by_message
+            ),
+            None,
+        )
+        if thread_id is None and subject:
+            thread_id = thread_by_subject.get(subject)
+        if thread_id is None:
+            thread = EmailThread(subject=subject)
+            new_threads.append(thread)
+            thread_id = thread.pk
+            if subject:
+                thread_by_subject[subject] = thread_id
+        thread_by_message[parsed.message_id] = thread_id
+
+        from_addr = parsed.from_address[0] if parsed.from_address else ""
+        contact_id, case_id = contacts.get(from_addr.lower(), (None, None))
+        messages.append(
+            EmailMessage(
+                account=account,
+                thread_id=thread_id,
+                message_id=parsed.message_id,
+                in_reply_to=parsed.in_reply_to,
+                references=parsed.references,
+                direction=EmailMessage.Direction.INBOUND,
+                from_address=from_addr,
+                to_addresses=parsed.to_addresses,
+                cc_addresses=parsed.cc_addresses,
+                subject=parsed.subject,
+                body_text=parsed.body_text,
+                sent_at=parsed.date,
+                folder=EmailMessage.Folder.INBOX,
+                imap_uid=parsed.uid,
+                raw_headers=parsed.raw_headers,
+                contact_id=contact_id,
+                case_id=case_id,
+            )
+        )
+
+    attachments = []
+    try:
+        for msg, parsed in zip(messages, parsed_list):
+            for att in parsed.attachments:
+                attachments.append(
+                    EmailAttachment(
+                        email=msg,
+                        file=_save_attachment_file(att),
+                        filename=att["filename"],
+                        mime_type=att["mime_type"],
+                        file_size=att["size"],
+                    )
+                )
+
+        with transaction.atomic():
+            EmailThread.objects.bulk_create(new_threads)
+            EmailMessage.objects.bulk_create(messages)
+            EmailAttachment.objects.bulk_create(attachments)
+            _refresh_thread_stats({msg.thread_id for msg in messages})
+    except Exception:
+        # Nothing references the stored bodies; the retry saves them again
+        _delete_attachment_files([att.file.name for att in attachments])
+        raise
+
+    inbound_messages_synced.send(
+        sender=EmailMessage, account=account, message_ids=[msg.pk for msg in messages]
+    )
+    return len(messages)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def sync_email_account(self, account_id: str):
-    """Sync a single email account via IMAP."""
-    from apps.emails.models import (
-        EmailAccount,
-        EmailAttachment,
-        EmailMessage,
-        EmailSyncLog,
-    )
+    """
+    Sync a single email account via IMAP.
+
+    New messages are fetched in UID batches and stored a batch at a time;
+    the account's UID checkpoint advances after every stored batch, so a
+    failed sync resumes where it stopped.
+    """
+    from apps.emails.models import EmailAccount, EmailSyncLog
 
     started_at = timezone.now()
 
@@ -91,16 +251,6 @@ def sync_email_account(self, account_id: str):
         logger.warning("Email account %s not found or inactive", account_id)
         return
 
-    # Determine the last known IMAP UID
-    last_msg = (
-        EmailMessage.objects.filter(account=account, direction="inbound")
-        .exclude(imap_uid="")
-        .order_by("-imap_uid")
-        .values_list("imap_uid", flat=True)
-        .first()
-    )
-    since_uid = last_msg or ""
-
     messages_fetched = 0
     try:
         with IMAPClient(
@@ -110,76 +260,42 @@ def sync_email_account(self, account_id: str):
             username=account.username,
             password=account.password,
         ) as client:
-            parsed_emails = client.fetch_new_messages(since_uid=since_uid)
-
-            for parsed in parsed_emails:
-                if not parsed.message_id:
-                    continue
-
-                # Skip duplicates
-                if EmailMessage.objects.filter(message_id=parsed.message_id).exists():
-                    continue
-
-                # Find or create thread
-                thread = _find_or_create_thread(parsed, account)
-
-                # Auto-link contact
-                from_addr = parsed.from_address[0] if parsed.from_address else ""
-                contact = _auto_link_contact(from_addr) if from_addr else None
-
-                # Create message
-                msg = EmailMessage.objects.create(
-                    account=account,
-                    thread=thread,
-                    message_id=parsed.message_id,
-                    in_reply_to=parsed.in_reply_to,
-                    references=parsed.references,
-                    direction=EmailMessage.Direction.INBOUND,
-                    from_address=from_addr,
-                    to_addresses=parsed.to_addresses,
-                    cc_addresses=parsed.cc_addresses,
-                    subject=parsed.subject,
-                    body_text=parsed.body_text,
-                    sent_at=parsed.date,
-                    folder=EmailMessage.Folder.INBOX,
-                    imap_uid=parsed.uid,
-                    raw_headers=parsed.raw_headers,
-                    contact=contact,
-                    case=(
-                        contact.tax_cases.order_by("-created_at").first()
-                        if contact
-                        else None
-                    ),
+            uidvalidity = client.select_inbox()
+            if account.imap_uidvalidity not in (None, uidvalidity):
+                # The mailbox was recreated and old UIDs mean nothing;
+                # refetch everything, duplicates are skipped by Message-ID
+                logger.info("UIDVALIDITY changed for account %s", account_id)
+                account.imap_last_uid = 0
+            account.imap_uidvalidity = uidvalidity
+
+            parsed_emails = iter(
+                client.fetch_new_messages(since_uid=account.imap_last_uid)
+            )
+            while True:
+                batch = list(islice(parsed_emails, SYNC_BATCH_SIZE))
+                if not batch:
+                    break
+                try:
+                    messages_fetched += store_messages(account, batch)
+                finally:
+                    for parsed in batch:
+                        parsed.close()
+                account.imap_last_uid = max(
+                    account.imap_last_uid, *(int(parsed.uid) for parsed in batch)
                 )
-
-                # Save attachments
-                for att in parsed.attachments:
-                    EmailAttachment.objects.create(
-                        email=msg,
-                        file=ContentFile(att["data"], name=att["filename"]),
-                        filename=att["filename"],
-                        mime_type=att["mime_type"],
-                        file_size=att["size"],
-                    )
-
-                messages_fetched += 1
-
-                # Update thread stats
-                thread.last_message_at = msg.sent_at or msg.created_at
-                thread.message_count = thread.messages.count()
-                if contact and not thread.contact:
-                    thread.contact = contact
-                thread.save(
-                    update_fields=[
-                        "last_message_at",
-                        "message_count",
-                        "contact",
-                        "updated_at",
-                    ]
+                account.save(
+                    update_fields=["imap_uidvalidity", "imap_last_uid", "updated_at"]
                 )
 
         account.last_sync_at = timezone.now()
-        account.save(update_fields=["last_sync_at", "updated_at"])
+        account.save(
+            update_fields=[
+                "last_sync_at",
+                "imap_uidvalidity",
+                "imap_last_uid",
+                "updated_at",
+            ]
+        )
 
         EmailSyncLog.objects.create(
             account=account,
@@ -0,0 +1,116 @@
+import imaplib
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.emails import imap_client
+from apps.emails.imap_client import IMAPClient, _plan_batches, _uid_set
+
+RAW = (
+    b"Message-ID: <{uid}@example.com>\r\n"
+    b"From: Sender <sender@example.com>\r\n"
+    b"Subject: Hello {uid}\r\n\r\nBody\r\n"
+)
+
+
+def _raw(uid):
+    return RAW.replace(b"{uid}", str(uid).encode())
+
+
+class TestBatchPlanning:
+    def test_uid_set_compacts_ranges(self):
+        assert _uid_set([1, 2, 3, 7, 9, 10]) == "1:3,7,9:10"
+
+    def test_batches_bounded_by_count(self):
+        with patch.object(imap_client, "FETCH_BATCH_SIZE", 2):
+            batches = list(_plan_batches({1: 10, 2: 10, 3: 10}))
+        assert batches == [[1, 2], [3]]
+
+    def test_batches_bounded_by_bytes(self):
+        with patch.object(imap_client, "FETCH_BATCH_BYTES", 25):
+            batches = list(_plan_batches({1: 10, 2: 10, 3: 10}))
+        assert batches == [[1, 2], [3]]
+
+    def test_large_messages_fetched_alone(self):
+        size = imap_client.LARGE_MESSAGE_BYTES + 1
+        assert list(_plan_batches({1: 10, 2: size, 3: 10})) == [[1], [2], [3]]
+
+
+class TestFetchNewMessages:
+    def _client(self, uids):
+        conn = MagicMock()
+        conn.select.return_value = ("OK", [b"3"])
+        conn.response.return_value = ("UIDVALIDITY", [b"42"])
+
+        def uid(command, *args):
+            if command == "search":
+                return "OK", [b" ".join(str(u).encode() for u in uids)]
+            uid_set, items = args
+            if items == "(RFC822.SIZE)":
+                return "OK", [
+                    f"{n} (UID {u} RFC822.SIZE 100)".encode()
+                    for n, u in enumerate(uids, 1)
+                ]
+            fetched = [
+                u
+                for u in uids
+                if any(
+                    int(a) <= u <= int(b or a)
+                    for a, _, b in (part.partition(":") for part in uid_set.split(","))
+                )
+            ]
+            data = []
+            for u in fetched:
+                data.append((f"1 (UID {u} RFC822 {{100}}".encode(), _raw(u)))
+                data.append(b")")
+            return "OK", data
+
+        conn.uid.side_effect = uid
+        client = IMAPClient("imap.example.com", 993, True, "user", "secret")
+        client._conn = conn
+        return client, conn
+
+    def test_select_returns_uidvalidity(self):
+        client, _conn = self._client([])
+        assert client.select_inbox() == 42
+
+    def test_fetches_in_batches(self):
+        client, conn = self._client([5, 6, 7])
+        with patch.object(imap_client, "FETCH_BATCH_SIZE", 2):
+            messages = list(client.fetch_new_messages(since_uid=4))
+
+        assert [m.uid for m in messages] == ["5", "6", "7"]
+        assert messages[0].message_id == "<5@example.com>"
+        fetches = [
+            c.args for c in conn.uid.call_args_list if c.args[-1] == "(UID RFC822)"
+        ]
+        assert [args[1] for args in fetches] == ["5:6", "7"]
+
+    def test_ignores_uids_at_or_below_checkpoint(self):
+        # "UID n:*" always returns the highest UID, even when it is below n
+        client, _conn = self._client([4])
+        assert list(client.fetch_new_messages(since_uid=4)) == []
+
+    def test_missing_uid_in_batch_raises(self):
+        client, conn = self._client([5, 6])
+        fetch = conn.uid.side_effect
+
+        def uid(command, *args):
+            status, data = fetch(command, *args)
+            if args and args[-1] == "(UID RFC822)":
+                data = data[:2]  # UID 6 not returned
+            return status, data
+
+        conn.uid.side_effect = uid
+        with pytest.raises(imaplib.IMAP4.error):
+            list(client.fetch_new_messages(since_uid=4))
+
+    def test_incomplete_large_message_raises(self):
+        client, conn = self._client([])
+        conn.uid.side_effect = [
+            ("OK", [(b"1 (UID 9 BODY[]<0> {4}", b"From")]),
+            ("NO", [None]),
+        ]
+        with patch.object(imap_client, "FETCH_CHUNK_BYTES", 4):
+            with pytest.raises(imaplib.IMAP4.error):
+                client._fetch_large(9, 10)
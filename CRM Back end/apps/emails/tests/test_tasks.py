@@ -1,12 +1,15 @@
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
 from django.utils import timezone
 
-from apps.emails.models import EmailMessage, EmailSyncLog
+from apps.emails.models import EmailAccount, EmailMessage, EmailSyncLog, EmailThread
+from apps.emails.signals import inbound_messages_synced
 from apps.emails.tasks import (
     check_no_reply_emails,
     check_unassigned_emails,
+    store_messages,
     sync_email_account,
 )
 from tests.factories import (
@@ -39,6 +42,7 @@ class TestSyncEmailAccount:
         parsed.raw_headers = {}
 
         mock_client = MagicMock()
+        mock_client.select_inbox.return_value = 1
         mock_client.fetch_new_messages.return_value = [parsed]
         mock_client.__enter__ = MagicMock(return_value=mock_client)
         mock_client.__exit__ = MagicMock(return_value=False)
@@ -69,6 +73,7 @@ class TestSyncEmailAccount:
         parsed.raw_headers = {}
 
         mock_client = MagicMock()
+        mock_client.select_inbox.return_value = 1
         mock_client.fetch_new_messages.return_value = [parsed]
         mock_client.__enter__ = MagicMock(return_value=mock_client)
         mock_client.__exit__ = MagicMock(return_value=False)
@@ -80,6 +85,192 @@ class TestSyncEmailAccount:
         assert msg.contact == contact
 
 
+def _parsed(uid, message_id, subject="Subject", **headers):
+    parsed = MagicMock()
+    parsed.uid = str(uid)
+    parsed.message_id = message_id
+    parsed.in_reply_to = headers.get("in_reply_to", "")
+    parsed.references = headers.get("references", "")
+    parsed.subject = subject
+    parsed.from_address = [headers.get("sender", "sender@example.com")]
+    parsed.to_addresses = ["office@example.com"]
+    parsed.cc_addresses = []
+    parsed.date = headers.get("date", timezone.now())
+    parsed.body_text = "Body"
+    parsed.attachments = []
+    parsed.raw_headers = {}
+    return parsed
+
+
+def _mock_client(mock_imap_cls, messages, uidvalidity=1):
+    mock_client = MagicMock()
+    mock_client.select_inbox.return_value = uidvalidity
+    mock_client.fetch_new_messages.return_value = iter(messages)
+    mock_client.__enter__ = MagicMock(return_value=mock_client)
+    mock_client.__exit__ = MagicMock(return_value=False)
+    mock_imap_cls.return_value = mock_client
+    return mock_client
+
+
+@pytest.mark.django_db
+class TestBatchedSync:
+    @patch("apps.emails.tasks.IMAPClient")
+    def test_checkpoints_last_uid(self, mock_imap_cls):
+        account = EmailAccountFactory(imap_uidvalidity=7, imap_last_uid=40)
+        client = _mock_client(
+            mock_imap_cls,
+            [_parsed(uid, f"<m{uid}@example.com>") for uid in (41, 42, 45)],
+            uidvalidity=7,
+        )
+
+        sync_email_account(str(account.id))
+
+        client.fetch_new_messages.assert_called_once_with(since_uid=40)
+        account.refresh_from_db()
+        assert account.imap_last_uid == 45
+        assert EmailMessage.objects.filter(account=account).count() == 3
+
+    @patch("apps.emails.tasks.IMAPClient")
+    def test_uidvalidity_change_resyncs_from_start(self, mock_imap_cls):
+        account = EmailAccountFactory(imap_uidvalidity=7, imap_last_uid=40)
+        client = _mock_client(mock_imap_cls, [_parsed(3, "<m3@example.com>")], 8)
+
+        sync_email_account(str(account.id))
+
+        client.fetch_new_messages.assert_called_once_with(since_uid=0)
+        account.refresh_from_db()
+        assert account.imap_uidvalidity == 8
+        assert account.imap_last_uid == 3
+
+    @patch("apps.emails.tasks.IMAPClient")
+    def test_first_sync_keeps_seeded_checkpoint(self, mock_imap_cls):
+        account = EmailAccountFactory(imap_uidvalidity=None, imap_last_uid=40)
+        client = _mock_client(mock_imap_cls, [], 9)
+
+        sync_email_account(str(account.id))
+
+        client.fetch_new_messages.assert_called_once_with(since_uid=40)
+        assert EmailAccount.objects.get(pk=account.pk).imap_uidvalidity == 9
+
+    @patch("apps.emails.tasks.IMAPClient")
+    def test_failed_batch_keeps_checkpoint(self, mock_imap_cls):
+        account = EmailAccountFactory(imap_uidvalidity=1, imap_last_uid=10)
+        _mock_client(mock_imap_cls, [_parsed(11, "<m11@example.com>")])
+
+        with patch("apps.emails.tasks.store_messages", side_effect=RuntimeError):
+            with pytest.raises(Exception):
+                sync_email_account(str(account.id))
+
+        account.refresh_from_db()
+        assert account.imap_last_uid == 10
+
+
+@pytest.mark.django_db
+class TestStoreMessages:
+    def test_skips_existing_and_repeated_message_ids(self):
+        account = EmailAccountFactory()
+        EmailMessageFactory(message_id="<old@example.com>")
+        batch = [
+            _parsed(1, "<old@example.com>"),
+            _parsed(2, "<new@example.com>"),
+            _parsed(3, "<new@example.com>"),
+        ]
+
+        assert store_messages(account, batch) == 1
+        assert EmailMessage.objects.filter(message_id="<new@example.com>").count() == 1
+
+    def test_threads_replies_within_and_across_batches(self):
+        account = EmailAccountFactory()
+        thread = EmailThreadFactory(subject="Original")
+        EmailMessageFactory(
+            account=account, thread=thread, message_id="<root@example.com>"
+        )
+        batch = [
+            _parsed(1, "<a@example.com>", "Other", in_reply_to="<root@example.com>"),
+            _parsed(2, "<b@example.com>", "New topic"),
+            _parsed(3, "<c@example.com>", "x", references="<z@x> <b@example.com>"),
+        ]
+
+        store_messages(account, batch)
+
+        threads = dict(
+            EmailMessage.objects.filter(account=account).values_list(
+                "message_id", "thread_id"
+            )
+        )
+        assert threads["<a@example.com>"] == thread.pk
+        assert threads["<c@example.com>"] == threads["<b@example.com>"]
+        assert threads["<b@example.com>"] != thread.pk
+
+    def test_matches_threads_by_subject(self):
+        account = EmailAccountFactory()
+        batch = [
+            _parsed(1, "<a@example.com>", "Quarterly filing"),
+            _parsed(2, "<b@example.com>", "Re: Quarterly filing"),
+        ]
+
+        store_messages(account, batch)
+
+        assert EmailThread.objects.filter(subject="Quarterly filing").count() == 1
+
+    def test_refreshes_thread_stats(self):
+        contact = ContactFactory(email="Client@Example.com")
+        account = EmailAccountFactory()
+        latest = timezone.now()
+        batch = [
+            _parsed(1, "<a@example.com>", "Stats", date=latest - timedelta(hours=1)),
+            _parsed(
+                2,
+                "<b@example.com>",
+                "Re: Stats",
+                date=latest,
+                sender="client@example.com",
+            ),
+        ]
+
+        store_messages(account, batch)
+
+        thread = EmailThread.objects.get(subject="Stats")
+        assert thread.message_count == 2
+        assert thread.last_message_at == latest
+        assert thread.contact == contact
+
+    def test_queues_analysis_once_per_batch(self):
+        account = EmailAccountFactory()
+        received = []
+
+        def listener(sender, message_ids, **kwargs):
+            received.append(message_ids)
+
+        inbound_messages_synced.connect(listener)
+        try:
+            store_messages(account, [_parsed(1, "<a@x>"), _parsed(2, "<b@x>")])
+        finally:
+            inbound_messages_synced.disconnect(listener)
+
+        assert len(received) == 1
+        assert len(received[0]) == 2
+
+    def test_failed_batch_removes_stored_attachments(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        parsed = _parsed(1, "<a@x>")
+        parsed.attachments = [
+            {
+                "filename": "w2.pdf",
+                "mime_type": "application/pdf",
+                "data": b"%PDF",
+                "size": 4,
+            }
+        ]
+
+        with patch("apps.emails.tasks._refresh_thread_stats", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                store_messages(EmailAccountFactory(), [parsed])
+
+        assert not EmailMessage.objects.exists()
+        assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+
 @pytest.mark.django_db
 class TestCheckUnassignedEmails:
     def test_counts_unassigned(self):
@@ -1,6 +1,8 @@
 import mimetypes
+import os
 import uuid
 
+from django.core.files.base import ContentFile
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
@@ -33,7 +35,8 @@ class EmailMessageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, ModulePermission]
     module_name = "emails"
     filterset_class = EmailMessageFilter
-    search_fields = ["subject", "from_address", "body_text"]
+    # Note: search is handled by EmailMessageFilter.filter_search
+    search_fields = []
     ordering_fields = ["sent_at", "created_at", "subject"]
     ordering = ["-sent_at"]
 
@@ -156,13 +159,17 @@ class EmailMessageViewSet(viewsets.ModelViewSet):
 
         # Attach documents from CRM
         from apps.documents.models import Document
+        from apps.documents.streaming import document_content
 
         for doc_id in data.get("attachment_ids", []):
             try:
                 doc = Document.objects.get(id=doc_id)
+                # A plaintext copy: the stored document may be encrypted
                 EmailAttachment.objects.create(
                     email=msg,
-                    file=doc.file,
+                    file=ContentFile(
+                        document_content(doc), name=os.path.basename(doc.file.name)
+                    ),
                     filename=doc.title,
                     mime_type=doc.mime_type,
                     file_size=doc.file_size,
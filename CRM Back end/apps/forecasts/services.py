@@ -1,8 +1,11 @@
+from collections import defaultdict
 from decimal import Decimal
 
 from django.db.models import Sum
+from django.db.models.functions import ExtractQuarter
 
 from apps.cases.models import TaxCase
+from apps.dashboard import kpis
 from apps.forecasts.models import ForecastEntry, SalesQuota
 
 CLOSED_WON_STATUSES = [TaxCase.Status.FILED, TaxCase.Status.COMPLETED]
@@ -39,88 +42,108 @@ def _quarter_date_range(fiscal_year, quarter):
 
 def get_team_user_ids(user):
     """Get IDs of users in the requesting user's team (subordinates via role hierarchy)."""
-    if not user.role_id:
-        return [user.id]
-    return list(user.role.get_subordinate_user_ids())
+    from apps.users.services.role_hierarchy import get_visible_user_ids
 
+    return list(get_visible_user_ids(user))
 
-def get_quarter_summary(user_ids, fiscal_year, quarter):
-    """Compute aggregated summary for a set of users in a given quarter."""
-    start, end = _quarter_date_range(fiscal_year, quarter)
 
-    quota_total = (
-        SalesQuota.objects.filter(
-            user_id__in=user_ids,
-            fiscal_year=fiscal_year,
-            quarter=quarter,
-        ).aggregate(total=Sum("amount"))["total"]
-        or ZERO
+def _summary(fiscal_year, quarter, quota, closed_won, pipeline, best_case, commit):
+    return {
+        "fiscal_year": fiscal_year,
+        "quarter": quarter,
+        "period_label": f"Q{quarter} FY {fiscal_year}",
+        "quota": quota,
+        "closed_won": closed_won,
+        "gap": quota - closed_won,
+        "pipeline": pipeline,
+        "best_case": best_case,
+        "commit": commit,
+        "funnel_total": pipeline + best_case + commit,
+    }
+
+
+def get_quarter_summaries(user_ids, fiscal_year):
+    """
+    Compute the aggregated summaries of all 4 quarters for a set of users,
+    one grouped query per measure; the pipeline comes from the dashboard
+    KPI rollups.
+    """
+    quotas = dict(
+        SalesQuota.objects.filter(user_id__in=user_ids, fiscal_year=fiscal_year)
+        .values("quarter")
+        .annotate(total=Sum("amount"))
+        .order_by()
+        .values_list("quarter", "total")
     )
 
-    closed_won = (
+    year_start, _ = _quarter_date_range(fiscal_year, 1)
+    _, year_end = _quarter_date_range(fiscal_year, 4)
+    closed_won = dict(
         TaxCase.objects.filter(
             assigned_preparer_id__in=user_ids,
             status__in=CLOSED_WON_STATUSES,
-            completed_date__gte=start,
-            completed_date__lte=end,
-        ).aggregate(total=Sum("actual_fee"))["total"]
-        or ZERO
+            completed_date__gte=year_start,
+            completed_date__lte=year_end,
+        )
+        .values(quarter=ExtractQuarter("completed_date"))
+        .annotate(total=Sum("actual_fee"))
+        .order_by()
+        .values_list("quarter", "total")
     )
 
-    pipeline_value = (
-        TaxCase.objects.filter(
-            assigned_preparer_id__in=user_ids,
-            status__in=PIPELINE_STATUSES,
-            created_at__date__gte=start,
-            created_at__date__lte=end,
-        ).aggregate(total=Sum("estimated_fee"))["total"]
-        or ZERO
-    )
+    pipeline = defaultdict(lambda: ZERO)
+    for row in kpis.case_totals(
+        year_start,
+        year_end,
+        group_by=("month",),
+        status__in=PIPELINE_STATUSES,
+        preparer_id__in=[str(user_id) for user_id in user_ids],
+    ):
+        pipeline[(row["month"].month - 1) // 3 + 1] += row["estimated"]
+
+    forecasts = {
+        row["quarter"]: row
+        for row in ForecastEntry.objects.filter(
+            user_id__in=user_ids, fiscal_year=fiscal_year
+        )
+        .values("quarter")
+        .annotate(best_case=Sum("best_case"), commit=Sum("commit"))
+        .order_by()
+    }
 
-    forecast = ForecastEntry.objects.filter(
-        user_id__in=user_ids,
-        fiscal_year=fiscal_year,
-        quarter=quarter,
-    ).aggregate(
-        best_case=Sum("best_case"),
-        commit=Sum("commit"),
-        f_pipeline=Sum("pipeline"),
-    )
-    best_case = forecast["best_case"] or ZERO
-    commit = forecast["commit"] or ZERO
+    summaries = []
+    for quarter in range(1, 5):
+        forecast = forecasts.get(quarter, {})
+        summaries.append(
+            _summary(
+                fiscal_year,
+                quarter,
+                quota=quotas.get(quarter) or ZERO,
+                closed_won=closed_won.get(quarter) or ZERO,
+                pipeline=pipeline[quarter],
+                best_case=forecast.get("best_case") or ZERO,
+                commit=forecast.get("commit") or ZERO,
+            )
+        )
+    return summaries
 
-    gap = quota_total - closed_won
-    funnel_total = pipeline_value + best_case + commit
 
-    return {
-        "fiscal_year": fiscal_year,
-        "quarter": quarter,
-        "period_label": f"Q{quarter} FY {fiscal_year}",
-        "quota": quota_total,
-        "closed_won": closed_won,
-        "gap": gap,
-        "pipeline": pipeline_value,
-        "best_case": best_case,
-        "commit": commit,
-        "funnel_total": funnel_total,
-    }
+def get_quarter_summary(user_ids, fiscal_year, quarter):
+    """Compute aggregated summary for a set of users in a given quarter."""
+    return get_quarter_summaries(user_ids, fiscal_year)[quarter - 1]
 
 
-def get_totals(user_ids, fiscal_year):
+def get_totals(user_ids, fiscal_year, summaries=None):
     """Compute annual totals across all 4 quarters."""
+    if summaries is None:
+        summaries = get_quarter_summaries(user_ids, fiscal_year)
     totals = {
-        "quota": ZERO,
-        "closed_won": ZERO,
-        "gap": ZERO,
-        "pipeline": ZERO,
+        "quota": sum((s["quota"] for s in summaries), ZERO),
+        "closed_won": sum((s["closed_won"] for s in summaries), ZERO),
+        "pipeline": sum((s["pipeline"] for s in summaries), ZERO),
     }
-    for q in range(1, 5):
-        summary = get_quarter_summary(user_ids, fiscal_year, q)
-        totals["quota"] += summary["quota"]
-        totals["closed_won"] += summary["closed_won"]
-        totals["pipeline"] += summary["pipeline"]
     totals["gap"] = totals["quota"] - totals["closed_won"]
-    return totals
+    return {key: totals[key] for key in ("quota", "closed_won", "gap", "pipeline")}
 
 
 def get_member_quarter_detail(user, fiscal_year, quarter):
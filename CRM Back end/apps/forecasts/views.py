@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.dashboard import kpis
 from apps.forecasts.models import ForecastEntry, SalesQuota
 from apps.forecasts.serializers import (
     ForecastEntrySerializer,
@@ -15,7 +16,7 @@ from apps.forecasts.serializers import (
 from apps.forecasts.services import (
     bulk_set_quotas,
     get_member_quarter_detail,
-    get_quarter_summary,
+    get_quarter_summaries,
     get_team_user_ids,
     get_totals,
 )
@@ -127,19 +128,16 @@ class ForecastSummaryView(APIView):
         fy = int(request.query_params.get("fiscal_year", date.today().year))
         user_ids = get_team_user_ids(request.user)
 
-        quarters = []
-        for q in range(1, 5):
-            quarters.append(get_quarter_summary(user_ids, fy, q))
-
-        totals = get_totals(user_ids, fy)
-
-        return Response(
-            {
+        def compute():
+            quarters = get_quarter_summaries(user_ids, fy)
+            return {
                 "fiscal_year": fy,
                 "quarters": quarters,
-                "totals": totals,
+                "totals": get_totals(user_ids, fy, summaries=quarters),
             }
-        )
+
+        scope = sorted(str(user_id) for user_id in user_ids)
+        return Response(kpis.cached("forecast_summary", (scope, fy), compute))
 
 
 class ForecastTeamDetailView(APIView):
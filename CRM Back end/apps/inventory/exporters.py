@@ -0,0 +1,47 @@
+"""
+CSV / XLSX exporter for invoices (see ``apps.core.exports``).
+"""
+
+from apps.core.exports import Column, ModelExporter, full_name
+from apps.inventory.models import Invoice
+
+
+class InvoiceExporter(ModelExporter):
+    model = Invoice
+    module = "invoices"
+    viewset = "apps.inventory.views.InvoiceViewSet"
+    filename = "invoices_export"
+    columns = (
+        Column("id"),
+        Column("invoice_number"),
+        Column("subject"),
+        Column("status"),
+        Column(
+            "contact",
+            "contact__first_name",
+            "contact__last_name",
+            formatter=full_name,
+        ),
+        Column("corporation", "corporation__name"),
+        Column("customer_no"),
+        Column("purchase_order_ref"),
+        Column("order_date"),
+        Column("due_date"),
+        Column("subtotal"),
+        Column("discount_amount"),
+        Column("tax_amount"),
+        Column("adjustment"),
+        Column("total"),
+        Column("billing_street"),
+        Column("billing_city"),
+        Column("billing_state"),
+        Column("billing_zip"),
+        Column("billing_country"),
+        Column(
+            "assigned_to",
+            "assigned_to__first_name",
+            "assigned_to__last_name",
+            formatter=full_name,
+        ),
+        Column("created_at"),
+    )
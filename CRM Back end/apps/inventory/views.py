@@ -1,7 +1,9 @@
 from django.db.models import Count
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 
+from apps.core.exports import export_queryset_response
 from apps.inventory.filters import (
     AssetFilter,
     InvoiceFilter,
@@ -225,6 +227,12 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return InvoiceCreateUpdateSerializer
         return InvoiceDetailSerializer
 
+    @action(detail=False, methods=["get"], url_path="export_csv")
+    def export_csv(self, request):
+        """Export the filtered invoices (see ``ContactViewSet.export_csv``)."""
+        qs = self.filter_queryset(self.get_queryset())
+        return export_queryset_response(request, "invoices", qs)
+
 
 # ---------------------------------------------------------------------------
 # Sales Order
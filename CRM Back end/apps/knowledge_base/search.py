@@ -0,0 +1,19 @@
+"""
+Search indexing of knowledge base articles (see ``apps.core.search``).
+"""
+
+from apps.core.search import SearchSource
+from apps.knowledge_base.models import Article
+
+
+class ArticleSearch(SearchSource):
+    model = Article
+    module = "articles"
+    fields = ("title", "summary", "content", "keywords", "tags")
+    config = "english"
+
+    def title(self, obj):
+        return obj.title
+
+    def texts(self, obj):
+        return [obj.summary, obj.keywords, *(obj.tags or []), obj.content]
@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle
 from rest_framework.views import APIView
 
+from apps.core.search import filter_queryset, ranked
+
 from .models import FAQ, Article, ArticleAttachment, ArticleFeedback, Category
 from .serializers import (
     ArticleAttachmentSerializer,
@@ -110,12 +112,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
         # Search
         search = self.request.query_params.get("search")
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search)
-                | Q(summary__icontains=search)
-                | Q(content__icontains=search)
-                | Q(keywords__icontains=search)
-            )
+            queryset = filter_queryset(queryset, "articles", search)
 
         return queryset.order_by("-is_pinned", "-is_featured", "-created_at")
 
@@ -320,11 +317,7 @@ class PublicArticleView(APIView):
             # Search
             search = request.query_params.get("search")
             if search:
-                articles = articles.filter(
-                    Q(title__icontains=search)
-                    | Q(summary__icontains=search)
-                    | Q(content__icontains=search)
-                )
+                articles = filter_queryset(articles, "articles", search)
 
             # Pagination with input validation
             try:
@@ -512,18 +505,14 @@ class SearchView(APIView):
         if not query or len(query) < 2:
             return Response({"articles": [], "faqs": []})
 
-        # Search articles
-        articles = (
-            Article.objects.filter(status="published", visibility="public")
-            .filter(
-                Q(title__icontains=query)
-                | Q(summary__icontains=query)
-                | Q(content__icontains=query)
-                | Q(keywords__icontains=query)
-                | Q(tags__icontains=query)
-            )
-            .select_related("category")[:10]
-        )
+        # Search articles, best match first
+        articles = ranked(
+            Article.objects.filter(
+                status="published", visibility="public"
+            ).select_related("category"),
+            "articles",
+            query,
+        )[:10]
 
         # Search FAQs
         faqs = (
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("live_chat", "0002_chatmessage_cursor_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatdepartment",
+            name="routing_method",
+            field=models.CharField(
+                choices=[
+                    ("least_loaded", "Least Loaded"),
+                    ("round_robin", "Round Robin"),
+                ],
+                default="least_loaded",
+                max_length=20,
+                verbose_name="routing method",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatagent",
+            name="last_assigned_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="last assigned at"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chatsession",
+            index=models.Index(
+                fields=["department", "status", "started_at"],
+                name="idx_livechat_session_queue",
+            ),
+        ),
+    ]
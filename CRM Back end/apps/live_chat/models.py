@@ -4,6 +4,7 @@ Live Chat models for real-time customer support.
 
 from django.conf import settings
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -20,12 +21,22 @@ class ChatDepartment(TimeStampedModel):
     is_active = models.BooleanField(_("active"), default=True)
     order = models.PositiveIntegerField(_("order"), default=0)
 
+    class RoutingMethod(models.TextChoices):
+        LEAST_LOADED = "least_loaded", _("Least Loaded")
+        ROUND_ROBIN = "round_robin", _("Round Robin")
+
     # Auto-assignment settings
     auto_assign = models.BooleanField(
         _("auto assign"),
         default=True,
         help_text=_("Automatically assign chats to available agents"),
     )
+    routing_method = models.CharField(
+        _("routing method"),
+        max_length=20,
+        choices=RoutingMethod.choices,
+        default=RoutingMethod.LEAST_LOADED,
+    )
     max_concurrent_chats = models.PositiveIntegerField(
         _("max concurrent chats per agent"),
         default=5,
@@ -115,6 +126,9 @@ class ChatAgent(TimeStampedModel):
     )
 
     last_seen = models.DateTimeField(_("last seen"), null=True, blank=True)
+    last_assigned_at = models.DateTimeField(
+        _("last assigned at"), null=True, blank=True
+    )
 
     class Meta:
         db_table = "livechat_agents"
@@ -143,6 +157,25 @@ class ChatAgent(TimeStampedModel):
         self.status = self.Status.OFFLINE
         self.save()
 
+    def take_chat(self):
+        """Count one more chat (in the database, so concurrent takes add up)."""
+        now = timezone.now()
+        ChatAgent.objects.filter(pk=self.pk).update(
+            current_chat_count=F("current_chat_count") + 1, last_assigned_at=now
+        )
+        self.refresh_from_db(fields=["current_chat_count", "last_assigned_at"])
+
+    def release_chat(self, handled=False):
+        """Free one chat slot, counting the chat as handled if it ended."""
+        ChatAgent.objects.filter(pk=self.pk, current_chat_count__gt=0).update(
+            current_chat_count=F("current_chat_count") - 1
+        )
+        if handled:
+            ChatAgent.objects.filter(pk=self.pk).update(
+                total_chats_handled=F("total_chats_handled") + 1
+            )
+        self.refresh_from_db(fields=["current_chat_count", "total_chats_handled"])
+
 
 class ChatSession(TimeStampedModel):
     """
@@ -276,6 +309,11 @@ class ChatSession(TimeStampedModel):
         indexes = [
             models.Index(fields=["status", "department"]),
             models.Index(fields=["assigned_agent", "status"]),
+            # Department waiting queues, oldest first
+            models.Index(
+                fields=["department", "status", "started_at"],
+                name="idx_livechat_session_queue",
+            ),
         ]
 
     def __str__(self):
@@ -295,15 +333,12 @@ class ChatSession(TimeStampedModel):
         """Assign this chat to an agent."""
         if self.assigned_agent and self.assigned_agent != agent:
             self.previous_agents.add(self.assigned_agent)
-            self.assigned_agent.current_chat_count = max(
-                0, self.assigned_agent.current_chat_count - 1
-            )
-            self.assigned_agent.save()
+            self.assigned_agent.release_chat()
 
+        if self.assigned_agent != agent:
+            agent.take_chat()
         self.assigned_agent = agent
         self.status = self.Status.ACTIVE
-        agent.current_chat_count += 1
-        agent.save()
         self.save()
 
     def close(self, by_agent: bool = False):
@@ -312,11 +347,7 @@ class ChatSession(TimeStampedModel):
         self.ended_at = timezone.now()
 
         if self.assigned_agent:
-            self.assigned_agent.current_chat_count = max(
-                0, self.assigned_agent.current_chat_count - 1
-            )
-            self.assigned_agent.total_chats_handled += 1
-            self.assigned_agent.save()
+            self.assigned_agent.release_chat(handled=True)
 
         self.save()
 
@@ -394,6 +425,13 @@ class ChatMessage(TimeStampedModel):
     class Meta:
         db_table = "livechat_messages"
         ordering = ["created_at"]
+        indexes = [
+            # Polling reads a session's messages after a cursor
+            models.Index(
+                fields=["session", "created_at"],
+                name="idx_livechat_message_cursor",
+            ),
+        ]
         verbose_name = _("chat message")
         verbose_name_plural = _("chat messages")
 
@@ -0,0 +1,221 @@
+"""
+Live chat event channel and message cursors.
+
+Every chat session has a channel.  Creating a ``ChatMessage`` publishes a
+``message`` event on it (after commit), and typing indicators and read
+receipts are published straight to it without touching the database.
+The channel is Redis pub/sub (``LIVE_CHAT_EVENTS_URL``), or a
+process-local broker when that setting is empty (tests, single process).
+
+Events only wake listeners up; messages are always read back from the
+database after a cursor, so a listener that misses an event loses
+nothing but latency.  A cursor is the id of the last message the client
+has (or an ISO timestamp).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db.models import Exists, Q, Subquery
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "live_chat:session:"
+
+MESSAGE = "message"
+TYPING = "typing"
+STOPPED_TYPING = "stopped_typing"
+READ = "read"
+SESSION = "session"
+
+# Events clients may send through the signal endpoints
+CLIENT_EVENTS = (TYPING, STOPPED_TYPING, READ)
+
+
+def channel_name(session_id):
+    return f"{CHANNEL_PREFIX}{session_id}"
+
+
+# ---------------------------------------------------------------------------
+# Brokers
+# ---------------------------------------------------------------------------
+
+
+class RedisBroker:
+    """Redis pub/sub; each subscription holds its own connection."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, event):
+        self.client.publish(channel, json.dumps(event))
+
+    async def subscribe(self, channel):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(client, pubsub)
+
+
+class _RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        """Events received within *timeout* seconds (at least one, or none)."""
+        events = []
+        message = await self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout
+        )
+        while message is not None:
+            events.append(json.loads(message["data"]))
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=0
+            )
+        return events
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class MemoryBroker:
+    """Process-local broker, used when no Redis URL is configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    async def subscribe(self, channel):
+        subscription = _MemorySubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+
+class _MemorySubscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, event):
+        # Publishers run in request / worker threads, not on this loop
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout):
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    async def close(self):
+        self.broker._remove(self)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = settings.LIVE_CHAT_EVENTS_URL
+                _broker = RedisBroker(url) if url else MemoryBroker()
+    return _broker
+
+
+def session_event(session):
+    """``session`` event describing *session*'s status and assignment."""
+    return {
+        "type": SESSION,
+        "status": session.status,
+        "assigned_agent": (
+            str(session.assigned_agent_id) if session.assigned_agent_id else None
+        ),
+    }
+
+
+def publish(session_id, event):
+    """
+    Publish *event* on the session's channel.  Failures are logged: a lost
+    event only delays clients until their next poll.
+    """
+    try:
+        get_broker().publish(channel_name(session_id), event)
+    except Exception:
+        logger.warning(
+            "Could not publish live chat event %s for session %s",
+            event.get("type"),
+            session_id,
+            exc_info=True,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Cursors
+# ---------------------------------------------------------------------------
+
+
+def messages_after(messages, since):
+    """
+    *messages* (a ``ChatMessage`` queryset) created after the cursor
+    *since*: a message id, or an ISO timestamp.  Unparseable cursors and
+    ids of messages that don't exist return the queryset unchanged.
+    """
+    if not since:
+        return messages
+    try:
+        message_id = uuid.UUID(str(since))
+    except ValueError:
+        timestamp = parse_datetime(str(since))
+        if timestamp is None:
+            return messages
+        return messages.filter(created_at__gt=timestamp)
+
+    cursor_message = messages.model.objects.filter(pk=message_id)
+    cursor = Subquery(cursor_message.values("created_at")[:1])
+    # Messages sharing the cursor's timestamp are ordered by id; an unknown
+    # id has no timestamp to compare with, so the whole history is sent
+    return messages.filter(
+        Q(created_at__gt=cursor)
+        | Q(created_at=cursor, id__gt=message_id)
+        | ~Exists(cursor_message)
+    ).order_by("created_at", "id")
+
+
+def next_cursor(messages, since=None):
+    """Cursor to poll with after receiving *messages* (serialized)."""
+    if messages:
+        return str(messages[-1]["id"])
+    return since
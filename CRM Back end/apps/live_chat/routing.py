@@ -0,0 +1,210 @@
+"""
+Live chat routing: department waiting queues and agent capacity.
+
+Waiting sessions queue per department, oldest ``started_at`` first.
+Assigning one takes two conditional ``UPDATE``s: the agent's
+``current_chat_count`` only goes up while it is below
+``max_concurrent_chats`` (the capacity reservation), and the session is
+only claimed while it is still waiting and unassigned.  Concurrent
+visitors therefore can't both take an agent's last slot; whoever loses
+the race moves on to the next candidate.
+
+Candidates are the department's online agents with room, least loaded
+first, or longest since their last assignment for ``round_robin``
+departments.  Queued sessions are dispatched when an agent comes online
+or frees a slot, and by the ``dispatch_waiting_chats`` task as a
+fallback; ``dispatch`` locks them with ``SKIP LOCKED`` so concurrent
+runs share the queue.
+"""
+
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from . import realtime
+from .models import ChatAgent, ChatDepartment, ChatSession
+
+# Waiting sessions locked and routed per transaction
+DISPATCH_BATCH_SIZE = 50
+
+# Agents tried per session before it stays queued
+MAX_CANDIDATES = 10
+
+# Recently closed chats averaged for the wait estimate
+WAIT_ESTIMATE_SAMPLE = 50
+
+
+def _online_agents(department_id):
+    return ChatAgent.objects.filter(
+        departments=department_id,
+        is_available=True,
+        status=ChatAgent.Status.ONLINE,
+        user__is_active=True,
+    )
+
+
+def _candidates(department):
+    agents = _online_agents(department.pk).filter(
+        current_chat_count__lt=F("max_concurrent_chats")
+    )
+    last_assigned = F("last_assigned_at").asc(nulls_first=True)
+    if department.routing_method == ChatDepartment.RoutingMethod.ROUND_ROBIN:
+        agents = agents.order_by(last_assigned, "pk")
+    else:
+        agents = agents.order_by("current_chat_count", last_assigned, "pk")
+    return list(agents.values_list("pk", flat=True)[:MAX_CANDIDATES])
+
+
+def _reserve(agent_id, now):
+    """Take one of *agent_id*'s slots if it still has one."""
+    reserved = ChatAgent.objects.filter(
+        pk=agent_id,
+        is_available=True,
+        status=ChatAgent.Status.ONLINE,
+        current_chat_count__lt=F("max_concurrent_chats"),
+    ).update(current_chat_count=F("current_chat_count") + 1, last_assigned_at=now)
+    return reserved == 1
+
+
+def has_online_agents(department):
+    """Whether anyone in *department* is online to take its chats."""
+    return _online_agents(department.pk).exists()
+
+
+def route(session):
+    """
+    Assign the waiting *session* to an agent of its department with free
+    capacity.  Returns the agent's id, or ``None`` if the session stays
+    queued.
+    """
+    department = session.department
+    if department is None or not department.auto_assign:
+        return None
+
+    now = timezone.now()
+    for agent_id in _candidates(department):
+        with transaction.atomic():
+            if not _reserve(agent_id, now):
+                continue  # Filled up by a concurrent assignment
+            claimed = ChatSession.objects.filter(
+                pk=session.pk,
+                status=ChatSession.Status.WAITING,
+                assigned_agent__isnull=True,
+            ).update(
+                assigned_agent_id=agent_id,
+                status=ChatSession.Status.ACTIVE,
+                updated_at=now,
+            )
+            if not claimed:
+                # Assigned or closed meanwhile; give the slot back
+                transaction.set_rollback(True)
+                return None
+
+        session.assigned_agent_id = agent_id
+        session.status = ChatSession.Status.ACTIVE
+        session.updated_at = now
+        event = realtime.session_event(session)
+        session_id = session.session_id
+        transaction.on_commit(lambda: realtime.publish(session_id, event))
+        return agent_id
+    return None
+
+
+def dispatch(departments=None):
+    """
+    Route queued sessions, oldest first, until their departments run out
+    of capacity; *departments* (ids or a queryset) limits the queues
+    considered.  Returns the number of sessions assigned.
+    """
+    full = set()
+    assigned = 0
+    while True:
+        with transaction.atomic():
+            waiting = (
+                ChatSession.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("department")
+                .filter(
+                    status=ChatSession.Status.WAITING,
+                    assigned_agent__isnull=True,
+                    department__auto_assign=True,
+                )
+                .exclude(department_id__in=full)
+            )
+            if departments is not None:
+                waiting = waiting.filter(department__in=departments)
+            batch = list(waiting.order_by("started_at")[:DISPATCH_BATCH_SIZE])
+            for session in batch:
+                if session.department_id in full:
+                    continue
+                if route(session):
+                    assigned += 1
+                elif not _candidates(session.department):
+                    # Otherwise the session was claimed elsewhere meanwhile
+                    full.add(session.department_id)
+        if len(batch) < DISPATCH_BATCH_SIZE:
+            return assigned
+
+
+def dispatch_for_agent(agent):
+    """Route queued sessions of *agent*'s departments after it freed up."""
+    if not agent.can_accept_chat:
+        return 0
+    return dispatch(agent.departments.values("pk"))
+
+
+def queue_position(session):
+    """1-based place of *session* in its department's queue, if waiting."""
+    if session.status != ChatSession.Status.WAITING or session.assigned_agent_id:
+        return None
+    ahead = ChatSession.objects.filter(
+        Q(started_at__lt=session.started_at)
+        | Q(started_at=session.started_at, pk__lt=session.pk),
+        department_id=session.department_id,
+        status=ChatSession.Status.WAITING,
+        assigned_agent__isnull=True,
+    ).count()
+    return ahead + 1
+
+
+def estimated_wait(department_id, position):
+    """
+    Rough seconds until the session at *position* is picked up: that many
+    chats have to end, and the department's online agents end about
+    ``slots / average chat length`` of them per second.
+    """
+    if department_id is None:
+        return None
+    online = _online_agents(department_id)
+    slots = online.aggregate(total=Sum("max_concurrent_chats"))["total"]
+    if not slots:
+        return None
+    recent = (
+        ChatSession.objects.filter(
+            department_id=department_id,
+            status=ChatSession.Status.CLOSED,
+            ended_at__isnull=False,
+        )
+        .order_by("-ended_at")
+        .values_list("started_at", "ended_at", "wait_time")[:WAIT_ESTIMATE_SAMPLE]
+    )
+    lengths = [
+        (ended - started - (wait or timedelta())).total_seconds()
+        for started, ended, wait in recent
+    ]
+    if not lengths:
+        return None
+    return math.ceil(position * max(sum(lengths) / len(lengths), 0) / slots)
+
+
+def queue_status(session):
+    """Queue position and estimated wait shown to a waiting visitor."""
+    position = queue_position(session)
+    if position is None:
+        return None
+    return {
+        "position": position,
+        "estimated_wait_seconds": estimated_wait(session.department_id, position),
+    }
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from . import realtime
 from .models import (
     CannedResponse,
     ChatAgent,
@@ -26,6 +27,7 @@ class ChatDepartmentSerializer(serializers.ModelSerializer):
             "is_active",
             "order",
             "auto_assign",
+            "routing_method",
             "max_concurrent_chats",
             "offline_message",
             "collect_email_offline",
@@ -270,6 +272,13 @@ class SendMessageSerializer(serializers.Serializer):
     is_internal = serializers.BooleanField(default=False)
 
 
+class ChatSignalSerializer(serializers.Serializer):
+    """Serializer for a typing indicator or read receipt."""
+
+    type = serializers.ChoiceField(choices=realtime.CLIENT_EVENTS)
+    message_id = serializers.UUIDField(required=False)
+
+
 class TransferChatSerializer(serializers.Serializer):
     """Serializer for transferring a chat."""
 
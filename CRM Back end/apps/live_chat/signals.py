@@ -2,9 +2,11 @@
 Signals for live chat notifications and updates.
 """
 
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from . import realtime
 from .models import ChatMessage, ChatSession, OfflineMessage
 
 
@@ -14,20 +16,45 @@ def on_chat_session_created(sender, instance, created, **kwargs):
     if created:
         # Notify agents about new waiting chat
         if instance.status == ChatSession.Status.WAITING:
-            from apps.notifications.models import Notification
+            from apps.notifications.services import create_notifications_bulk
 
             # Find agents in the department
             if instance.department:
                 agents = instance.department.agents.filter(is_available=True)
-                for agent in agents:
-                    Notification.objects.create(
-                        recipient=agent.user,
-                        notification_type="system",
-                        title="New Chat Waiting",
-                        message=f"New chat from {instance.visitor_name or 'Anonymous'}",
-                        action_url=f"/live-chat?session={instance.session_id}",
-                        severity="info",
-                    )
+                payload = {
+                    "title": "New Chat Waiting",
+                    "message": f"New chat from {instance.visitor_name or 'Anonymous'}",
+                    "action_url": f"/live-chat?session={instance.session_id}",
+                    "severity": "info",
+                }
+                create_notifications_bulk(
+                    (user_id, "system", payload)
+                    for user_id in agents.values_list("user_id", flat=True)
+                )
+
+
+@receiver(post_save, sender=ChatSession)
+def on_chat_session_saved(sender, instance, created, **kwargs):
+    """Tell listeners about status and assignment changes."""
+    if created:
+        return
+    event = realtime.session_event(instance)
+    session_id = instance.session_id
+    transaction.on_commit(lambda: realtime.publish(session_id, event))
+
+
+@receiver(post_save, sender=ChatMessage)
+def on_chat_message_published(sender, instance, created, **kwargs):
+    """Wake the session's listeners once the message is committed."""
+    if not created:
+        return
+    event = {
+        "type": realtime.MESSAGE,
+        "id": str(instance.pk),
+        "internal": instance.is_internal,
+    }
+    session_id = instance.session.session_id
+    transaction.on_commit(lambda: realtime.publish(session_id, event))
 
 
 @receiver(post_save, sender=ChatMessage)
@@ -54,18 +81,19 @@ def on_offline_message_created(sender, instance, created, **kwargs):
     if created:
         from django.contrib.auth import get_user_model
 
-        from apps.notifications.models import Notification
+        from apps.notifications.services import create_notifications_bulk
 
         User = get_user_model()
 
         # Notify admins about offline message
         admins = User.objects.filter(role__slug="admin", is_active=True)
-        for admin in admins:
-            Notification.objects.create(
-                recipient=admin,
-                notification_type="system",
-                title="New Offline Message",
-                message=f"Message from {instance.name}: {instance.message[:50]}",
-                action_url="/live-chat/offline-messages",
-                severity="info",
-            )
+        payload = {
+            "title": "New Offline Message",
+            "message": f"Message from {instance.name}: {instance.message[:50]}",
+            "action_url": "/live-chat/offline-messages",
+            "severity": "info",
+        }
+        create_notifications_bulk(
+            (user_id, "system", payload)
+            for user_id in admins.values_list("id", flat=True)
+        )
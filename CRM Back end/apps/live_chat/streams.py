@@ -0,0 +1,205 @@
+"""
+Push endpoints for live chat: long-poll and Server-Sent Events.
+
+These are plain async Django views (DRF views are synchronous).  The
+reverse proxy sends them to a separate ``config/asgi.py`` service with
+uvicorn workers, so a waiting client holds no worker thread; the rest of
+the API stays on the threaded WSGI service.  Both
+subscribe to the session's channel before reading messages after the
+client's cursor, so nothing committed in between is missed.
+
+Long-poll (default) answers as soon as there are new messages or other
+events, or with an empty list after ``LIVE_CHAT_LONG_POLL_SECONDS``.
+Clients that send ``Accept: text/event-stream`` get an SSE stream instead,
+which ends after ``LIVE_CHAT_STREAM_SECONDS``; EventSource reconnects with
+``Last-Event-ID`` as the cursor.
+"""
+
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from apps.users.services.permission_matrix import is_admin_user
+
+from . import realtime
+from .models import ChatAgent, ChatMessage, ChatSession
+from .serializers import ChatMessageSerializer
+
+# Seconds between SSE comments keeping proxies from closing idle streams
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@sync_to_async
+def _authenticate(request):
+    from rest_framework import exceptions
+
+    from apps.users.authentication import CookieJWTAuthentication
+
+    try:
+        result = CookieJWTAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@sync_to_async
+def _can_follow(user, session):
+    """
+    Whether *user* may follow *session*: admins, the agent it is assigned
+    to, and agents of its department.
+    """
+    if is_admin_user(user):
+        return True
+    agent = ChatAgent.objects.filter(user=user).first()
+    if agent is None:
+        return False
+    if session.assigned_agent_id == agent.pk:
+        return True
+    return (
+        session.department_id is not None
+        and agent.departments.filter(pk=session.department_id).exists()
+    )
+
+
+@sync_to_async
+def _messages_after(session_pk, since, show_internal):
+    messages = ChatMessage.objects.filter(session_id=session_pk).select_related(
+        "agent__user"
+    )
+    if not show_internal:
+        messages = messages.exclude(is_internal=True)
+    return ChatMessageSerializer(
+        realtime.messages_after(messages, since), many=True
+    ).data
+
+
+def _since(request):
+    return request.GET.get("since") or request.headers.get("Last-Event-ID")
+
+
+def _not_found():
+    return JsonResponse({"error": "Session not found"}, status=404)
+
+
+async def visitor_events(request, session_id):
+    """Events of a widget session; internal notes are never sent."""
+    session = await ChatSession.objects.filter(session_id=session_id).afirst()
+    if session is None:
+        return _not_found()
+    return await _respond(request, session, show_internal=False)
+
+
+async def agent_events(request, pk):
+    """Events of a session for an agent allowed to follow it."""
+    user = await _authenticate(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    session = await ChatSession.objects.filter(pk=pk).afirst()
+    if session is None:
+        return _not_found()
+    if not await _can_follow(user, session):
+        return JsonResponse(
+            {"detail": "You do not have permission to perform this action."},
+            status=403,
+        )
+    show_internal = request.GET.get("show_internal", "true").lower() == "true"
+    return await _respond(request, session, show_internal=show_internal)
+
+
+async def _respond(request, session, show_internal):
+    since = _since(request)
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        response = StreamingHttpResponse(
+            _stream(session, since, show_internal),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    limit = settings.LIVE_CHAT_LONG_POLL_SECONDS
+    try:
+        timeout = max(0.0, min(float(request.GET.get("timeout", limit)), limit))
+    except ValueError:
+        timeout = limit
+    messages, events = await _long_poll(session, since, show_internal, timeout)
+    return JsonResponse(
+        {
+            "session_id": session.session_id,
+            "status": session.status,
+            "messages": messages,
+            "events": events,
+            "cursor": realtime.next_cursor(messages, since),
+        }
+    )
+
+
+async def _long_poll(session, since, show_internal, timeout):
+    broker = realtime.get_broker()
+    subscription = await broker.subscribe(realtime.channel_name(session.session_id))
+    try:
+        messages = await _messages_after(session.pk, since, show_internal)
+        deadline = time.monotonic() + timeout
+        events = []
+        while not messages and not events:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            received = await subscription.get(remaining)
+            events = _visible(received, show_internal)
+            if any(event["type"] == realtime.MESSAGE for event in received):
+                messages = await _messages_after(session.pk, since, show_internal)
+        return messages, events
+    finally:
+        await subscription.close()
+
+
+def _visible(events, show_internal):
+    """Non-message events the client should see."""
+    return [
+        event
+        for event in events
+        if event.get("type") != realtime.MESSAGE
+        and (show_internal or not event.get("internal"))
+    ]
+
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _stream(session, since, show_internal):
+    broker = realtime.get_broker()
+    subscription = await broker.subscribe(realtime.channel_name(session.session_id))
+    cursor = since
+    try:
+        deadline = time.monotonic() + settings.LIVE_CHAT_STREAM_SECONDS
+        yield "retry: 1000\n\n"
+        received = [{"type": realtime.MESSAGE}]
+        while True:
+            if any(event.get("type") == realtime.MESSAGE for event in received):
+                messages = await _messages_after(session.pk, cursor, show_internal)
+                for message in messages:
+                    cursor = str(message["id"])
+                    yield _sse(realtime.MESSAGE, message, event_id=cursor)
+            for event in _visible(received, show_internal):
+                yield _sse(event["type"], event)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            received = await subscription.get(min(remaining, SSE_KEEPALIVE_SECONDS))
+            if not received:
+                yield ": keepalive\n\n"
+    finally:
+        await subscription.close()
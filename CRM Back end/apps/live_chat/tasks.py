@@ -0,0 +1,23 @@
+"""
+Celery tasks for live chat routing.
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def dispatch_waiting_chats():
+    """
+    Route queued chats to agents with free capacity.  Runs every minute as
+    a fallback; capacity changes normally dispatch straight away.
+    """
+    from apps.live_chat.routing import dispatch
+
+    assigned = dispatch()
+    if assigned:
+        logger.info("Dispatched %d waiting chats", assigned)
+    return assigned
@@ -0,0 +1,251 @@
+"""
+Tests for live chat cursors, events and long-poll endpoints.
+"""
+
+import datetime
+import uuid
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework import status
+
+from apps.live_chat import realtime
+from tests.factories import (
+    ChatAgentFactory,
+    ChatDepartmentFactory,
+    ChatMessageFactory,
+    ChatSessionFactory,
+)
+
+BASE_CHAT = "/api/v1/live-chat/"
+
+
+def _conversation(session, count=3):
+    start = datetime.datetime(2031, 1, 1, 9, tzinfo=datetime.timezone.utc)
+    messages = []
+    for offset in range(count):
+        message = ChatMessageFactory(session=session, content=f"Message {offset}")
+        # Explicit times: messages created in one tick would tie
+        message.created_at = start + datetime.timedelta(seconds=offset)
+        message.save(update_fields=["created_at"])
+        messages.append(message)
+    return messages
+
+
+@pytest.mark.django_db
+class TestMessagesAfter:
+    """Tests for realtime.messages_after()."""
+
+    def test_message_id_cursor(self):
+        session = ChatSessionFactory()
+        first, second, third = _conversation(session)
+
+        messages = realtime.messages_after(session.messages.all(), str(first.id))
+
+        assert list(messages) == [second, third]
+
+    def test_timestamp_cursor(self):
+        session = ChatSessionFactory()
+        first, second, third = _conversation(session)
+
+        messages = realtime.messages_after(
+            session.messages.all(), second.created_at.isoformat()
+        )
+
+        assert list(messages) == [third]
+
+    def test_invalid_cursor_returns_everything(self):
+        session = ChatSessionFactory()
+        _conversation(session)
+
+        assert realtime.messages_after(session.messages.all(), "junk").count() == 3
+
+    def test_unknown_message_id_returns_everything(self):
+        session = ChatSessionFactory()
+        _conversation(session)
+
+        messages = realtime.messages_after(session.messages.all(), str(uuid.uuid4()))
+
+        assert messages.count() == 3
+
+
+class TestMemoryBroker:
+    """Tests for the process-local broker."""
+
+    def test_subscribers_receive_published_events(self):
+        broker = realtime.MemoryBroker()
+
+        async def listen():
+            subscription = await broker.subscribe("chat")
+            broker.publish("chat", {"type": realtime.TYPING})
+            broker.publish("other", {"type": realtime.READ})
+            try:
+                return await subscription.get(1)
+            finally:
+                await subscription.close()
+
+        assert async_to_sync(listen)() == [{"type": realtime.TYPING}]
+        assert not broker._subscriptions
+
+    def test_get_times_out_empty(self):
+        broker = realtime.MemoryBroker()
+
+        async def listen():
+            subscription = await broker.subscribe("chat")
+            try:
+                return await subscription.get(0.01)
+            finally:
+                await subscription.close()
+
+        assert async_to_sync(listen)() == []
+
+
+@pytest.mark.django_db
+class TestCursorEndpoints:
+    """Tests for ?since= on the message endpoints."""
+
+    def test_public_session_since(self, api_client):
+        session = ChatSessionFactory()
+        first, second, third = _conversation(session)
+
+        resp = api_client.get(
+            f"{BASE_CHAT}public/{session.session_id}/?since={first.id}"
+        )
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert [m["content"] for m in resp.data["messages"]] == [
+            "Message 1",
+            "Message 2",
+        ]
+        assert resp.data["cursor"] == str(third.id)
+
+    def test_agent_messages_since(self, admin_client):
+        session = ChatSessionFactory()
+        first, second, third = _conversation(session)
+
+        resp = admin_client.get(
+            f"{BASE_CHAT}sessions/{session.id}/messages/?since={second.id}"
+        )
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert [m["content"] for m in resp.data["messages"]] == ["Message 2"]
+        assert resp.data["cursor"] == str(third.id)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLongPoll:
+    """Tests for the long-poll event endpoints."""
+
+    def test_returns_pending_messages_immediately(self, api_client):
+        session = ChatSessionFactory()
+        first, second, third = _conversation(session)
+
+        resp = api_client.get(
+            f"{BASE_CHAT}public/{session.session_id}/events/?since={first.id}"
+        )
+
+        assert resp.status_code == status.HTTP_200_OK
+        body = resp.json()
+        assert [m["content"] for m in body["messages"]] == ["Message 1", "Message 2"]
+        assert body["cursor"] == str(third.id)
+
+    def test_times_out_empty(self, api_client):
+        session = ChatSessionFactory()
+        (last,) = _conversation(session, count=1)
+
+        resp = api_client.get(
+            f"{BASE_CHAT}public/{session.session_id}/events/"
+            f"?since={last.id}&timeout=0"
+        )
+
+        body = resp.json()
+        assert body["messages"] == []
+        assert body["events"] == []
+        assert body["cursor"] == str(last.id)
+
+    def test_internal_notes_hidden_from_visitor(self, api_client):
+        session = ChatSessionFactory()
+        ChatMessageFactory(session=session, content="Secret", is_internal=True)
+
+        resp = api_client.get(
+            f"{BASE_CHAT}public/{session.session_id}/events/?timeout=0"
+        )
+
+        assert resp.json()["messages"] == []
+
+    def test_agent_events_require_authentication(self, api_client):
+        session = ChatSessionFactory()
+
+        resp = api_client.get(f"{BASE_CHAT}sessions/{session.id}/events/?timeout=0")
+
+        assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_agent_events(self, admin_client):
+        session = ChatSessionFactory()
+        ChatMessageFactory(session=session, content="Note", is_internal=True)
+
+        resp = admin_client.get(f"{BASE_CHAT}sessions/{session.id}/events/?timeout=0")
+
+        assert resp.status_code == status.HTTP_200_OK
+        assert [m["content"] for m in resp.json()["messages"]] == ["Note"]
+
+    def test_agent_events_limited_to_agents_of_the_session(
+        self, authenticated_client, preparer_user
+    ):
+        department = ChatDepartmentFactory()
+        session = ChatSessionFactory(department=department)
+        url = f"{BASE_CHAT}sessions/{session.id}/events/?timeout=0"
+
+        outsider = authenticated_client.get(url)
+        agent = ChatAgentFactory(user=preparer_user)
+        other_department = authenticated_client.get(url)
+        agent.departments.add(department)
+        member = authenticated_client.get(url)
+
+        assert outsider.status_code == status.HTTP_403_FORBIDDEN
+        assert other_department.status_code == status.HTTP_403_FORBIDDEN
+        assert member.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestSignals:
+    """Typing and read events are published, not stored."""
+
+    def test_visitor_typing_is_published(self, api_client):
+        session = ChatSessionFactory()
+
+        with mock.patch.object(realtime, "publish") as publish:
+            resp = api_client.post(
+                f"{BASE_CHAT}public/{session.session_id}/signal/",
+                {"type": "typing"},
+                format="json",
+            )
+
+        assert resp.status_code == status.HTTP_204_NO_CONTENT
+        publish.assert_called_once_with(
+            session.session_id, {"type": "typing", "sender": "visitor"}
+        )
+
+    def test_unknown_signal_rejected(self, admin_client):
+        session = ChatSessionFactory()
+
+        resp = admin_client.post(
+            f"{BASE_CHAT}sessions/{session.id}/signal/",
+            {"type": "message"},
+            format="json",
+        )
+
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_new_message_published_on_commit(self, django_capture_on_commit_callbacks):
+        session = ChatSessionFactory()
+
+        with mock.patch.object(realtime, "publish") as publish:
+            with django_capture_on_commit_callbacks(execute=True):
+                message = ChatMessageFactory(session=session)
+
+        publish.assert_any_call(
+            session.session_id,
+            {"type": "message", "id": str(message.id), "internal": False},
+        )
@@ -0,0 +1,209 @@
+"""
+Tests for live chat routing.
+"""
+
+import datetime
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from apps.live_chat import routing
+from apps.live_chat.models import ChatSession
+from tests.factories import (
+    ChatAgentFactory,
+    ChatDepartmentFactory,
+    ChatSessionFactory,
+)
+
+BASE_CHAT = "/api/v1/live-chat/"
+
+
+def _agent(department, **kwargs):
+    agent = ChatAgentFactory(is_available=True, status="online", **kwargs)
+    agent.departments.add(department)
+    return agent
+
+
+def _queue(department, count):
+    start = timezone.now() - datetime.timedelta(minutes=count)
+    sessions = []
+    for offset in range(count):
+        session = ChatSessionFactory(department=department)
+        session.started_at = start + datetime.timedelta(minutes=offset)
+        session.save(update_fields=["started_at"])
+        sessions.append(session)
+    return sessions
+
+
+@pytest.mark.django_db
+class TestRoute:
+    """Tests for routing.route()."""
+
+    def test_least_loaded_agent_is_chosen(self):
+        department = ChatDepartmentFactory()
+        _agent(department, current_chat_count=3)
+        idle = _agent(department, current_chat_count=1)
+        (session,) = _queue(department, 1)
+
+        assert routing.route(session) == idle.pk
+
+        session.refresh_from_db()
+        idle.refresh_from_db()
+        assert session.assigned_agent == idle
+        assert session.status == ChatSession.Status.ACTIVE
+        assert idle.current_chat_count == 2
+
+    def test_round_robin_takes_turns(self):
+        department = ChatDepartmentFactory(routing_method="round_robin")
+        now = timezone.now()
+        first = _agent(
+            department,
+            current_chat_count=0,
+            max_concurrent_chats=10,
+            last_assigned_at=now - datetime.timedelta(hours=2),
+        )
+        second = _agent(
+            department,
+            current_chat_count=0,
+            max_concurrent_chats=10,
+            last_assigned_at=now - datetime.timedelta(hours=1),
+        )
+
+        assigned = [routing.route(session) for session in _queue(department, 3)]
+
+        assert assigned == [first.pk, second.pk, first.pk]
+
+    def test_full_agents_leave_the_session_queued(self):
+        department = ChatDepartmentFactory()
+        agent = _agent(department, current_chat_count=2, max_concurrent_chats=2)
+        (session,) = _queue(department, 1)
+
+        assert routing.route(session) is None
+
+        agent.refresh_from_db()
+        assert agent.current_chat_count == 2
+        assert ChatSession.objects.get(pk=session.pk).status == "waiting"
+
+    def test_last_slot_is_reserved_once(self):
+        department = ChatDepartmentFactory()
+        agent = _agent(department, current_chat_count=0, max_concurrent_chats=1)
+        now = timezone.now()
+
+        # Both requests picked the agent while it still had room
+        assert routing._reserve(agent.pk, now)
+        assert not routing._reserve(agent.pk, now)
+
+    def test_claimed_session_releases_the_reservation(self):
+        department = ChatDepartmentFactory()
+        agent = _agent(department, current_chat_count=0)
+        (session,) = _queue(department, 1)
+        ChatSession.objects.filter(pk=session.pk).update(status="closed")
+
+        assert routing.route(session) is None
+
+        agent.refresh_from_db()
+        assert agent.current_chat_count == 0
+
+
+@pytest.mark.django_db
+class TestDispatch:
+    """Tests for routing.dispatch()."""
+
+    def test_oldest_sessions_fill_the_free_capacity(self):
+        department = ChatDepartmentFactory()
+        _agent(department, current_chat_count=0, max_concurrent_chats=2)
+        first, second, third = _queue(department, 3)
+
+        assert routing.dispatch() == 2
+
+        statuses = [
+            ChatSession.objects.get(pk=session.pk).status
+            for session in (first, second, third)
+        ]
+        assert statuses == ["active", "active", "waiting"]
+
+    def test_lost_claim_does_not_stop_the_queue(self, monkeypatch):
+        department = ChatDepartmentFactory()
+        _agent(department, current_chat_count=0, max_concurrent_chats=2)
+        taken, queued = _queue(department, 2)
+        route = routing.route
+
+        def claimed_elsewhere(session):
+            if session.pk == taken.pk:
+                return None  # As if another dispatcher claimed it first
+            return route(session)
+
+        monkeypatch.setattr(routing, "route", claimed_elsewhere)
+
+        assert routing.dispatch() == 1
+        assert ChatSession.objects.get(pk=queued.pk).status == "active"
+
+    def test_agent_coming_online_takes_queued_chats(
+        self, authenticated_client, preparer_user
+    ):
+        department = ChatDepartmentFactory()
+        agent = ChatAgentFactory(user=preparer_user)
+        agent.departments.add(department)
+        (session,) = _queue(department, 1)
+
+        resp = authenticated_client.post(f"{BASE_CHAT}agents/go_online/")
+
+        assert resp.status_code == status.HTTP_200_OK
+        session.refresh_from_db()
+        assert session.assigned_agent == agent
+
+    def test_closing_a_chat_dispatches_the_next(self, admin_client, admin_user):
+        department = ChatDepartmentFactory()
+        agent = _agent(
+            department, user=admin_user, current_chat_count=0, max_concurrent_chats=1
+        )
+        active, queued = _queue(department, 2)
+        routing.route(active)
+
+        resp = admin_client.post(f"{BASE_CHAT}sessions/{active.id}/close/")
+
+        assert resp.status_code == status.HTTP_200_OK
+        queued.refresh_from_db()
+        agent.refresh_from_db()
+        assert queued.assigned_agent == agent
+        assert agent.current_chat_count == 1
+
+
+@pytest.mark.django_db
+class TestQueueStatus:
+    """Tests for the queue position shown to the widget."""
+
+    def test_position_and_estimate(self):
+        department = ChatDepartmentFactory()
+        _agent(department, current_chat_count=2, max_concurrent_chats=2)
+        # Chats take ten minutes; two slots free up every ten minutes
+        ended = timezone.now()
+        closed = ChatSessionFactory(
+            department=department, status="closed", ended_at=ended
+        )
+        ChatSession.objects.filter(pk=closed.pk).update(
+            started_at=ended - datetime.timedelta(minutes=10)
+        )
+        first, second = _queue(department, 2)
+
+        assert routing.queue_status(first) == {
+            "position": 1,
+            "estimated_wait_seconds": 300,
+        }
+        assert routing.queue_status(second)["position"] == 2
+
+    def test_widget_sees_its_place_in_the_queue(self, api_client):
+        department = ChatDepartmentFactory()
+        _agent(department, current_chat_count=5)
+        _queue(department, 1)
+
+        resp = api_client.post(
+            f"{BASE_CHAT}public/",
+            {"initial_message": "Hello", "department": str(department.id)},
+            format="json",
+        )
+
+        assert resp.status_code == status.HTTP_201_CREATED
+        assert resp.data["status"] == "waiting"
+        assert resp.data["queue"]["position"] == 2
@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from . import streams
 from .views import (
     CannedResponseViewSet,
     ChatAgentViewSet,
@@ -11,6 +12,7 @@ from .views import (
     OfflineMessageViewSet,
     PublicChatRatingView,
     PublicChatSessionView,
+    PublicChatSignalView,
     PublicChatView,
 )
 
@@ -22,6 +24,8 @@ router.register(r"canned-responses", CannedResponseViewSet, basename="canned-res
 router.register(r"offline-messages", OfflineMessageViewSet, basename="offline-message")
 
 urlpatterns = [
+    # Long-poll / SSE endpoints (async views, served by config/asgi.py)
+    path("sessions/<uuid:pk>/events/", streams.agent_events, name="chat-events"),
     path("", include(router.urls)),
     path("widget-settings/", ChatWidgetSettingsView.as_view(), name="widget-settings"),
     path("stats/", ChatStatsView.as_view(), name="chat-stats"),
@@ -32,6 +36,16 @@ urlpatterns = [
         PublicChatSessionView.as_view(),
         name="public-chat-session",
     ),
+    path(
+        "public/<str:session_id>/events/",
+        streams.visitor_events,
+        name="public-chat-events",
+    ),
+    path(
+        "public/<str:session_id>/signal/",
+        PublicChatSignalView.as_view(),
+        name="public-chat-signal",
+    ),
     path(
         "public/<str:session_id>/rate/",
         PublicChatRatingView.as_view(),
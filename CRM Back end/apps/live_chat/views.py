@@ -1,7 +1,7 @@
 import uuid
 from datetime import timedelta
 
-from django.db.models import Avg, F, Q
+from django.db.models import Avg, Q
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -10,6 +10,7 @@ from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle
 from rest_framework.views import APIView
 
+from . import realtime, routing
 from .models import (
     CannedResponse,
     ChatAgent,
@@ -27,6 +28,7 @@ from .serializers import (
     ChatMessageSerializer,
     ChatSessionListSerializer,
     ChatSessionSerializer,
+    ChatSignalSerializer,
     ChatWidgetSettingsSerializer,
     OfflineMessageSerializer,
     RateChatSerializer,
@@ -78,6 +80,14 @@ class ChatMessageThrottle(AnonRateThrottle):
         return super().allow_request(request, view)
 
 
+def _publish_signal(session, sender, data):
+    """Typing and read events go to the session channel, not the database."""
+    event = {"type": data["type"], "sender": sender}
+    if data.get("message_id"):
+        event["message_id"] = str(data["message_id"])
+    realtime.publish(session.session_id, event)
+
+
 class ChatDepartmentViewSet(viewsets.ModelViewSet):
     """ViewSet for managing chat departments."""
 
@@ -131,6 +141,8 @@ class ChatAgentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(agent, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        # Availability or capacity may have changed
+        routing.dispatch_for_agent(agent)
         return Response(serializer.data)
 
     @action(detail=False, methods=["post"])
@@ -138,6 +150,7 @@ class ChatAgentViewSet(viewsets.ModelViewSet):
         """Set current agent as online."""
         agent, _ = ChatAgent.objects.get_or_create(user=request.user)
         agent.go_online()
+        routing.dispatch_for_agent(agent)
         return Response({"message": "You are now online"})
 
     @action(detail=False, methods=["post"])
@@ -159,6 +172,7 @@ class ChatAgentViewSet(viewsets.ModelViewSet):
         agent.is_available = agent.status == ChatAgent.Status.ONLINE
         agent.last_seen = timezone.now()
         agent.save()
+        routing.dispatch_for_agent(agent)
 
         return Response(ChatAgentSerializer(agent).data)
 
@@ -255,6 +269,7 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         agent_id = serializer.validated_data.get("agent_id")
         department_id = serializer.validated_data.get("department_id")
         note = serializer.validated_data.get("note", "")
+        previous_agent = session.assigned_agent
 
         if agent_id:
             new_agent = ChatAgent.objects.get(id=agent_id)
@@ -266,10 +281,14 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
             session.assign_to(new_agent)
             msg = f"Chat transferred to {new_agent.user.get_full_name()}"
         elif department_id:
+            if previous_agent:
+                session.previous_agents.add(previous_agent)
+                previous_agent.release_chat()
             session.department_id = department_id
             session.assigned_agent = None
             session.status = ChatSession.Status.WAITING
             session.save()
+            routing.dispatch([department_id])
             msg = "Chat transferred to another department"
         else:
             return Response(
@@ -277,6 +296,9 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if previous_agent and previous_agent != session.assigned_agent:
+            routing.dispatch_for_agent(previous_agent)
+
         # Create system message
         ChatMessage.objects.create(
             session=session, message_type="system", sender_type="system", content=msg
@@ -305,6 +327,8 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
             )
 
         session.close(by_agent=True)
+        if session.assigned_agent:
+            routing.dispatch_for_agent(session.assigned_agent)
 
         # Create system message
         agent = getattr(request.user, "chat_agent", None)
@@ -350,13 +374,34 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         show_internal = (
             request.query_params.get("show_internal", "true").lower() == "true"
         )
-        messages = session.messages.all()
+        messages = session.messages.select_related("agent__user")
         if not show_internal:
             messages = messages.exclude(is_internal=True)
 
-        serializer = ChatMessageSerializer(messages, many=True)
+        # ?since=<message id or timestamp>: only what the client doesn't have
+        since = request.query_params.get("since")
+        serializer = ChatMessageSerializer(
+            realtime.messages_after(messages, since), many=True
+        )
+        if since:
+            return Response(
+                {
+                    "messages": serializer.data,
+                    "cursor": realtime.next_cursor(serializer.data, since),
+                }
+            )
         return Response(serializer.data)
 
+    @action(detail=True, methods=["post"])
+    def signal(self, request, pk=None):
+        """Publish a typing indicator or read receipt to the visitor."""
+        session = self.get_object()
+        serializer = ChatSignalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        _publish_signal(session, "agent", serializer.validated_data)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
         """Mark all visitor messages as read."""
@@ -364,6 +409,7 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         session.messages.filter(sender_type="visitor", is_read=False).update(
             is_read=True, read_at=timezone.now()
         )
+        _publish_signal(session, "agent", {"type": realtime.READ})
 
         return Response({"message": "Messages marked as read"})
 
@@ -650,7 +696,7 @@ class PublicChatView(APIView):
         department_id = serializer.validated_data.get("department")
         if department_id:
             department = ChatDepartment.objects.filter(id=department_id).first()
-            if not department or department.online_agents_count == 0:
+            if not department or not routing.has_online_agents(department):
                 # Create offline message instead
                 OfflineMessage.objects.create(
                     name=serializer.validated_data.get("visitor_name", ""),
@@ -699,21 +745,10 @@ class PublicChatView(APIView):
             delivered_at=timezone.now(),
         )
 
-        # Auto-assign if enabled
-        if department and department.auto_assign:
-            available_agent = (
-                ChatAgent.objects.filter(
-                    is_available=True,
-                    status=ChatAgent.Status.ONLINE,
-                    departments=department,
-                    current_chat_count__lt=F("max_concurrent_chats"),
-                )
-                .order_by("current_chat_count")
-                .first()
-            )
-
-            if available_agent:
-                session.assign_to(available_agent)
+        # Auto-assign if enabled; earlier visitors in the queue go first
+        if department:
+            routing.dispatch([department.pk])
+            session.refresh_from_db(fields=["status", "assigned_agent"])
 
         return Response(
             {
@@ -724,6 +759,7 @@ class PublicChatView(APIView):
                     if session.assigned_agent
                     else None
                 ),
+                "queue": routing.queue_status(session),
             },
             status=status.HTTP_201_CREATED,
         )
@@ -749,8 +785,14 @@ class PublicChatSessionView(APIView):
                 {"error": "Session not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        messages = session.messages.exclude(is_internal=True)
-        serializer = ChatMessageSerializer(messages, many=True)
+        messages = session.messages.exclude(is_internal=True).select_related(
+            "agent__user"
+        )
+        # ?since=<message id or timestamp>: only what the widget doesn't have
+        since = request.query_params.get("since")
+        serializer = ChatMessageSerializer(
+            realtime.messages_after(messages, since), many=True
+        )
 
         return Response(
             {
@@ -762,6 +804,8 @@ class PublicChatSessionView(APIView):
                     else None
                 ),
                 "messages": serializer.data,
+                "cursor": realtime.next_cursor(serializer.data, since),
+                "queue": routing.queue_status(session),
             }
         )
 
@@ -800,6 +844,27 @@ class PublicChatSessionView(APIView):
         )
 
 
+class PublicChatSignalView(APIView):
+    """Typing indicators and read receipts from the widget."""
+
+    permission_classes = [AllowAny]
+    throttle_classes = [PublicChatRateThrottle]
+
+    def post(self, request, session_id):
+        """Publish a typing indicator or read receipt to the agent."""
+        session = ChatSession.objects.filter(session_id=session_id).first()
+        if session is None:
+            return Response(
+                {"error": "Session not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = ChatSignalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        _publish_signal(session, "visitor", serializer.validated_data)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class PublicChatRatingView(APIView):
     """Public API for rating a chat."""
 
@@ -0,0 +1,455 @@
+"""
+Batched campaign send engine.
+
+``send_campaign`` builds every recipient with one ``bulk_create`` and
+queues the pending ones in chunks of ``SEND_CHUNK_SIZE``.  Each
+``send_campaign_batch`` task prepares the campaign once - templates are
+compiled into literal parts and substitution slots, tracking links are
+rewritten to per-campaign ``CampaignLink`` ids - and then sends the whole
+chunk over one SMTP connection, paced by ``MARKETING_SEND_RATE``.
+Sent/failed statuses are written back with bulk UPDATEs every
+``STATUS_FLUSH_SIZE`` messages and the campaign counter is incremented
+with an ``F()`` expression, so concurrent chunks never lose updates.
+"""
+
+import logging
+import re
+import secrets
+import smtplib
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Recipients per send_campaign_batch task
+SEND_CHUNK_SIZE = 500
+
+# Recipient rows per INSERT when building the audience
+RECIPIENT_BATCH_SIZE = 1000
+
+# Sent/failed statuses buffered before they are written back
+STATUS_FLUSH_SIZE = 100
+
+COMPANY_NAME = "Ebenezer Tax Services"
+FAILED_MESSAGE = "Failed to send email. Please contact support."
+
+_VARIABLE_RE = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+_LINK_RE = re.compile(r'href=["\']([^"\']+)["\']')
+_TAG_RE = re.compile("<.*?>")
+
+# Substitution slot for the recipient's tracking token
+_TOKEN_SLOT = "{{recipient.tracking_token}}"
+
+
+# ---------------------------------------------------------------------------
+# Templates
+# ---------------------------------------------------------------------------
+
+
+class CompiledTemplate:
+    """
+    A ``{{variable.path}}`` template split once into literal text and
+    variable slots, so rendering is a lookup and a join.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, source):
+        source = source or ""
+        parts, position = [], 0
+        for match in _VARIABLE_RE.finditer(source):
+            parts.append(source[position : match.start()])
+            parts.append(tuple(match.group(1).split(".")))
+            position = match.end()
+        parts.append(source[position:])
+        # Literals at even indexes, variable paths at odd ones
+        self.parts = tuple(parts)
+
+    def render(self, context):
+        out = []
+        for index, part in enumerate(self.parts):
+            out.append(_lookup(context, part) if index % 2 else part)
+        return "".join(out)
+
+
+def _lookup(context, path):
+    value = context
+    for part in path:
+        if isinstance(value, dict):
+            value = value.get(part, "")
+        else:
+            value = getattr(value, part, "")
+    return str(value) if value else ""
+
+
+@lru_cache(maxsize=256)
+def compile_template(source):
+    return CompiledTemplate(source)
+
+
+def render_template_string(template_string, context):
+    """Render a template string with the given context."""
+    if not template_string:
+        return ""
+    return compile_template(template_string).render(context)
+
+
+def strip_html_tags(html):
+    """Remove HTML tags from a string."""
+    return _TAG_RE.sub("", html)
+
+
+# ---------------------------------------------------------------------------
+# Campaign preparation
+# ---------------------------------------------------------------------------
+
+
+def _trackable(url):
+    # Unsubscribe/tracking URLs keep working as they are, and personalized
+    # URLs differ per recipient so a single CampaignLink cannot stand in
+    return not ("unsubscribe" in url or "track" in url or "{{" in url)
+
+
+def _variant_content(campaign, variant):
+    if campaign.is_ab_test and variant == "B":
+        return (
+            campaign.ab_test_subject_b or campaign.subject,
+            campaign.ab_test_content_b or campaign.html_content,
+        )
+    return campaign.subject, campaign.html_content
+
+
+def ensure_campaign_links(campaign, html_sources):
+    """
+    Create the ``CampaignLink`` rows for every trackable URL in
+    ``html_sources`` and return ``{original_url: link_id}``.
+    """
+    from .models import CampaignLink
+
+    max_length = CampaignLink._meta.get_field("original_url").max_length
+    urls = {
+        url
+        for html in html_sources
+        for url in _LINK_RE.findall(html or "")
+        if _trackable(url) and len(url) <= max_length
+    }
+    if not urls:
+        return {}
+    CampaignLink.objects.bulk_create(
+        [CampaignLink(campaign=campaign, original_url=url) for url in urls],
+        ignore_conflicts=True,
+    )
+    return dict(
+        CampaignLink.objects.filter(
+            campaign=campaign, original_url__in=urls
+        ).values_list("original_url", "id")
+    )
+
+
+class PreparedCampaign:
+    """A campaign's content compiled once per variant for fast per-recipient rendering."""
+
+    def __init__(self, campaign):
+        self.campaign = campaign
+        self.from_email = f"{campaign.from_name} <{campaign.from_email}>"
+        self.reply_to = [campaign.reply_to] if campaign.reply_to else None
+        self.track_base = f"{settings.API_URL}/api/v1/marketing/track"
+        self.unsubscribe_base = f"{settings.FRONTEND_URL}/unsubscribe"
+
+        variants = ("A", "B") if campaign.is_ab_test else ("A",)
+        contents = {
+            variant: _variant_content(campaign, variant) for variant in variants
+        }
+        links = {}
+        if campaign.track_clicks:
+            links = ensure_campaign_links(
+                campaign, [html for _subject, html in contents.values()]
+            )
+        self.variants = {
+            variant: self._compile(subject, html, links)
+            for variant, (subject, html) in contents.items()
+        }
+
+    def _compile(self, subject, html, links):
+        campaign = self.campaign
+        if campaign.track_opens:
+            pixel = (
+                f'<img src="{self.track_base}/open/{_TOKEN_SLOT}/" '
+                'width="1" height="1" alt="" style="display:none;" />'
+            )
+            if "</body>" in html:
+                html = html.replace("</body>", f"{pixel}</body>")
+            else:
+                html += pixel
+        if links:
+
+            def replace_link(match):
+                link_id = links.get(match.group(1))
+                if link_id is None:
+                    return match.group(0)
+                return f'href="{self.track_base}/click/{_TOKEN_SLOT}/{link_id}/"'
+
+            html = _LINK_RE.sub(replace_link, html)
+
+        text = campaign.text_content or strip_html_tags(html)
+        return (
+            CompiledTemplate(subject),
+            CompiledTemplate(html),
+            CompiledTemplate(text),
+        )
+
+    def context_for(self, recipient):
+        contact = recipient.contact
+        token = recipient.tracking_token
+        return {
+            "contact": {
+                "first_name": contact.first_name or "",
+                "last_name": contact.last_name or "",
+                "full_name": contact.full_name or "",
+                "email": contact.email,
+            },
+            "recipient": {"tracking_token": token},
+            "company_name": COMPANY_NAME,
+            "unsubscribe_url": f"{self.unsubscribe_base}/{token}",
+            "tracking_pixel": f"{self.track_base}/open/{token}/",
+        }
+
+    def build_message(self, recipient, connection=None):
+        subject, html, text = self.variants.get(
+            recipient.ab_variant, self.variants["A"]
+        )
+        context = self.context_for(recipient)
+        message = EmailMultiAlternatives(
+            subject=subject.render(context),
+            body=text.render(context),
+            from_email=self.from_email,
+            to=[recipient.email],
+            reply_to=self.reply_to,
+            connection=connection,
+            headers={
+                "X-Campaign-ID": str(self.campaign.id),
+                "X-Recipient-ID": str(recipient.id),
+                "List-Unsubscribe": f"<{context['unsubscribe_url']}>",
+            },
+        )
+        message.attach_alternative(html.render(context), "text/html")
+        return message
+
+
+# ---------------------------------------------------------------------------
+# Audience
+# ---------------------------------------------------------------------------
+
+
+def _ab_variant(campaign):
+    if not campaign.is_ab_test:
+        return ""
+    # SECURITY: Use cryptographically secure random for A/B assignment
+    # to prevent prediction of variant assignment
+    return "A" if secrets.randbelow(100) < campaign.ab_test_split else "B"
+
+
+def build_recipients(campaign):
+    """
+    Create a pending ``CampaignRecipient`` for every opted-in subscriber
+    of the campaign's lists.  Existing recipients are left untouched.
+    Returns the campaign's recipient count.
+    """
+    from apps.contacts.models import Contact
+
+    from .models import CampaignRecipient
+
+    contacts = (
+        Contact.objects.filter(
+            list_subscriptions__email_list__in=campaign.email_lists.all(),
+            list_subscriptions__is_subscribed=True,
+            email_opt_in__in=[
+                Contact.EmailOptIn.SINGLE_OPT_IN,
+                Contact.EmailOptIn.DOUBLE_OPT_IN,
+            ],
+        )
+        .exclude(email="")
+        .distinct()
+        .values_list("pk", "email")
+    )
+
+    batch = []
+    for contact_id, email in contacts.iterator(chunk_size=RECIPIENT_BATCH_SIZE):
+        batch.append(
+            CampaignRecipient(
+                campaign=campaign,
+                contact_id=contact_id,
+                email=email,
+                status=CampaignRecipient.Status.PENDING,
+                ab_variant=_ab_variant(campaign),
+            )
+        )
+        if len(batch) >= RECIPIENT_BATCH_SIZE:
+            CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+
+    return CampaignRecipient.objects.filter(campaign=campaign).count()
+
+
+def dispatch_pending(campaign):
+    """Queue the campaign's pending recipients in send chunks."""
+    from .tasks import send_campaign_batch
+
+    recipient_ids = campaign.recipients.filter(status="pending").values_list(
+        "id", flat=True
+    )
+    chunk, chunks = [], 0
+    for recipient_id in recipient_ids.iterator(chunk_size=SEND_CHUNK_SIZE):
+        chunk.append(str(recipient_id))
+        if len(chunk) >= SEND_CHUNK_SIZE:
+            send_campaign_batch.delay(str(campaign.id), chunk)
+            chunk, chunks = [], chunks + 1
+    if chunk:
+        send_campaign_batch.delay(str(campaign.id), chunk)
+        chunks += 1
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Sending
+# ---------------------------------------------------------------------------
+
+
+class RateLimiter:
+    """Spaces calls to ``wait`` at most ``rate`` per second (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+class _StatusBuffer:
+    """Sent/failed recipient ids, written back in bulk."""
+
+    def __init__(self, campaign):
+        self.campaign = campaign
+        self.sent = []
+        self.failed = []
+
+    def __len__(self):
+        return len(self.sent) + len(self.failed)
+
+    def flush(self):
+        from .models import Campaign, CampaignRecipient
+
+        if self.sent:
+            CampaignRecipient.objects.filter(pk__in=self.sent).update(
+                status=CampaignRecipient.Status.SENT,
+                sent_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            Campaign.objects.filter(pk=self.campaign.pk).update(
+                total_sent=F("total_sent") + len(self.sent)
+            )
+        if self.failed:
+            CampaignRecipient.objects.filter(pk__in=self.failed).update(
+                status=CampaignRecipient.Status.FAILED,
+                error_message=FAILED_MESSAGE,
+                updated_at=timezone.now(),
+            )
+        self.sent, self.failed = [], []
+
+
+class ConnectionLost(Exception):
+    """The SMTP connection dropped and could not be re-established."""
+
+
+def _send(connection, message):
+    try:
+        connection.send_messages([message])
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        # The server dropped the persistent connection; reconnect once
+        connection.close()
+        try:
+            connection.open()
+        except Exception as exc:
+            raise ConnectionLost(str(exc)) from exc
+        try:
+            connection.send_messages([message])
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as exc:
+            raise ConnectionLost(str(exc)) from exc
+
+
+def send_batch(campaign, recipient_ids):
+    """
+    Send ``campaign`` to the pending recipients among ``recipient_ids``
+    over one SMTP connection.  Returns ``(sent, failed)`` counts.
+
+    Raises ``ConnectionLost`` if the connection drops and reconnecting
+    fails; statuses recorded so far are written and the recipients not
+    reached yet stay pending for a retry.
+    """
+    from .models import CampaignRecipient
+
+    recipients = (
+        CampaignRecipient.objects.filter(
+            campaign=campaign, pk__in=recipient_ids, status="pending"
+        )
+        .select_related("contact")
+        .only(
+            "id",
+            "email",
+            "ab_variant",
+            "tracking_token",
+            "contact__salutation",
+            "contact__first_name",
+            "contact__last_name",
+            "contact__email",
+        )
+        .order_by()
+    )
+    recipients = list(recipients)
+    if not recipients:
+        return 0, 0
+
+    prepared = PreparedCampaign(campaign)
+    limiter = RateLimiter(settings.MARKETING_SEND_RATE)
+    statuses = _StatusBuffer(campaign)
+    sent = failed = 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for recipient in recipients:
+            limiter.wait()
+            try:
+                _send(connection, prepared.build_message(recipient, connection))
+            except ConnectionLost:
+                raise
+            except Exception as e:
+                # SECURITY: Log full error details but don't expose to users
+                logger.error(f"Error sending email to recipient {recipient.id}: {e}")
+                statuses.failed.append(recipient.id)
+                failed += 1
+            else:
+                statuses.sent.append(recipient.id)
+                sent += 1
+            if len(statuses) >= STATUS_FLUSH_SIZE:
+                statuses.flush()
+    finally:
+        statuses.flush()
+        connection.close()
+
+    logger.info(f"Campaign {campaign.name}: sent {sent}, failed {failed} in one batch")
+    return sent, failed
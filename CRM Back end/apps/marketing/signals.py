@@ -1,7 +1,10 @@
+from django.db import transaction
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from apps.contacts.models import Contact
+from apps.core.signals import records_imported
 
 from .models import AutomationEnrollment, AutomationSequence
 
@@ -51,3 +54,56 @@ def trigger_signup_automation(sender, instance, created, **kwargs):
                 from .tasks import process_automation_enrollment
 
                 process_automation_enrollment.delay(str(enrollment.id))
+
+
+@receiver(records_imported, sender=Contact)
+def trigger_signup_automation_for_import(sender, instances, **kwargs):
+    """
+    Bulk counterpart of ``trigger_signup_automation`` for a chunk of
+    contacts created by a CSV import.
+    """
+    from .models import EmailListSubscriber
+    from .tasks import process_automation_enrollment
+
+    sequences = list(
+        AutomationSequence.objects.filter(is_active=True, trigger_type="signup")
+    )
+    contact_ids = [contact.pk for contact in instances]
+    for sequence in sequences:
+        eligible = contact_ids
+        if sequence.email_lists.exists():
+            eligible = list(
+                EmailListSubscriber.objects.filter(
+                    email_list__in=sequence.email_lists.all(),
+                    contact_id__in=contact_ids,
+                    is_subscribed=True,
+                )
+                .values_list("contact_id", flat=True)
+                .distinct()
+            )
+        if not eligible:
+            continue
+
+        first_step = sequence.steps.order_by("order").first()
+        enrollments = [
+            AutomationEnrollment(
+                sequence=sequence,
+                contact_id=contact_id,
+                status="active",
+                current_step=first_step,
+            )
+            for contact_id in eligible
+        ]
+        # New contacts have no enrollments yet, so every row is inserted
+        AutomationEnrollment.objects.bulk_create(enrollments)
+        AutomationSequence.objects.filter(pk=sequence.pk).update(
+            total_enrolled=F("total_enrolled") + len(enrollments)
+        )
+
+        enrollment_ids = [str(enrollment.id) for enrollment in enrollments]
+        transaction.on_commit(
+            lambda ids=enrollment_ids: [
+                process_automation_enrollment.delay(enrollment_id)
+                for enrollment_id in ids
+            ]
+        )
@@ -1,12 +1,19 @@
 import logging
-import re
 from datetime import timedelta
 
 from celery import shared_task
-from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.utils import timezone
 
+from .sending import (
+    FAILED_MESSAGE,
+    build_recipients,
+    dispatch_pending,
+    render_template_string,
+    send_batch,
+    strip_html_tags,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,8 +21,11 @@ logger = logging.getLogger(__name__)
 def send_campaign(campaign_id: str):
     """
     Send a campaign to all recipients.
+
+    Recipients are created in bulk and handed to ``send_campaign_batch``
+    in chunks; see ``apps.marketing.sending``.
     """
-    from .models import Campaign, CampaignRecipient, EmailListSubscriber
+    from .models import Campaign
 
     try:
         campaign = Campaign.objects.get(id=campaign_id)
@@ -28,53 +38,18 @@ def send_campaign(campaign_id: str):
 
         # Update status to sending
         campaign.status = "sending"
-        campaign.save()
-
-        # Get all subscribers from the email lists
-        subscribers = (
-            EmailListSubscriber.objects.filter(
-                email_list__in=campaign.email_lists.all(),
-                is_subscribed=True,
-                contact__email_opt_in_status__in=["single_opt_in", "double_opt_in"],
-            )
-            .select_related("contact")
-            .distinct("contact")
-        )
-
-        # Create recipients
-        recipients_created = 0
-        for subscriber in subscribers:
-            recipient, created = CampaignRecipient.objects.get_or_create(
-                campaign=campaign,
-                contact=subscriber.contact,
-                defaults={"email": subscriber.contact.email, "status": "pending"},
-            )
-            if created:
-                recipients_created += 1
-
-                # Assign A/B variant if needed
-                if campaign.is_ab_test:
-                    # SECURITY: Use cryptographically secure random for A/B assignment
-                    # to prevent prediction of variant assignment
-                    import secrets
-
-                    recipient.ab_variant = (
-                        "A" if secrets.randbelow(100) < campaign.ab_test_split else "B"
-                    )
-                    recipient.save()
-
-        campaign.total_recipients = recipients_created
-        campaign.save()
-
-        # Send to each recipient
-        for recipient in campaign.recipients.filter(status="pending"):
-            send_campaign_email.delay(str(recipient.id))
+        campaign.save(update_fields=["status", "updated_at"])
 
+        total_recipients = build_recipients(campaign)
+        campaign.total_recipients = total_recipients
         campaign.sent_at = timezone.now()
-        campaign.save()
+        campaign.save(update_fields=["total_recipients", "sent_at", "updated_at"])
+
+        chunks = dispatch_pending(campaign)
 
         logger.info(
-            f"Campaign {campaign.name} started sending to {recipients_created} recipients"
+            f"Campaign {campaign.name} started sending to {total_recipients} "
+            f"recipients in {chunks} batches"
         )
 
     except Campaign.DoesNotExist:
@@ -83,104 +58,57 @@ def send_campaign(campaign_id: str):
         logger.error(f"Error sending campaign {campaign_id}: {str(e)}")
 
 
-@shared_task
-def send_campaign_email(recipient_id: str):
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_campaign_batch(self, campaign_id: str, recipient_ids: list):
     """
-    Send a single campaign email to a recipient.
+    Send a campaign to a chunk of recipients over one SMTP connection.
     """
-    from .models import CampaignRecipient
+    from .models import Campaign
 
     try:
-        recipient = CampaignRecipient.objects.select_related("campaign", "contact").get(
-            id=recipient_id
-        )
-
-        campaign = recipient.campaign
-        contact = recipient.contact
+        campaign = Campaign.objects.get(id=campaign_id)
+    except Campaign.DoesNotExist:
+        logger.error(f"Campaign {campaign_id} not found")
+        return
 
-        # Determine content based on A/B variant
-        if campaign.is_ab_test and recipient.ab_variant == "B":
-            subject = campaign.ab_test_subject_b or campaign.subject
-            html_content = campaign.ab_test_content_b or campaign.html_content
-        else:
-            subject = campaign.subject
-            html_content = campaign.html_content
+    # Paused or cancelled campaigns keep their remaining recipients pending
+    if campaign.status != "sending":
+        return
 
-        # Personalize content
-        context = {
-            "contact": {
-                "first_name": contact.first_name or "",
-                "last_name": contact.last_name or "",
-                "full_name": contact.full_name or "",
-                "email": contact.email,
-            },
-            "company_name": "Ebenezer Tax Services",
-            "unsubscribe_url": f"{settings.FRONTEND_URL}/unsubscribe/{recipient.tracking_token}",
-            "tracking_pixel": f"{settings.API_URL}/api/v1/marketing/track/open/{recipient.tracking_token}/",
-        }
+    try:
+        send_batch(campaign, recipient_ids)
+    except Exception as exc:
+        # Connection-level failure: recipients not yet sent are still pending
+        logger.error(f"Error sending campaign {campaign_id} batch: {exc}")
+        raise self.retry(exc=exc)
 
-        # Render template variables
-        subject = render_template_string(subject, context)
-        html_content = render_template_string(html_content, context)
-        text_content = (
-            render_template_string(campaign.text_content, context)
-            if campaign.text_content
-            else ""
-        )
+    if not campaign.recipients.filter(status="pending").exists():
+        update_campaign_stats.delay(campaign_id)
 
-        # Add tracking pixel if enabled
-        if campaign.track_opens:
-            tracking_pixel = f'<img src="{context["tracking_pixel"]}" width="1" height="1" alt="" style="display:none;" />'
-            html_content = html_content.replace("</body>", f"{tracking_pixel}</body>")
-            if "</body>" not in html_content:
-                html_content += tracking_pixel
 
-        # Replace links with tracking links if enabled
-        if campaign.track_clicks:
-            html_content = add_link_tracking(html_content, campaign, recipient)
+@shared_task
+def send_campaign_email(recipient_id: str):
+    """
+    Send a single campaign email to a recipient.
+    """
+    from .models import CampaignRecipient
 
-        # Send email
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content or strip_html_tags(html_content),
-            from_email=f"{campaign.from_name} <{campaign.from_email}>",
-            to=[recipient.email],
-            reply_to=[campaign.reply_to] if campaign.reply_to else None,
+    try:
+        recipient = CampaignRecipient.objects.select_related("campaign").get(
+            id=recipient_id
         )
-        email.attach_alternative(html_content, "text/html")
-
-        # Add headers
-        email.extra_headers = {
-            "X-Campaign-ID": str(campaign.id),
-            "X-Recipient-ID": str(recipient.id),
-            "List-Unsubscribe": f"<{context['unsubscribe_url']}>",
-        }
-
-        email.send(fail_silently=False)
-
-        # Update recipient status
-        recipient.mark_sent()
-
-        # Update campaign stats
-        campaign.total_sent += 1
-        campaign.save()
-
-        logger.info(f"Sent campaign email to {recipient.email}")
-
     except CampaignRecipient.DoesNotExist:
         logger.error(f"Recipient {recipient_id} not found")
+        return
+
+    try:
+        send_batch(recipient.campaign, [recipient.id])
     except Exception as e:
         # SECURITY: Log full error details but don't expose to users
-        # Exception details could contain sensitive info (DB queries, file paths, etc.)
         logger.error(f"Error sending email to recipient {recipient_id}: {str(e)}")
-        try:
-            recipient = CampaignRecipient.objects.get(id=recipient_id)
-            recipient.status = "failed"
-            # Store generic message for user, not the actual exception
-            recipient.error_message = "Failed to send email. Please contact support."
-            recipient.save()
-        except Exception:
-            pass
+        CampaignRecipient.objects.filter(id=recipient_id, status="pending").update(
+            status="failed", error_message=FAILED_MESSAGE
+        )
 
 
 @shared_task
@@ -315,9 +243,14 @@ def update_campaign_stats(campaign_id: str):
     """
     Update denormalized campaign statistics.
     """
+    from django.core.cache import cache
     from django.db.models import Count, Q
 
     from .models import Campaign
+    from .tracking import STATS_PENDING_KEY
+
+    # Tracking events arriving from now on schedule a fresh recomputation
+    cache.delete(STATS_PENDING_KEY.format(campaign_id))
 
     try:
         campaign = Campaign.objects.get(id=campaign_id)
@@ -356,61 +289,21 @@ def update_campaign_stats(campaign_id: str):
         logger.error(f"Campaign {campaign_id} not found")
 
 
-# Helper functions
-
-
-def render_template_string(template_string, context):
-    """Render a template string with the given context."""
-    if not template_string:
-        return ""
-
-    # Simple variable replacement for {{variable.path}}
-    pattern = r"\{\{\s*([\w.]+)\s*\}\}"
-
-    def replace_var(match):
-        var_path = match.group(1)
-        parts = var_path.split(".")
-        value = context
-        for part in parts:
-            if isinstance(value, dict):
-                value = value.get(part, "")
-            else:
-                value = getattr(value, part, "")
-        return str(value) if value else ""
-
-    return re.sub(pattern, replace_var, template_string)
-
-
-def strip_html_tags(html):
-    """Remove HTML tags from a string."""
-    clean = re.compile("<.*?>")
-    return re.sub(clean, "", html)
-
-
-def add_link_tracking(html_content, campaign, recipient):
-    """Replace links with tracking URLs."""
-    from .models import CampaignLink
-
-    # Find all links
-    link_pattern = r'href=["\']([^"\']+)["\']'
-
-    def replace_link(match):
-        original_url = match.group(1)
-
-        # Skip unsubscribe and tracking URLs
-        if "unsubscribe" in original_url or "track" in original_url:
-            return match.group(0)
-
-        # Get or create link tracking
-        link, created = CampaignLink.objects.get_or_create(
-            campaign=campaign, original_url=original_url
-        )
+@shared_task
+def drain_tracking_events():
+    """
+    Apply buffered open/click tracking events in bulk.
+    Runs every 10 seconds via Celery Beat.
+    """
+    from .tracking import drain
 
-        tracking_url = f"{settings.API_URL}/api/v1/marketing/track/click/{recipient.tracking_token}/{link.id}/"
+    applied = drain()
+    if applied:
+        logger.info(f"Applied {applied} tracking events")
+    return applied
 
-        return f'href="{tracking_url}"'
 
-    return re.sub(link_pattern, replace_link, html_content)
+# Helper functions
 
 
 def send_automation_email(enrollment, step):
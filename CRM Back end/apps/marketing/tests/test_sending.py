@@ -0,0 +1,171 @@
+import smtplib
+from unittest.mock import patch
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+from apps.marketing.models import (
+    Campaign,
+    CampaignLink,
+    CampaignRecipient,
+    EmailList,
+    EmailListSubscriber,
+)
+from apps.marketing.sending import (
+    CompiledTemplate,
+    ConnectionLost,
+    build_recipients,
+    render_template_string,
+    send_batch,
+)
+from tests.factories import ContactFactory
+
+
+def _campaign(**kwargs):
+    email_list = EmailList.objects.create(name="Clients")
+    defaults = {
+        "name": "Spring newsletter",
+        "subject": "Hello {{contact.first_name}}",
+        "html_content": (
+            '<html><body><a href="https://example.com/offer">Offer</a> '
+            '<a href="{{unsubscribe_url}}">Unsubscribe</a></body></html>'
+        ),
+    }
+    defaults.update(kwargs)
+    campaign = Campaign.objects.create(**defaults)
+    campaign.email_lists.add(email_list)
+    return campaign, email_list
+
+
+def _subscribe(email_list, count, **contact_kwargs):
+    contacts = [ContactFactory(**contact_kwargs) for _ in range(count)]
+    for contact in contacts:
+        EmailListSubscriber.objects.create(email_list=email_list, contact=contact)
+    return contacts
+
+
+class TestCompiledTemplate:
+    def test_renders_nested_values(self):
+        template = CompiledTemplate(
+            "Hi {{ contact.first_name }}, from {{company_name}}"
+        )
+        context = {"contact": {"first_name": "Ana"}, "company_name": "Acme"}
+        assert template.render(context) == "Hi Ana, from Acme"
+
+    def test_missing_values_render_empty(self):
+        assert render_template_string("[{{contact.nope}}]", {"contact": {}}) == "[]"
+
+
+@pytest.mark.django_db
+class TestBuildRecipients:
+    def test_creates_opted_in_subscribers_once(self):
+        campaign, email_list = _campaign()
+        _subscribe(email_list, 3)
+        _subscribe(email_list, 1, email_opt_in="opt_out")
+        unsubscribed = ContactFactory()
+        EmailListSubscriber.objects.create(
+            email_list=email_list, contact=unsubscribed, is_subscribed=False
+        )
+
+        assert build_recipients(campaign) == 3
+        assert build_recipients(campaign) == 3
+        assert campaign.recipients.filter(status="pending").count() == 3
+
+    def test_assigns_ab_variants(self):
+        campaign, email_list = _campaign(is_ab_test=True, ab_test_split=100)
+        _subscribe(email_list, 2)
+
+        build_recipients(campaign)
+
+        assert set(campaign.recipients.values_list("ab_variant", flat=True)) == {"A"}
+
+
+@pytest.mark.django_db
+class TestSendBatch:
+    def _prepare(self, count=3, **kwargs):
+        campaign, email_list = _campaign(status="sending", **kwargs)
+        _subscribe(email_list, count)
+        build_recipients(campaign)
+        return campaign, list(campaign.recipients.values_list("id", flat=True))
+
+    def test_sends_personalized_messages_and_records_status(self):
+        campaign, ids = self._prepare()
+
+        assert send_batch(campaign, ids) == (3, 0)
+
+        assert len(mail.outbox) == 3
+        recipient = CampaignRecipient.objects.select_related("contact").first()
+        message = next(m for m in mail.outbox if m.to == [recipient.email])
+        assert message.subject == f"Hello {recipient.contact.first_name}"
+        assert message.extra_headers["X-Recipient-ID"] == str(recipient.id)
+        html = message.alternatives[0][0]
+        assert f"/track/open/{recipient.tracking_token}/" in html
+        assert f"/unsubscribe/{recipient.tracking_token}" in html
+
+        assert not campaign.recipients.exclude(status="sent").exists()
+        campaign.refresh_from_db()
+        assert campaign.total_sent == 3
+
+    def test_creates_tracking_links_once_per_campaign(self):
+        campaign, ids = self._prepare()
+
+        send_batch(campaign, ids[:1])
+        send_batch(campaign, ids[1:])
+
+        link = CampaignLink.objects.get(campaign=campaign)
+        assert link.original_url == "https://example.com/offer"
+        for message in mail.outbox:
+            assert f"/{link.id}/" in message.alternatives[0][0]
+            assert "https://example.com/offer" not in message.alternatives[0][0]
+
+    def test_uses_one_connection_per_batch(self):
+        campaign, ids = self._prepare()
+
+        with patch(
+            "apps.marketing.sending.get_connection", wraps=mail.get_connection
+        ) as get:
+            send_batch(campaign, ids)
+
+        assert get.call_count == 1
+
+    def test_failed_sends_are_recorded(self):
+        campaign, ids = self._prepare(count=2)
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=RuntimeError("boom"),
+        ):
+            assert send_batch(campaign, ids) == (0, 2)
+
+        assert campaign.recipients.filter(status="failed").count() == 2
+        campaign.refresh_from_db()
+        assert campaign.total_sent == 0
+
+    def test_failed_reconnect_leaves_rest_pending(self):
+        campaign, ids = self._prepare(count=3)
+        real_send = EmailBackend.send_messages
+        calls = []
+
+        def send_messages(self, messages):
+            calls.append(messages)
+            if len(calls) == 1:
+                return real_send(self, messages)
+            raise smtplib.SMTPServerDisconnected("gone")
+
+        with (
+            patch.object(EmailBackend, "send_messages", send_messages),
+            patch.object(EmailBackend, "open", side_effect=[None, OSError("refused")]),
+        ):
+            with pytest.raises(ConnectionLost):
+                send_batch(campaign, ids)
+
+        assert campaign.recipients.filter(status="sent").count() == 1
+        assert campaign.recipients.filter(status="pending").count() == 2
+        assert not campaign.recipients.filter(status="failed").exists()
+
+    def test_skips_recipients_already_sent(self):
+        campaign, ids = self._prepare(count=2)
+        CampaignRecipient.objects.filter(pk=ids[0]).update(status="sent")
+
+        assert send_batch(campaign, ids) == (1, 0)
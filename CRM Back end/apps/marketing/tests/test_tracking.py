@@ -0,0 +1,162 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.marketing import tracking
+from apps.marketing.models import (
+    Campaign,
+    CampaignLink,
+    CampaignLinkClick,
+    CampaignRecipient,
+)
+from apps.users.services.ip_rules import get_ip_rules
+from tests.factories import ContactFactory
+
+
+@pytest.fixture(autouse=True)
+def _buffer():
+    tracking._buffer = tracking.MemoryBuffer()
+    yield tracking._buffer
+    tracking._buffer = None
+
+
+def _recipient(campaign=None, **kwargs):
+    campaign = campaign or Campaign.objects.create(
+        name="Newsletter", subject="Hi", html_content="<p>Hi</p>", status="sent"
+    )
+    contact = ContactFactory()
+    return CampaignRecipient.objects.create(
+        campaign=campaign, contact=contact, email=contact.email, status="sent", **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestTrackingEndpoints:
+    def test_pixel_only_buffers(self, api_client, _buffer):
+        recipient = _recipient()
+        get_ip_rules()  # per-process, loaded by the first request
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(
+                f"/api/v1/marketing/track/open/{recipient.tracking_token}/"
+            )
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/gif"
+        assert len(queries) == 0
+        assert len(_buffer.read(10)) == 1
+        recipient.refresh_from_db()
+        assert recipient.open_count == 0
+
+    def test_click_redirects_and_buffers(self, api_client, _buffer):
+        recipient = _recipient()
+        link = CampaignLink.objects.create(
+            campaign=recipient.campaign, original_url="https://example.com/a"
+        )
+
+        response = api_client.get(
+            f"/api/v1/marketing/track/click/{recipient.tracking_token}/{link.id}/"
+        )
+
+        assert response.status_code == 302
+        assert response["Location"] == "https://example.com/a"
+        assert not CampaignLinkClick.objects.exists()
+        assert _buffer.read(10)[0][1]["link"] == str(link.id)
+
+    def test_click_on_other_campaign_link_is_rejected(self, api_client):
+        recipient = _recipient()
+        other = _recipient()
+        link = CampaignLink.objects.create(
+            campaign=other.campaign, original_url="https://example.com/a"
+        )
+
+        response = api_client.get(
+            f"/api/v1/marketing/track/click/{recipient.tracking_token}/{link.id}/"
+        )
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestDrain:
+    def test_applies_counters_in_bulk(self):
+        recipient = _recipient()
+        other = _recipient(campaign=recipient.campaign)
+        link = CampaignLink.objects.create(
+            campaign=recipient.campaign, original_url="https://example.com/a"
+        )
+        tracking.record_open(recipient.tracking_token)
+        tracking.record_open(recipient.tracking_token)
+        tracking.record_open(other.tracking_token)
+        tracking.record_click(recipient.tracking_token, link.id)
+        tracking.record_click(recipient.tracking_token, link.id)
+        tracking.record_open("unknown-token")
+
+        assert tracking.drain() == 6
+
+        recipient.refresh_from_db()
+        other.refresh_from_db()
+        link.refresh_from_db()
+        assert (recipient.open_count, recipient.click_count) == (2, 2)
+        assert recipient.status == "clicked"
+        assert recipient.opened_at and recipient.clicked_at
+        assert (other.open_count, other.status) == (1, "opened")
+        assert (link.total_clicks, link.unique_clicks) == (2, 1)
+        assert CampaignLinkClick.objects.filter(link=link).count() == 2
+        assert tracking.get_buffer().read(10) == []
+
+    def test_open_does_not_downgrade_clicked(self):
+        recipient = _recipient()
+        CampaignRecipient.objects.filter(pk=recipient.pk).update(status="clicked")
+        tracking.record_open(recipient.tracking_token)
+
+        tracking.drain()
+
+        recipient.refresh_from_db()
+        assert recipient.status == "clicked"
+
+    def test_unique_clicks_count_across_batches(self):
+        recipient = _recipient()
+        link = CampaignLink.objects.create(
+            campaign=recipient.campaign, original_url="https://example.com/a"
+        )
+        tracking.record_click(recipient.tracking_token, link.id)
+        tracking.drain()
+        tracking.record_click(recipient.tracking_token, link.id)
+        tracking.drain()
+
+        link.refresh_from_db()
+        assert (link.total_clicks, link.unique_clicks) == (2, 1)
+
+    def test_stats_recomputed_once_per_interval(self):
+        recipient = _recipient()
+
+        with patch(
+            "apps.marketing.tasks.update_campaign_stats.apply_async"
+        ) as apply_async:
+            tracking.record_open(recipient.tracking_token)
+            tracking.drain()
+            tracking.record_open(recipient.tracking_token)
+            tracking.drain()
+
+        assert apply_async.call_count == 1
+        cache.delete(tracking.STATS_PENDING_KEY.format(recipient.campaign_id))
+
+    def test_unbuffered_event_schedules_stats(self, _buffer):
+        recipient = _recipient()
+
+        with (
+            patch.object(_buffer, "append", side_effect=ConnectionError),
+            patch(
+                "apps.marketing.tasks.update_campaign_stats.apply_async"
+            ) as apply_async,
+        ):
+            tracking.record_open(recipient.tracking_token)
+
+        recipient.refresh_from_db()
+        assert recipient.open_count == 1
+        apply_async.assert_called_once()
+        cache.delete(tracking.STATS_PENDING_KEY.format(recipient.campaign_id))
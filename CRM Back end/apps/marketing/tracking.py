@@ -0,0 +1,366 @@
+"""
+Buffered ingestion of campaign open/click tracking events.
+
+The public tracking endpoints only append an event to a buffer and return;
+the pixel endpoint touches no database table at all.  The buffer is a
+Redis stream (``MARKETING_TRACKING_BUFFER_URL``), or a process-local list
+when that setting is empty (tests).
+
+``drain_tracking_events`` (Celery beat, every few seconds) reads the
+buffer in batches and applies each batch with a handful of statements:
+one ``bulk_create`` for ``CampaignLinkClick`` rows and ``Case``/``F()``
+UPDATEs for recipient and link counters, so concurrent hits never lose
+increments.  Campaign stats are then recomputed at most once per campaign
+per ``STATS_INTERVAL``.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Case,
+    CharField,
+    DateTimeField,
+    F,
+    IntegerField,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "marketing:tracking_events"
+# Approximate cap on buffered events if the consumer falls behind
+STREAM_MAXLEN = 1_000_000
+
+# Events applied per transaction
+DRAIN_BATCH_SIZE = 1000
+# Batches a single drain run may apply before yielding to the next run
+DRAIN_MAX_BATCHES = 50
+DRAIN_LOCK_KEY = "marketing:tracking_drain_lock"
+DRAIN_LOCK_TIMEOUT = 120
+
+# Seconds between campaign stats recomputations triggered by tracking
+STATS_INTERVAL = 60
+STATS_PENDING_KEY = "marketing:stats_pending:{}"
+
+# Recipients / links updated per UPDATE statement
+UPDATE_CHUNK_SIZE = 500
+
+OPEN = "open"
+CLICK = "click"
+
+
+# ---------------------------------------------------------------------------
+# Buffers
+# ---------------------------------------------------------------------------
+
+
+class RedisStreamBuffer:
+    """Events in a Redis stream, consumed by a single (locked) drain run."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def append(self, event):
+        self.client.xadd(
+            STREAM_KEY,
+            {"event": json.dumps(event)},
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    def read(self, count):
+        return [
+            (entry_id, json.loads(fields[b"event"]))
+            for entry_id, fields in self.client.xrange(STREAM_KEY, count=count)
+        ]
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.client.xdel(STREAM_KEY, *entry_ids)
+
+
+class MemoryBuffer:
+    """Process-local buffer, used when no Redis URL is configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._next_id = 0
+
+    def append(self, event):
+        with self._lock:
+            self._next_id += 1
+            self._events.append((self._next_id, event))
+
+    def read(self, count):
+        with self._lock:
+            return list(self._events[:count])
+
+    def ack(self, entry_ids):
+        acked = set(entry_ids)
+        with self._lock:
+            self._events = [e for e in self._events if e[0] not in acked]
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = settings.MARKETING_TRACKING_BUFFER_URL
+                _buffer = RedisStreamBuffer(url) if url else MemoryBuffer()
+    return _buffer
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+
+def record_event(event):
+    """
+    Buffer a tracking event.  If the buffer is unreachable the event is
+    applied directly, and its campaign's stats refresh scheduled as a
+    drain would, so an outage costs latency rather than data.
+    """
+    event.setdefault("at", time.time())
+    try:
+        get_buffer().append(event)
+    except Exception as e:
+        logger.warning(f"Tracking buffer unavailable, applying event directly: {e}")
+        schedule_campaign_stats(apply_events([event]))
+
+
+def record_open(tracking_token):
+    record_event({"type": OPEN, "token": tracking_token})
+
+
+def record_click(tracking_token, link_id, ip_address=None, user_agent=""):
+    record_event(
+        {
+            "type": CLICK,
+            "token": tracking_token,
+            "link": str(link_id),
+            "ip": ip_address,
+            "ua": user_agent,
+        }
+    )
+
+
+# ---------------------------------------------------------------------------
+# Applying
+# ---------------------------------------------------------------------------
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _per_pk(mapping, default, output_field):
+    """``Case`` selecting ``mapping[pk]`` for each row."""
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in mapping.items()],
+        default=default,
+        output_field=output_field,
+    )
+
+
+def _chunks(items, size=UPDATE_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _update_recipients(opens, clicks, first_open, first_click):
+    from .models import CampaignRecipient
+
+    Status = CampaignRecipient.Status
+    for chunk in _chunks(set(opens) | set(clicks)):
+        chunk_opens = {pk: opens[pk] for pk in chunk if pk in opens}
+        chunk_clicks = {pk: clicks[pk] for pk in chunk if pk in clicks}
+        CampaignRecipient.objects.filter(pk__in=chunk).update(
+            open_count=F("open_count") + _per_pk(chunk_opens, Value(0), IntegerField()),
+            click_count=F("click_count")
+            + _per_pk(chunk_clicks, Value(0), IntegerField()),
+            opened_at=Coalesce(
+                "opened_at",
+                _per_pk(
+                    {pk: first_open[pk] for pk in chunk_opens},
+                    Value(None),
+                    DateTimeField(),
+                ),
+            ),
+            clicked_at=Coalesce(
+                "clicked_at",
+                _per_pk(
+                    {pk: first_click[pk] for pk in chunk_clicks},
+                    Value(None),
+                    DateTimeField(),
+                ),
+            ),
+            # Same transitions as mark_opened / mark_clicked
+            status=Case(
+                When(pk__in=list(chunk_clicks), then=Value(Status.CLICKED)),
+                When(status=Status.CLICKED, then=Value(Status.CLICKED)),
+                default=Value(Status.OPENED),
+                output_field=CharField(),
+            ),
+        )
+
+
+def _apply_clicks(clicks, recipients):
+    """Insert click rows and bump total/unique link counters."""
+    from .models import CampaignLink, CampaignLinkClick
+
+    links = dict(
+        CampaignLink.objects.filter(
+            pk__in={event["link"] for event, _pk in clicks}
+        ).values_list("pk", "campaign_id")
+    )
+    rows = [
+        (event, recipient_pk)
+        for event, recipient_pk in clicks
+        if links.get(_as_uuid(event["link"])) == recipients[recipient_pk]
+    ]
+    if not rows:
+        return
+
+    pairs = {(_as_uuid(event["link"]), pk) for event, pk in rows}
+    seen = set(
+        CampaignLinkClick.objects.filter(
+            link_id__in={link for link, _pk in pairs},
+            recipient_id__in={pk for _link, pk in pairs},
+        ).values_list("link_id", "recipient_id")
+    )
+
+    total, unique = defaultdict(int), defaultdict(int)
+    objs = []
+    for event, recipient_pk in rows:
+        link_pk = _as_uuid(event["link"])
+        total[link_pk] += 1
+        if (link_pk, recipient_pk) not in seen:
+            seen.add((link_pk, recipient_pk))
+            unique[link_pk] += 1
+        objs.append(
+            CampaignLinkClick(
+                link_id=link_pk,
+                recipient_id=recipient_pk,
+                ip_address=event.get("ip") or None,
+                user_agent=event.get("ua") or "",
+            )
+        )
+    CampaignLinkClick.objects.bulk_create(objs)
+
+    for chunk in _chunks(total):
+        CampaignLink.objects.filter(pk__in=chunk).update(
+            total_clicks=F("total_clicks")
+            + _per_pk({pk: total[pk] for pk in chunk}, Value(0), IntegerField()),
+            unique_clicks=F("unique_clicks")
+            + _per_pk({pk: unique[pk] for pk in chunk}, Value(0), IntegerField()),
+        )
+
+
+def apply_events(events):
+    """
+    Apply a batch of buffered events to the database.
+
+    Returns the ids of the campaigns whose stats changed.  Events with an
+    unknown tracking token or a link from another campaign are dropped.
+    """
+    from .models import CampaignRecipient
+
+    tokens = {event.get("token") for event in events} - {None}
+    if not tokens:
+        return set()
+    recipients_by_token = {
+        token: (pk, campaign_id)
+        for token, pk, campaign_id in CampaignRecipient.objects.filter(
+            tracking_token__in=tokens
+        ).values_list("tracking_token", "pk", "campaign_id")
+    }
+
+    opens, clicks = defaultdict(int), defaultdict(int)
+    first_open, first_click = {}, {}
+    click_rows, campaigns = [], {}
+    for event in events:
+        match = recipients_by_token.get(event.get("token"))
+        if match is None:
+            continue
+        pk, campaign_id = match
+        at = _timestamp(event.get("at", time.time()))
+        campaigns[pk] = campaign_id
+        if event.get("type") == CLICK:
+            clicks[pk] += 1
+            first_click[pk] = min(first_click.get(pk, at), at)
+            if _as_uuid(event.get("link")) is not None:
+                click_rows.append((event, pk))
+        else:
+            opens[pk] += 1
+            first_open[pk] = min(first_open.get(pk, at), at)
+
+    if not campaigns:
+        return set()
+    with transaction.atomic():
+        _update_recipients(opens, clicks, first_open, first_click)
+        if click_rows:
+            _apply_clicks(click_rows, campaigns)
+    return set(campaigns.values())
+
+
+def schedule_campaign_stats(campaign_ids):
+    """Queue ``update_campaign_stats`` at most once per campaign per interval."""
+    from .tasks import update_campaign_stats
+
+    for campaign_id in campaign_ids:
+        if cache.add(STATS_PENDING_KEY.format(campaign_id), 1, STATS_INTERVAL * 2):
+            update_campaign_stats.apply_async(
+                args=[str(campaign_id)], countdown=STATS_INTERVAL
+            )
+
+
+def drain():
+    """
+    Apply buffered events until the buffer is empty or
+    ``DRAIN_MAX_BATCHES`` batches were applied.  Returns the event count.
+    """
+    if not cache.add(DRAIN_LOCK_KEY, 1, DRAIN_LOCK_TIMEOUT):
+        return 0
+    buffer = get_buffer()
+    applied = 0
+    try:
+        for _ in range(DRAIN_MAX_BATCHES):
+            entries = buffer.read(DRAIN_BATCH_SIZE)
+            if not entries:
+                break
+            campaign_ids = apply_events([event for _entry_id, event in entries])
+            buffer.ack([entry_id for entry_id, _event in entries])
+            schedule_campaign_stats(campaign_ids)
+            applied += len(entries)
+    finally:
+        cache.delete(DRAIN_LOCK_KEY)
+    return applied
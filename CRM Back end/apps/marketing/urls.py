@@ -26,16 +26,16 @@ urlpatterns = [
     path("analytics/", CampaignAnalyticsView.as_view(), name="campaign-analytics"),
     # Tracking endpoints (public)
     path(
-        "track/open/<uuid:tracking_token>/", TrackOpenView.as_view(), name="track-open"
+        "track/open/<str:tracking_token>/", TrackOpenView.as_view(), name="track-open"
     ),
     path(
-        "track/click/<uuid:tracking_token>/<uuid:link_id>/",
+        "track/click/<str:tracking_token>/<uuid:link_id>/",
         TrackClickView.as_view(),
         name="track-click",
     ),
     # Unsubscribe (public)
     path(
-        "unsubscribe/<uuid:tracking_token>/",
+        "unsubscribe/<str:tracking_token>/",
         UnsubscribeView.as_view(),
         name="unsubscribe",
     ),
@@ -18,7 +18,6 @@ from .models import (
     AutomationStep,
     Campaign,
     CampaignLink,
-    CampaignLinkClick,
     CampaignRecipient,
     CampaignTemplate,
     EmailList,
@@ -39,6 +38,7 @@ from .serializers import (
     EmailListSubscriberSerializer,
 )
 from .tasks import send_campaign, update_campaign_stats
+from .tracking import record_click, record_open
 
 
 class TrackingRateThrottle(AnonRateThrottle):
@@ -268,10 +268,9 @@ class CampaignViewSet(viewsets.ModelViewSet):
         campaign.save()
 
         # Resume sending pending recipients
-        from .tasks import send_campaign_email
+        from .sending import dispatch_pending
 
-        for recipient in campaign.recipients.filter(status="pending"):
-            send_campaign_email.delay(str(recipient.id))
+        dispatch_pending(campaign)
 
         return Response({"message": "Campaign resumed"})
 
@@ -426,7 +425,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
 
         from django.core.mail import EmailMultiAlternatives
 
-        from .tasks import render_template_string, strip_html_tags
+        from .sending import render_template_string, strip_html_tags
 
         context = {
             "contact": {
@@ -668,15 +667,8 @@ class TrackOpenView(APIView):
     throttle_classes = [TrackingRateThrottle]
 
     def get(self, request, tracking_token):
-        try:
-            recipient = CampaignRecipient.objects.get(tracking_token=tracking_token)
-            recipient.mark_opened()
-
-            # Update campaign stats
-            update_campaign_stats.delay(str(recipient.campaign_id))
-
-        except CampaignRecipient.DoesNotExist:
-            pass
+        # Buffered; applied in bulk by drain_tracking_events
+        record_open(tracking_token)
 
         # Return 1x1 transparent GIF
         gif = b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3b"
@@ -692,42 +684,26 @@ class TrackClickView(APIView):
     throttle_classes = [TrackingRateThrottle]
 
     def get(self, request, tracking_token, link_id):
-        try:
-            recipient = CampaignRecipient.objects.get(tracking_token=tracking_token)
-            link = CampaignLink.objects.get(id=link_id, campaign=recipient.campaign)
-
-            # Record click
-            recipient.mark_clicked()
-
-            # Update link stats
-            link.total_clicks += 1
-
-            # Check if unique click
-            existing_click = CampaignLinkClick.objects.filter(
-                link=link, recipient=recipient
-            ).exists()
-
-            if not existing_click:
-                link.unique_clicks += 1
-
-            link.save()
-
-            # Log click details
-            CampaignLinkClick.objects.create(
-                link=link,
-                recipient=recipient,
-                ip_address=request.META.get("REMOTE_ADDR"),
-                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        original_url = (
+            CampaignLink.objects.filter(
+                id=link_id, campaign__recipients__tracking_token=tracking_token
             )
+            .values_list("original_url", flat=True)
+            .first()
+        )
+        if original_url is None:
+            return Response({"error": "Invalid tracking link"}, status=404)
 
-            # Update campaign stats
-            update_campaign_stats.delay(str(recipient.campaign_id))
-
-            # Redirect to original URL
-            return redirect(link.original_url)
+        # Buffered; applied in bulk by drain_tracking_events
+        record_click(
+            tracking_token,
+            link_id,
+            ip_address=request.META.get("REMOTE_ADDR"),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        )
 
-        except (CampaignRecipient.DoesNotExist, CampaignLink.DoesNotExist):
-            return Response({"error": "Invalid tracking link"}, status=404)
+        # Redirect to original URL
+        return redirect(original_url)
 
 
 class UnsubscribeView(APIView):
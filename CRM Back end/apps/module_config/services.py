@@ -201,25 +201,12 @@ def _validate_field_type(field_def, value):
 def is_module_active(module_name: str) -> bool:
     """
     Check if a CRM module is active.
-    Cached with a 60-second TTL.
+    Answered from the in-process permission matrix, which is reloaded
+    whenever a CRMModule changes.  Unregistered modules count as active.
     """
-    cache_key = f"module_active_{module_name}"
-    result = cache.get(cache_key)
-    if result is not None:
-        return result
-
-    try:
-        module = CRMModule.objects.only("is_active").get(name=module_name)
-        active = module.is_active
-    except CRMModule.DoesNotExist:
-        # If module isn't registered, treat as active (backward compat)
-        active = True
-    except Exception:
-        # Table may not exist yet (before migrations). Treat as active.
-        active = True
+    from apps.users.services.permission_matrix import get_permission_matrix
 
-    cache.set(cache_key, active, timeout=60)
-    return active
+    return get_permission_matrix().is_module_active(module_name)
 
 
 def get_picklist_values(picklist_name: str, module_name: str = None) -> list:
@@ -67,9 +67,8 @@ class CRMModuleViewSet(viewsets.ModelViewSet):
         """Toggle module active/inactive status."""
         module = self.get_object()
         module.is_active = not module.is_active
+        # The post_save signal reloads the permission matrix
         module.save(update_fields=["is_active", "updated_at"])
-        # Invalidate cache
-        cache.delete(f"module_active_{module.name}")
         return Response(
             CRMModuleDetailSerializer(module).data,
             status=status.HTTP_200_OK,
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def backfill_reminder_keys(apps, schema_editor):
+    """Key the reminders already sent so they are not sent again."""
+    Notification = apps.get_model("notifications", "Notification")
+    seen = set()
+    updated = []
+    reminders = (
+        Notification.objects.filter(
+            notification_type="appointment_reminder",
+            related_object_id__isnull=False,
+        )
+        .order_by("created_at")
+        .only("id", "recipient_id", "related_object_id")
+    )
+    for notification in reminders.iterator():
+        key = (
+            f"appointment_reminder:{notification.related_object_id}:"
+            f"{notification.recipient_id}"
+        )
+        if key in seen:
+            continue
+        seen.add(key)
+        notification.idempotency_key = key
+        updated.append(notification)
+    Notification.objects.bulk_update(updated, ["idempotency_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0004_alter_notification_notification_type_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, default=None, max_length=255, null=True, unique=True
+            ),
+        ),
+        migrations.RunPython(backfill_reminder_keys, migrations.RunPython.noop),
+    ]
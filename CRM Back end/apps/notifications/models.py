@@ -53,6 +53,12 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False, db_index=True)
     email_sent = models.BooleanField(default=False)
 
+    # Set by senders that must not notify twice (e.g. one reminder per
+    # appointment); duplicates are skipped on insert
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, default=None, unique=True
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
@@ -1,17 +1,39 @@
 """
 Notification creation service.
 
-All other apps should call ``create_notification()`` instead of importing the
-model directly — this function handles preference checks and optional email
-dispatch.
+All other apps should call ``create_notification()`` — or
+``create_notifications_bulk()`` to notify many users at once — instead of
+importing the model directly.  These functions handle preference checks,
+de-duplication, the unread counters and optional email dispatch.
+
+Preferences are read per user from the cache (``preference_map()``); one
+query loads the users not cached yet, and changing a preference drops
+the user's entry.  The bell's unread count is a cached counter that is
+adjusted as notifications are created and read, and recounted from the
+database whenever it is missing or expired.
 """
 
 import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 
 from apps.notifications.models import Notification, NotificationPreference
 
 logger = logging.getLogger(__name__)
 
+_PREFERENCES_CACHE_KEY = "notification_preferences:{user}"
+_UNREAD_CACHE_KEY = "notification_unread:{user}"
+
+# ``(in_app_enabled, email_enabled)`` for types without a preference row
+DEFAULT_DELIVERY = (True, False)
+
+
+def _user_id(user):
+    return str(getattr(user, "pk", user))
+
 
 def create_notification(
     recipient,
@@ -21,6 +43,7 @@ def create_notification(
     severity="info",
     related_object=None,
     action_url="",
+    idempotency_key=None,
 ):
     """
     Create an in-app notification for *recipient* and optionally queue an email.
@@ -41,63 +64,201 @@ def create_notification(
         Any Django model with ``id`` — stored as generic reference.
     action_url : str, optional
         Frontend route the user is navigated to when clicking the notification.
+    idempotency_key : str, optional
+        Unique key of this notification; if one with the same key exists,
+        nothing is created.
 
     Returns
     -------
     Notification or None
         The created notification, or ``None`` if the user has disabled in-app
-        delivery for this type.
+        and email delivery for this type or the key was already used.
+    """
+    created = create_notifications_bulk(
+        [
+            (
+                recipient,
+                notification_type,
+                {
+                    "title": title,
+                    "message": message,
+                    "severity": severity,
+                    "related_object": related_object,
+                    "action_url": action_url,
+                    "idempotency_key": idempotency_key,
+                },
+            )
+        ]
+    )
+    return created[0] if created else None
+
+
+def create_notifications_bulk(notifications):
+    """
+    Create many notifications with one insert.
+
+    Parameters
+    ----------
+    notifications : iterable of ``(recipient, notification_type, payload)``
+        *recipient* is a User or a user id; *payload* is a dict of the
+        remaining ``create_notification()`` arguments (``title`` is
+        required).  Instead of ``related_object`` it may give
+        ``related_object_type`` and ``related_object_id``.
+
+    Returns
+    -------
+    list of Notification
+        The notifications created, in input order.  Entries the recipient
+        has disabled, or whose ``idempotency_key`` already exists, are left
+        out.  Users who only want email get a read notification to track
+        it; all emails are queued as one task once the transaction commits.
     """
-    # Check user preferences
-    pref = NotificationPreference.objects.filter(
-        user=recipient,
-        notification_type=notification_type,
-    ).first()
-
-    # Default: in-app enabled, email disabled
-    in_app_enabled = pref.in_app_enabled if pref else True
-    email_enabled = pref.email_enabled if pref else False
-
-    if not in_app_enabled and not email_enabled:
-        return None
-
-    related_object_type = ""
-    related_object_id = None
-    if related_object is not None:
-        related_object_type = related_object.__class__.__name__.lower()
-        related_object_id = related_object.pk
-
-    notification = None
-    if in_app_enabled:
-        notification = Notification.objects.create(
-            recipient=recipient,
+    notifications = list(notifications)
+    if not notifications:
+        return []
+
+    preferences = preference_map({_user_id(r) for r, _, _ in notifications})
+    rows = []
+    keys = set()
+    for recipient, notification_type, payload in notifications:
+        user_id = _user_id(recipient)
+        in_app_enabled, email_enabled = preferences[user_id].get(
+            notification_type, DEFAULT_DELIVERY
+        )
+        if not in_app_enabled and not email_enabled:
+            continue
+
+        key = payload.get("idempotency_key")
+        if key:
+            if key in keys:
+                continue
+            keys.add(key)
+
+        related_object = payload.get("related_object")
+        if related_object is not None:
+            related_object_type = related_object.__class__.__name__.lower()
+            related_object_id = related_object.pk
+        else:
+            related_object_type = payload.get("related_object_type", "")
+            related_object_id = payload.get("related_object_id")
+
+        notification = Notification(
             notification_type=notification_type,
-            title=title,
-            message=message,
-            severity=severity,
+            title=payload["title"],
+            message=payload.get("message", ""),
+            severity=payload.get("severity", "info"),
             related_object_type=related_object_type,
             related_object_id=related_object_id,
-            action_url=action_url,
+            action_url=payload.get("action_url", ""),
+            is_read=not in_app_enabled,  # email only: don't show in-app
+            idempotency_key=key or None,
         )
+        if hasattr(recipient, "pk"):
+            notification.recipient = recipient
+        else:
+            notification.recipient_id = recipient
+        rows.append((notification, email_enabled))
 
-    if email_enabled:
-        from apps.notifications.tasks import send_notification_email
+    if not rows:
+        return []
 
-        if notification:
-            send_notification_email.delay(str(notification.id))
-        else:
-            # Create a notification just for email tracking
-            notification = Notification.objects.create(
-                recipient=recipient,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                severity=severity,
-                related_object_type=related_object_type,
-                related_object_id=related_object_id,
-                action_url=action_url,
-                is_read=True,  # don't show in-app
+    Notification.objects.bulk_create([n for n, _ in rows], ignore_conflicts=bool(keys))
+    if keys:
+        # Rows whose key was already taken were not inserted
+        inserted = set(
+            Notification.objects.filter(pk__in=[n.pk for n, _ in rows]).values_list(
+                "pk", flat=True
             )
-            send_notification_email.delay(str(notification.id))
+        )
+        rows = [(n, email) for n, email in rows if n.pk in inserted]
+
+    unread = Counter(_user_id(n.recipient_id) for n, _ in rows if not n.is_read)
+    if unread:
+        transaction.on_commit(lambda: adjust_unread_counts(unread))
+
+    email_ids = [str(n.pk) for n, email_enabled in rows if email_enabled]
+    if email_ids:
+        from apps.notifications.tasks import send_notification_emails
+
+        transaction.on_commit(lambda: send_notification_emails.delay(email_ids))
+
+    return [n for n, _ in rows]
+
+
+# ---------------------------------------------------------------------------
+# Preferences
+# ---------------------------------------------------------------------------
+
+
+def preference_map(user_ids):
+    """
+    ``{user_id: {notification_type: (in_app_enabled, email_enabled)}}`` of
+    *user_ids* (as strings); types without a preference row are absent.
+    """
+    keys = {
+        _PREFERENCES_CACHE_KEY.format(user=_user_id(user_id)): _user_id(user_id)
+        for user_id in user_ids
+    }
+    cached = cache.get_many(list(keys))
+    preferences = {keys[key]: value for key, value in cached.items()}
+
+    missing = [user_id for key, user_id in keys.items() if key not in cached]
+    if missing:
+        loaded = {user_id: {} for user_id in missing}
+        rows = NotificationPreference.objects.filter(user_id__in=missing).values_list(
+            "user_id", "notification_type", "in_app_enabled", "email_enabled"
+        )
+        for user_id, notification_type, in_app_enabled, email_enabled in rows:
+            loaded[_user_id(user_id)][notification_type] = (
+                in_app_enabled,
+                email_enabled,
+            )
+        cache.set_many(
+            {
+                _PREFERENCES_CACHE_KEY.format(user=user_id): value
+                for user_id, value in loaded.items()
+            },
+            settings.NOTIFICATION_PREFERENCE_CACHE_TIMEOUT,
+        )
+        preferences.update(loaded)
+    return preferences
+
+
+def invalidate_preferences(user_id):
+    """Drop the cached preferences of *user_id*."""
+    cache.delete(_PREFERENCES_CACHE_KEY.format(user=_user_id(user_id)))
+
+
+# ---------------------------------------------------------------------------
+# Unread counters
+# ---------------------------------------------------------------------------
+
+
+def unread_count(user):
+    """Number of unread notifications of *user*, for the bell badge."""
+    key = _UNREAD_CACHE_KEY.format(user=_user_id(user))
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.add(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_counts(deltas):
+    """
+    Add ``{user_id: delta}`` to the cached counters.  Counters that aren't
+    cached are left alone: the next read counts from the database.
+    """
+    for user_id, delta in deltas.items():
+        key = _UNREAD_CACHE_KEY.format(user=_user_id(user_id))
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            continue
+        if count < 0:
+            cache.delete(key)
+
 
-    return notification
+def reset_unread_count(user_id):
+    """Recount *user_id*'s unread notifications on the next read."""
+    cache.delete(_UNREAD_CACHE_KEY.format(user=_user_id(user_id)))
@@ -0,0 +1,34 @@
+"""
+Signals keeping the notification caches in step with the database.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.notifications import services
+from apps.notifications.models import Notification, NotificationPreference
+
+
+@receiver(post_save, sender=Notification)
+def on_notification_saved(sender, instance, created, raw=False, **kwargs):
+    """Count notifications created one by one (bulk inserts count themselves)."""
+    if created and not raw and not instance.is_read:
+        deltas = {instance.recipient_id: 1}
+        transaction.on_commit(lambda: services.adjust_unread_counts(deltas))
+
+
+@receiver(post_delete, sender=Notification)
+def on_notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        deltas = {instance.recipient_id: -1}
+        transaction.on_commit(lambda: services.adjust_unread_counts(deltas))
+
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def on_preference_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    services.invalidate_preferences(user_id)
+    # Drop anything reloaded from the pre-commit state in the meantime
+    transaction.on_commit(lambda: services.invalidate_preferences(user_id))
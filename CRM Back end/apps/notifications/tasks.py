@@ -2,11 +2,21 @@ import logging
 
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
 
 logger = logging.getLogger(__name__)
 
 
+def _email_content(notification):
+    """Subject and body of *notification*'s email."""
+    subject = f"[Ebenezer CRM] {notification.title}"
+    body = notification.message or notification.title
+
+    if notification.action_url:
+        body += f"\n\nView details: {notification.action_url}"
+    return subject, body
+
+
 @shared_task(bind=True, max_retries=3)
 def send_notification_email(self, notification_id):
     """Send an email for a notification."""
@@ -25,11 +35,7 @@ def send_notification_email(self, notification_id):
         logger.warning("User %s has no email, skipping.", recipient.id)
         return
 
-    subject = f"[Ebenezer CRM] {notification.title}"
-    body = notification.message or notification.title
-
-    if notification.action_url:
-        body += f"\n\nView details: {notification.action_url}"
+    subject, body = _email_content(notification)
 
     try:
         send_mail(
@@ -45,3 +51,55 @@ def send_notification_email(self, notification_id):
     except Exception as exc:
         logger.error("Failed to send notification email: %s", exc)
         raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_notification_emails(self, notification_ids):
+    """
+    Send the emails of many notifications over one SMTP connection.
+    Notifications already emailed are skipped; failed ones are retried.
+    """
+    from apps.notifications.models import Notification
+
+    notifications = Notification.objects.select_related("recipient").filter(
+        id__in=notification_ids, email_sent=False
+    )
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.error("Failed to open the mail connection: %s", exc)
+        raise self.retry(exc=exc, countdown=60)
+
+    sent, failed = [], []
+    try:
+        for notification in notifications:
+            recipient = notification.recipient
+            if not recipient.email:
+                logger.warning("User %s has no email, skipping.", recipient.id)
+                continue
+            subject, body = _email_content(notification)
+            message = EmailMessage(
+                subject=subject,
+                body=body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[recipient.email],
+                connection=connection,
+            )
+            try:
+                message.send(fail_silently=False)
+            except Exception as exc:
+                logger.error(
+                    "Failed to send notification email %s: %s", notification.id, exc
+                )
+                failed.append(str(notification.id))
+            else:
+                sent.append(notification.id)
+    finally:
+        connection.close()
+
+    Notification.objects.filter(id__in=sent).update(email_sent=True)
+    logger.info("Sent %d notification emails", len(sent))
+    if failed:
+        raise self.retry(args=[failed], countdown=60)
+    return len(sent)
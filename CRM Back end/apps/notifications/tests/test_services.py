@@ -3,7 +3,12 @@ from unittest.mock import patch
 import pytest
 
 from apps.notifications.models import Notification
-from apps.notifications.services import create_notification
+from apps.notifications.services import (
+    create_notification,
+    create_notifications_bulk,
+    preference_map,
+    unread_count,
+)
 from tests.factories import NotificationPreferenceFactory, UserFactory
 
 
@@ -38,8 +43,10 @@ class TestCreateNotification:
         assert notif is None
         assert Notification.objects.filter(recipient=user).count() == 0
 
-    @patch("apps.notifications.tasks.send_notification_email")
-    def test_queues_email_when_enabled(self, mock_email):
+    @patch("apps.notifications.tasks.send_notification_emails")
+    def test_queues_email_when_enabled(
+        self, mock_email, django_capture_on_commit_callbacks
+    ):
         user = UserFactory()
         NotificationPreferenceFactory(
             user=user,
@@ -47,13 +54,14 @@ class TestCreateNotification:
             in_app_enabled=True,
             email_enabled=True,
         )
-        notif = create_notification(
-            recipient=user,
-            notification_type="system",
-            title="Email Test",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            notif = create_notification(
+                recipient=user,
+                notification_type="system",
+                title="Email Test",
+            )
         assert notif is not None
-        mock_email.delay.assert_called_once()
+        mock_email.delay.assert_called_once_with([str(notif.id)])
 
     def test_related_object_stored(self):
         user = UserFactory()
@@ -68,3 +76,88 @@ class TestCreateNotification:
         )
         assert notif.related_object_type == "taxcase"
         assert notif.related_object_id == case.pk
+
+
+@pytest.mark.django_db
+class TestCreateNotificationsBulk:
+    def test_one_insert_for_many_recipients(self, django_assert_num_queries):
+        users = UserFactory.create_batch(5)
+        NotificationPreferenceFactory(
+            user=users[0], notification_type="system", in_app_enabled=False
+        )
+
+        # Preferences, insert
+        with django_assert_num_queries(2):
+            created = create_notifications_bulk(
+                (user, "system", {"title": "Hello"}) for user in users
+            )
+
+        assert [n.recipient for n in created] == users[1:]
+        assert Notification.objects.count() == 4
+
+    def test_preferences_are_cached(self, django_assert_num_queries):
+        user = UserFactory()
+        NotificationPreferenceFactory(
+            user=user, notification_type="system", email_enabled=True
+        )
+        preference_map([user.pk])
+
+        with django_assert_num_queries(0):
+            preferences = preference_map([user.pk])
+
+        assert preferences[str(user.pk)]["system"] == (True, True)
+
+    def test_preference_change_drops_the_cache(self):
+        user = UserFactory()
+        preference = NotificationPreferenceFactory(
+            user=user, notification_type="system"
+        )
+        preference_map([user.pk])
+
+        preference.in_app_enabled = False
+        preference.save()
+
+        assert preference_map([user.pk])[str(user.pk)]["system"] == (False, False)
+
+    def test_idempotency_key_skips_duplicates(self):
+        user = UserFactory()
+        entry = (user, "system", {"title": "Once", "idempotency_key": "once:1"})
+
+        assert len(create_notifications_bulk([entry, entry])) == 1
+        assert create_notifications_bulk([entry]) == []
+        assert Notification.objects.count() == 1
+
+    @patch("apps.notifications.tasks.send_notification_emails")
+    def test_emails_are_queued_as_one_task(
+        self, mock_email, django_capture_on_commit_callbacks
+    ):
+        users = UserFactory.create_batch(3)
+        for user in users:
+            NotificationPreferenceFactory(
+                user=user, notification_type="system", email_enabled=True
+            )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            created = create_notifications_bulk(
+                (user, "system", {"title": "Hi"}) for user in users
+            )
+
+        mock_email.delay.assert_called_once_with([str(n.id) for n in created])
+
+
+@pytest.mark.django_db
+class TestUnreadCount:
+    def test_counter_follows_new_notifications(
+        self, django_capture_on_commit_callbacks, django_assert_num_queries
+    ):
+        user = UserFactory()
+        assert unread_count(user) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_notifications_bulk(
+                (user, "system", {"title": f"N{i}"}) for i in range(3)
+            )
+            create_notification(recipient=user, notification_type="system", title="X")
+
+        with django_assert_num_queries(0):
+            assert unread_count(user) == 4
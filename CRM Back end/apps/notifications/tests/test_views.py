@@ -53,6 +53,19 @@ class TestNotificationActions:
             == 0
         )
 
+    def test_mark_read_updates_the_cached_count(
+        self, authenticated_client, preparer_user
+    ):
+        notif = NotificationFactory(recipient=preparer_user, is_read=False)
+        NotificationFactory(recipient=preparer_user, is_read=False)
+        authenticated_client.get(f"{NOTIFICATIONS_BASE}unread-count/")
+
+        authenticated_client.post(f"{NOTIFICATIONS_BASE}{notif.id}/mark-read/")
+        authenticated_client.post(f"{NOTIFICATIONS_BASE}{notif.id}/mark-read/")
+
+        resp = authenticated_client.get(f"{NOTIFICATIONS_BASE}unread-count/")
+        assert resp.data["count"] == 1
+
     def test_unread_count(self, authenticated_client, preparer_user):
         NotificationFactory.create_batch(3, recipient=preparer_user, is_read=False)
         NotificationFactory(recipient=preparer_user, is_read=True)
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.notifications import services
 from apps.notifications.models import Notification, NotificationPreference
 from apps.notifications.serializers import (
     NotificationPreferenceSerializer,
@@ -38,8 +39,12 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark a single notification as read."""
         notification = self.get_object()
+        # Only the request that flips it counts it as read
+        if Notification.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True
+        ):
+            services.adjust_unread_counts({request.user.pk: -1})
         notification.is_read = True
-        notification.save(update_fields=["is_read"])
         return Response(NotificationSerializer(notification).data)
 
     @action(detail=False, methods=["post"], url_path="mark-all-read")
@@ -48,15 +53,13 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         count = Notification.objects.filter(
             recipient=request.user, is_read=False
         ).update(is_read=True)
+        services.reset_unread_count(request.user.pk)
         return Response({"updated": count})
 
     @action(detail=False, methods=["get"], url_path="unread-count")
     def unread_count(self, request):
         """Return the number of unread notifications for the bell badge."""
-        count = Notification.objects.filter(
-            recipient=request.user, is_read=False
-        ).count()
-        return Response({"count": count})
+        return Response({"count": services.unread_count(request.user)})
 
 
 class NotificationPreferenceViewSet(viewsets.ModelViewSet):
@@ -155,7 +155,7 @@ class PortalDocumentSerializer(serializers.Serializer):
 
 class PortalDocumentUploadSerializer(serializers.ModelSerializer):
     document_title = serializers.CharField(source="document.title", read_only=True)
-    document_file = serializers.FileField(source="document.file", read_only=True)
+    document_file = serializers.SerializerMethodField()
 
     class Meta:
         model = PortalDocumentUpload
@@ -171,6 +171,12 @@ class PortalDocumentUploadSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "status", "created_at"]
 
+    def get_document_file(self, obj):
+        # Decrypting download endpoint; stored files may be encrypted
+        if not obj.document.file:
+            return None
+        return f"/api/v1/portal/documents/{obj.id}/download/"
+
 
 class PortalDocumentCreateSerializer(serializers.Serializer):
     """Handles file upload from portal clients."""
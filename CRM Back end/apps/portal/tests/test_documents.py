@@ -43,6 +43,10 @@ class TestPortalDocumentRetrieve:
 
         resp = portal_authenticated_client.get(f"/api/v1/portal/documents/{upload.id}/")
         assert resp.status_code == 200
+        assert (
+            resp.data["document_file"]
+            == f"/api/v1/portal/documents/{upload.id}/download/"
+        )
 
     def test_cannot_view_other_contacts_document(self, portal_authenticated_client):
         other_contact = ContactFactory()
@@ -490,7 +490,11 @@ class PortalDocumentViewSet(viewsets.ViewSet):
                     "id": str(upload.id),
                     "title": upload.document.title,
                     "doc_type": upload.document.doc_type,
-                    "file": upload.document.file.url if upload.document.file else None,
+                    "file": (
+                        f"/api/v1/portal/documents/{upload.id}/download/"
+                        if upload.document.file
+                        else None
+                    ),
                     "file_size": upload.document.file_size,
                     "mime_type": upload.document.mime_type,
                     "status": upload.status,
@@ -523,18 +527,21 @@ class PortalDocumentViewSet(viewsets.ViewSet):
         serializer = PortalDocumentCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        from apps.documents.encryption import encrypt_upload
         from apps.documents.models import Document
 
         uploaded_file = serializer.validated_data["file"]
+        stored, encryption = encrypt_upload(uploaded_file)
         doc = Document.objects.create(
             title=serializer.validated_data["title"],
-            file=uploaded_file,
+            file=stored,
             doc_type=serializer.validated_data.get("doc_type", "other"),
             status="pending",
             file_size=uploaded_file.size,
             mime_type=uploaded_file.content_type or "application/octet-stream",
             contact_id=request.portal_contact_id,
             case_id=serializer.validated_data.get("case"),
+            **encryption,
         )
 
         upload = PortalDocumentUpload.objects.create(
@@ -557,9 +564,8 @@ class PortalDocumentViewSet(viewsets.ViewSet):
             inline: If 'true', display inline (for PDF viewing) instead of download.
             token: Portal JWT token (for browser/app access without headers)
         """
-        from django.http import FileResponse
-
         from apps.documents.models import Document
+        from apps.documents.streaming import document_file_response
         from apps.portal.auth import decode_portal_token
 
         # Authenticate via header or query param token
@@ -615,17 +621,16 @@ class PortalDocumentViewSet(viewsets.ViewSet):
         inline_view = request.query_params.get("inline", "").lower() == "true"
         disposition = "inline" if inline_view else "attachment"
 
-        # Get file
+        # Streams plaintext (decrypting segment by segment) and honours Range
         try:
-            file_handle = document.file.open("rb")
-            response = FileResponse(
-                file_handle,
-                content_type=document.mime_type or "application/octet-stream",
+            response = document_file_response(
+                request,
+                document,
+                document.mime_type or "application/octet-stream",
             )
             # Use proper filename encoding for special characters
             filename = document.title.replace('"', '\\"')
             response["Content-Disposition"] = f'{disposition}; filename="{filename}"'
-            response["Content-Length"] = document.file_size or document.file.size
             # Allow CORS for mobile app
             response["Access-Control-Allow-Origin"] = "*"
             return response
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.reports.models import Report, ReportFolder
+from apps.reports.models import Report, ReportFolder, ReportSnapshot
 
 
 @admin.register(ReportFolder)
@@ -26,3 +26,16 @@ class ReportAdmin(admin.ModelAdmin):
     search_fields = ["name", "description"]
     raw_id_fields = ["owner", "folder"]
     filter_horizontal = ["shared_with"]
+
+
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    list_display = [
+        "report",
+        "generated_at",
+        "row_count",
+        "truncated",
+        "duration_ms",
+    ]
+    list_filter = ["truncated"]
+    raw_id_fields = ["report"]
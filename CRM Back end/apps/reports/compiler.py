@@ -0,0 +1,368 @@
+"""Report compiler.
+
+Turns a ``Report`` definition into a single projected ``values()`` query:
+
+- tabular/detail reports select only the requested columns, following
+  forward foreign keys for ``related_modules`` columns written as
+  ``"<module>.<field>"`` (e.g. ``"contacts.email"`` on a cases report);
+- summary reports group by ``chart_config["group_by"]`` and compute
+  ``chart_config["measure"]`` with a SQL aggregate;
+- rows are paginated with a keyset cursor on ``(sort_field, pk)`` instead
+  of OFFSET, so deep pages cost the same as the first one.
+
+Compiling validates every field name against the model, exactly like the
+original engine, and the result is cached per definition hash.
+
+Security: Field names are validated against actual model fields to prevent
+ORM injection attacks via malicious field traversal.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+
+OPERATOR_MAP = {
+    "equals": "exact",
+    "not_equals": "exact",  # negated via exclude
+    "contains": "icontains",
+    "not_contains": "icontains",  # negated
+    "starts_with": "istartswith",
+    "ends_with": "iendswith",
+    "greater_than": "gt",
+    "less_than": "lt",
+    "greater_or_equal": "gte",
+    "less_or_equal": "lte",
+    "is_empty": "isnull",
+    "is_not_empty": "isnull",
+}
+
+AGGREGATES = {
+    "count": Count,
+    "sum": Sum,
+    "avg": Avg,
+    "min": Min,
+    "max": Max,
+}
+
+# Map primary_module choices → (app_label, model_name)
+MODULE_MODEL_MAP = {
+    "contacts": ("contacts", "Contact"),
+    "corporations": ("corporations", "Corporation"),
+    "cases": ("cases", "TaxCase"),
+    "quotes": ("quotes", "Quote"),
+    "appointments": ("appointments", "Appointment"),
+    "tasks": ("tasks", "Task"),
+    "documents": ("documents", "Document"),
+    "users": ("users", "User"),
+}
+
+_IDENTIFIER_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+DEFAULT_COLUMN_COUNT = 10
+PLAN_CACHE_SIZE = 256
+
+
+def get_module_model(module_name: str):
+    mapping = MODULE_MODEL_MAP.get(module_name)
+    if not mapping:
+        return None
+    app_label, model_name = mapping
+    try:
+        return apps.get_model(app_label, model_name)
+    except LookupError:
+        return None
+
+
+def _concrete_fields(model) -> dict:
+    """Concrete (single-column) fields of ``model`` keyed by name."""
+    return {f.name: f for f in model._meta.concrete_fields}
+
+
+def _is_safe_field_name(field_name, valid_fields) -> bool:
+    """Validate that a field name is safe to use in ORM queries.
+
+    Prevents:
+    - Field traversal (e.g., 'user__password')
+    - Special characters that could be exploited
+    - Empty or None field names
+    """
+    if not field_name or not isinstance(field_name, str):
+        return False
+    if "__" in field_name or not _IDENTIFIER_RE.match(field_name):
+        return False
+    return field_name in valid_fields
+
+
+@dataclass(frozen=True)
+class CompiledReport:
+    """Validated, query-ready form of a report definition."""
+
+    model: type
+    columns: tuple  # output column names, in order
+    paths: tuple  # ORM path for each column
+    filters: tuple  # ((path, lookup, value, negate), ...)
+    sort_path: str
+    descending: bool
+    summary: bool
+    group_paths: tuple = ()
+    measure_name: str = ""
+    measure_path: str = ""
+    aggregate: str = ""
+
+    # ---- query building --------------------------------------------------
+
+    def base_queryset(self):
+        qs = self.model._default_manager.all()
+        for path, lookup, value, negate in self.filters:
+            condition = Q(**{f"{path}__{lookup}": value})
+            qs = qs.exclude(condition) if negate else qs.filter(condition)
+        return qs
+
+    def _aggregate_expression(self):
+        if self.aggregate == "count":
+            return Count(self.measure_path or "pk")
+        return AGGREGATES[self.aggregate](self.measure_path)
+
+    def queryset(self):
+        """Projected rows (tabular) or grouped aggregates (summary)."""
+        qs = self.base_queryset()
+        if self.summary:
+            qs = qs.values(*self.group_paths).annotate(
+                **{self.measure_name: self._aggregate_expression()}
+            )
+            return qs.order_by(
+                *[f"-{p}" if self.descending else p for p in self.group_paths]
+            )
+
+        # NULLs last in both directions so the keyset order is the same on
+        # every database backend
+        sort = F(self.sort_path)
+        sort = (
+            sort.desc(nulls_last=True) if self.descending else sort.asc(nulls_last=True)
+        )
+        pk = "-pk" if self.descending else "pk"
+        projection = ["pk", *self.paths]
+        if self.sort_path not in projection:
+            # Needed to build the next keyset cursor
+            projection.append(self.sort_path)
+        return qs.order_by(sort, pk).values(*projection)
+
+    def cursor_for(self, row) -> str:
+        """Keyset cursor pointing just after the projected ``row``."""
+        return encode_cursor(row[self.sort_path], row["pk"])
+
+    def total(self):
+        """Aggregate over all rows, for summary reports without group_by."""
+        return self.base_queryset().aggregate(
+            **{self.measure_name: self._aggregate_expression()}
+        )
+
+    def count(self):
+        if self.summary:
+            return self.queryset().count() if self.group_paths else 1
+        return self.base_queryset().count()
+
+    def after(self, qs, cursor):
+        """Restrict ``qs`` to rows after the keyset ``cursor``."""
+        sort_value, pk = cursor
+        op = "lt" if self.descending else "gt"
+        if self.sort_path == "pk":
+            return qs.filter(**{f"pk__{op}": pk})
+        if sort_value is None:
+            return qs.filter(**{f"{self.sort_path}__isnull": True, f"pk__{op}": pk})
+        return qs.filter(
+            Q(**{f"{self.sort_path}__{op}": sort_value})
+            | Q(**{self.sort_path: sort_value, f"pk__{op}": pk})
+            | Q(**{f"{self.sort_path}__isnull": True})
+        )
+
+
+def _resolve_related(model, module_name: str, field_name: str):
+    """
+    Resolve ``<module>.<field>`` to an ORM path through a forward FK.
+
+    Only single-valued relations are followed so joins never multiply rows.
+    """
+    related_model = get_module_model(module_name)
+    if related_model is None:
+        return None
+    related_fields = _concrete_fields(related_model)
+    if not _is_safe_field_name(field_name, related_fields):
+        return None
+    for field in model._meta.concrete_fields:
+        if field.is_relation and field.related_model is related_model:
+            return f"{field.name}__{field_name}"
+    return None
+
+
+def _resolve_column(model, column, fields, related_modules):
+    if not isinstance(column, str):
+        return None
+    if "." in column:
+        module_name, _, field_name = column.partition(".")
+        if module_name not in related_modules:
+            return None
+        return _resolve_related(model, module_name, field_name)
+    if _is_safe_field_name(column, fields):
+        return column
+    return None
+
+
+def _compile_filters(model, filters, fields, related_modules):
+    compiled = []
+    for f in filters or []:
+        if not isinstance(f, dict):
+            continue
+        path = _resolve_column(model, f.get("field", ""), fields, related_modules)
+        if path is None:
+            continue
+        operator = f.get("operator", "equals")
+        lookup = OPERATOR_MAP.get(operator, "exact")
+        negate = operator in ("not_equals", "not_contains", "is_not_empty")
+        value = True if operator in ("is_empty", "is_not_empty") else f.get("value", "")
+        compiled.append((path, lookup, value, negate))
+    return tuple(compiled)
+
+
+def definition_of(report) -> dict:
+    """The parts of a report that determine its query."""
+    return {
+        "primary_module": report.primary_module,
+        "related_modules": list(report.related_modules or []),
+        "report_type": report.report_type,
+        "columns": list(report.columns or []),
+        "filters": list(report.filters or []),
+        "sort_field": report.sort_field,
+        "sort_order": report.sort_order,
+        "chart_config": dict(report.chart_config or {}),
+    }
+
+
+def definition_hash(report) -> str:
+    payload = json.dumps(definition_of(report), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _compile(definition: dict) -> Optional[CompiledReport]:
+    model = get_module_model(definition["primary_module"])
+    if model is None:
+        return None
+
+    fields = _concrete_fields(model)
+    related_modules = set(definition["related_modules"][:2])
+
+    columns, paths = [], []
+    for column in definition["columns"]:
+        path = _resolve_column(model, column, fields, related_modules)
+        if path is not None and column not in columns:
+            columns.append(column)
+            paths.append(path)
+    if not columns:
+        # Default: use a sensible set of model fields
+        columns = [name for name, f in fields.items() if not f.primary_key][
+            :DEFAULT_COLUMN_COUNT
+        ]
+        paths = list(columns)
+
+    sort_field = definition["sort_field"]
+    sort_path = sort_field if _is_safe_field_name(sort_field, fields) else "pk"
+    descending = definition["sort_order"] == "desc"
+    compiled_filters = _compile_filters(
+        model, definition["filters"], fields, related_modules
+    )
+
+    if definition["report_type"] != "summary":
+        return CompiledReport(
+            model=model,
+            columns=tuple(columns),
+            paths=tuple(paths),
+            filters=compiled_filters,
+            sort_path=sort_path,
+            descending=descending,
+            summary=False,
+        )
+
+    config = definition["chart_config"]
+    group_by = config.get("group_by") or []
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    group_columns, group_paths = [], []
+    for column in group_by:
+        path = _resolve_column(model, column, fields, related_modules)
+        if path is not None:
+            group_columns.append(column)
+            group_paths.append(path)
+
+    measure = config.get("measure") or "count"
+    aggregate = str(config.get("aggregate") or "").lower()
+    if measure == "count":
+        measure_path, aggregate = "", "count"
+    else:
+        measure_path = _resolve_column(model, measure, fields, related_modules)
+        if measure_path is None:
+            raise ValidationError(f"Invalid summary measure: {measure}")
+        aggregate = aggregate if aggregate in AGGREGATES else "sum"
+    if measure_path:
+        measure_name = f"{aggregate}_{measure.replace('.', '_')}"
+    else:
+        measure_name = "count"
+
+    return CompiledReport(
+        model=model,
+        columns=tuple(group_columns) + (measure_name,),
+        paths=tuple(group_paths) + (measure_name,),
+        filters=compiled_filters,
+        sort_path=sort_path,
+        descending=descending,
+        summary=True,
+        group_paths=tuple(group_paths),
+        measure_name=measure_name,
+        measure_path=measure_path,
+        aggregate=aggregate,
+    )
+
+
+_plan_lock = threading.Lock()
+_plan_cache: "OrderedDict[str, Optional[CompiledReport]]" = OrderedDict()
+
+
+def compile_report(report) -> Optional[CompiledReport]:
+    """Compile ``report``, reusing the cached plan for identical definitions."""
+    key = definition_hash(report)
+    with _plan_lock:
+        if key in _plan_cache:
+            _plan_cache.move_to_end(key)
+            return _plan_cache[key]
+
+    plan = _compile(definition_of(report))
+    with _plan_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+# ---- keyset cursors ------------------------------------------------------
+
+
+def encode_cursor(sort_value, pk) -> str:
+    payload = json.dumps([sort_value, pk], default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from ``encode_cursor``; raises ValidationError."""
+    try:
+        sort_value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+    return sort_value, pk
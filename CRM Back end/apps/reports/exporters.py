@@ -0,0 +1,32 @@
+"""
+Background exports of report results (see ``apps.core.exports``).
+"""
+
+from apps.core.exports import Exporter
+from apps.reports.compiler import compile_report
+from apps.reports.services import iter_report_rows
+from apps.reports.snapshots import get_fresh_snapshot, iter_snapshot_rows
+
+
+def report_rows(report):
+    """``(header, rows)`` for a full report export, from a fresh snapshot if any."""
+    snapshot = get_fresh_snapshot(report)
+    if snapshot is not None:
+        return list(snapshot.columns), iter_snapshot_rows(snapshot)
+    plan = compile_report(report)
+    if plan is None:
+        return [], iter(())
+    return iter_report_rows(plan)
+
+
+class ReportExporter(Exporter):
+    module = "reports"
+    filename = "report"
+    background = True
+
+    def job_rows(self, job):
+        from apps.reports.models import Report
+
+        report = Report.objects.get(pk=job.params["report_id"])
+        self.filename = report.name
+        return report_rows(report)
@@ -0,0 +1,159 @@
+"""
+Streaming CSV / XLSX export of report results.
+
+Both writers consume an iterator of value lists and yield the file in
+pieces for ``StreamingHttpResponse``, so exporting a large report never
+holds the whole file in memory.  The XLSX writer emits a minimal
+single-sheet workbook (inline strings, no styles) through ``zipfile`` and
+needs no third-party spreadsheet library.
+"""
+
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+
+CSV_CONTENT_TYPE = "text/csv"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_FORMATS = ("csv", "xlsx")
+
+# Flush buffered XLSX output once this many bytes are pending
+XLSX_FLUSH_SIZE = 64 * 1024
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_CONTENT_TYPES = (
+    _XML_DECL
+    + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS = (
+    _XML_DECL + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS = (
+    _XML_DECL + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+_SHEET_HEAD = (_XML_DECL + f'<worksheet xmlns="{_MAIN_NS}"><sheetData>').encode()
+_SHEET_TAIL = b"</sheetData></worksheet>"
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    """Yield CSV lines for ``header`` followed by ``rows``."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _Sink:
+    """Write-only, unseekable buffer that ``zipfile`` streams into."""
+
+    def __init__(self):
+        self._chunks = []
+        self.pending = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.pending = 0
+        return data
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value!r}</v></c>"
+    text = escape(_ILLEGAL_XML_RE.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return ("<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>").encode()
+
+
+def iter_xlsx(header, rows, sheet_name="Report"):
+    """Yield the bytes of a single-sheet XLSX workbook."""
+    sheet_name = _ILLEGAL_XML_RE.sub("", sheet_name)[:31] or "Report"
+    workbook = (
+        _XML_DECL + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+        f'<sheet name={quoteattr(sheet_name)} sheetId="1" r:id="rId1"/>'
+        "</sheets></workbook>"
+    )
+
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", workbook)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD)
+            sheet.write(_xlsx_row(header))
+            for row in rows:
+                sheet.write(_xlsx_row(row))
+                if sink.pending >= XLSX_FLUSH_SIZE:
+                    yield sink.drain()
+            sheet.write(_SHEET_TAIL)
+    yield sink.drain()
+
+
+def export_response(name, header, rows, file_format="csv"):
+    """``StreamingHttpResponse`` downloading ``rows`` as CSV or XLSX."""
+    filename = slugify(name) or "report"
+    if file_format == "xlsx":
+        content = iter_xlsx(header, rows, sheet_name=name)
+        content_type = XLSX_CONTENT_TYPE
+    else:
+        file_format = "csv"
+        content = iter_csv(header, rows)
+        content_type = CSV_CONTENT_TYPE
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
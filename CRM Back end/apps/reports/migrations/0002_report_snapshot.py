@@ -0,0 +1,61 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("definition_hash", models.CharField(max_length=64)),
+                ("columns", models.JSONField(default=list)),
+                ("data", models.BinaryField()),
+                ("row_count", models.PositiveIntegerField(default=0)),
+                (
+                    "truncated",
+                    models.BooleanField(
+                        default=False,
+                        help_text="True when the result exceeded REPORT_SNAPSHOT_MAX_ROWS",
+                    ),
+                ),
+                ("generated_at", models.DateTimeField()),
+                ("duration_ms", models.PositiveIntegerField(default=0)),
+                (
+                    "report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="reports.report",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "crm_report_snapshots",
+                "ordering": ["-generated_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("report", "definition_hash"),
+                        name="unique_report_snapshot_definition",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_snapshots(apps, schema_editor):
+    # Single-blob snapshots can't be served any more; the next
+    # materialize_scheduled_reports run rebuilds them in chunks.
+    apps.get_model("reports", "ReportSnapshot").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0002_report_snapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_snapshots, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="reportsnapshot",
+            name="data",
+        ),
+        migrations.CreateModel(
+            name="ReportSnapshotChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                ("data", models.BinaryField()),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="reports.reportsnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "crm_report_snapshot_chunks",
+                "ordering": ["snapshot", "index"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("snapshot", "index"),
+                        name="unique_report_snapshot_chunk",
+                    )
+                ],
+            },
+        ),
+    ]
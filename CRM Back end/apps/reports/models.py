@@ -130,3 +130,74 @@ class Report(TimeStampedModel):
 
     def __str__(self):
         return self.name
+
+
+class ReportSnapshot(TimeStampedModel):
+    """
+    Materialized result of a scheduled report.
+
+    Rows are stored in ``ReportSnapshotChunk`` rows so ``run`` and exports
+    can serve a scheduled report without querying the source module.  A snapshot belongs to one
+    definition of the report: editing the report changes ``definition_hash``
+    and the old snapshot is no longer served.
+    """
+
+    class Meta:
+        db_table = "crm_report_snapshots"
+        ordering = ["-generated_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["report", "definition_hash"],
+                name="unique_report_snapshot_definition",
+            ),
+        ]
+
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name="snapshots",
+    )
+    definition_hash = models.CharField(max_length=64)
+    columns = models.JSONField(default=list)
+    row_count = models.PositiveIntegerField(default=0)
+    truncated = models.BooleanField(
+        default=False,
+        help_text=_("True when the result exceeded REPORT_SNAPSHOT_MAX_ROWS"),
+    )
+    generated_at = models.DateTimeField()
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.report} @ {self.generated_at:%Y-%m-%d %H:%M}"
+
+
+class ReportSnapshotChunk(models.Model):
+    """
+    A run of consecutive rows of a ``ReportSnapshot``.
+
+    ``data`` holds the rows as zlib-compressed JSON lines (one list of
+    values per row, in the snapshot's ``columns`` order), encrypted with
+    the field encryption key since results may include PII.  Splitting
+    the result lets a page be served from the chunks that cover it.
+    """
+
+    class Meta:
+        db_table = "crm_report_snapshot_chunks"
+        ordering = ["snapshot", "index"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["snapshot", "index"],
+                name="unique_report_snapshot_chunk",
+            ),
+        ]
+
+    snapshot = models.ForeignKey(
+        ReportSnapshot,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+    index = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.snapshot} #{self.index}"
@@ -8,221 +8,172 @@ ORM injection attacks via malicious field traversal.
 """
 
 import logging
-import re
-from datetime import datetime
+import uuid
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from django.apps import apps
 from django.db.models import DateField, DateTimeField, DecimalField
 from django.utils import timezone
-
+from django.utils.functional import Promise
+
+from apps.reports.compiler import (
+    MODULE_MODEL_MAP,  # noqa: F401 - re-exported for existing importers
+    compile_report,
+    decode_cursor,
+    get_module_model,
+)
 from apps.reports.models import Report
 
 logger = logging.getLogger(__name__)
 
+# Minimum gap between last_accessed / last_run writes for one report
+ACCESS_TRACKING_INTERVAL = timedelta(minutes=5)
 
-def _get_valid_field_names(model) -> set:
-    """Get the set of valid field names for a model.
-
-    Only includes direct fields, not related field traversals.
-    This prevents ORM injection via field__related__field patterns.
-    """
-    valid_fields = set()
-    for field in model._meta.get_fields():
-        if hasattr(field, "column") or hasattr(field, "attname"):
-            valid_fields.add(field.name)
-    return valid_fields
-
-
-def _is_safe_field_name(field_name: str, valid_fields: set) -> bool:
-    """Validate that a field name is safe to use in ORM queries.
 
-    Prevents:
-    - Field traversal (e.g., 'user__password')
-    - Special characters that could be exploited
-    - Empty or None field names
-    """
-    if not field_name or not isinstance(field_name, str):
-        return False
-
-    # Only allow alphanumeric and underscore (no double underscores for traversal)
-    if "__" in field_name:
-        return False
-
-    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", field_name):
-        return False
-
-    return field_name in valid_fields
-
-
-# Map primary_module choices → (app_label, model_name)
-MODULE_MODEL_MAP = {
-    "contacts": ("contacts", "Contact"),
-    "corporations": ("corporations", "Corporation"),
-    "cases": ("cases", "TaxCase"),
-    "quotes": ("quotes", "Quote"),
-    "appointments": ("appointments", "Appointment"),
-    "tasks": ("tasks", "Task"),
-    "documents": ("documents", "Document"),
-    "users": ("users", "User"),
-}
-
-OPERATOR_MAP = {
-    "equals": "exact",
-    "not_equals": "exact",  # negated via exclude
-    "contains": "icontains",
-    "not_contains": "icontains",  # negated
-    "starts_with": "istartswith",
-    "ends_with": "iendswith",
-    "greater_than": "gt",
-    "less_than": "lt",
-    "greater_or_equal": "gte",
-    "less_or_equal": "lte",
-    "is_empty": "isnull",
-    "is_not_empty": "isnull",
-}
-
-
-def _get_model(primary_module: str):
-    mapping = MODULE_MODEL_MAP.get(primary_module)
-    if not mapping:
-        return None
-    app_label, model_name = mapping
-    try:
-        return apps.get_model(app_label, model_name)
-    except LookupError:
+def _serialise_value(val):
+    """Convert a projected column value to a JSON-safe type."""
+    if val is None:
         return None
+    if isinstance(val, Promise):
+        return str(val)
+    if isinstance(val, Decimal):
+        return float(val)
+    if isinstance(val, (datetime, date)):
+        return val.isoformat()
+    if isinstance(val, uuid.UUID):
+        return str(val)
+    return val
 
 
-def _apply_filters(qs, filters, valid_fields: set):
-    """Apply a list of filter conditions to a queryset.
-
-    Each filter: {"field": "status", "operator": "equals", "value": "completed"}
-
-    Security: Field names are validated against valid_fields to prevent ORM injection.
-    """
-    for f in filters:
-        field = f.get("field", "")
-        operator = f.get("operator", "equals")
-        value = f.get("value", "")
+def _summary_rows(plan):
+    """Summary result rows as lists in ``plan.columns`` order."""
+    if not plan.group_paths:
+        yield [_serialise_value(plan.total()[plan.measure_name])]
+        return
+    for values in plan.queryset():
+        yield [_serialise_value(values[path]) for path in plan.paths]
 
-        if not field:
-            continue
 
-        # Security: Validate field name against whitelist
-        if not _is_safe_field_name(field, valid_fields):
-            continue
+def _tabular_row(plan, values):
+    return [str(values["pk"])] + [_serialise_value(values[path]) for path in plan.paths]
 
-        lookup = OPERATOR_MAP.get(operator, "exact")
-        negate = operator in ("not_equals", "not_contains", "is_not_empty")
 
-        if operator == "is_empty":
-            kwarg = {f"{field}__isnull": True}
-        elif operator == "is_not_empty":
-            kwarg = {f"{field}__isnull": True}
-        else:
-            kwarg = {f"{field}__{lookup}": value}
+def iter_report_rows(plan, chunk_size: int = 2000):
+    """
+    Return ``(columns, rows)`` for the full result of a compiled report.
 
-        if negate:
-            qs = qs.exclude(**kwarg)
-        else:
-            qs = qs.filter(**kwarg)
+    ``rows`` is a lazy iterator of JSON-safe value lists; tabular results
+    start with an ``"id"`` column.  Used by materialization and exports,
+    which walk the whole result without holding it in memory.
+    """
+    if plan.summary:
+        return list(plan.columns), _summary_rows(plan)
+    rows = (
+        _tabular_row(plan, values)
+        for values in plan.queryset().iterator(chunk_size=chunk_size)
+    )
+    return ["id", *plan.columns], rows
 
-    return qs
 
+def track_report_access(report: Report, ran: bool = False):
+    """
+    Record that ``report`` was viewed (and executed, if ``ran``).
 
-def _serialise_value(val):
-    """Convert a model field value to a JSON-safe type."""
-    if val is None:
-        return None
-    if isinstance(val, Decimal):
-        return float(val)
-    if isinstance(val, datetime):
-        return val.isoformat()
-    if hasattr(val, "date") and callable(val.date):
-        return val.isoformat()
-    if hasattr(val, "id"):
-        return str(val.id)
-    return val
+    Writes at most once per ``ACCESS_TRACKING_INTERVAL`` per field, so
+    repeatedly opening the same report does not issue an UPDATE each time.
+    """
+    now = timezone.now()
+    threshold = now - ACCESS_TRACKING_INTERVAL
+    fields = ["last_accessed", "last_run"] if ran else ["last_accessed"]
+    updates = {}
+    for field in fields:
+        current = getattr(report, field)
+        if current is None or current < threshold:
+            updates[field] = now
+            setattr(report, field, now)
+    if updates:
+        Report.objects.filter(pk=report.pk).update(**updates)
+
+
+def execute_report(
+    report: Report, page: int = 1, page_size: int = 50, cursor: str = None
+):
+    """Execute a report and return paginated rows + metadata.
 
+    The report is compiled once per definition (see ``apps.reports.compiler``)
+    into a ``values()`` query, so only the selected columns are fetched and no
+    model instances are built.  Pass the ``next_cursor`` of a previous result
+    as ``cursor`` to fetch the following page by keyset; ``page`` is still
+    honoured (via OFFSET) when no cursor is given.  ``total`` is only counted
+    for the first request of a cursor walk.
 
-def execute_report(report: Report, page: int = 1, page_size: int = 50):
-    """Execute a report and return paginated rows + metadata.
+    Raises ``django.core.exceptions.ValidationError`` for a malformed cursor
+    or summary measure.
 
     Security: All field names (filters, sort, columns) are validated against
     the model's actual fields to prevent ORM injection attacks.
     """
-    model = _get_model(report.primary_module)
-    if model is None:
+    plan = compile_report(report)
+    if plan is None:
         return {"columns": [], "rows": [], "total": 0}
 
-    # Security: Build whitelist of valid field names for this model
-    valid_fields = _get_valid_field_names(model)
+    if plan.summary:
+        rows = [dict(zip(plan.columns, values)) for values in _summary_rows(plan)]
+        result = {
+            "columns": list(plan.columns),
+            "rows": rows,
+            "total": len(rows),
+            "page": 1,
+            "page_size": len(rows),
+            "next_cursor": None,
+        }
+    else:
+        qs = plan.queryset()
+        total, offset = None, 0
+        if cursor:
+            qs = plan.after(qs, decode_cursor(cursor))
+        else:
+            total = plan.count()
+            offset = max(page - 1, 0) * page_size
+
+        # One extra row tells us whether there is a next page
+        fetched = list(qs[offset : offset + page_size + 1])
+        has_more = len(fetched) > page_size
+        fetched = fetched[:page_size]
+
+        columns = ["id", *plan.columns]
+        rows = [dict(zip(columns, _tabular_row(plan, values))) for values in fetched]
+        next_cursor = plan.cursor_for(fetched[-1]) if has_more else None
+
+        result = {
+            "columns": list(plan.columns),
+            "rows": rows,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        }
 
-    qs = model.objects.all()
+    track_report_access(report, ran=True)
+    return result
 
-    # Apply user-defined filters (with field validation)
-    if report.filters:
-        qs = _apply_filters(qs, report.filters, valid_fields)
 
-    # Sorting (with field validation)
-    if report.sort_field and _is_safe_field_name(report.sort_field, valid_fields):
-        order = (
-            f"-{report.sort_field}"
-            if report.sort_order == "desc"
-            else report.sort_field
-        )
-        qs = qs.order_by(order)
+def run_report(report: Report, page: int = 1, page_size: int = 50, cursor: str = None):
+    """
+    Serve a report run, from its materialized snapshot when one is fresh.
 
-    total = qs.count()
+    Scheduled reports (``frequency`` other than ``none``) are precomputed by
+    ``apps.reports.tasks.materialize_scheduled_reports``; everything else,
+    and cursor-based pagination, runs live through ``execute_report``.
+    """
+    from apps.reports.snapshots import get_fresh_snapshot, snapshot_page
 
-    # Determine columns (with field validation)
-    if report.columns:
-        # Security: Filter to only valid field names
-        columns = [
-            col for col in report.columns if _is_safe_field_name(col, valid_fields)
-        ]
-    else:
-        # Default: use a sensible set of model fields
-        columns = [
-            f.name
-            for f in model._meta.get_fields()
-            if hasattr(f, "column") and not f.primary_key
-        ][:10]
-
-    # Paginate
-    offset = (page - 1) * page_size
-    rows_qs = qs[offset : offset + page_size]
-
-    rows = []
-    for obj in rows_qs:
-        row = {"id": str(obj.pk)}
-        for col in columns:
-            # Security: col is already validated above
-            try:
-                val = getattr(obj, col, None)
-                if callable(val) and not hasattr(val, "id"):
-                    val = val()
-                row[col] = _serialise_value(val)
-            except Exception as e:
-                logger.warning(
-                    f"Error retrieving field '{col}' from {obj.__class__.__name__} "
-                    f"(id={obj.pk}): {e}"
-                )
-                row[col] = None
-        rows.append(row)
-
-    # Update tracking
-    now = timezone.now()
-    Report.objects.filter(pk=report.pk).update(last_run=now, last_accessed=now)
+    snapshot = None if cursor else get_fresh_snapshot(report)
+    if snapshot is None:
+        return execute_report(report, page=page, page_size=page_size, cursor=cursor)
 
-    return {
-        "columns": columns,
-        "rows": rows,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-    }
+    track_report_access(report)
+    return snapshot_page(snapshot, page=page, page_size=page_size)
 
 
 def get_module_fields(primary_module: str):
@@ -230,7 +181,7 @@ def get_module_fields(primary_module: str):
 
     Used in report builder UI.
     """
-    model = _get_model(primary_module)
+    model = get_module_model(primary_module)
     if model is None:
         return []
 
@@ -0,0 +1,187 @@
+"""
+Materialized results for scheduled reports.
+
+A report with a ``frequency`` other than ``none`` is precomputed by the
+``materialize_scheduled_reports`` Celery task into a ``ReportSnapshot``.
+The full result is stored in chunks of ``CHUNK_ROWS`` rows, each one
+zlib-compressed JSON lines encrypted with the field encryption key (results
+may include PII).  ``run`` and the CSV/XLSX export serve that snapshot while
+it is fresh, so opening a heavy scheduled report does not re-scan the source
+tables, and a page only reads the chunks it covers.
+
+A snapshot is fresh while its ``definition_hash`` matches the report's
+current definition and it is younger than the report's frequency (plus
+``FRESHNESS_GRACE`` to cover the gap between task runs).
+"""
+
+import json
+import logging
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.encryption import decrypt_bytes, encrypt_bytes
+from apps.reports.compiler import compile_report, definition_hash
+from apps.reports.models import Report, ReportSnapshot, ReportSnapshotChunk
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_INTERVALS = {
+    Report.Frequency.DAILY: timedelta(days=1),
+    Report.Frequency.WEEKLY: timedelta(days=7),
+    Report.Frequency.MONTHLY: timedelta(days=31),
+}
+FRESHNESS_GRACE = timedelta(hours=2)
+COMPRESSION_LEVEL = 6
+
+# Rows per stored chunk
+CHUNK_ROWS = 500
+
+# Chunks loaded per query when reading a whole snapshot
+CHUNK_FETCH_SIZE = 20
+
+
+def _interval(report):
+    return FREQUENCY_INTERVALS.get(report.frequency)
+
+
+def get_fresh_snapshot(report):
+    """Return the snapshot ``run`` may serve for ``report``, or None."""
+    interval = _interval(report)
+    if interval is None:
+        return None
+    cutoff = timezone.now() - interval - FRESHNESS_GRACE
+    return ReportSnapshot.objects.filter(
+        report=report,
+        definition_hash=definition_hash(report),
+        generated_at__gte=cutoff,
+    ).first()
+
+
+def stale_scheduled_reports():
+    """Scheduled reports whose snapshot is missing, outdated or expired."""
+    reports = list(Report.objects.exclude(frequency=Report.Frequency.NONE))
+    generated = {
+        (report_id, digest): generated_at
+        for report_id, digest, generated_at in ReportSnapshot.objects.filter(
+            report__in=reports
+        ).values_list("report_id", "definition_hash", "generated_at")
+    }
+    now = timezone.now()
+    stale = []
+    for report in reports:
+        interval = _interval(report)
+        if interval is None:
+            continue
+        generated_at = generated.get((report.pk, definition_hash(report)))
+        if generated_at is None or generated_at <= now - interval:
+            stale.append(report)
+    return stale
+
+
+def materialize_report(report):
+    """
+    Compute ``report`` in full and store it as its current snapshot.
+
+    Snapshots of earlier definitions are removed.  Results longer than
+    ``REPORT_SNAPSHOT_MAX_ROWS`` are cut off and flagged ``truncated``.
+    """
+    from apps.reports.services import iter_report_rows
+
+    plan = compile_report(report)
+    if plan is None:
+        return None
+
+    started = time.monotonic()
+    max_rows = settings.REPORT_SNAPSHOT_MAX_ROWS
+    columns, rows = iter_report_rows(plan)
+    chunks, pending, row_count, truncated = [], [], 0, False
+    for row in rows:
+        if row_count >= max_rows:
+            truncated = True
+            break
+        pending.append(row)
+        row_count += 1
+        if len(pending) == CHUNK_ROWS:
+            chunks.append(_pack(pending))
+            pending = []
+    if pending:
+        chunks.append(_pack(pending))
+
+    now = timezone.now()
+    with transaction.atomic():
+        snapshot, _created = ReportSnapshot.objects.update_or_create(
+            report=report,
+            definition_hash=definition_hash(report),
+            defaults={
+                "columns": columns,
+                "row_count": row_count,
+                "truncated": truncated,
+                "generated_at": now,
+                "duration_ms": int((time.monotonic() - started) * 1000),
+            },
+        )
+        snapshot.chunks.all().delete()
+        ReportSnapshotChunk.objects.bulk_create(
+            ReportSnapshotChunk(snapshot=snapshot, index=index, data=data)
+            for index, data in enumerate(chunks)
+        )
+        ReportSnapshot.objects.filter(report=report).exclude(pk=snapshot.pk).delete()
+        Report.objects.filter(pk=report.pk).update(last_run=now)
+
+    if truncated:
+        logger.warning(f"Report {report.pk} snapshot truncated at {max_rows} rows")
+    return snapshot
+
+
+def _pack(rows):
+    data = b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+    return encrypt_bytes(zlib.compress(data, COMPRESSION_LEVEL))
+
+
+def _unpack(data):
+    lines = zlib.decompress(decrypt_bytes(bytes(data))).splitlines()
+    return [json.loads(line) for line in lines if line]
+
+
+def iter_snapshot_rows(snapshot):
+    """Yield the stored rows of ``snapshot`` one at a time."""
+    chunks = snapshot.chunks.order_by("index").values_list("data", flat=True)
+    for data in chunks.iterator(chunk_size=CHUNK_FETCH_SIZE):
+        yield from _unpack(data)
+
+
+def snapshot_page(snapshot, page: int = 1, page_size: int = 50):
+    """A ``run`` response for one page of ``snapshot``."""
+    columns = list(snapshot.columns)
+    tabular = columns[:1] == ["id"]
+    if not tabular:
+        # Summary results are returned whole, as execute_report does
+        page, page_size = 1, snapshot.row_count
+    start = max(page - 1, 0) * page_size
+    end = min(start + page_size, snapshot.row_count)
+    rows = []
+    if start < end:
+        first, last = start // CHUNK_ROWS, (end - 1) // CHUNK_ROWS
+        chunks = snapshot.chunks.filter(index__range=(first, last)).order_by("index")
+        offset = first * CHUNK_ROWS
+        for data in chunks.values_list("data", flat=True):
+            for values in _unpack(data):
+                if start <= offset < end:
+                    rows.append(dict(zip(columns, values)))
+                offset += 1
+
+    return {
+        "columns": columns[1:] if tabular else columns,
+        "rows": rows,
+        "total": snapshot.row_count,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": None,
+        "snapshot_generated_at": snapshot.generated_at.isoformat(),
+        "truncated": snapshot.truncated,
+    }
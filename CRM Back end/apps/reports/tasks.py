@@ -0,0 +1,45 @@
+"""
+Celery tasks for the reports app.
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def materialize_scheduled_reports():
+    """Dispatch materialization for scheduled reports with a stale snapshot."""
+    from apps.reports.snapshots import stale_scheduled_reports
+
+    for report in stale_scheduled_reports():
+        materialize_report.delay(str(report.pk))
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=300)
+def materialize_report(self, report_id: str):
+    """Precompute one report into a ReportSnapshot."""
+    from apps.reports.models import Report
+    from apps.reports.snapshots import materialize_report as materialize
+
+    try:
+        report = Report.objects.get(id=report_id)
+    except Report.DoesNotExist:
+        logger.warning("Report %s not found", report_id)
+        return
+
+    try:
+        snapshot = materialize(report)
+    except Exception as exc:
+        logger.exception("Failed to materialize report %s", report_id)
+        raise self.retry(exc=exc)
+
+    if snapshot is not None:
+        logger.info(
+            "Materialized report %s: %s rows in %sms",
+            report_id,
+            snapshot.row_count,
+            snapshot.duration_ms,
+        )
@@ -0,0 +1,165 @@
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from apps.cases.models import TaxCase
+from apps.reports import compiler
+from apps.reports.models import Report
+from apps.reports.services import execute_report
+from tests.factories import ContactFactory, TaxCaseFactory
+
+BASE = "/api/v1/reports/"
+
+
+def _report(**kwargs):
+    kwargs.setdefault("name", "Cases")
+    kwargs.setdefault("primary_module", "cases")
+    return Report.objects.create(**kwargs)
+
+
+@pytest.mark.django_db
+class TestProjection:
+    def test_selects_only_requested_columns(self):
+        TaxCaseFactory.create_batch(3)
+        report = _report(columns=["case_number", "status"])
+
+        result = execute_report(report)
+        assert result["columns"] == ["case_number", "status"]
+        assert result["total"] == 3
+        assert set(result["rows"][0]) == {"id", "case_number", "status"}
+
+    def test_unsafe_fields_are_dropped(self):
+        TaxCaseFactory()
+        report = _report(
+            columns=["case_number", "created_by__password", "contact.first_name"],
+            filters=[{"field": "created_by__password", "value": "x"}],
+            sort_field="contact__email",
+        )
+        result = execute_report(report)
+        assert result["columns"] == ["case_number"]
+        assert result["total"] == 1
+
+    def test_related_column_is_joined(self):
+        contact = ContactFactory(first_name="Ada")
+        TaxCaseFactory(contact=contact)
+        report = _report(
+            related_modules=["contacts"],
+            columns=["case_number", "contacts.first_name"],
+        )
+        result = execute_report(report)
+        assert result["rows"][0]["contacts.first_name"] == "Ada"
+
+    def test_single_query_without_model_instances(self, monkeypatch):
+        TaxCaseFactory.create_batch(5)
+        report = _report(
+            columns=["case_number", "estimated_fee"], sort_field="case_number"
+        )
+        compiler.compile_report(report)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("report rows must not build model instances")
+
+        monkeypatch.setattr(TaxCase, "from_db", classmethod(fail))
+        with CaptureQueriesContext(connection) as ctx:
+            result = execute_report(report)
+        # count + rows + last_run update
+        assert len(ctx.captured_queries) == 3
+        assert len(result["rows"]) == 5
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_cursor_walks_every_row_once(self):
+        for fee in ["10.00", "10.00", "20.00", "30.00", "30.00"]:
+            TaxCaseFactory(estimated_fee=Decimal(fee))
+        TaxCaseFactory(estimated_fee=None)
+        report = _report(
+            columns=["case_number", "estimated_fee"],
+            sort_field="estimated_fee",
+            sort_order="desc",
+        )
+
+        seen, cursor = [], None
+        while True:
+            result = execute_report(report, page_size=2, cursor=cursor)
+            seen.extend(row["id"] for row in result["rows"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == len(set(seen)) == 6
+        expected = list(
+            TaxCase.objects.order_by("-estimated_fee").values_list(
+                "estimated_fee", flat=True
+            )
+        )
+        fees = [TaxCase.objects.get(pk=pk).estimated_fee for pk in seen]
+        assert fees[:-1] == [fee for fee in expected if fee is not None]
+        assert fees[-1] is None
+
+    def test_page_param_still_supported(self):
+        TaxCaseFactory.create_batch(5)
+        report = _report(columns=["case_number"], sort_field="case_number")
+        first = execute_report(report, page=1, page_size=2)
+        third = execute_report(report, page=3, page_size=2)
+        assert len(third["rows"]) == 1
+        assert third["next_cursor"] is None
+        assert first["rows"][0]["id"] not in {r["id"] for r in third["rows"]}
+
+    def test_invalid_cursor(self, admin_client, admin_user):
+        report = _report(owner=admin_user, columns=["case_number"])
+        with pytest.raises(ValidationError):
+            execute_report(report, cursor="not-a-cursor")
+
+        resp = admin_client.get(f"{BASE}{report.id}/run/?cursor=not-a-cursor")
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestSummary:
+    def test_group_by_with_aggregate(self):
+        TaxCaseFactory(status="new", estimated_fee=Decimal("100.00"))
+        TaxCaseFactory(status="new", estimated_fee=Decimal("50.00"))
+        TaxCaseFactory(status="filed", estimated_fee=Decimal("25.00"))
+        report = _report(
+            report_type="summary",
+            chart_config={
+                "group_by": "status",
+                "measure": "estimated_fee",
+                "aggregate": "sum",
+            },
+        )
+
+        result = execute_report(report)
+        assert result["columns"] == ["status", "sum_estimated_fee"]
+        by_status = {row["status"]: row["sum_estimated_fee"] for row in result["rows"]}
+        assert by_status == {"new": 150.0, "filed": 25.0}
+
+    def test_count_without_group_by(self):
+        TaxCaseFactory.create_batch(4)
+        report = _report(report_type="summary", chart_config={})
+        assert execute_report(report)["rows"] == [{"count": 4}]
+
+    def test_invalid_measure(self):
+        report = _report(report_type="summary", chart_config={"measure": "nope"})
+        with pytest.raises(ValidationError):
+            execute_report(report)
+
+
+class TestPlanCache:
+    def test_identical_definitions_share_a_plan(self):
+        a = Report(name="A", primary_module="cases", columns=["status"])
+        b = Report(name="B", primary_module="cases", columns=["status"])
+        c = Report(name="C", primary_module="cases", columns=["priority"])
+        assert compiler.compile_report(a) is compiler.compile_report(b)
+        assert compiler.compile_report(a) is not compiler.compile_report(c)
+
+    def test_cursor_roundtrip(self):
+        assert compiler.decode_cursor(compiler.encode_cursor("2025-01-01", 7)) == (
+            "2025-01-01",
+            7,
+        )
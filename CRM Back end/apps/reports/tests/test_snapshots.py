@@ -0,0 +1,200 @@
+import io
+import zipfile
+from datetime import timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+import apps.core.encryption as encryption_module
+from apps.core.encryption import _NOT_INITIALIZED
+from apps.reports import snapshots
+from apps.reports.exports import iter_xlsx
+from apps.reports.models import Report, ReportSnapshot, ReportSnapshotChunk
+from apps.reports.snapshots import (
+    get_fresh_snapshot,
+    iter_snapshot_rows,
+    materialize_report,
+    snapshot_page,
+    stale_scheduled_reports,
+)
+from apps.reports.tasks import materialize_scheduled_reports
+from tests.factories import TaxCaseFactory
+
+BASE = "/api/v1/reports/"
+
+
+def _report(**kwargs):
+    kwargs.setdefault("name", "Daily cases")
+    kwargs.setdefault("primary_module", "cases")
+    kwargs.setdefault("frequency", Report.Frequency.DAILY)
+    kwargs.setdefault("columns", ["case_number", "status"])
+    kwargs.setdefault("sort_field", "case_number")
+    return Report.objects.create(**kwargs)
+
+
+@pytest.mark.django_db
+class TestMaterialization:
+    def test_snapshot_holds_full_result(self):
+        cases = TaxCaseFactory.create_batch(3)
+        report = _report()
+
+        snapshot = materialize_report(report)
+        assert snapshot.columns == ["id", "case_number", "status"]
+        assert snapshot.row_count == 3
+        rows = list(iter_snapshot_rows(snapshot))
+        assert [row[1] for row in rows] == sorted(c.case_number for c in cases)
+
+        report.refresh_from_db()
+        assert report.last_run == snapshot.generated_at
+
+    def test_row_limit_truncates(self, settings):
+        settings.REPORT_SNAPSHOT_MAX_ROWS = 2
+        TaxCaseFactory.create_batch(3)
+        snapshot = materialize_report(_report())
+        assert snapshot.row_count == 2
+        assert snapshot.truncated
+
+    def test_rows_are_stored_in_encrypted_chunks(self, settings, monkeypatch):
+        settings.FIELD_ENCRYPTION_KEY = Fernet.generate_key().decode()
+        monkeypatch.setattr(encryption_module, "_fernet_instance", _NOT_INITIALIZED)
+        monkeypatch.setattr(snapshots, "CHUNK_ROWS", 2)
+        cases = TaxCaseFactory.create_batch(5)
+
+        snapshot = materialize_report(_report())
+        chunks = list(snapshot.chunks.values_list("index", "data"))
+        assert [index for index, _data in chunks] == [0, 1, 2]
+        for _index, data in chunks:
+            assert bytes(data).startswith(b"gAAAAA")
+            assert cases[0].case_number.encode() not in bytes(data)
+        rows = list(iter_snapshot_rows(snapshot))
+        assert [row[1] for row in rows] == sorted(c.case_number for c in cases)
+
+    def test_page_reads_only_its_chunks(self, monkeypatch):
+        monkeypatch.setattr(snapshots, "CHUNK_ROWS", 2)
+        cases = TaxCaseFactory.create_batch(5)
+        snapshot = materialize_report(_report())
+        ReportSnapshotChunk.objects.filter(snapshot=snapshot, index=0).update(
+            data=b"not read"
+        )
+
+        result = snapshot_page(snapshot, page=2, page_size=2)
+        assert [row["case_number"] for row in result["rows"]] == sorted(
+            c.case_number for c in cases
+        )[2:4]
+        assert snapshot_page(snapshot, page=4, page_size=2)["rows"] == []
+
+    def test_definition_change_invalidates(self):
+        report = _report()
+        materialize_report(report)
+        assert get_fresh_snapshot(report) is not None
+
+        report.columns = ["case_number"]
+        report.save()
+        assert get_fresh_snapshot(report) is None
+
+        materialize_report(report)
+        assert ReportSnapshot.objects.filter(report=report).count() == 1
+
+    def test_expired_snapshot_is_not_served(self):
+        report = _report()
+        snapshot = materialize_report(report)
+        snapshot.generated_at = timezone.now() - timedelta(days=2)
+        snapshot.save()
+        assert get_fresh_snapshot(report) is None
+        assert report in stale_scheduled_reports()
+
+    def test_task_materializes_only_stale_reports(self):
+        TaxCaseFactory()
+        scheduled = _report()
+        unscheduled = _report(frequency=Report.Frequency.NONE)
+
+        materialize_scheduled_reports()
+        assert ReportSnapshot.objects.filter(report=scheduled).exists()
+        assert not ReportSnapshot.objects.filter(report=unscheduled).exists()
+        assert stale_scheduled_reports() == []
+
+
+@pytest.mark.django_db
+class TestServing:
+    def test_run_serves_fresh_snapshot(self, admin_client, admin_user):
+        TaxCaseFactory.create_batch(3)
+        report = _report(owner=admin_user)
+        materialize_report(report)
+        TaxCaseFactory()  # not in the snapshot
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = admin_client.get(f"{BASE}{report.id}/run/?page=1&page_size=2")
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.data["columns"] == ["case_number", "status"]
+        assert resp.data["total"] == 3
+        assert len(resp.data["rows"]) == 2
+        assert resp.data["snapshot_generated_at"]
+        assert not any("crm_tax_cases" in q["sql"] for q in ctx.captured_queries)
+
+    def test_unscheduled_report_runs_live(self, admin_client, admin_user):
+        TaxCaseFactory.create_batch(2)
+        report = _report(owner=admin_user, frequency=Report.Frequency.NONE)
+        resp = admin_client.get(f"{BASE}{report.id}/run/")
+        assert resp.data["total"] == 2
+        assert "snapshot_generated_at" not in resp.data
+
+    def test_access_tracking_is_throttled(self, admin_client, admin_user):
+        report = _report(owner=admin_user, frequency=Report.Frequency.NONE)
+        admin_client.get(f"{BASE}{report.id}/run/")
+        report.refresh_from_db()
+        first_access = report.last_accessed
+        assert first_access is not None
+
+        admin_client.get(f"{BASE}{report.id}/run/")
+        report.refresh_from_db()
+        assert report.last_accessed == first_access
+
+    def test_csv_export_streams_snapshot(self, admin_client, admin_user):
+        TaxCaseFactory.create_batch(2)
+        report = _report(owner=admin_user)
+        materialize_report(report)
+
+        resp = admin_client.get(f"{BASE}{report.id}/export/")
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.streaming
+        assert resp["Content-Type"] == "text/csv"
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        assert lines[0] == "id,case_number,status"
+        assert len(lines) == 3
+
+    def test_export_requires_export_permission(self, authenticated_client):
+        report = _report(frequency=Report.Frequency.NONE)
+
+        resp = authenticated_client.get(f"{BASE}{report.id}/export/")
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+        resp = authenticated_client.get(f"{BASE}{report.id}/export/?async=true")
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_xlsx_export(self, admin_client, admin_user):
+        TaxCaseFactory.create_batch(2)
+        report = _report(owner=admin_user, frequency=Report.Frequency.NONE)
+
+        resp = admin_client.get(f"{BASE}{report.id}/export/?file_format=xlsx")
+        assert resp.status_code == status.HTTP_200_OK
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+        assert sheet.count("<row>") == 3
+
+    def test_unknown_export_format(self, admin_client, admin_user):
+        report = _report(owner=admin_user)
+        resp = admin_client.get(f"{BASE}{report.id}/export/?file_format=pdf")
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestXlsxWriter:
+    def test_escapes_and_types(self):
+        data = b"".join(iter_xlsx(["name", "n"], [["<a & b>", 3], [None, 1.5]]))
+        sheet = zipfile.ZipFile(io.BytesIO(data)).read("xl/worksheets/sheet1.xml")
+        assert b"&lt;a &amp; b&gt;" in sheet
+        assert b"<c><v>3</v></c>" in sheet
+        assert b"<c/>" in sheet
@@ -1,11 +1,15 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Count
-from django.utils import timezone
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.core.exports import start_export_job
+from apps.reports.exporters import report_rows
+from apps.reports.exports import EXPORT_FORMATS, export_response
 from apps.reports.models import Report, ReportFolder
 from apps.reports.serializers import (
     ReportCreateUpdateSerializer,
@@ -14,7 +18,13 @@ from apps.reports.serializers import (
     ReportFolderSerializer,
     ReportListSerializer,
 )
-from apps.reports.services import execute_report, get_module_fields
+from apps.reports.services import (
+    get_module_fields,
+    run_report,
+    track_report_access,
+)
+from apps.reports.tasks import materialize_report
+from apps.users.permissions import has_action_permission
 
 
 class ReportFolderViewSet(viewsets.ModelViewSet):
@@ -73,24 +83,76 @@ class ReportViewSet(viewsets.ModelViewSet):
         return ReportListSerializer
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        report = serializer.save(owner=self.request.user)
+        self._schedule_materialization(report)
+
+    def perform_update(self, serializer):
+        report = serializer.save()
+        self._schedule_materialization(report)
+
+    @staticmethod
+    def _schedule_materialization(report):
+        # Rebuild the snapshot for the new definition instead of waiting
+        # for the next hourly pass
+        if report.frequency != Report.Frequency.NONE:
+            report_id = str(report.pk)
+            transaction.on_commit(lambda: materialize_report.delay(report_id))
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Track access
-        Report.objects.filter(pk=instance.pk).update(last_accessed=timezone.now())
+        track_report_access(instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     @action(detail=True, methods=["get"])
     def run(self, request, pk=None):
-        """Execute the report and return paginated results."""
+        """
+        Return paginated results, from the report's materialized snapshot
+        when it is scheduled and the snapshot is fresh.
+        """
         report = self.get_object()
         page = int(request.query_params.get("page", 1))
         page_size = int(request.query_params.get("page_size", 50))
-        result = execute_report(report, page=page, page_size=page_size)
+        cursor = request.query_params.get("cursor") or None
+        try:
+            result = run_report(report, page=page, page_size=page_size, cursor=cursor)
+        except DjangoValidationError as e:
+            return Response(
+                {"detail": " ".join(e.messages)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         return Response(result)
 
+    @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        """
+        Stream the full report as CSV or XLSX (``?file_format=xlsx``).
+
+        With ``?async=true`` the file is written in the background instead;
+        the response is 202 with an export job to poll at
+        ``/api/v1/exports/<id>/``.
+        """
+        report = self.get_object()
+        if not has_action_permission(request.user, "reports", "export"):
+            return Response(
+                {"detail": "You do not have export permission."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"file_format must be one of {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        track_report_access(report)
+        if request.query_params.get("async", "").lower() in ("1", "true"):
+            return start_export_job(
+                request, "reports", file_format, params={"report_id": str(report.pk)}
+            )
+        header, rows = report_rows(report)
+        return export_response(report.name, header, rows, file_format=file_format)
+
 
 class ModuleFieldsView(APIView):
     """Return available fields for a given primary module (for report builder)."""
@@ -2,6 +2,7 @@
 Analytics service functions for Sales Insights.
 Queries TaxCase, Task, and Appointment models to produce
 time-series and aggregate data for the Sales Insights dashboard.
+Case counts by creation date are read from the dashboard KPI rollups.
 """
 
 from datetime import date, timedelta
@@ -14,6 +15,7 @@ from django.db.models.functions import (
 
 from apps.appointments.models import Appointment
 from apps.cases.models import TaxCase
+from apps.dashboard import kpis
 from apps.tasks.models import Task
 
 
@@ -55,6 +57,16 @@ def _format_label(dt, group_by):
     return dt.strftime("%b %Y")
 
 
+def _case_filters(user_id=None, case_type=None):
+    """KPI rollup filters for the optional preparer / case type parameters."""
+    filters = {}
+    if user_id:
+        filters["preparer_id"] = str(user_id)
+    if case_type:
+        filters["case_type"] = case_type
+    return filters
+
+
 def _base_filters(
     qs, date_from, date_to, date_field, user_id=None, user_field="assigned_to"
 ):
@@ -218,30 +230,22 @@ def get_cases_added(
 ):
     """Count of cases created per time period."""
     date_from, date_to = _parse_dates(date_from, date_to)
-    trunc_fn, _ = _trunc_and_label(group_by)
+    bucket = "week" if group_by == "weekly" else "month"
 
-    qs = TaxCase.objects.filter(
-        created_at__date__gte=date_from, created_at__date__lte=date_to
-    )
-    if user_id:
-        qs = qs.filter(assigned_preparer=user_id)
-    if case_type:
-        qs = qs.filter(case_type=case_type)
-
-    rows_qs = (
-        qs.annotate(period=trunc_fn("created_at"))
-        .values("period")
-        .annotate(count=Count("id"))
-        .order_by("period")
+    totals = kpis.case_totals(
+        date_from,
+        date_to,
+        group_by=(bucket,),
+        **_case_filters(user_id, case_type),
     )
     rows = []
     total = 0
-    for r in rows_qs:
+    for r in sorted(totals, key=lambda r: r[bucket]):
         total += r["count"]
         rows.append(
             {
-                "period": _format_period(r["period"], group_by),
-                "label": _format_label(r["period"], group_by),
+                "period": _format_period(r[bucket], group_by),
+                "label": _format_label(r[bucket], group_by),
                 "count": r["count"],
             }
         )
@@ -252,33 +256,23 @@ def get_cases_added(
 def get_pipeline_value(date_from=None, date_to=None, user_id=None, case_type=None):
     """Sum of estimated_fee grouped by case status (pipeline stages)."""
     date_from, date_to = _parse_dates(date_from, date_to)
-    qs = TaxCase.objects.filter(
-        created_at__date__gte=date_from, created_at__date__lte=date_to
+    totals = kpis.case_totals(
+        date_from,
+        date_to,
+        group_by=("status",),
+        **_case_filters(user_id, case_type),
     )
-    if user_id:
-        qs = qs.filter(assigned_preparer=user_id)
-    if case_type:
-        qs = qs.filter(case_type=case_type)
 
     STATUS_LABELS = dict(TaxCase.Status.choices)
-    rows_qs = (
-        qs.values("status")
-        .annotate(
-            count=Count("id"),
-            estimated=Sum("estimated_fee"),
-            actual=Sum("actual_fee"),
-        )
-        .order_by("status")
-    )
     rows = []
-    for r in rows_qs:
+    for r in sorted(totals, key=lambda r: r["status"]):
         rows.append(
             {
                 "status": r["status"],
                 "label": STATUS_LABELS.get(r["status"], r["status"]),
                 "count": r["count"],
-                "estimated": float(r["estimated"] or 0),
-                "actual": float(r["actual"] or 0),
+                "estimated": float(r["estimated"]),
+                "actual": float(r["actual"]),
             }
         )
 
@@ -338,20 +332,17 @@ def get_pipeline_activity(
 def get_funnel_progression(date_from=None, date_to=None, user_id=None, case_type=None):
     """Case count per status — shows pipeline funnel."""
     date_from, date_to = _parse_dates(date_from, date_to)
-    qs = TaxCase.objects.filter(
-        created_at__date__gte=date_from, created_at__date__lte=date_to
+    totals = kpis.case_totals(
+        date_from,
+        date_to,
+        group_by=("status",),
+        **_case_filters(user_id, case_type),
     )
-    if user_id:
-        qs = qs.filter(assigned_preparer=user_id)
-    if case_type:
-        qs = qs.filter(case_type=case_type)
 
     STATUS_ORDER = [s[0] for s in TaxCase.Status.choices]
     STATUS_LABELS = dict(TaxCase.Status.choices)
 
-    counts = dict(
-        qs.values("status").annotate(count=Count("id")).values_list("status", "count")
-    )
+    counts = {r["status"]: r["count"] for r in totals}
     rows = []
     for s in STATUS_ORDER:
         rows.append(
@@ -368,26 +359,19 @@ def get_funnel_progression(date_from=None, date_to=None, user_id=None, case_type
 def get_product_pipeline(date_from=None, date_to=None, user_id=None):
     """Case count and value grouped by case_type."""
     date_from, date_to = _parse_dates(date_from, date_to)
-    qs = TaxCase.objects.filter(
-        created_at__date__gte=date_from, created_at__date__lte=date_to
+    totals = kpis.case_totals(
+        date_from, date_to, group_by=("case_type",), **_case_filters(user_id)
     )
-    if user_id:
-        qs = qs.filter(assigned_preparer=user_id)
 
     TYPE_LABELS = dict(TaxCase.CaseType.choices)
-    rows_qs = (
-        qs.values("case_type")
-        .annotate(count=Count("id"), estimated=Sum("estimated_fee"))
-        .order_by("-count")
-    )
     rows = []
-    for r in rows_qs:
+    for r in sorted(totals, key=lambda r: -r["count"]):
         rows.append(
             {
                 "case_type": r["case_type"],
                 "label": TYPE_LABELS.get(r["case_type"], r["case_type"]),
                 "count": r["count"],
-                "estimated": float(r["estimated"] or 0),
+                "estimated": float(r["estimated"]),
             }
         )
 
@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.dashboard import kpis
 from apps.sales_insights.services import (
     get_activities_added,
     get_activities_completed,
@@ -32,6 +33,13 @@ class _BaseInsightView(APIView):
         case_type = request.query_params.get("case_type") or None
         return date_from, date_to, group_by, user_id, case_type
 
+    def _respond(self, service, *args):
+        """``service(*args)``, cached until the underlying records change."""
+        data = kpis.cached(
+            f"sales_insights.{service.__name__}", args, lambda: service(*args)
+        )
+        return Response(data)
+
 
 # ---------------------------------------------------------------------------
 # Activity Reports
@@ -39,22 +47,23 @@ class _BaseInsightView(APIView):
 class ActivitiesAddedView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, _ = self._params(request)
-        data = get_activities_added(date_from, date_to, group_by, user_id)
-        return Response(data)
+        return self._respond(
+            get_activities_added, date_from, date_to, group_by, user_id
+        )
 
 
 class ActivitiesCompletedView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, _ = self._params(request)
-        data = get_activities_completed(date_from, date_to, group_by, user_id)
-        return Response(data)
+        return self._respond(
+            get_activities_completed, date_from, date_to, group_by, user_id
+        )
 
 
 class ActivityEfficiencyView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, _ = self._params(request)
-        data = get_activity_efficiency(date_from, date_to, user_id)
-        return Response(data)
+        return self._respond(get_activity_efficiency, date_from, date_to, user_id)
 
 
 # ---------------------------------------------------------------------------
@@ -63,36 +72,37 @@ class ActivityEfficiencyView(_BaseInsightView):
 class CasesAddedView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, case_type = self._params(request)
-        data = get_cases_added(date_from, date_to, group_by, user_id, case_type)
-        return Response(data)
+        return self._respond(
+            get_cases_added, date_from, date_to, group_by, user_id, case_type
+        )
 
 
 class PipelineValueView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, case_type = self._params(request)
-        data = get_pipeline_value(date_from, date_to, user_id, case_type)
-        return Response(data)
+        return self._respond(get_pipeline_value, date_from, date_to, user_id, case_type)
 
 
 class PipelineActivityView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, _ = self._params(request)
-        data = get_pipeline_activity(date_from, date_to, group_by, user_id)
-        return Response(data)
+        return self._respond(
+            get_pipeline_activity, date_from, date_to, group_by, user_id
+        )
 
 
 class FunnelProgressionView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, case_type = self._params(request)
-        data = get_funnel_progression(date_from, date_to, user_id, case_type)
-        return Response(data)
+        return self._respond(
+            get_funnel_progression, date_from, date_to, user_id, case_type
+        )
 
 
 class ProductPipelineView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, _ = self._params(request)
-        data = get_product_pipeline(date_from, date_to, user_id)
-        return Response(data)
+        return self._respond(get_product_pipeline, date_from, date_to, user_id)
 
 
 # ---------------------------------------------------------------------------
@@ -101,26 +111,22 @@ class ProductPipelineView(_BaseInsightView):
 class ClosedVsGoalsView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, _ = self._params(request)
-        data = get_closed_vs_goals(date_from, date_to, group_by, user_id)
-        return Response(data)
+        return self._respond(get_closed_vs_goals, date_from, date_to, group_by, user_id)
 
 
 class ProductRevenueView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, _ = self._params(request)
-        data = get_product_revenue(date_from, date_to, user_id)
-        return Response(data)
+        return self._respond(get_product_revenue, date_from, date_to, user_id)
 
 
 class SalesCycleDurationView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, _, user_id, _ = self._params(request)
-        data = get_sales_cycle_duration(date_from, date_to, user_id)
-        return Response(data)
+        return self._respond(get_sales_cycle_duration, date_from, date_to, user_id)
 
 
 class LostDealsView(_BaseInsightView):
     def get(self, request):
         date_from, date_to, group_by, user_id, _ = self._params(request)
-        data = get_lost_deals(date_from, date_to, group_by, user_id)
-        return Response(data)
+        return self._respond(get_lost_deals, date_from, date_to, group_by, user_id)
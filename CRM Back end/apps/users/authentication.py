@@ -12,6 +12,10 @@ Security features:
 - Short-lived access tokens (30 min) with longer refresh tokens (1 day)
 """
 
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+
 from django.conf import settings
 from rest_framework import exceptions
 from rest_framework_simplejwt.authentication import JWTAuthentication
@@ -21,6 +25,52 @@ from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 ACCESS_TOKEN_COOKIE = "access_token"
 REFRESH_TOKEN_COOKIE = "refresh_token"
 
+# Attribute on the Django HttpRequest holding the memoized JWT context
+_JWT_CONTEXT_ATTR = "_jwt_context"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JWTContext:
+    """Result of decoding the Authorization header once per request."""
+
+    raw_token: Optional[str] = None
+    user: Any = None
+    token: Any = None
+
+
+def get_request_jwt_context(request) -> JWTContext:
+    """
+    Decode the Bearer token of ``request`` once and memoize the result.
+
+    The security middleware chain and ``CookieJWTAuthentication`` all need the
+    authenticated user; verifying the signature and loading the user for each
+    of them repeats the same work, so the first caller stores the outcome on
+    the underlying HttpRequest and later callers reuse it.
+    """
+    request = getattr(request, "_request", request)
+    context = getattr(request, _JWT_CONTEXT_ATTR, None)
+    if context is not None:
+        return context
+
+    context = JWTContext()
+    auth_header = request.META.get("HTTP_AUTHORIZATION", "")
+    if auth_header.startswith("Bearer "):
+        raw_token = auth_header.split(" ", 1)[1]
+        try:
+            jwt_auth = JWTAuthentication()
+            validated_token = jwt_auth.get_validated_token(raw_token)
+            user = jwt_auth.get_user(validated_token)
+            context = JWTContext(raw_token=raw_token, user=user, token=validated_token)
+        except Exception as e:
+            # Expected for expired/invalid tokens - log at debug level
+            logger.debug(f"JWT validation failed: {type(e).__name__}")
+            context = JWTContext(raw_token=raw_token)
+
+    setattr(request, _JWT_CONTEXT_ATTR, context)
+    return context
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     """
@@ -38,6 +88,10 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         # If no cookie, fall back to Authorization header (for mobile/API clients)
         if not raw_token:
+            # Reuse the token the security middleware already decoded
+            context = get_request_jwt_context(request)
+            if context.user is not None:
+                return (context.user, context.token)
             return super().authenticate(request)
 
         # Validate the token from cookie
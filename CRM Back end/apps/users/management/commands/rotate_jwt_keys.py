@@ -163,6 +163,7 @@ class Command(BaseCommand):
             )
 
             from apps.users.models import UserSession
+            from apps.users.services.session_state import deactivate_sessions
 
             # Blacklist all outstanding tokens
             outstanding = OutstandingToken.objects.all()
@@ -172,9 +173,7 @@ class Command(BaseCommand):
                 count += 1
 
             # Deactivate all user sessions
-            sessions_count = UserSession.objects.filter(is_active=True).update(
-                is_active=False
-            )
+            sessions_count = deactivate_sessions(UserSession.objects.all())
 
             self.stdout.write(
                 self.style.SUCCESS(
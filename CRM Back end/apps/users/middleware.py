@@ -2,57 +2,61 @@ import logging
 
 from django.http import JsonResponse
 from django.utils import timezone
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from apps.core.utils import get_client_ip
+from apps.users.authentication import get_request_jwt_context
+from apps.users.services.blocked_requests import record_blocked_request
+from apps.users.services.ip_rules import get_ip_rules
+from apps.users.services.session_state import (
+    get_authentication_policy,
+    get_last_activity,
+    get_session_state,
+    invalidate_session_state,
+    record_session_activity,
+)
 
 logger = logging.getLogger(__name__)
 
 
 def _get_jwt_user_and_token(request):
-    """Extract JWT user and validated token from the Authorization header."""
-    auth_header = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth_header.startswith("Bearer "):
-        return None, None
-    try:
-        jwt_auth = JWTAuthentication()
-        validated_token = jwt_auth.get_validated_token(auth_header.split(" ", 1)[1])
-        user = jwt_auth.get_user(validated_token)
-        return user, validated_token
-    except Exception as e:
-        # Expected for expired/invalid tokens - log at debug level
-        logger.debug(f"JWT validation failed: {type(e).__name__}")
-        return None, None
+    """
+    Extract JWT user and validated token from the Authorization header.
+
+    The result is memoized on the request (see ``get_request_jwt_context``) so
+    the middleware chain and DRF authentication decode the token only once.
+    """
+    context = get_request_jwt_context(request)
+    return context.user, context.token
 
 
 class BlockedIPMiddleware:
     """
     Checks if the client IP is in the blocked IP list.
     Returns 403 if the IP is blocked.
+
+    Matching uses the compiled in-process rules (no DB query per request) and
+    rejections are logged through a batched write buffer.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        from apps.users.models import BlockedIP
-
         client_ip = get_client_ip(request)
-        blocked_entries = BlockedIP.objects.filter(is_active=True)
-
-        for entry in blocked_entries:
-            if entry.matches(client_ip):
-                # Log the blocked request
-                self._log_blocked_request(entry, request, client_ip)
-                return JsonResponse(
-                    {"detail": "Access denied: Your IP address has been blocked."},
-                    status=403,
-                )
+        blocked_ip_id = get_ip_rules().blocked_entry_id(client_ip)
+
+        if blocked_ip_id is not None:
+            # Log the blocked request
+            self._log_blocked_request(blocked_ip_id, request, client_ip)
+            return JsonResponse(
+                {"detail": "Access denied: Your IP address has been blocked."},
+                status=403,
+            )
 
         return self.get_response(request)
 
-    def _log_blocked_request(self, blocked_ip, request, client_ip):
-        """Create a log entry for the blocked request."""
+    def _log_blocked_request(self, blocked_ip_id, request, client_ip):
+        """Queue a log entry for the blocked request."""
         from apps.users.models import BlockedIPLog
 
         # Determine request type
@@ -66,19 +70,13 @@ class BlockedIPMiddleware:
         else:
             request_type = BlockedIPLog.RequestType.OTHER
 
-        # Create log entry
-        try:
-            BlockedIPLog.objects.create(
-                blocked_ip=blocked_ip,
-                ip_address=client_ip,
-                request_type=request_type,
-                request_path=path[:500],
-                user_agent=request.META.get("HTTP_USER_AGENT", "")[:1000],
-            )
-            # Increment counter
-            blocked_ip.increment_blocked_count()
-        except Exception as e:
-            logger.warning(f"Failed to log blocked IP request: {e}")
+        record_blocked_request(
+            blocked_ip_id,
+            client_ip,
+            request_type,
+            path,
+            request.META.get("HTTP_USER_AGENT", ""),
+        )
 
 
 class IPWhitelistMiddleware:
@@ -97,22 +95,12 @@ class IPWhitelistMiddleware:
         if user is None:
             user = getattr(request, "user", None)
         if user and getattr(user, "is_authenticated", False):
-            from django.db.models import Q
-
-            from apps.users.models import LoginIPWhitelist
-
-            q = Q(is_active=True)
-            role_q = Q(role=user.role) if user.role_id else Q()
-            user_q = Q(user=user)
-            entries = LoginIPWhitelist.objects.filter(q & (role_q | user_q))
-
-            if entries.exists():
-                client_ip = get_client_ip(request)
-                if not any(entry.matches(client_ip) for entry in entries):
-                    return JsonResponse(
-                        {"detail": "Access denied: IP address not allowed."},
-                        status=403,
-                    )
+            client_ip = get_client_ip(request)
+            if not get_ip_rules().is_allowed_for(user, client_ip):
+                return JsonResponse(
+                    {"detail": "Access denied: IP address not allowed."},
+                    status=403,
+                )
 
         return self.get_response(request)
 
@@ -147,15 +135,12 @@ class SessionTimeoutMiddleware:
         if user and token:
             jti = token.get("jti")
             if jti:
-                from apps.users.models import AuthenticationPolicy, UserSession
-
-                try:
-                    session = UserSession.objects.get(jti=jti, is_active=True)
-                except UserSession.DoesNotExist:
-                    # No tracked session — allow through
+                session = get_session_state(jti)
+                if session is None or not session["is_active"]:
+                    # No tracked active session — allow through
                     return self.get_response(request)
 
-                policy = AuthenticationPolicy.load()
+                policy = get_authentication_policy()
                 now = timezone.now()
 
                 # Check absolute session duration (prevents indefinite session extension)
@@ -163,9 +148,8 @@ class SessionTimeoutMiddleware:
                     max_duration = timezone.timedelta(
                         hours=policy.max_session_duration_hours
                     )
-                    if now - session.created_at > max_duration:
-                        session.is_active = False
-                        session.save(update_fields=["is_active"])
+                    if now - session["created_at"] > max_duration:
+                        self._expire(session, jti)
                         return JsonResponse(
                             {
                                 "detail": "Session expired: maximum session duration exceeded. Please log in again."
@@ -173,27 +157,38 @@ class SessionTimeoutMiddleware:
                             status=401,
                         )
 
-                # Check idle timeout
+                # Check idle timeout against the latest recorded activity
                 idle_limit = timezone.timedelta(
                     minutes=policy.idle_session_timeout_minutes
                 )
-                if now - session.last_activity > idle_limit:
-                    session.is_active = False
-                    session.save(update_fields=["is_active"])
+                last_activity = get_last_activity(jti, session)
+                if now - last_activity > idle_limit:
+                    self._expire(session, jti)
                     return JsonResponse(
                         {"detail": "Session expired due to inactivity."},
                         status=401,
                     )
 
-                # Only update last_activity for paths that indicate real user activity
-                # Exclude token refresh and timeout-check endpoints
+                # Only record activity for paths that indicate real user activity
+                # Exclude token refresh and timeout-check endpoints.  Activity is
+                # persisted in bulk by flush_session_activity.
                 if not any(
                     request.path.startswith(path) for path in self.EXCLUDED_PATHS
                 ):
-                    session.save(update_fields=["last_activity"])
+                    record_session_activity(
+                        jti, now, policy.idle_session_timeout_minutes, last_activity
+                    )
 
         return self.get_response(request)
 
+    @staticmethod
+    def _expire(session, jti):
+        """Deactivate a timed-out session and drop its cached state."""
+        from apps.users.models import UserSession
+
+        UserSession.objects.filter(pk=session["id"]).update(is_active=False)
+        invalidate_session_state(jti)
+
 
 class ConcurrentSessionMiddleware:
     """
@@ -210,14 +205,11 @@ class ConcurrentSessionMiddleware:
         if user and token:
             jti = token.get("jti")
             if jti:
-                from apps.users.models import UserSession
-
-                try:
-                    session = UserSession.objects.get(jti=jti)
-                except UserSession.DoesNotExist:
+                session = get_session_state(jti)
+                if session is None:
                     return self.get_response(request)
 
-                if not session.is_active:
+                if not session["is_active"]:
                     return JsonResponse(
                         {
                             "detail": "Session terminated: concurrent session limit exceeded."
@@ -0,0 +1,81 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_role_closure(apps, schema_editor):
+    Role = apps.get_model("users", "Role")
+    RoleClosure = apps.get_model("users", "RoleClosure")
+
+    parents = dict(Role.objects.values_list("pk", "parent_id"))
+    rows = []
+    for role_id in parents:
+        current, depth, seen = role_id, 0, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(
+                RoleClosure(ancestor_id=current, descendant_id=role_id, depth=depth)
+            )
+            current = parents.get(current)
+            depth += 1
+    RoleClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0015_add_max_session_duration_hours"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoleClosure",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "depth",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="depth"),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="users.role",
+                        verbose_name="ancestor",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="users.role",
+                        verbose_name="descendant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "role closure",
+                "verbose_name_plural": "role closures",
+                "db_table": "crm_role_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="crm_role_cl_desc_depth_idx",
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(populate_role_closure, migrations.RunPython.noop),
+    ]
@@ -150,39 +150,75 @@ class Role(models.Model):
 
     def get_ancestors(self):
         """Return list of ancestor roles from immediate parent to root."""
-        ancestors = []
-        current = self.parent
-        visited = set()
-        while current and current.pk not in visited:
-            ancestors.append(current)
-            visited.add(current.pk)
-            current = current.parent
-        return ancestors
+        return list(
+            Role.objects.filter(
+                descendant_links__descendant=self,
+                descendant_links__depth__gt=0,
+            ).order_by("descendant_links__depth")
+        )
 
     def get_descendants(self):
-        """Return flat list of all descendant roles (BFS)."""
-        descendants = []
-        queue = list(self.children.all())
-        visited = {self.pk}
-        while queue:
-            role = queue.pop(0)
-            if role.pk in visited:
-                continue
-            visited.add(role.pk)
-            descendants.append(role)
-            queue.extend(role.children.all())
-        return descendants
+        """Return flat list of all descendant roles, nearest first."""
+        return list(
+            Role.objects.filter(
+                ancestor_links__ancestor=self,
+                ancestor_links__depth__gt=0,
+            ).order_by("ancestor_links__depth", "name")
+        )
 
     def get_subordinate_user_ids(self):
         """Return user IDs from this role and all descendant roles."""
         from apps.users.models import User
 
-        role_ids = [self.pk] + [r.pk for r in self.get_descendants()]
         return list(
-            User.objects.filter(role_id__in=role_ids).values_list("id", flat=True)
+            User.objects.filter(role__ancestor_links__ancestor=self).values_list(
+                "id", flat=True
+            )
         )
 
 
+# ---------------------------------------------------------------------------
+# Role Closure
+# ---------------------------------------------------------------------------
+class RoleClosure(models.Model):
+    """
+    Transitive closure of the role tree: one row per (ancestor, descendant)
+    pair, including each role paired with itself at depth 0.
+
+    Maintained incrementally by ``apps.users.services.role_hierarchy`` when
+    a role is created or its parent changes.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ancestor = models.ForeignKey(
+        Role,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        verbose_name=_("ancestor"),
+    )
+    descendant = models.ForeignKey(
+        Role,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+        verbose_name=_("descendant"),
+    )
+    depth = models.PositiveSmallIntegerField(_("depth"), default=0)
+
+    class Meta:
+        db_table = "crm_role_closure"
+        unique_together = ("ancestor", "descendant")
+        indexes = [
+            models.Index(
+                fields=["descendant", "depth"], name="crm_role_cl_desc_depth_idx"
+            ),
+        ]
+        verbose_name = _("role closure")
+        verbose_name_plural = _("role closures")
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
+
 # ---------------------------------------------------------------------------
 # Module Permission
 # ---------------------------------------------------------------------------
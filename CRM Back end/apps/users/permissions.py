@@ -1,7 +1,9 @@
 from rest_framework.permissions import BasePermission
 
-from apps.users.models import ModulePermission as ModulePermissionModel
-from apps.users.models import Role
+from apps.users.services.permission_matrix import (
+    get_permission_matrix,
+    is_admin_user,
+)
 
 # Map custom action names to permission fields
 ACTION_PERM_MAP = {
@@ -17,21 +19,30 @@ def has_action_permission(user, module_name, action_name):
     """
     if not user or not user.is_authenticated:
         return False
-    if user.is_superuser:
-        return True
-    if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+    if is_admin_user(user):
         return True
 
     perm_field = ACTION_PERM_MAP.get(action_name)
     if perm_field is None:
         return False
 
-    try:
-        perm = ModulePermissionModel.objects.get(role=user.role, module=module_name)
-    except ModulePermissionModel.DoesNotExist:
+    return get_permission_matrix().has_permission(user.role_id, module_name, perm_field)
+
+
+def has_view_permission(user, module_name):
+    """
+    Check whether *user* may view *module_name* (active module and
+    ``can_view``), as ``ModulePermission`` does for GET requests.
+    """
+    if not user or not user.is_authenticated:
         return False
+    if is_admin_user(user):
+        return True
 
-    return getattr(perm, perm_field, False)
+    matrix = get_permission_matrix()
+    return matrix.is_module_active(module_name) and matrix.has_permission(
+        user.role_id, module_name, "can_view"
+    )
 
 
 class ModulePermission(BasePermission):
@@ -65,12 +76,8 @@ class ModulePermission(BasePermission):
         if not user or not user.is_authenticated:
             return False
 
-        # Superuser always passes
-        if user.is_superuser:
-            return True
-
-        # Admin role bypasses module-level checks
-        if user.role and user.role.slug == Role.RoleSlug.ADMIN:
+        # Superuser and admin role bypass module-level checks
+        if is_admin_user(user):
             return True
 
         module_name = getattr(view, "module_name", None)
@@ -79,24 +86,15 @@ class ModulePermission(BasePermission):
             return False
 
         # Check if the module is active
-        from apps.module_config.services import is_module_active
-
-        if not is_module_active(module_name):
+        matrix = get_permission_matrix()
+        if not matrix.is_module_active(module_name):
             return False
 
         perm_field = self.METHOD_PERM_MAP.get(request.method)
         if perm_field is None:
             return False
 
-        try:
-            perm = ModulePermissionModel.objects.get(
-                role=user.role,
-                module=module_name,
-            )
-        except ModulePermissionModel.DoesNotExist:
-            return False
-
-        return getattr(perm, perm_field, False)
+        return matrix.has_permission(user.role_id, module_name, perm_field)
 
 
 class IsAdminRole(BasePermission):
@@ -109,6 +107,4 @@ class IsAdminRole(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        if user.is_superuser:
-            return True
-        return user.role and user.role.slug == Role.RoleSlug.ADMIN
+        return is_admin_user(user)
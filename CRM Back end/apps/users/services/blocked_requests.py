@@ -0,0 +1,130 @@
+"""
+Buffered logging of requests rejected by ``BlockedIPMiddleware``.
+
+A flood from a blocked address must not turn into one ``BlockedIPLog``
+INSERT plus one ``BlockedIP`` UPDATE per request.  Rejections are appended
+to a bounded in-process buffer and written in batches: one ``bulk_create``
+for the log rows and one ``F()`` increment per blocked entry.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# At most one write per FLUSH_INTERVAL, or sooner once FLUSH_SIZE accumulate.
+FLUSH_SIZE = 100
+FLUSH_INTERVAL = 5  # seconds
+
+# Upper bound on buffered log rows.  Beyond it rows are dropped but the
+# per-entry counters keep counting, so a flood cannot exhaust memory.
+MAX_BUFFERED_LOGS = 1000
+
+
+class BlockedRequestBuffer:
+    """
+    Thread-safe accumulator of blocked-request log rows and counters.
+
+    The first rejection after a quiet period is written immediately; further
+    rejections within ``FLUSH_INTERVAL`` are buffered and written together,
+    either when ``FLUSH_SIZE`` is reached or by a timer at the end of the
+    interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs = []
+        self._counts = Counter()
+        self._last_flush = None
+        self._timer = None
+
+    def add(self, blocked_ip_id, ip_address, request_type, path, user_agent):
+        with self._lock:
+            self._counts[blocked_ip_id] += 1
+            if len(self._logs) < MAX_BUFFERED_LOGS:
+                self._logs.append(
+                    {
+                        "blocked_ip_id": blocked_ip_id,
+                        "ip_address": ip_address,
+                        "request_type": request_type,
+                        "request_path": path[:500],
+                        "user_agent": user_agent[:1000],
+                    }
+                )
+            due = (
+                self._last_flush is None
+                or sum(self._counts.values()) >= FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+            )
+            if not due and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Write buffered rows and counter increments; returns rows written."""
+        from apps.users.models import BlockedIP, BlockedIPLog
+
+        with self._lock:
+            logs, counts = self._logs, self._counts
+            self._logs, self._counts = [], Counter()
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+
+        try:
+            # Entries may have been deleted since the request was blocked
+            existing = set(
+                BlockedIP.objects.filter(pk__in=counts).values_list("pk", flat=True)
+            )
+            created = BlockedIPLog.objects.bulk_create(
+                [
+                    BlockedIPLog(**log)
+                    for log in logs
+                    if log["blocked_ip_id"] in existing
+                ]
+            )
+            now = timezone.now()
+            for blocked_ip_id, count in counts.items():
+                if blocked_ip_id in existing:
+                    BlockedIP.objects.filter(pk=blocked_ip_id).update(
+                        blocked_webform_requests=F("blocked_webform_requests") + count,
+                        updated_at=now,
+                    )
+            return len(created)
+        except Exception as e:
+            logger.warning(f"Failed to flush blocked IP request logs: {e}")
+            return 0
+
+
+_buffer = BlockedRequestBuffer()
+
+
+def record_blocked_request(blocked_ip_id, ip_address, request_type, path, user_agent):
+    """Queue a blocked request for the next batched write."""
+    _buffer.add(blocked_ip_id, ip_address, request_type, path, user_agent)
+
+
+def flush_blocked_requests():
+    """Write any buffered blocked-request logs now."""
+    return _buffer.flush()
+
+
+atexit.register(flush_blocked_requests)
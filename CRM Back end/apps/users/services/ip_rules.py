@@ -0,0 +1,167 @@
+"""
+Compiled, in-process matchers for the IP blocklist and login allowlist.
+
+``BlockedIPMiddleware`` and ``IPWhitelistMiddleware`` run on every request,
+including anonymous webform and tracking-pixel hits.  Instead of querying
+``BlockedIP``/``LoginIPWhitelist`` and re-parsing each CIDR per request, the
+active rows are compiled once per process into sorted interval tables that
+answer lookups with a binary search.
+
+Rebuilds are coordinated through a version token in the shared cache: saving
+or deleting a rule bumps the token (see ``apps.users.signals``), and every
+process notices the new token on its next version check and recompiles
+(``apps.core.versioned_cache``).
+"""
+
+import ipaddress
+import logging
+from bisect import bisect_right
+
+from apps.core.versioned_cache import VersionedValue
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "ip_rules_version"
+
+
+class IPNetworkSet:
+    """
+    Immutable set of IPv4/IPv6 networks supporting O(log n) containment.
+
+    Networks are stored per address family as ``(start, end, payload)``
+    integer intervals sorted by start.  CIDR blocks either nest or are
+    disjoint, so each interval also records the index of its closest
+    enclosing interval; a lookup bisects to the last interval starting at or
+    before the address and walks up that chain until one contains it.
+    """
+
+    def __init__(self, entries=()):
+        by_version = {4: [], 6: []}
+        for network, payload in entries:
+            by_version[network.version].append(
+                (int(network.network_address), int(network.broadcast_address), payload)
+            )
+        self._tables = {}
+        for version, intervals in by_version.items():
+            # Wider networks first on equal starts so they become parents
+            intervals.sort(key=lambda iv: (iv[0], -iv[1]))
+            parents = []
+            stack = []
+            for index, (start, end, _payload) in enumerate(intervals):
+                while stack and intervals[stack[-1]][1] < start:
+                    stack.pop()
+                parents.append(stack[-1] if stack else -1)
+                stack.append(index)
+            self._tables[version] = (
+                [iv[0] for iv in intervals],
+                intervals,
+                parents,
+            )
+
+    def __bool__(self):
+        return any(table[1] for table in self._tables.values())
+
+    def lookup(self, client_ip_str):
+        """Return the payload of the most specific matching network, or None."""
+        try:
+            client_ip = ipaddress.ip_address(client_ip_str)
+        except ValueError:
+            return None
+        starts, intervals, parents = self._tables[client_ip.version]
+        value = int(client_ip)
+        index = bisect_right(starts, value) - 1
+        while index >= 0:
+            start, end, payload = intervals[index]
+            if start <= value <= end:
+                return payload
+            index = parents[index]
+        return None
+
+    def __contains__(self, client_ip_str):
+        return self.lookup(client_ip_str) is not None
+
+
+def parse_network(ip_address, cidr_prefix):
+    """Parse a rule's address/prefix into an ip_network, or None if invalid."""
+    try:
+        if cidr_prefix is not None:
+            return ipaddress.ip_network(f"{ip_address}/{cidr_prefix}", strict=False)
+        return ipaddress.ip_network(ip_address)
+    except ValueError:
+        logger.warning(f"Ignoring invalid IP rule: {ip_address}/{cidr_prefix}")
+        return None
+
+
+class IPRules:
+    """Compiled blocklist and per-role/per-user allowlists."""
+
+    def __init__(self, blocked, whitelist_by_role, whitelist_by_user):
+        self.blocked = blocked
+        self.whitelist_by_role = whitelist_by_role
+        self.whitelist_by_user = whitelist_by_user
+
+    @classmethod
+    def build(cls):
+        from apps.users.models import BlockedIP, LoginIPWhitelist
+
+        blocked = []
+        for pk, ip, prefix in BlockedIP.objects.filter(is_active=True).values_list(
+            "pk", "ip_address", "cidr_prefix"
+        ):
+            network = parse_network(ip, prefix)
+            if network is not None:
+                blocked.append((network, pk))
+
+        by_role, by_user = {}, {}
+        for ip, prefix, role_id, user_id in LoginIPWhitelist.objects.filter(
+            is_active=True
+        ).values_list("ip_address", "cidr_prefix", "role_id", "user_id"):
+            network = parse_network(ip, prefix)
+            if network is None:
+                continue
+            if role_id:
+                by_role.setdefault(role_id, []).append((network, True))
+            if user_id:
+                by_user.setdefault(user_id, []).append((network, True))
+
+        return cls(
+            IPNetworkSet(blocked),
+            {k: IPNetworkSet(v) for k, v in by_role.items()},
+            {k: IPNetworkSet(v) for k, v in by_user.items()},
+        )
+
+    def blocked_entry_id(self, client_ip_str):
+        """Return the pk of the BlockedIP matching the address, if any."""
+        return self.blocked.lookup(client_ip_str)
+
+    def is_allowed_for(self, user, client_ip_str):
+        """
+        Apply the login allowlist for ``user``.
+
+        Returns True when no active entries exist for the user or their role,
+        otherwise whether the address matches at least one of them.
+        """
+        sets = [
+            s
+            for s in (
+                self.whitelist_by_role.get(user.role_id) if user.role_id else None,
+                self.whitelist_by_user.get(user.pk),
+            )
+            if s
+        ]
+        if not sets:
+            return True
+        return any(client_ip_str in s for s in sets)
+
+
+_rules = VersionedValue(VERSION_CACHE_KEY, IPRules.build)
+
+
+def get_ip_rules():
+    """Return the compiled rules, rebuilding them if the version changed."""
+    return _rules.get()
+
+
+def invalidate_ip_rules():
+    """Publish a new version so every process recompiles its rules."""
+    _rules.invalidate()
@@ -0,0 +1,120 @@
+"""
+In-process role -> module -> action permission matrix.
+
+``ModulePermission`` is consulted on every request to every module viewset,
+and ``is_module_active`` used to cost a cache round trip per call.  The
+whole matrix is tiny (roles x modules x six flags), so it is loaded once per
+process into a dict of bitmaps and answered without queries or network I/O.
+
+Rebuilds follow the same version-token scheme as ``ip_rules``: saving or
+deleting a ``ModulePermission``, ``Role`` or ``CRMModule`` bumps the token
+in the shared cache (see ``apps.users.signals``) and every process reloads
+the matrix on its next version check.
+"""
+
+import logging
+
+from apps.core.versioned_cache import VersionedValue
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "permission_matrix_version"
+
+# One bit per boolean flag on ModulePermission
+PERMISSION_BITS = {
+    "can_view": 1 << 0,
+    "can_create": 1 << 1,
+    "can_edit": 1 << 2,
+    "can_delete": 1 << 3,
+    "can_export": 1 << 4,
+    "can_import": 1 << 5,
+}
+
+
+class PermissionMatrix:
+    """Compiled permission bitmaps, role slugs and inactive modules."""
+
+    def __init__(self, role_slugs, bitmaps, inactive_modules):
+        self.role_slugs = role_slugs
+        self.bitmaps = bitmaps
+        self.inactive_modules = inactive_modules
+
+    @classmethod
+    def build(cls):
+        from apps.users.models import ModulePermission, Role
+
+        role_slugs = dict(Role.objects.values_list("pk", "slug"))
+
+        bitmaps = {}
+        flags = list(PERMISSION_BITS)
+        for row in ModulePermission.objects.values_list("role_id", "module", *flags):
+            role_id, module, values = row[0], row[1], row[2:]
+            bits = 0
+            for flag, value in zip(flags, values):
+                if value:
+                    bits |= PERMISSION_BITS[flag]
+            bitmaps[(role_id, module)] = bits
+
+        return cls(role_slugs, bitmaps, _load_inactive_modules())
+
+    def role_slug(self, role_id):
+        return self.role_slugs.get(role_id)
+
+    def has_permission(self, role_id, module_name, perm_field):
+        """Whether ``role_id`` has the ``perm_field`` flag on the module."""
+        bit = PERMISSION_BITS.get(perm_field)
+        if bit is None or role_id is None:
+            return False
+        return bool(self.bitmaps.get((role_id, module_name), 0) & bit)
+
+    def is_module_active(self, module_name):
+        return module_name not in self.inactive_modules
+
+
+def _load_inactive_modules():
+    from apps.module_config.models import CRMModule
+
+    try:
+        return frozenset(
+            CRMModule.objects.filter(is_active=False).values_list("name", flat=True)
+        )
+    except Exception:
+        # Table may not exist yet (before migrations). Treat all as active.
+        return frozenset()
+
+
+_matrix = VersionedValue(VERSION_CACHE_KEY, PermissionMatrix.build)
+
+
+def get_permission_matrix():
+    """Return the compiled matrix, rebuilding it if the version changed."""
+    return _matrix.get()
+
+
+def invalidate_permission_matrix():
+    """Publish a new version so every process reloads its matrix."""
+    _matrix.invalidate()
+
+
+def user_role_slug(user):
+    """Return the slug of ``user``'s role without loading the Role row."""
+    role_id = getattr(user, "role_id", None)
+    if role_id is None:
+        return None
+    return get_permission_matrix().role_slug(role_id)
+
+
+def is_admin_user(user):
+    """Superusers and members of the admin role bypass module checks."""
+    from apps.users.models import Role
+
+    if user.is_superuser:
+        return True
+    return user_role_slug(user) == Role.RoleSlug.ADMIN
+
+
+def role_has_permission(user, module_name, perm_field):
+    """Whether ``user``'s role grants ``perm_field`` on ``module_name``."""
+    return get_permission_matrix().has_permission(
+        getattr(user, "role_id", None), module_name, perm_field
+    )
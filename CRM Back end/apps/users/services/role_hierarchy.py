@@ -0,0 +1,138 @@
+"""
+Role hierarchy maintenance and cached visibility lookups.
+
+The role tree is materialized in ``RoleClosure`` so descendant, ancestor
+and subordinate-user queries are a single indexed join instead of one query
+per node.  The closure is kept in sync incrementally from the Role signals
+in ``apps.users.signals``: creating a role or changing its parent rewrites
+only the links of the moved subtree.
+
+``get_visible_user_ids`` caches the set of users a user can see through the
+role hierarchy (their own role and every subordinate role).  Entries are
+keyed by a version token that is bumped whenever the tree or a user's role
+changes, so invalidation never has to enumerate users.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.versioned_cache import bump_version, current_version
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "role_hierarchy_version"
+VISIBLE_USERS_TTL = 300  # seconds
+
+
+def _closure_model():
+    from apps.users.models import RoleClosure
+
+    return RoleClosure
+
+
+def move_role(role):
+    """
+    Re-link ``role`` and its subtree under ``role.parent_id``.
+
+    Also used for newly created roles, whose subtree is just themselves.
+    """
+    RoleClosure = _closure_model()
+
+    if role.parent_id is not None and (
+        role.parent_id == role.pk
+        or RoleClosure.objects.filter(
+            ancestor_id=role.pk, descendant_id=role.parent_id
+        ).exists()
+    ):
+        logger.warning(f"Role {role.pk} cannot be moved under its own subtree")
+        return
+
+    with transaction.atomic():
+        RoleClosure.objects.get_or_create(
+            ancestor_id=role.pk, descendant_id=role.pk, defaults={"depth": 0}
+        )
+        subtree = list(
+            RoleClosure.objects.filter(ancestor_id=role.pk).values_list(
+                "descendant_id", "depth"
+            )
+        )
+        subtree_ids = [descendant_id for descendant_id, _depth in subtree]
+
+        # Detach the subtree from its former ancestors
+        RoleClosure.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+
+        if role.parent_id is None:
+            return
+        ancestors = list(
+            RoleClosure.objects.filter(descendant_id=role.parent_id).values_list(
+                "ancestor_id", "depth"
+            )
+        )
+        RoleClosure.objects.bulk_create(
+            [
+                RoleClosure(
+                    ancestor_id=ancestor_id,
+                    descendant_id=descendant_id,
+                    depth=ancestor_depth + descendant_depth + 1,
+                )
+                for ancestor_id, ancestor_depth in ancestors
+                for descendant_id, descendant_depth in subtree
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_role_closure():
+    """Recompute the whole closure table from ``Role.parent``."""
+    from apps.users.models import Role
+
+    RoleClosure = _closure_model()
+    parents = dict(Role.objects.values_list("pk", "parent_id"))
+    rows = []
+    for role_id in parents:
+        current, depth, seen = role_id, 0, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(
+                RoleClosure(ancestor_id=current, descendant_id=role_id, depth=depth)
+            )
+            current = parents.get(current)
+            depth += 1
+
+    with transaction.atomic():
+        RoleClosure.objects.all().delete()
+        RoleClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+def invalidate_visible_user_ids():
+    """Drop every cached visibility set by publishing a new version."""
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_visible_user_ids(user):
+    """
+    Return the IDs of users ``user`` can see through the role hierarchy.
+
+    Users without a role only see themselves.  This is the one place
+    role-scoped visibility (forecast teams, sales insights, sharing rules)
+    should be computed, so all of them share the cached set.
+    """
+    if not user.role_id:
+        return frozenset([user.pk])
+
+    cache_key = f"visible_user_ids_{current_version(VERSION_CACHE_KEY)}_{user.pk}"
+    visible = cache.get(cache_key)
+    if visible is None:
+        from apps.users.models import User
+
+        visible = frozenset(
+            User.objects.filter(
+                role__ancestor_links__ancestor_id=user.role_id
+            ).values_list("id", flat=True)
+        )
+        cache.set(cache_key, visible, timeout=VISIBLE_USERS_TTL)
+    return visible
@@ -0,0 +1,223 @@
+"""
+Cached session and authentication-policy state for the security middleware.
+
+Every authenticated API request needs the caller's ``UserSession`` row and
+the singleton ``AuthenticationPolicy``.  Reading both from the database on
+each hit is the largest fixed per-request cost of the middleware chain, so
+they are kept in the shared cache with a short TTL.  Entries are dropped
+explicitly whenever a session is revoked or the policy changes; the TTL only
+bounds staleness for writes that bypass these helpers.
+
+Session activity is write-behind: requests record their timestamp under a
+separate cache key (``record_session_activity``), at most once per
+``ACTIVITY_WRITE_INTERVAL``, and note the session's jti as dirty.
+``flush_session_activity`` - run periodically by Celery - persists the
+latest value of the dirty sessions in one bulk UPDATE.  Idle timeouts are
+evaluated against the cached value, so they behave as if ``last_activity``
+were written on every request, give or take the write interval.
+"""
+
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SESSION_STATE_TTL = 30  # seconds
+POLICY_TTL = 60  # seconds
+
+# Activity entries outlive the idle timeout by this margin so a flush delay
+# can never make an active session look idle.
+ACTIVITY_TTL_MARGIN = 3600  # seconds
+
+# Requests within this many seconds of the recorded activity don't write it
+# again.
+ACTIVITY_WRITE_INTERVAL = 60  # seconds
+
+# Dirty jtis are kept in numbered slots: ``cache.incr`` hands out slot
+# numbers atomically, and the flush reads the slots after the last one it
+# handled.
+_DIRTY_COUNTER_KEY = "user_session_activity_dirty"
+_FLUSHED_COUNTER_KEY = "user_session_activity_flushed"
+
+POLICY_CACHE_KEY = "auth_policy"
+
+# Marker cached for jtis that have no tracked session, so untracked tokens
+# (e.g. issued by RefreshToken.for_user) don't hit the DB on every request.
+_MISSING = "__missing__"
+
+
+def _session_cache_key(jti: str) -> str:
+    return f"user_session_state_{jti}"
+
+
+def _activity_cache_key(jti: str) -> str:
+    return f"user_session_activity_{jti}"
+
+
+def _dirty_slot_key(slot: int) -> str:
+    return f"user_session_activity_dirty_{slot}"
+
+
+def _serialize_session(session) -> dict:
+    return {
+        "id": str(session.pk),
+        "user_id": str(session.user_id),
+        "is_active": session.is_active,
+        "created_at": session.created_at,
+        "last_activity": session.last_activity,
+    }
+
+
+def get_session_state(jti: str):
+    """
+    Return the cached state of the session identified by ``jti``.
+
+    The state is a dict with ``id``, ``user_id``, ``is_active``,
+    ``created_at`` and ``last_activity``, or None when no session is tracked
+    for the token.
+    """
+    from apps.users.models import UserSession
+
+    key = _session_cache_key(jti)
+    state = cache.get(key)
+    if state is not None:
+        return None if state == _MISSING else state
+
+    session = (
+        UserSession.objects.filter(jti=jti)
+        .only("id", "user_id", "is_active", "created_at", "last_activity")
+        .first()
+    )
+    state = _serialize_session(session) if session else None
+    cache.set(key, state if state else _MISSING, timeout=SESSION_STATE_TTL)
+    return state
+
+
+def get_last_activity(jti: str, state: dict):
+    """
+    Return the most recent activity time for a session.
+
+    This is the later of the persisted ``last_activity`` and any activity
+    recorded in the cache that has not been flushed yet.
+    """
+    recorded = cache.get(_activity_cache_key(jti))
+    if recorded is not None and recorded > state["last_activity"]:
+        return recorded
+    return state["last_activity"]
+
+
+def record_session_activity(
+    jti: str, when, idle_timeout_minutes: int, last_activity=None
+) -> None:
+    """
+    Record request activity for a session without touching the DB.
+
+    Nothing is written if ``last_activity`` (as returned by
+    ``get_last_activity``) is less than ``ACTIVITY_WRITE_INTERVAL`` old.
+    """
+    if (
+        last_activity is not None
+        and (when - last_activity).total_seconds() < ACTIVITY_WRITE_INTERVAL
+    ):
+        return
+    cache.set(
+        _activity_cache_key(jti),
+        when,
+        timeout=idle_timeout_minutes * 60 + ACTIVITY_TTL_MARGIN,
+    )
+    _mark_dirty(jti)
+
+
+def _mark_dirty(jti: str) -> None:
+    try:
+        slot = cache.incr(_DIRTY_COUNTER_KEY)
+    except ValueError:
+        cache.add(_DIRTY_COUNTER_KEY, 0, timeout=None)
+        slot = cache.incr(_DIRTY_COUNTER_KEY)
+    cache.set(_dirty_slot_key(slot), jti, timeout=ACTIVITY_TTL_MARGIN)
+
+
+def _take_dirty_jtis() -> set:
+    """The jtis marked dirty since the previous call."""
+    last = cache.get(_DIRTY_COUNTER_KEY) or 0
+    first = cache.get(_FLUSHED_COUNTER_KEY) or 0
+    if last < first:
+        first = 0  # The counter was lost and started over
+    cache.set(_FLUSHED_COUNTER_KEY, last, timeout=None)
+    keys = [_dirty_slot_key(slot) for slot in range(first + 1, last + 1)]
+    jtis = set(cache.get_many(keys).values())
+    cache.delete_many(keys)
+    return jtis
+
+
+def invalidate_session_state(*jtis) -> None:
+    """Drop cached state for the given jtis so the next request re-reads it."""
+    keys = [_session_cache_key(jti) for jti in jtis if jti]
+    if keys:
+        cache.delete_many(keys)
+
+
+def deactivate_sessions(queryset) -> int:
+    """
+    Revoke every session in ``queryset`` and invalidate its cached state.
+
+    Use this instead of a bare ``.update(is_active=False)``, which would leave
+    revoked sessions usable until their cache entry expires.
+    """
+    jtis = list(queryset.filter(is_active=True).values_list("jti", flat=True))
+    if not jtis:
+        return 0
+    from apps.users.models import UserSession
+
+    count = UserSession.objects.filter(jti__in=jtis).update(is_active=False)
+    invalidate_session_state(*jtis)
+    return count
+
+
+def get_authentication_policy():
+    """Return the AuthenticationPolicy singleton, cached for POLICY_TTL."""
+    from apps.users.models import AuthenticationPolicy
+
+    policy = cache.get(POLICY_CACHE_KEY)
+    if policy is None:
+        policy = AuthenticationPolicy.load()
+        cache.set(POLICY_CACHE_KEY, policy, timeout=POLICY_TTL)
+    return policy
+
+
+def invalidate_authentication_policy() -> None:
+    cache.delete(POLICY_CACHE_KEY)
+
+
+def flush_session_activity() -> int:
+    """
+    Persist the activity recorded since the last flush in one bulk UPDATE.
+
+    Returns the number of sessions whose ``last_activity`` was advanced.
+    """
+    from apps.users.models import UserSession
+
+    jtis = _take_dirty_jtis()
+    if not jtis:
+        return 0
+    sessions = list(
+        UserSession.objects.filter(is_active=True, jti__in=jtis).only(
+            "id", "jti", "last_activity"
+        )
+    )
+    if not sessions:
+        return 0
+    recorded = cache.get_many([_activity_cache_key(s.jti) for s in sessions])
+
+    dirty = []
+    for session in sessions:
+        when = recorded.get(_activity_cache_key(session.jti))
+        if when is not None and when > session.last_activity:
+            session.last_activity = when
+            dirty.append(session)
+
+    if dirty:
+        # bulk_update doesn't apply auto_now, so the recorded times are kept
+        UserSession.objects.bulk_update(dirty, ["last_activity"], batch_size=1000)
+    return len(dirty)
@@ -1,2 +1,107 @@
 # Signals for the users app.
 # Audit-related signals are handled in the audit app.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.users.services.ip_rules import invalidate_ip_rules
+from apps.users.services.permission_matrix import invalidate_permission_matrix
+from apps.users.services.role_hierarchy import (
+    invalidate_visible_user_ids,
+    move_role,
+    rebuild_role_closure,
+)
+from apps.users.services.session_state import (
+    invalidate_authentication_policy,
+    invalidate_session_state,
+)
+
+
+@receiver(post_save, sender="users.UserSession")
+@receiver(post_delete, sender="users.UserSession")
+def on_user_session_change(sender, instance, **kwargs):
+    """Drop the cached session state so middleware sees revocations at once."""
+    invalidate_session_state(instance.jti)
+
+
+@receiver(post_save, sender="users.AuthenticationPolicy")
+def on_authentication_policy_change(sender, instance, **kwargs):
+    """Drop the cached policy so new timeouts apply on the next request."""
+    invalidate_authentication_policy()
+
+
+# Saves that only touch the blocked-request counter don't change matching.
+_BLOCKED_IP_COUNTER_FIELDS = frozenset({"blocked_webform_requests", "updated_at"})
+
+
+@receiver(post_save, sender="users.BlockedIP")
+@receiver(post_delete, sender="users.BlockedIP")
+@receiver(post_save, sender="users.LoginIPWhitelist")
+@receiver(post_delete, sender="users.LoginIPWhitelist")
+def on_ip_rule_change(sender, instance, **kwargs):
+    """Recompile the in-process IP blocklist/allowlist matchers."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= _BLOCKED_IP_COUNTER_FIELDS:
+        return
+    invalidate_ip_rules()
+    # Bump again once committed so other processes can't compile stale rows
+    transaction.on_commit(invalidate_ip_rules)
+
+
+# Saves that only advance a module's numbering sequence don't affect access.
+_CRM_MODULE_COUNTER_FIELDS = frozenset({"number_next_seq", "updated_at"})
+
+
+@receiver(post_save, sender="users.ModulePermission")
+@receiver(post_delete, sender="users.ModulePermission")
+@receiver(post_save, sender="users.Role")
+@receiver(post_delete, sender="users.Role")
+@receiver(post_save, sender="module_config.CRMModule")
+@receiver(post_delete, sender="module_config.CRMModule")
+def on_permission_matrix_change(sender, instance, **kwargs):
+    """Reload the in-process role/module permission matrix."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= _CRM_MODULE_COUNTER_FIELDS:
+        return
+    invalidate_permission_matrix()
+    # Bump again once committed so other processes can't load stale rows
+    transaction.on_commit(invalidate_permission_matrix)
+
+
+@receiver(pre_save, sender="users.Role")
+def remember_role_parent(sender, instance, **kwargs):
+    """Record the stored parent so post_save can tell whether it moved."""
+    if instance._state.adding:
+        instance._previous_parent_id = None
+        return
+    instance._previous_parent_id = (
+        sender.objects.filter(pk=instance.pk).values_list("parent_id", flat=True)
+    ).first()
+
+
+@receiver(post_save, sender="users.Role")
+def on_role_saved(sender, instance, created, **kwargs):
+    """Keep the role closure table in sync with ``Role.parent``."""
+    if created or instance.parent_id != getattr(
+        instance, "_previous_parent_id", instance.parent_id
+    ):
+        move_role(instance)
+        invalidate_visible_user_ids()
+
+
+@receiver(post_delete, sender="users.Role")
+def on_role_deleted(sender, instance, **kwargs):
+    """Children of a deleted role become roots; relink the whole tree."""
+    rebuild_role_closure()
+    invalidate_visible_user_ids()
+
+
+@receiver(post_save, sender="users.User")
+@receiver(post_delete, sender="users.User")
+def on_user_role_change(sender, instance, **kwargs):
+    """Role membership changes alter who can see whom."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields and "role" not in update_fields:
+        return
+    invalidate_visible_user_ids()
@@ -106,3 +106,18 @@ EJFLOW Support Team
         logger.error(f"Failed to send password reset email to {email}: {exc}")
         # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=60 * (2**self.request.retries))
+
+
+@shared_task
+def flush_session_activity() -> dict:
+    """
+    Persist session activity recorded by SessionTimeoutMiddleware.
+
+    Runs every minute so ``UserSession.last_activity`` in the database trails
+    real activity by at most one interval, in a single bulk UPDATE.
+    """
+    from apps.users.services.session_state import (
+        flush_session_activity as flush_activity,
+    )
+
+    return {"updated_sessions": flush_activity()}
@@ -0,0 +1,104 @@
+import ipaddress
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.models import BlockedIP, BlockedIPLog
+from apps.users.services import blocked_requests
+from apps.users.services.blocked_requests import flush_blocked_requests
+from apps.users.services.ip_rules import IPNetworkSet
+from tests.factories import LoginIPWhitelistFactory, UserFactory
+
+
+def _net(value):
+    return ipaddress.ip_network(value, strict=False)
+
+
+class TestIPNetworkSet:
+    def test_exact_and_cidr_lookup(self):
+        networks = IPNetworkSet(
+            [(_net("10.0.0.0/24"), "a"), (_net("192.168.1.5"), "b")]
+        )
+        assert networks.lookup("10.0.0.17") == "a"
+        assert networks.lookup("192.168.1.5") == "b"
+        assert networks.lookup("192.168.1.6") is None
+        assert networks.lookup("10.0.1.1") is None
+
+    def test_nested_networks_return_most_specific(self):
+        networks = IPNetworkSet(
+            [
+                (_net("10.0.0.0/8"), "wide"),
+                (_net("10.1.0.0/16"), "narrow"),
+                (_net("10.1.2.3"), "host"),
+            ]
+        )
+        assert networks.lookup("10.1.2.3") == "host"
+        assert networks.lookup("10.1.9.9") == "narrow"
+        # Falls back to the enclosing network past a nested block
+        assert networks.lookup("10.200.0.1") == "wide"
+        assert networks.lookup("11.0.0.1") is None
+
+    def test_ipv6_and_invalid_input(self):
+        networks = IPNetworkSet([(_net("2001:db8::/32"), "v6")])
+        assert "2001:db8::1" in networks
+        assert "2001:db9::1" not in networks
+        assert "not-an-ip" not in networks
+        assert "10.0.0.1" not in networks
+
+
+@pytest.mark.django_db
+class TestBlockedIPMiddleware:
+    def test_blocked_ip_rejected_and_logged(self, api_client):
+        entry = BlockedIP.objects.create(ip_address="127.0.0.0", cidr_prefix=8)
+        resp = api_client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+        flush_blocked_requests()
+        assert BlockedIPLog.objects.filter(blocked_ip=entry).count() == 1
+        entry.refresh_from_db()
+        assert entry.blocked_webform_requests == 1
+
+    def test_deactivated_entry_no_longer_blocks(self, api_client):
+        entry = BlockedIP.objects.create(ip_address="127.0.0.1")
+        assert api_client.get("/api/v1/users/me/").status_code == 403
+
+        entry.is_active = False
+        entry.save()
+        assert api_client.get("/api/v1/users/me/").status_code == 401
+
+    def test_flood_is_written_in_batches(self, api_client, monkeypatch):
+        monkeypatch.setattr(blocked_requests, "FLUSH_INTERVAL", 3600)
+        monkeypatch.setattr(
+            blocked_requests, "_buffer", blocked_requests.BlockedRequestBuffer()
+        )
+        entry = BlockedIP.objects.create(ip_address="127.0.0.1")
+        for _ in range(5):
+            assert api_client.get("/api/v1/users/me/").status_code == 403
+
+        # Only the leading request was written; the rest are buffered
+        assert BlockedIPLog.objects.filter(blocked_ip=entry).count() == 1
+        flush_blocked_requests()
+        assert BlockedIPLog.objects.filter(blocked_ip=entry).count() == 5
+        entry.refresh_from_db()
+        assert entry.blocked_webform_requests == 5
+
+
+@pytest.mark.django_db
+class TestCompiledWhitelist:
+    def test_user_entry_applies_only_to_that_user(self, admin_role):
+        user = UserFactory(role=admin_role)
+        other = UserFactory(role=admin_role)
+        LoginIPWhitelistFactory(ip_address="10.0.0.0", cidr_prefix=24, user=user)
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+        assert client.get("/api/v1/users/me/").status_code == 403
+
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(other).access_token}"
+        )
+        assert client.get("/api/v1/users/me/").status_code == 200
@@ -129,3 +129,84 @@ class TestConcurrentSessionMiddleware:
         client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
         resp = client.get("/api/v1/users/me/")
         assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestRequestJWTContext:
+    def test_token_decoded_once_per_request(self, admin_role, monkeypatch):
+        """Middleware chain and DRF auth share a single JWT decode."""
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        user = UserFactory(role=admin_role)
+        access = RefreshToken.for_user(user).access_token
+        calls = []
+        original = JWTAuthentication.get_validated_token
+
+        def counting(self, raw_token):
+            calls.append(raw_token)
+            return original(self, raw_token)
+
+        monkeypatch.setattr(JWTAuthentication, "get_validated_token", counting)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        resp = client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_200_OK
+        assert len(calls) == 1
+
+    def test_invalid_token_still_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        resp = client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestSessionStateCache:
+    def _client_with_session(self, user):
+        access = RefreshToken.for_user(user).access_token
+        session = UserSession.objects.create(
+            user=user, jti=str(access["jti"]), ip_address="127.0.0.1"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client, session
+
+    def test_revoked_session_rejected_immediately(self, admin_role):
+        """Revoking a session invalidates its cached state."""
+        user = UserFactory(role=admin_role)
+        client, session = self._client_with_session(user)
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+        session.is_active = False
+        session.save(update_fields=["is_active"])
+
+        resp = client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivate_sessions_invalidates_cache(self, admin_role):
+        from apps.users.services.session_state import deactivate_sessions
+
+        user = UserFactory(role=admin_role)
+        client, session = self._client_with_session(user)
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+        assert deactivate_sessions(UserSession.objects.filter(user=user)) == 1
+
+        resp = client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_policy_change_applies_without_waiting_for_ttl(self, admin_role):
+        policy = AuthenticationPolicyFactory(max_session_duration_hours=24)
+        user = UserFactory(role=admin_role)
+        client, session = self._client_with_session(user)
+        UserSession.objects.filter(pk=session.pk).update(
+            created_at=timezone.now() - timezone.timedelta(hours=2)
+        )
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+        policy.max_session_duration_hours = 1
+        policy.save()
+
+        resp = client.get("/api/v1/users/me/")
+        assert resp.status_code == status.HTTP_401_UNAUTHORIZED
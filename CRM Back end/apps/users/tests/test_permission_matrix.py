@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.module_config.models import CRMModule
+from apps.module_config.services import is_module_active
+from apps.users.models import ModulePermission as ModulePermissionModel
+from apps.users.permissions import ModulePermission, has_action_permission
+from apps.users.services.permission_matrix import get_permission_matrix
+from tests.factories import ModulePermissionFactory, RoleFactory, UserFactory
+
+
+class _ContactsView:
+    module_name = "contacts"
+
+
+def _request(method, user):
+    request = getattr(APIRequestFactory(), method.lower())("/api/v1/contacts/")
+    request.user = user
+    return request
+
+
+@pytest.mark.django_db
+class TestPermissionMatrix:
+    def test_method_permissions_follow_flags(self):
+        role = RoleFactory()
+        ModulePermissionFactory(
+            role=role, module="contacts", can_view=True, can_create=False
+        )
+        user = UserFactory(role=role)
+        perm = ModulePermission()
+
+        assert perm.has_permission(_request("GET", user), _ContactsView())
+        assert not perm.has_permission(_request("POST", user), _ContactsView())
+
+    def test_permission_change_applies_immediately(self):
+        role = RoleFactory()
+        mp = ModulePermissionFactory(role=role, module="contacts", can_export=False)
+        user = UserFactory(role=role)
+        assert not has_action_permission(user, "contacts", "export")
+
+        mp.can_export = True
+        mp.save()
+        assert has_action_permission(user, "contacts", "export")
+
+        mp.delete()
+        assert not has_action_permission(user, "contacts", "export")
+
+    def test_role_slug_change_applies_immediately(self):
+        role = RoleFactory(slug="clerk")
+        user = UserFactory(role=role)
+        assert not has_action_permission(user, "contacts", "import")
+
+        role.slug = "admin"
+        role.save()
+        assert has_action_permission(user, "contacts", "import")
+
+    def test_inactive_module_denies_access(self):
+        role = RoleFactory()
+        ModulePermissionFactory(role=role, module="contacts", can_view=True)
+        user = UserFactory(role=role)
+        module = CRMModule.objects.create(
+            name="contacts", label="Contact", label_plural="Contacts"
+        )
+        assert is_module_active("contacts")
+
+        module.is_active = False
+        module.save(update_fields=["is_active", "updated_at"])
+        assert not is_module_active("contacts")
+        assert not ModulePermission().has_permission(
+            _request("GET", user), _ContactsView()
+        )
+
+    def test_steady_state_checks_issue_no_queries(self):
+        role = RoleFactory()
+        ModulePermissionFactory(role=role, module="contacts", can_view=True)
+        user = UserFactory(role=role)
+        perm = ModulePermission()
+        get_permission_matrix()
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(100):
+                assert perm.has_permission(_request("GET", user), _ContactsView())
+                assert not has_action_permission(user, "contacts", "export")
+        assert len(ctx.captured_queries) == 0
+
+    def test_missing_row_denies(self):
+        role = RoleFactory()
+        user = UserFactory(role=role)
+        assert not ModulePermissionModel.objects.filter(role=role).exists()
+        assert not ModulePermission().has_permission(
+            _request("GET", user), _ContactsView()
+        )
@@ -1,6 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
+from apps.users.models import RoleClosure
+from apps.users.services.role_hierarchy import get_visible_user_ids
 from tests.factories import RoleFactory, UserFactory
 
 BASE = "/api/v1/roles/"
@@ -45,6 +49,79 @@ class TestRoleHierarchyMethods:
         assert user2.pk in ids
 
 
+@pytest.mark.django_db
+class TestRoleClosure:
+    def _chain(self, depth):
+        roles = [RoleFactory(parent=None)]
+        for _ in range(depth - 1):
+            roles.append(RoleFactory(parent=roles[-1]))
+        return roles
+
+    def test_closure_rows_for_chain(self):
+        root, middle, leaf = self._chain(3)
+        depths = dict(
+            RoleClosure.objects.filter(descendant=leaf).values_list(
+                "ancestor_id", "depth"
+            )
+        )
+        assert depths == {leaf.pk: 0, middle.pk: 1, root.pk: 2}
+
+    def test_moving_subtree_relinks_descendants(self):
+        root, middle, leaf = self._chain(3)
+        other = RoleFactory(parent=None)
+
+        middle.parent = other
+        middle.save()
+
+        assert [r.pk for r in leaf.get_ancestors()] == [middle.pk, other.pk]
+        assert root.get_descendants() == []
+        assert {r.pk for r in other.get_descendants()} == {middle.pk, leaf.pk}
+
+    def test_moving_under_own_descendant_keeps_links(self):
+        root, middle, leaf = self._chain(3)
+
+        middle.parent = leaf
+        middle.save()
+
+        assert [r.pk for r in leaf.get_ancestors()] == [middle.pk, root.pk]
+        assert {r.pk for r in root.get_descendants()} == {middle.pk, leaf.pk}
+
+    def test_deleting_role_detaches_children(self):
+        root, middle, leaf = self._chain(3)
+        middle.delete()
+        leaf.refresh_from_db()
+        assert leaf.parent_id is None
+        assert leaf.get_ancestors() == []
+        assert root.get_descendants() == []
+
+    def test_subordinate_lookup_is_single_query_for_deep_tree(self):
+        roles = self._chain(12)
+        for role in roles:
+            UserFactory(role=role)
+        with CaptureQueriesContext(connection) as ctx:
+            ids = roles[0].get_subordinate_user_ids()
+        assert len(ids) == 12
+        assert len(ctx.captured_queries) == 1
+
+    def test_visible_user_ids_cached_and_invalidated(self):
+        root, child = self._chain(2)
+        boss = UserFactory(role=root)
+        report = UserFactory(role=child)
+        assert get_visible_user_ids(boss) == {boss.pk, report.pk}
+
+        with CaptureQueriesContext(connection) as ctx:
+            get_visible_user_ids(boss)
+        assert len(ctx.captured_queries) == 0
+
+        report.role = RoleFactory(parent=None)
+        report.save()
+        assert get_visible_user_ids(boss) == {boss.pk}
+
+    def test_user_without_role_sees_only_self(self):
+        user = UserFactory(role=None)
+        assert get_visible_user_ids(user) == {user.pk}
+
+
 @pytest.mark.django_db
 class TestRoleCRUD:
     def test_admin_can_create_role(self, admin_client):
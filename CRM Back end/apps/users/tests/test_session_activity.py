@@ -0,0 +1,161 @@
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.middleware import SessionTimeoutMiddleware
+from apps.users.models import UserSession
+from apps.users.services.session_state import (
+    flush_session_activity,
+    get_last_activity,
+    get_session_state,
+    record_session_activity,
+)
+from apps.users.tasks import flush_session_activity as flush_session_activity_task
+from tests.factories import AuthenticationPolicyFactory, UserFactory
+
+
+def _session_for(user):
+    access = RefreshToken.for_user(user).access_token
+    session = UserSession.objects.create(
+        user=user, jti=str(access["jti"]), ip_address="127.0.0.1"
+    )
+    return access, session
+
+
+def _write_count(queries):
+    return sum(
+        1
+        for q in queries
+        if q["sql"].lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))
+    )
+
+
+@pytest.mark.django_db
+class TestWriteBehindSessionActivity:
+    def test_requests_do_not_update_session_row(self, admin_role):
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        before = UserSession.objects.get(pk=session.pk).last_activity
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+        assert UserSession.objects.get(pk=session.pk).last_activity == before
+
+    def test_flush_persists_latest_activity(self, admin_role):
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        old = timezone.now() - timezone.timedelta(minutes=5)
+        UserSession.objects.filter(pk=session.pk).update(last_activity=old)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        client.get("/api/v1/users/me/")
+
+        result = flush_session_activity_task()
+        assert result == {"updated_sessions": 1}
+        assert UserSession.objects.get(pk=session.pk).last_activity > old
+        # Nothing new to persist on the next run
+        assert flush_session_activity() == 0
+
+    def test_recorded_activity_keeps_session_alive(self, admin_role):
+        """Idle timeout uses the recorded activity, not the stale DB value."""
+        AuthenticationPolicyFactory(idle_session_timeout_minutes=1)
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+        # The row was last written 10 minutes ago, but the user was just active
+        UserSession.objects.filter(pk=session.pk).update(
+            last_activity=timezone.now() - timezone.timedelta(minutes=10)
+        )
+        assert client.get("/api/v1/users/me/").status_code == status.HTTP_200_OK
+
+    def test_excluded_paths_do_not_record_activity(self, admin_role):
+        AuthenticationPolicyFactory(idle_session_timeout_minutes=240)
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        old = timezone.now() - timezone.timedelta(minutes=5)
+        UserSession.objects.filter(pk=session.pk).update(last_activity=old)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        client.get("/api/v1/settings/session-timeout/")
+
+        assert flush_session_activity() == 0
+
+    def test_recent_activity_is_not_rewritten(self, admin_role):
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        jti = str(access["jti"])
+        now = timezone.now()
+
+        record_session_activity(jti, now, 30)
+        record_session_activity(jti, now + timezone.timedelta(seconds=30), 30, now)
+
+        assert get_last_activity(jti, get_session_state(jti)) == now
+
+    def test_flush_only_reads_dirty_sessions(self, admin_role):
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        _idle_access, idle_session = _session_for(user)
+        old = timezone.now() - timezone.timedelta(minutes=5)
+        UserSession.objects.update(last_activity=old)
+
+        record_session_activity(str(access["jti"]), timezone.now(), 30)
+
+        assert flush_session_activity() == 1
+        assert UserSession.objects.get(pk=idle_session.pk).last_activity == old
+        assert flush_session_activity() == 0
+
+
+@pytest.mark.django_db
+class TestSessionActivityWriteBenchmark:
+    """
+    DB writes per 1,000 authenticated requests.
+
+    Before write-behind tracking every request issued an UPDATE on
+    crm_user_sessions (1,000 writes).  Now the requests issue none (and
+    only the first one writes to the cache) and the periodic flush persists
+    the latest activity with a single UPDATE.
+    """
+
+    REQUESTS = 1000
+
+    def test_writes_per_thousand_requests(self, admin_role):
+        AuthenticationPolicyFactory(idle_session_timeout_minutes=240)
+        user = UserFactory(role=admin_role)
+        access, session = _session_for(user)
+        UserSession.objects.filter(pk=session.pk).update(
+            last_activity=timezone.now() - timezone.timedelta(minutes=5)
+        )
+        middleware = SessionTimeoutMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(self.REQUESTS):
+                request = factory.get(
+                    "/api/v1/users/me/", HTTP_AUTHORIZATION=f"Bearer {access}"
+                )
+                assert middleware(request).status_code == 200
+        request_writes = _write_count(ctx.captured_queries)
+
+        with CaptureQueriesContext(connection) as ctx:
+            flush_session_activity()
+        flush_writes = _write_count(ctx.captured_queries)
+
+        # Was one UPDATE per request
+        assert request_writes == 0
+        assert flush_writes == 1
+        session.refresh_from_db()
+        assert timezone.now() - session.last_activity < timezone.timedelta(minutes=1)
@@ -358,6 +358,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         from apps.audit.models import LoginHistory
         from apps.users.models import AuthenticationPolicy, UserSession
         from apps.users.services.brute_force import BruteForceProtection
+        from apps.users.services.session_state import deactivate_sessions
 
         ip = get_client_ip(request)
         user_agent = request.META.get("HTTP_USER_AGENT", "")
@@ -487,8 +488,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                                 oldest_ids = list(
                                     active.values_list("pk", flat=True)[:excess]
                                 )
-                                UserSession.objects.filter(pk__in=oldest_ids).update(
-                                    is_active=False
+                                deactivate_sessions(
+                                    UserSession.objects.filter(pk__in=oldest_ids)
                                 )
                     except Exception:
                         pass  # Don't block login if session tracking fails
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.workflows.models import WorkflowExecutionLog, WorkflowRule
+from apps.workflows.models import WorkflowExecutionLog, WorkflowFiring, WorkflowRule
 
 
 @admin.register(WorkflowRule)
@@ -36,3 +36,10 @@ class WorkflowExecutionLogAdmin(admin.ModelAdmin):
         "result",
         "error_message",
     ]
+
+
+@admin.register(WorkflowFiring)
+class WorkflowFiringAdmin(admin.ModelAdmin):
+    list_display = ["rule", "object_type", "object_id", "window", "created_at"]
+    list_filter = ["object_type"]
+    raw_id_fields = ["rule"]
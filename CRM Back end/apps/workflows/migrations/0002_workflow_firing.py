@@ -0,0 +1,51 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflows", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkflowFiring",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("object_type", models.CharField(max_length=50)),
+                ("object_id", models.UUIDField()),
+                ("window", models.CharField(max_length=64)),
+                ("claim_token", models.UUIDField(db_index=True)),
+                (
+                    "rule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="firings",
+                        to="workflows.workflowrule",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("rule", "object_id", "window"),
+                        name="unique_workflow_firing",
+                    )
+                ],
+            },
+        ),
+    ]
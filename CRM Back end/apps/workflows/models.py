@@ -84,3 +84,37 @@ class WorkflowExecutionLog(TimeStampedModel):
 
     def __str__(self):
         return f"{self.rule.name} @ {self.triggered_at} — {self.result}"
+
+
+class WorkflowFiring(TimeStampedModel):
+    """
+    Idempotency record for scheduled workflow triggers.
+
+    One row per (rule, object, window) that a scheduled check has fired, so
+    the five-minute scheduler never re-notifies for the same occurrence.
+    ``window`` identifies the occurrence (a due date, an appointment start,
+    a reminder period); ``claim_token`` tells the run that inserted a row
+    which claims are its own.
+    """
+
+    rule = models.ForeignKey(
+        WorkflowRule,
+        on_delete=models.CASCADE,
+        related_name="firings",
+    )
+    object_type = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+    window = models.CharField(max_length=64)
+    claim_token = models.UUIDField(db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rule", "object_id", "window"],
+                name="unique_workflow_firing",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.rule_id} → {self.object_type}:{self.object_id} [{self.window}]"
@@ -0,0 +1,134 @@
+"""
+In-process index of active workflow rules.
+
+Every ``TaxCase`` and ``Document`` save used to query ``WorkflowRule`` to
+find matching signal triggers.  Active rules are few and change rarely, so
+they are loaded once per process into buckets keyed by
+``(trigger_type, from_status, to_status)`` - ``None`` standing for "any" -
+with their conditions pre-compiled.  A save that matches no bucket costs no
+queries at all.
+
+Rebuilds follow the version-token scheme of
+``apps.users.services.permission_matrix``: saving or deleting a rule bumps
+the token in the shared cache (see ``apps.workflows.signals``) and every
+process reloads the index on its next version check.
+"""
+
+import logging
+
+from apps.core.versioned_cache import VersionedValue
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "workflow_rule_index_version"
+
+
+def compile_conditions(conditions):
+    """
+    Compile ``WorkflowRule.conditions`` (field -> value or list of values)
+    into a tuple of ``(field, expected, is_list)`` checks.
+    """
+    compiled = []
+    for field, expected in (conditions or {}).items():
+        if isinstance(expected, list):
+            compiled.append((field, tuple(expected), True))
+        else:
+            compiled.append((field, expected, False))
+    return tuple(compiled)
+
+
+def conditions_match(compiled, instance):
+    """Whether ``instance`` satisfies every compiled condition."""
+    for field, expected, is_list in compiled:
+        actual = getattr(instance, field, None)
+        if actual is None:
+            return False
+        if is_list:
+            if actual not in expected:
+                return False
+        elif actual != expected:
+            return False
+    return True
+
+
+class CompiledRule:
+    """An active rule with its trigger key and compiled conditions."""
+
+    __slots__ = ("rule", "position", "conditions")
+
+    def __init__(self, rule, position):
+        self.rule = rule
+        self.position = position
+        self.conditions = compile_conditions(rule.conditions)
+
+    def matches(self, instance):
+        return conditions_match(self.conditions, instance)
+
+
+def _trigger_key(rule):
+    config = rule.trigger_config or {}
+    if rule.trigger_type == "case_status_changed":
+        return (
+            rule.trigger_type,
+            config.get("from_status") or None,
+            config.get("to_status") or None,
+        )
+    return (rule.trigger_type, None, None)
+
+
+class RuleIndex:
+    """Active rules bucketed by ``(trigger_type, from_status, to_status)``."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.trigger_types = frozenset(key[0] for key in buckets)
+
+    @classmethod
+    def build(cls):
+        from apps.workflows.models import WorkflowRule
+
+        buckets = {}
+        # Keep the model's default ordering so rules fire in the same order
+        # as the per-save query used to return them
+        for position, rule in enumerate(WorkflowRule.objects.filter(is_active=True)):
+            buckets.setdefault(_trigger_key(rule), []).append(
+                CompiledRule(rule, position)
+            )
+        return cls({key: tuple(rules) for key, rules in buckets.items()})
+
+    def candidates(self, trigger_type, old_status=None, new_status=None):
+        """Rules whose trigger matches, before conditions are checked."""
+        if trigger_type not in self.trigger_types:
+            return []
+        keys = {
+            (trigger_type, None, None),
+            (trigger_type, old_status, None),
+            (trigger_type, None, new_status),
+            (trigger_type, old_status, new_status),
+        }
+        found = []
+        for key in keys:
+            found.extend(self.buckets.get(key, ()))
+        found.sort(key=lambda compiled: compiled.position)
+        return found
+
+    def match(self, trigger_type, instance, old_status=None, new_status=None):
+        """Rules triggered by ``instance`` whose conditions all hold."""
+        return [
+            compiled.rule
+            for compiled in self.candidates(trigger_type, old_status, new_status)
+            if compiled.matches(instance)
+        ]
+
+
+_index = VersionedValue(VERSION_CACHE_KEY, RuleIndex.build)
+
+
+def get_rule_index():
+    """Return the compiled index, rebuilding it if the version changed."""
+    return _index.get()
+
+
+def invalidate_rule_index():
+    """Publish a new version so every process reloads its index."""
+    _index.invalidate()
@@ -0,0 +1,312 @@
+"""
+Set-based evaluation of scheduled (time-based) workflow triggers.
+
+Each check turns a rule into one filtered queryset: ``WorkflowRule.conditions``
+become SQL filters, missing documents are found with a single aggregate per
+rule, and occurrences that already fired are excluded with an anti-join on
+``WorkflowFiring``.  Matching objects are claimed in ``WorkflowFiring``
+(rule, object, window) so each occurrence fires exactly once, then handed to
+``execute_scheduled_actions`` in chunks so Celery workers run the actions in
+parallel.  Claims of objects whose action is skipped or fails, or whose
+chunk could not be queued, are released so a later run picks them up again.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import CharField, Count, Exists, OuterRef, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from apps.workflows.models import WorkflowFiring
+
+logger = logging.getLogger(__name__)
+
+# Objects per execute_scheduled_actions task
+DISPATCH_CHUNK_SIZE = 200
+
+# Candidate rows claimed per INSERT
+CLAIM_BATCH_SIZE = 1000
+
+# Foreign keys the action handlers read, per model
+ACTION_RELATIONS = {
+    "cases.TaxCase": ("assigned_preparer", "reviewer", "contact"),
+    "appointments.Appointment": ("contact", "assigned_to", "case"),
+    "tasks.Task": ("assigned_to", "case", "contact"),
+}
+
+_MATCH_NOTHING = Q(pk__in=[])
+
+
+# ---------------------------------------------------------------------------
+# Conditions → SQL
+# ---------------------------------------------------------------------------
+
+
+def conditions_to_q(conditions, model):
+    """
+    Translate ``WorkflowRule.conditions`` into a ``Q`` on *model*.
+
+    Keys that are not concrete fields (properties, related objects) cannot
+    be expressed in SQL; they are left out here and checked again in Python
+    by ``evaluate_conditions`` when the action runs.
+    """
+    fields = {}
+    for field in model._meta.concrete_fields:
+        fields[field.attname] = field
+        if not field.is_relation:
+            fields[field.name] = field
+
+    q = Q()
+    for name, expected in (conditions or {}).items():
+        field = fields.get(name)
+        if field is None:
+            continue
+        if isinstance(expected, list):
+            values = [v for v in (_coerce(field, v) for v in expected) if v is not None]
+            q &= Q(**{f"{name}__in": values})
+        else:
+            value = _coerce(field, expected)
+            if value is None:
+                # evaluate_conditions never matches a missing value
+                return _MATCH_NOTHING
+            q &= Q(**{name: value})
+    return q
+
+
+def _coerce(field, value):
+    if value is None:
+        return None
+    try:
+        return field.to_python(value)
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Claiming and dispatch
+# ---------------------------------------------------------------------------
+
+
+def _not_fired(rule, window):
+    """Filter excluding objects that already fired for *rule* in *window*."""
+    return ~Exists(
+        WorkflowFiring.objects.filter(
+            rule=rule, object_id=OuterRef("pk"), window=window
+        )
+    )
+
+
+def claim(rule, model, candidates, token=None):
+    """
+    Record ``(object_id, window)`` candidates as fired for *rule*.
+
+    Returns the set of object ids this call claimed; candidates already
+    claimed, by an earlier or a concurrent run, are left out.  The rows
+    carry *token* (a new one if not given) so they can be released.
+    """
+    token = token or uuid.uuid4()
+    object_type = model.__name__.lower()
+    WorkflowFiring.objects.bulk_create(
+        [
+            WorkflowFiring(
+                rule=rule,
+                object_type=object_type,
+                object_id=object_id,
+                window=window,
+                claim_token=token,
+            )
+            for object_id, window in candidates
+        ],
+        ignore_conflicts=True,
+        batch_size=CLAIM_BATCH_SIZE,
+    )
+    return set(
+        WorkflowFiring.objects.filter(rule=rule, claim_token=token).values_list(
+            "object_id", flat=True
+        )
+    )
+
+
+def release(rule_id, token, object_ids):
+    """Drop the claims *token* made for *object_ids*, so they can fire again."""
+    if not token or not object_ids:
+        return 0
+    deleted, _ = WorkflowFiring.objects.filter(
+        rule_id=rule_id, claim_token=token, object_id__in=object_ids
+    ).delete()
+    return deleted
+
+
+def dispatch(rule, model, items, token=None):
+    """
+    Queue ``(object_id, context)`` items for execution in chunks.
+
+    With the *token* of their claims, the worker releases the objects it
+    skips or fails on; if queueing fails, the claims of the chunks not
+    queued are released here.
+    """
+    from apps.workflows.tasks import execute_scheduled_actions
+
+    label = model._meta.label
+    claim_token = str(token) if token else None
+    for start in range(0, len(items), DISPATCH_CHUNK_SIZE):
+        chunk = [
+            [str(object_id), context]
+            for object_id, context in items[start : start + DISPATCH_CHUNK_SIZE]
+        ]
+        try:
+            execute_scheduled_actions.delay(
+                str(rule.pk), label, chunk, claim_token=claim_token
+            )
+        except Exception:
+            release(rule.pk, token, [object_id for object_id, _ in items[start:]])
+            raise
+
+
+def fire(rule, model, rows):
+    """
+    Claim and dispatch ``(object_id, window, context)`` rows.
+
+    Rows are consumed in chunks so a large candidate set is never held in
+    memory at once.  Returns the number of objects dispatched.
+    """
+    rows = iter(rows)
+    fired = 0
+    while True:
+        chunk = list(islice(rows, CLAIM_BATCH_SIZE))
+        if not chunk:
+            return fired
+        token = uuid.uuid4()
+        claimed = claim(
+            rule, model, [(pk, window) for pk, window, _ in chunk], token=token
+        )
+        items = [(pk, context) for pk, _, context in chunk if pk in claimed]
+        dispatch(rule, model, items, token=token)
+        fired += len(items)
+
+
+# ---------------------------------------------------------------------------
+# Checks, one per scheduled trigger type
+# ---------------------------------------------------------------------------
+
+
+def fire_appointment_reminders(rule, now=None):
+    """Remind about appointments starting within ``minutes_before``."""
+    from apps.appointments.models import Appointment
+
+    now = now or timezone.now()
+    minutes_before = rule.trigger_config.get("minutes_before", 30)
+    # Every appointment starting before the reminder horizon qualifies, so
+    # a delayed scheduler run cannot skip one; claims keep it to one
+    # reminder per start time.
+    qs = Appointment.objects.filter(
+        conditions_to_q(rule.conditions, Appointment),
+        start_datetime__gt=now,
+        start_datetime__lte=now + timedelta(minutes=minutes_before),
+        status__in=["scheduled", "confirmed"],
+    )
+    context = {"minutes_before": minutes_before}
+    rows = (
+        (pk, f"start:{start.isoformat()}", context)
+        for pk, start in qs.values_list("pk", "start_datetime").iterator()
+    )
+    return fire(rule, Appointment, rows)
+
+
+def fire_document_missing(rule, today=None):
+    """
+    Flag open cases lacking a required document type.
+
+    A case is reminded at most once per ``repeat_after_days`` (default 1).
+    """
+    from apps.cases.models import TaxCase
+    from apps.documents.models import Document
+
+    today = today or timezone.now().date()
+    required = list(
+        dict.fromkeys(rule.trigger_config.get("required_doc_types", ["w2", "1099"]))
+    )
+    if not required:
+        return 0
+    repeat_after_days = max(int(rule.trigger_config.get("repeat_after_days", 1)), 1)
+    window = f"missing:{today.toordinal() // repeat_after_days}"
+
+    case_ids = (
+        TaxCase.objects.filter(
+            conditions_to_q(rule.conditions, TaxCase),
+            _not_fired(rule, window),
+            status__in=["new", "in_progress"],
+        )
+        .annotate(
+            present=Count(
+                "documents__doc_type",
+                filter=Q(documents__doc_type__in=required),
+                distinct=True,
+            )
+        )
+        .filter(present__lt=len(required))
+        .values_list("pk", flat=True)
+    )
+
+    def rows():
+        ids = case_ids.iterator()
+        while True:
+            chunk = list(islice(ids, CLAIM_BATCH_SIZE))
+            if not chunk:
+                return
+            present = {}
+            for case_id, doc_type in (
+                Document.objects.filter(case_id__in=chunk, doc_type__in=required)
+                .values_list("case_id", "doc_type")
+                .distinct()
+            ):
+                present.setdefault(case_id, set()).add(doc_type)
+            for case_id in chunk:
+                found = present.get(case_id, set())
+                missing = [dt for dt in required if dt not in found]
+                yield case_id, window, {"missing_doc_types": missing}
+
+    return fire(rule, TaxCase, rows())
+
+
+def fire_due_dates(rule, today=None):
+    """Warn about open cases due in exactly ``days_before`` days."""
+    from apps.cases.models import TaxCase
+
+    today = today or timezone.now().date()
+    days_before = rule.trigger_config.get("days_before", 7)
+    target_date = today + timedelta(days=days_before)
+    window = f"due:{target_date.isoformat()}"
+
+    qs = TaxCase.objects.filter(
+        conditions_to_q(rule.conditions, TaxCase),
+        _not_fired(rule, window),
+        due_date=target_date,
+        status__in=["new", "in_progress", "under_review"],
+    )
+    context = {"days_until_due": days_before}
+    rows = ((pk, window, context) for pk in qs.values_list("pk", flat=True).iterator())
+    return fire(rule, TaxCase, rows)
+
+
+def fire_overdue_tasks(rule, today=None):
+    """Flag open tasks past their due date, once per due date."""
+    from apps.tasks.models import Task
+
+    today = today or timezone.now().date()
+    qs = Task.objects.filter(
+        conditions_to_q(rule.conditions, Task),
+        status__in=["todo", "in_progress"],
+        due_date__lt=today,
+    ).filter(
+        # The window is the due date, so moving the date re-arms the trigger
+        _not_fired(rule, Cast(OuterRef("due_date"), output_field=CharField()))
+    )
+    rows = (
+        (pk, due_date.isoformat(), {"days_overdue": (today - due_date).days})
+        for pk, due_date in qs.values_list("pk", "due_date").iterator()
+    )
+    return fire(rule, Task, rows)
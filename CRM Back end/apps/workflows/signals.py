@@ -4,24 +4,20 @@ Django signals that fire workflow triggers on model changes.
 
 import logging
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
+from apps.workflows.rule_index import invalidate_rule_index
+
 logger = logging.getLogger(__name__)
 
 
-@receiver(pre_save, sender="cases.TaxCase")
-def case_pre_save(sender, instance, **kwargs):
-    """Capture old status before save for change detection."""
-    if instance.pk:
-        try:
-            instance._old_status = sender.objects.values_list("status", flat=True).get(
-                pk=instance.pk
-            )
-        except sender.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+@receiver(post_init, sender="cases.TaxCase")
+def case_post_init(sender, instance, **kwargs):
+    """Remember the loaded status for change detection, without a query."""
+    # Deferred fields are absent from __dict__; reading them would query
+    instance._old_status = instance.__dict__.get("status")
 
 
 @receiver(post_save, sender="cases.TaxCase")
@@ -29,17 +25,18 @@ def case_post_save(sender, instance, created, **kwargs):
     """Fire workflow triggers for case creation or status changes."""
     from apps.workflows.workflow_engine import evaluate_signal_trigger
 
+    old_status = getattr(instance, "_old_status", None)
+    instance._old_status = instance.status
+
     if created:
         evaluate_signal_trigger("case_created", instance)
-    else:
-        old_status = getattr(instance, "_old_status", None)
-        if old_status and old_status != instance.status:
-            evaluate_signal_trigger(
-                "case_status_changed",
-                instance,
-                old_status=old_status,
-                new_status=instance.status,
-            )
+    elif old_status and old_status != instance.status:
+        evaluate_signal_trigger(
+            "case_status_changed",
+            instance,
+            old_status=old_status,
+            new_status=instance.status,
+        )
 
 
 @receiver(post_save, sender="documents.Document")
@@ -49,3 +46,18 @@ def document_post_save(sender, instance, created, **kwargs):
         from apps.workflows.workflow_engine import evaluate_signal_trigger
 
         evaluate_signal_trigger("document_uploaded", instance)
+
+
+_RULE_COUNTER_FIELDS = {"execution_count", "last_executed_at"}
+
+
+@receiver(post_save, sender="workflows.WorkflowRule")
+@receiver(post_delete, sender="workflows.WorkflowRule")
+def workflow_rule_changed(sender, instance, **kwargs):
+    """Rebuild the rule index when a rule is added, edited or removed."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= _RULE_COUNTER_FIELDS:
+        return
+    invalidate_rule_index()
+    # Bump again once committed so other processes can't load stale rows
+    transaction.on_commit(invalidate_rule_index)
@@ -2,21 +2,31 @@
 Celery tasks for scheduled workflow checks.
 
 Signal-driven workflows (case_status_changed, case_created, document_uploaded)
-are handled synchronously in signals.py.  The tasks below handle time-based
-triggers that need periodic polling.
+are matched in signals.py and run once the triggering transaction commits.
+The tasks below handle time-based triggers that need periodic polling; the
+set-based queries behind them live in ``apps.workflows.scheduler``.
 """
 
 import logging
 from datetime import timedelta
 
 from celery import shared_task
+from django.apps import apps
 from django.utils import timezone
 
-from apps.workflows.models import WorkflowRule
-from apps.workflows.workflow_engine import evaluate_conditions, execute_action
+from apps.workflows import scheduler
+from apps.workflows.models import WorkflowFiring, WorkflowRule
+from apps.workflows.workflow_engine import (
+    ExecutionBatch,
+    evaluate_conditions,
+    execute_action,
+)
 
 logger = logging.getLogger(__name__)
 
+# How long fired occurrences are remembered
+FIRING_RETENTION_DAYS = 90
+
 
 @shared_task
 def run_scheduled_workflows():
@@ -27,102 +37,87 @@ def run_scheduled_workflows():
     check_overdue_tasks.delay()
 
 
+def _run_check(trigger_type, check):
+    fired = 0
+    for rule in WorkflowRule.objects.filter(is_active=True, trigger_type=trigger_type):
+        try:
+            fired += check(rule)
+        except Exception:
+            logger.exception("Scheduled workflow check failed for rule %s", rule.id)
+    if fired:
+        logger.info("Dispatched %d %s workflow actions", fired, trigger_type)
+    return fired
+
+
 @shared_task
 def check_appointment_reminders():
     """Find appointments needing a reminder per active workflow rules."""
-    from apps.appointments.models import Appointment
-
-    now = timezone.now()
-    rules = WorkflowRule.objects.filter(
-        is_active=True, trigger_type="appointment_reminder"
-    )
-
-    for rule in rules:
-        minutes_before = rule.trigger_config.get("minutes_before", 30)
-        window_center = now + timedelta(minutes=minutes_before)
-        # Check a 5-minute window to avoid missing any
-        window_start = window_center - timedelta(minutes=2.5)
-        window_end = window_center + timedelta(minutes=2.5)
-
-        appointments = Appointment.objects.filter(
-            start_datetime__gte=window_start,
-            start_datetime__lte=window_end,
-            status__in=["scheduled", "confirmed"],
-        ).select_related("contact", "assigned_to", "case")
-
-        for apt in appointments:
-            if evaluate_conditions(rule, apt, {}):
-                execute_action(rule, apt, {"minutes_before": minutes_before})
+    return _run_check("appointment_reminder", scheduler.fire_appointment_reminders)
 
 
 @shared_task
 def check_document_missing():
     """Find cases missing required documents per active workflow rules."""
-    from apps.cases.models import TaxCase
-    from apps.documents.models import Document
-
-    rules = WorkflowRule.objects.filter(
-        is_active=True, trigger_type="document_missing_check"
-    )
-
-    for rule in rules:
-        required_types = rule.trigger_config.get("required_doc_types", ["w2", "1099"])
-        active_cases = TaxCase.objects.filter(
-            status__in=["new", "in_progress"]
-        ).select_related("assigned_preparer", "contact")
-
-        for case in active_cases:
-            existing = set(
-                Document.objects.filter(case=case).values_list("doc_type", flat=True)
-            )
-            missing = [dt for dt in required_types if dt not in existing]
-            if missing and evaluate_conditions(rule, case, {}):
-                execute_action(rule, case, {"missing_doc_types": missing})
+    return _run_check("document_missing_check", scheduler.fire_document_missing)
 
 
 @shared_task
 def check_due_dates():
     """Find cases with approaching due dates per active workflow rules."""
-    from apps.cases.models import TaxCase
-
-    today = timezone.now().date()
-    rules = WorkflowRule.objects.filter(
-        is_active=True, trigger_type="case_due_date_approaching"
-    )
-
-    for rule in rules:
-        days_before = rule.trigger_config.get("days_before", 7)
-        target_date = today + timedelta(days=days_before)
-
-        cases = TaxCase.objects.filter(
-            due_date=target_date,
-            status__in=["new", "in_progress", "under_review"],
-        ).select_related("assigned_preparer", "contact")
-
-        for case in cases:
-            if evaluate_conditions(rule, case, {}):
-                execute_action(rule, case, {"days_until_due": days_before})
+    return _run_check("case_due_date_approaching", scheduler.fire_due_dates)
 
 
 @shared_task
 def check_overdue_tasks():
     """Find overdue tasks per active workflow rules."""
-    from apps.tasks.models import Task
+    return _run_check("task_overdue", scheduler.fire_overdue_tasks)
 
-    today = timezone.now().date()
-    rules = WorkflowRule.objects.filter(is_active=True, trigger_type="task_overdue")
 
-    if not rules.exists():
+@shared_task
+def execute_scheduled_actions(rule_id: str, model_label: str, items, claim_token=None):
+    """
+    Run *rule*'s action for a chunk of ``[object_id, context]`` items
+    claimed by a scheduled check.
+
+    Objects that are skipped (rule deactivated, object gone, conditions no
+    longer met) or whose action fails have their claim released, so a
+    later check can fire them again.
+    """
+    rule = WorkflowRule.objects.filter(pk=rule_id, is_active=True).first()
+    if rule is None:
+        scheduler.release(
+            rule_id, claim_token, [object_id for object_id, _context in items]
+        )
         return
 
-    overdue_tasks = Task.objects.filter(
-        status__in=["todo", "in_progress"],
-        due_date__lt=today,
-    ).select_related("assigned_to", "case", "contact")
-
-    for task in overdue_tasks:
-        for rule in rules:
-            if evaluate_conditions(rule, task, {}):
-                execute_action(
-                    rule, task, {"days_overdue": (today - task.due_date).days}
-                )
+    model = apps.get_model(model_label)
+    objects = {
+        str(pk): instance
+        for pk, instance in model._default_manager.select_related(
+            *scheduler.ACTION_RELATIONS.get(model_label, ())
+        )
+        .in_bulk([object_id for object_id, _context in items])
+        .items()
+    }
+
+    batch = ExecutionBatch()
+    unfired = []
+    for object_id, context in items:
+        instance = objects.get(object_id)
+        # Conditions that could not be expressed in SQL are checked here
+        if instance is None or not evaluate_conditions(rule, instance, context):
+            unfired.append(object_id)
+            continue
+        log = execute_action(rule, instance, context, batch=batch)
+        if log.result != "success":
+            unfired.append(object_id)
+    batch.flush()
+    scheduler.release(rule.pk, claim_token, unfired)
+
+
+@shared_task
+def cleanup_workflow_firings():
+    """Forget fired occurrences older than FIRING_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=FIRING_RETENTION_DAYS)
+    deleted, _ = WorkflowFiring.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -1,9 +1,14 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from apps.workflows.models import WorkflowExecutionLog
+from apps.workflows.models import WorkflowExecutionLog, WorkflowRule
+from apps.workflows.rule_index import get_rule_index
 from apps.workflows.workflow_engine import (
+    ExecutionBatch,
+    _run_pending_actions,
     evaluate_conditions,
     evaluate_signal_trigger,
     execute_action,
@@ -57,16 +62,18 @@ class TestExecuteAction:
 @pytest.mark.django_db
 class TestEvaluateSignalTrigger:
     @patch("apps.workflows.workflow_engine.execute_action")
-    def test_fires_matching_rules(self, mock_exec):
+    def test_fires_matching_rules(self, mock_exec, django_capture_on_commit_callbacks):
+        # Created before the rule so its own signal queues nothing
+        case = TaxCaseFactory()
         WorkflowRuleFactory(
             trigger_type="case_created",
             is_active=True,
             conditions={},
         )
-        case = TaxCaseFactory()
-        # Reset mock to clear calls from signal during TaxCaseFactory()
-        mock_exec.reset_mock()
-        evaluate_signal_trigger("case_created", case)
+        with django_capture_on_commit_callbacks(execute=True):
+            evaluate_signal_trigger("case_created", case)
+            # Actions only run once the transaction commits
+            mock_exec.assert_not_called()
         mock_exec.assert_called_once()
 
     @patch("apps.workflows.workflow_engine.execute_action")
@@ -76,3 +83,93 @@ class TestEvaluateSignalTrigger:
         mock_exec.reset_mock()
         evaluate_signal_trigger("case_created", case)
         mock_exec.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestRuleIndex:
+    def test_status_buckets(self):
+        any_change = WorkflowRuleFactory(trigger_type="case_status_changed")
+        to_filed = WorkflowRuleFactory(
+            trigger_type="case_status_changed", trigger_config={"to_status": "filed"}
+        )
+        review_to_filed = WorkflowRuleFactory(
+            trigger_type="case_status_changed",
+            trigger_config={"from_status": "under_review", "to_status": "filed"},
+        )
+        case = TaxCaseFactory()
+        index = get_rule_index()
+
+        def matched(old, new):
+            return set(index.match("case_status_changed", case, old, new))
+
+        assert matched("new", "in_progress") == {any_change}
+        assert matched("new", "filed") == {any_change, to_filed}
+        assert matched("under_review", "filed") == {
+            any_change,
+            to_filed,
+            review_to_filed,
+        }
+
+    def test_rule_changes_rebuild_index(self):
+        rule = WorkflowRuleFactory(trigger_type="case_created")
+        case = TaxCaseFactory()
+        assert get_rule_index().match("case_created", case) == [rule]
+
+        rule.is_active = False
+        rule.save()
+        assert get_rule_index().match("case_created", case) == []
+
+    def test_status_change_without_matching_rule_adds_no_queries(self):
+        WorkflowRuleFactory(
+            trigger_type="case_status_changed", trigger_config={"to_status": "filed"}
+        )
+        case = TaxCaseFactory(status="new")
+        get_rule_index()
+
+        case.status = "in_progress"
+        with CaptureQueriesContext(connection) as ctx:
+            case.save(update_fields=["status", "updated_at"])
+        sql = [q["sql"] for q in ctx.captured_queries]
+        assert not [q for q in sql if "workflows_" in q]
+        # Old status comes from the loaded instance, not a SELECT
+        assert not [q for q in sql if q.startswith("SELECT") and "crm_tax_cases" in q]
+
+
+@pytest.mark.django_db
+class TestDeferredExecution:
+    def test_actions_batched_after_commit(self, django_capture_on_commit_callbacks):
+        rule = WorkflowRuleFactory(trigger_type="case_created")
+        with patch.dict(
+            "apps.workflows.workflow_engine._ACTION_HANDLERS",
+            {"send_notification": lambda r, i, c: "mocked"},
+        ):
+            with django_capture_on_commit_callbacks(execute=True) as callbacks:
+                TaxCaseFactory.create_batch(3)
+                assert not WorkflowExecutionLog.objects.filter(rule=rule).exists()
+
+        # One shared flush for every match in the transaction
+        flushes = [cb for cb in callbacks if cb is _run_pending_actions]
+        assert len(flushes) == 1
+        assert WorkflowExecutionLog.objects.filter(rule=rule).count() == 3
+        rule.refresh_from_db()
+        assert rule.execution_count == 3
+        assert rule.last_executed_at is not None
+
+    def test_batch_counts_only_successes(self):
+        rule = WorkflowRuleFactory(action_type="send_notification")
+        case = TaxCaseFactory()
+        batch = ExecutionBatch()
+
+        def fail(r, i, c):
+            raise ValueError("boom")
+
+        with patch.dict(
+            "apps.workflows.workflow_engine._ACTION_HANDLERS",
+            {"send_notification": fail},
+        ):
+            execute_action(rule, case, {}, batch=batch)
+        assert not WorkflowExecutionLog.objects.exists()
+        batch.flush()
+
+        assert WorkflowExecutionLog.objects.get(rule=rule).result == "error"
+        assert WorkflowRule.objects.get(pk=rule.pk).execution_count == 0
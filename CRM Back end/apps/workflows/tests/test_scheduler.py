@@ -0,0 +1,216 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.cases.models import TaxCase
+from apps.workflows import scheduler
+from apps.workflows.models import WorkflowExecutionLog, WorkflowFiring
+from apps.workflows.tasks import (
+    check_appointment_reminders,
+    check_document_missing,
+    check_due_dates,
+    check_overdue_tasks,
+)
+from tests.factories import (
+    AppointmentFactory,
+    DocumentFactory,
+    TaskFactory,
+    TaxCaseFactory,
+    WorkflowRuleFactory,
+)
+
+
+@pytest.fixture
+def recorded_actions():
+    """Replace the notification handler and record the objects it ran for."""
+    seen = []
+
+    def handler(rule, instance, context):
+        seen.append((instance.pk, context))
+        return "recorded"
+
+    with patch.dict(
+        "apps.workflows.workflow_engine._ACTION_HANDLERS",
+        {"send_notification": handler},
+    ):
+        yield seen
+
+
+class TestConditionsToQ:
+    def test_fields_lists_and_unknown_keys(self):
+        q = scheduler.conditions_to_q(
+            {"case_type": "individual_1040", "status": ["new", "filed"], "nope": 1},
+            TaxCase,
+        )
+        assert ("case_type", "individual_1040") in q.children
+        assert ("status__in", ["new", "filed"]) in q.children
+        assert len(q.children) == 2
+
+    def test_uncoercible_value_matches_nothing(self):
+        q = scheduler.conditions_to_q({"fiscal_year": "not-a-year"}, TaxCase)
+        assert q == scheduler._MATCH_NOTHING
+
+
+@pytest.mark.django_db
+class TestDocumentMissing:
+    def test_one_aggregate_query_and_fires_once(self, recorded_actions):
+        rule = WorkflowRuleFactory(
+            trigger_type="document_missing_check",
+            trigger_config={"required_doc_types": ["w2", "1099"]},
+            conditions={"case_type": "individual_1040"},
+        )
+        complete = TaxCaseFactory(case_type="individual_1040", status="new")
+        DocumentFactory(case=complete, doc_type="w2")
+        DocumentFactory(case=complete, doc_type="1099")
+        partial = TaxCaseFactory(case_type="individual_1040", status="in_progress")
+        DocumentFactory(case=partial, doc_type="w2")
+        TaxCaseFactory.create_batch(5, case_type="individual_1040", status="new")
+        TaxCaseFactory(case_type="corporate_1120", status="new")
+
+        with CaptureQueriesContext(connection) as ctx:
+            fired = scheduler.fire_document_missing(rule)
+        assert fired == 6
+        document_queries = [
+            q for q in ctx.captured_queries if "crm_documents" in q["sql"]
+        ]
+        # One aggregate for candidates, one lookup of present types per chunk
+        assert len(document_queries) == 2
+
+        contexts = dict(recorded_actions)
+        assert complete.pk not in contexts
+        assert contexts[partial.pk] == {"missing_doc_types": ["1099"]}
+
+        recorded_actions.clear()
+        check_document_missing()
+        assert recorded_actions == []
+
+    def test_repeats_after_window(self, recorded_actions):
+        rule = WorkflowRuleFactory(
+            trigger_type="document_missing_check",
+            trigger_config={"required_doc_types": ["w2"], "repeat_after_days": 1},
+        )
+        TaxCaseFactory(status="new")
+        today = timezone.now().date()
+        assert scheduler.fire_document_missing(rule, today=today) == 1
+        assert scheduler.fire_document_missing(rule, today=today) == 0
+        assert (
+            scheduler.fire_document_missing(rule, today=today + timedelta(days=1)) == 1
+        )
+
+
+@pytest.mark.django_db
+class TestOverdueTasks:
+    def test_fires_once_per_due_date(self, recorded_actions):
+        WorkflowRuleFactory(
+            trigger_type="task_overdue", conditions={"priority": "high"}
+        )
+        today = timezone.now().date()
+        task = TaskFactory(priority="high", due_date=today - timedelta(days=3))
+        TaskFactory(priority="low", due_date=today - timedelta(days=3))
+        TaskFactory(priority="high", due_date=today + timedelta(days=3))
+
+        check_overdue_tasks()
+        assert recorded_actions == [(task.pk, {"days_overdue": 3})]
+
+        check_overdue_tasks()
+        assert len(recorded_actions) == 1
+
+        # A new due date is a new occurrence
+        task.due_date = today - timedelta(days=1)
+        task.save()
+        check_overdue_tasks()
+        assert len(recorded_actions) == 2
+        assert (
+            WorkflowExecutionLog.objects.filter(trigger_object_id=task.pk).count() == 2
+        )
+
+
+@pytest.mark.django_db
+class TestDueDatesAndReminders:
+    def test_due_date_fires_once(self, recorded_actions):
+        WorkflowRuleFactory(
+            trigger_type="case_due_date_approaching", trigger_config={"days_before": 7}
+        )
+        target = timezone.now().date() + timedelta(days=7)
+        case = TaxCaseFactory(due_date=target, status="new")
+        TaxCaseFactory(due_date=target, status="filed")
+
+        check_due_dates()
+        check_due_dates()
+        assert recorded_actions == [(case.pk, {"days_until_due": 7})]
+
+    def test_appointment_reminder_fires_once_per_start(self, recorded_actions):
+        WorkflowRuleFactory(
+            trigger_type="appointment_reminder", trigger_config={"minutes_before": 30}
+        )
+        start = timezone.now() + timedelta(minutes=10)
+        appointment = AppointmentFactory(start_datetime=start)
+        AppointmentFactory(start_datetime=timezone.now() + timedelta(hours=3))
+
+        check_appointment_reminders()
+        check_appointment_reminders()
+        assert [pk for pk, _ in recorded_actions] == [appointment.pk]
+
+        appointment.start_datetime = start + timedelta(minutes=5)
+        appointment.save()
+        check_appointment_reminders()
+        assert len(recorded_actions) == 2
+
+
+@pytest.mark.django_db
+class TestClaims:
+    def test_claim_skips_already_claimed(self):
+        rule = WorkflowRuleFactory(trigger_type="task_overdue")
+        task = TaskFactory()
+        first = scheduler.claim(rule, type(task), [(task.pk, "w")])
+        second = scheduler.claim(rule, type(task), [(task.pk, "w")])
+        assert first == {task.pk}
+        assert second == set()
+        assert WorkflowFiring.objects.filter(rule=rule).count() == 1
+
+    def test_dispatch_chunks(self, monkeypatch):
+        rule = WorkflowRuleFactory(trigger_type="task_overdue")
+        monkeypatch.setattr(scheduler, "DISPATCH_CHUNK_SIZE", 2)
+        with patch("apps.workflows.tasks.execute_scheduled_actions.delay") as delay:
+            scheduler.dispatch(rule, TaxCase, [(i, {}) for i in range(5)])
+        assert [len(call.args[2]) for call in delay.call_args_list] == [2, 2, 1]
+
+    def test_failed_action_releases_claim(self):
+        WorkflowRuleFactory(trigger_type="task_overdue")
+        TaskFactory(due_date=timezone.now().date() - timedelta(days=1))
+
+        def fail(rule, instance, context):
+            raise ValueError("boom")
+
+        with patch.dict(
+            "apps.workflows.workflow_engine._ACTION_HANDLERS",
+            {"send_notification": fail},
+        ):
+            check_overdue_tasks()
+        assert not WorkflowFiring.objects.exists()
+
+    def test_skipped_object_releases_claim(self, recorded_actions):
+        # Not a column: left out of the SQL, then fails the check in the task
+        rule = WorkflowRuleFactory(
+            trigger_type="task_overdue", conditions={"missing_attr": "x"}
+        )
+        task = TaskFactory(due_date=timezone.now().date() - timedelta(days=1))
+
+        assert scheduler.fire(rule, type(task), [(task.pk, "w", {})]) == 1
+        assert recorded_actions == []
+        assert not WorkflowFiring.objects.filter(rule=rule).exists()
+
+    def test_failed_dispatch_releases_claims(self):
+        rule = WorkflowRuleFactory(trigger_type="task_overdue")
+        task = TaskFactory()
+        with patch(
+            "apps.workflows.tasks.execute_scheduled_actions.delay",
+            side_effect=RuntimeError("broker down"),
+        ):
+            with pytest.raises(RuntimeError):
+                scheduler.fire(rule, type(task), [(task.pk, "w", {})])
+        assert not WorkflowFiring.objects.filter(rule=rule).exists()
@@ -4,10 +4,19 @@ Core workflow engine — evaluates triggers, conditions, and executes actions.
 
 import logging
 import re
+import threading
+from collections import Counter
 
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
 from apps.workflows.models import WorkflowExecutionLog, WorkflowRule
+from apps.workflows.rule_index import (
+    compile_conditions,
+    conditions_match,
+    get_rule_index,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,23 +28,23 @@ logger = logging.getLogger(__name__)
 
 def evaluate_signal_trigger(trigger_type, instance, **context):
     """
-    Called from Django signals.  Finds active rules matching *trigger_type*,
-    evaluates conditions against *instance*, and executes the action for each
-    matching rule.
+    Called from Django signals.  Looks up active rules matching
+    *trigger_type* in the in-process rule index, evaluates their conditions
+    against *instance*, and schedules the action of each matching rule to
+    run once the current transaction commits.
 
-    Returns a list of WorkflowExecutionLog entries.
+    Returns the list of matched WorkflowRule objects.  When nothing matches
+    no query is issued.
     """
-    rules = WorkflowRule.objects.filter(is_active=True, trigger_type=trigger_type)
-
-    logs = []
+    rules = get_rule_index().match(
+        trigger_type,
+        instance,
+        old_status=context.get("old_status"),
+        new_status=context.get("new_status"),
+    )
     for rule in rules:
-        if not _matches_trigger_config(rule, instance, context):
-            continue
-        if not evaluate_conditions(rule, instance, context):
-            continue
-        log = execute_action(rule, instance, context)
-        logs.append(log)
-    return logs
+        _defer_action(rule, instance, context)
+    return rules
 
 
 def evaluate_conditions(rule, instance, context):
@@ -43,28 +52,52 @@ def evaluate_conditions(rule, instance, context):
     Evaluate ``rule.conditions`` (a dict of field→value) against *instance*.
     An empty conditions dict means "always match".
     """
-    conditions = rule.conditions or {}
-    for field, expected in conditions.items():
-        actual = getattr(instance, field, None)
-        if actual is None:
-            return False
-        if isinstance(expected, list):
-            if actual not in expected:
-                return False
-        elif actual != expected:
-            return False
-    return True
-
-
-def execute_action(rule, instance, context):
+    return conditions_match(compile_conditions(rule.conditions), instance)
+
+
+class ExecutionBatch:
+    """
+    Collects execution logs and rule counters so they are written with one
+    ``bulk_create`` and one UPDATE per rule instead of per execution.
+    """
+
+    def __init__(self):
+        self.logs = []
+        self.counts = Counter()
+        self.last_executed = {}
+
+    def add(self, log, succeeded):
+        self.logs.append(log)
+        if succeeded:
+            self.counts[log.rule_id] += 1
+            self.last_executed[log.rule_id] = log.triggered_at
+
+    def flush(self):
+        if self.logs:
+            WorkflowExecutionLog.objects.bulk_create(self.logs)
+        for rule_id, count in self.counts.items():
+            WorkflowRule.objects.filter(pk=rule_id).update(
+                execution_count=F("execution_count") + count,
+                last_executed_at=self.last_executed[rule_id],
+            )
+        self.logs, self.counts, self.last_executed = [], Counter(), {}
+
+
+def execute_action(rule, instance, context, batch=None):
     """
-    Dispatch to the correct action handler and create a WorkflowExecutionLog.
+    Dispatch to the correct action handler and record a WorkflowExecutionLog.
+
+    With a *batch* the log and the rule's execution counter are only
+    written when the batch is flushed; otherwise they are written at once.
     """
     now = timezone.now()
     handler = _ACTION_HANDLERS.get(rule.action_type)
+    own_batch = batch is None
+    if own_batch:
+        batch = ExecutionBatch()
 
     if handler is None:
-        return _create_log(
+        log = _build_log(
             rule,
             instance,
             now,
@@ -72,53 +105,77 @@ def execute_action(rule, instance, context):
             result="error",
             error_message=f"No handler for action_type={rule.action_type}",
         )
-
-    try:
-        description = handler(rule, instance, context)
-        log = _create_log(
-            rule,
-            instance,
-            now,
-            action_taken=description,
-            result="success",
-        )
-        # Update execution stats
-        rule.execution_count += 1
-        rule.last_executed_at = now
-        rule.save(update_fields=["execution_count", "last_executed_at"])
-        return log
-    except Exception as exc:
-        logger.exception("Workflow action failed for rule %s", rule.id)
-        return _create_log(
-            rule,
-            instance,
-            now,
-            action_taken=f"{rule.action_type} attempted",
-            result="error",
-            error_message=str(exc),
-        )
+        batch.add(log, succeeded=False)
+    else:
+        try:
+            description = handler(rule, instance, context)
+            log = _build_log(
+                rule,
+                instance,
+                now,
+                action_taken=description,
+                result="success",
+            )
+            batch.add(log, succeeded=True)
+        except Exception as exc:
+            logger.exception("Workflow action failed for rule %s", rule.id)
+            log = _build_log(
+                rule,
+                instance,
+                now,
+                action_taken=f"{rule.action_type} attempted",
+                result="error",
+                error_message=str(exc),
+            )
+            batch.add(log, succeeded=False)
+
+    if own_batch:
+        batch.flush()
+    return log
 
 
 # ---------------------------------------------------------------------------
-# Trigger config matching
+# Deferred execution
 # ---------------------------------------------------------------------------
 
+_pending = threading.local()
 
-def _matches_trigger_config(rule, instance, context):
-    """Check trigger_config against the specific trigger context."""
-    config = rule.trigger_config or {}
 
-    if rule.trigger_type == "case_status_changed":
-        from_status = config.get("from_status")
-        to_status = config.get("to_status")
-        if from_status and context.get("old_status") != from_status:
-            return False
-        if to_status and context.get("new_status") != to_status:
-            return False
+def _defer_action(rule, instance, context):
+    """
+    Queue *rule*'s action to run after the current transaction commits.
 
-    # Other trigger types don't need trigger_config matching at signal time
-    # (scheduled triggers handle their own config in the task layer)
-    return True
+    All actions matched within one transaction share a single on_commit
+    callback and a single ExecutionBatch.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        execute_action(rule, instance, context)
+        return
+
+    queue = getattr(_pending, "queue", None)
+    if queue is None or not _flush_registered(connection):
+        # No callback pending for this transaction (first match, or the
+        # previous transaction rolled back and dropped it)
+        queue = _pending.queue = []
+        transaction.on_commit(_run_pending_actions)
+    queue.append((rule, instance, context))
+
+
+def _flush_registered(connection):
+    return any(entry[1] is _run_pending_actions for entry in connection.run_on_commit)
+
+
+def _run_pending_actions():
+    queue = getattr(_pending, "queue", None) or []
+    _pending.queue = None
+    batch = ExecutionBatch()
+    for rule, instance, context in queue:
+        execute_action(rule, instance, context, batch=batch)
+    try:
+        batch.flush()
+    except Exception:
+        logger.exception("Failed to record %d workflow executions", len(batch.logs))
 
 
 # ---------------------------------------------------------------------------
@@ -299,8 +356,8 @@ _ACTION_HANDLERS = {
 # ---------------------------------------------------------------------------
 
 
-def _create_log(rule, instance, triggered_at, action_taken, result, error_message=""):
-    return WorkflowExecutionLog.objects.create(
+def _build_log(rule, instance, triggered_at, action_taken, result, error_message=""):
+    return WorkflowExecutionLog(
         rule=rule,
         triggered_at=triggered_at,
         trigger_object_type=instance.__class__.__name__.lower(),
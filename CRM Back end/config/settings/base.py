@@ -38,6 +38,11 @@ if not DEBUG:
 # Field encryption key for PII data
 FIELD_ENCRYPTION_KEY = env("FIELD_ENCRYPTION_KEY", default="")
 
+# HMAC key for blind indexes on encrypted fields (derived from
+# FIELD_ENCRYPTION_KEY when unset).  Changing it requires re-running
+# backfill_blind_indexes --rebuild.
+BLIND_INDEX_KEY = env("BLIND_INDEX_KEY", default="")
+
 # Document encryption key for files at rest (32 bytes, base64-encoded)
 # Generate with: python -c "import secrets, base64; print(base64.urlsafe_b64encode(secrets.token_bytes(32)).decode())"
 DOCUMENT_ENCRYPTION_KEY = env("DOCUMENT_ENCRYPTION_KEY", default="")
@@ -299,13 +304,17 @@ CELERY_BEAT_SCHEDULE = {
         "task": "apps.workflows.tasks.run_scheduled_workflows",
         "schedule": 300.0,  # every 5 minutes
     },
+    "cleanup-workflow-firings": {
+        "task": "apps.workflows.tasks.cleanup_workflow_firings",
+        "schedule": crontab(hour=4, minute=0),  # daily at 4 AM
+    },
     "process-appointment-reminders": {
         "task": "apps.appointments.tasks.process_appointment_reminders",
         "schedule": 900.0,  # every 15 minutes
     },
-    "generate-recurring-appointments": {
-        "task": "apps.appointments.tasks.generate_recurring_instances",
-        "schedule": crontab(hour=1, minute=0),
+    "dispatch-waiting-chats": {
+        "task": "apps.live_chat.tasks.dispatch_waiting_chats",
+        "schedule": 60.0,  # every minute (fallback for missed dispatches)
     },
     # AI Agent tasks
     "ai-agent-cycle": {
@@ -327,10 +336,38 @@ CELERY_BEAT_SCHEDULE = {
         ),  # weekly on Sunday at 2 AM
     },
     # Security cleanup tasks
+    "flush-session-activity": {
+        "task": "apps.users.tasks.flush_session_activity",
+        "schedule": 60.0,  # every minute
+    },
+    "materialize-scheduled-reports": {
+        "task": "apps.reports.tasks.materialize_scheduled_reports",
+        "schedule": crontab(minute=15),  # hourly
+    },
+    "drain-marketing-tracking-events": {
+        "task": "apps.marketing.tasks.drain_tracking_events",
+        "schedule": 10.0,  # every 10 seconds
+    },
+    "archive-audit-logs": {
+        "task": "apps.audit.tasks.archive_audit_logs",
+        "schedule": crontab(hour=2, minute=30),  # daily at 2:30 AM
+    },
     "cleanup-expired-download-tokens": {
         "task": "apps.documents.tasks.cleanup_expired_download_tokens",
         "schedule": crontab(hour=3, minute=0),  # daily at 3 AM
     },
+    "cleanup-export-jobs": {
+        "task": "apps.core.tasks.cleanup_export_jobs",
+        "schedule": crontab(minute=15),  # hourly
+    },
+    "check-sla-statuses": {
+        "task": "apps.cases.sla_tasks.check_sla_statuses",
+        "schedule": 60.0,  # every minute
+    },
+    "reconcile-kpi-rollups": {
+        "task": "apps.dashboard.tasks.reconcile_kpi_rollups",
+        "schedule": crontab(hour=1, minute=30),  # daily at 1:30 AM
+    },
     # Automated backup tasks
     "ai-agent-automated-backup-check": {
         "task": "apps.ai_agent.tasks.run_automated_backup_check",
@@ -684,6 +721,43 @@ DEFAULT_FROM_EMAIL = env(
 )
 SERVER_EMAIL = env("SERVER_EMAIL", default="support@ejsupportit.com")
 
+# Scheduled reports: largest result kept in a ReportSnapshot
+REPORT_SNAPSHOT_MAX_ROWS = env.int("REPORT_SNAPSHOT_MAX_ROWS", default=100_000)
+
+# CSV imports: larger files run as a background ImportJob
+IMPORT_SYNC_MAX_ROWS = env.int("IMPORT_SYNC_MAX_ROWS", default=1000)
+
+# Background exports: download token lifetime and how long files are kept
+EXPORT_DOWNLOAD_TOKEN_MINUTES = env.int("EXPORT_DOWNLOAD_TOKEN_MINUTES", default=5)
+EXPORT_RETENTION_HOURS = env.int("EXPORT_RETENTION_HOURS", default=24)
+
+# Dashboard KPIs: result cache lifetime (seconds) and days recomputed nightly
+KPI_CACHE_TIMEOUT = env.int("KPI_CACHE_TIMEOUT", default=900)
+KPI_RECONCILE_DAYS = env.int("KPI_RECONCILE_DAYS", default=35)
+
+# Chatbot / portal booking: lifetime (seconds) of cached free slots per staff day
+CHATBOT_AVAILABILITY_CACHE_TIMEOUT = env.int(
+    "CHATBOT_AVAILABILITY_CACHE_TIMEOUT", default=300
+)
+
+# Seconds the per-user notification preferences and unread counts are cached
+NOTIFICATION_PREFERENCE_CACHE_TIMEOUT = env.int(
+    "NOTIFICATION_PREFERENCE_CACHE_TIMEOUT", default=3600
+)
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = env.int(
+    "NOTIFICATION_UNREAD_CACHE_TIMEOUT", default=600
+)
+
+# Redis pub/sub for live chat events (messages, typing, read receipts);
+# empty uses a process-local broker (single process only)
+LIVE_CHAT_EVENTS_URL = env(
+    "LIVE_CHAT_EVENTS_URL", default=env("REDIS_URL", default="redis://localhost:6379/0")
+)
+# Longest a long-poll request waits for new events
+LIVE_CHAT_LONG_POLL_SECONDS = env.int("LIVE_CHAT_LONG_POLL_SECONDS", default=25)
+# Lifetime of an SSE stream before the client reconnects
+LIVE_CHAT_STREAM_SECONDS = env.int("LIVE_CHAT_STREAM_SECONDS", default=300)
+
 # Portal configuration
 PORTAL_BASE_URL = env(
     "PORTAL_BASE_URL", default="https://ebenezertaxservices1.od2.ejsupportit.com"
@@ -691,3 +765,19 @@ PORTAL_BASE_URL = env(
 CRM_BASE_URL = env(
     "CRM_BASE_URL", default="https://ebenezertaxservices1.od2.ejsupportit.com"
 )
+
+# Marketing campaigns: public URLs used in unsubscribe and tracking links
+FRONTEND_URL = env("FRONTEND_URL", default=CRM_BASE_URL)
+API_URL = env("API_URL", default=CRM_BASE_URL)
+# Messages per second each campaign send worker may hand to SMTP (0 = unlimited)
+MARKETING_SEND_RATE = env.float("MARKETING_SEND_RATE", default=20)
+# Redis stream buffering open/click tracking hits (empty = in-process buffer)
+MARKETING_TRACKING_BUFFER_URL = env(
+    "MARKETING_TRACKING_BUFFER_URL",
+    default=env("REDIS_URL", default="redis://localhost:6379/0"),
+)
+
+# Audit trail: modules whose entries are written by a Celery task instead of
+# in-process, and the age after which entries move to the archive table
+AUDIT_ASYNC_MODULES = env.list("AUDIT_ASYNC_MODULES", default=[])
+AUDIT_LOG_RETENTION_DAYS = env.int("AUDIT_LOG_RETENTION_DAYS", default=365)
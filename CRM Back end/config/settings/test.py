@@ -92,6 +92,12 @@ CACHES = {
     }
 }
 
+# Buffer marketing tracking events in-process instead of a Redis stream
+MARKETING_TRACKING_BUFFER_URL = ""
+
+# Publish live chat events in-process instead of Redis pub/sub
+LIVE_CHAT_EVENTS_URL = ""
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
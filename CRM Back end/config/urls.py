@@ -75,6 +75,8 @@ urlpatterns = [
     path("api/v1/video-meetings/", include("apps.video_meetings.urls")),
     path("api/v1/search/", include("apps.core.urls")),
     path("api/v1/backups/", include("apps.core.urls_backup")),
+    path("api/v1/imports/", include("apps.core.urls_imports")),
+    path("api/v1/exports/", include("apps.core.urls_exports")),
     path("api/v1/", include("apps.activities.urls")),
     # API docs
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -7,6 +7,7 @@ rather than repeating setup boilerplate.
 """
 
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -31,6 +32,27 @@ from tests.factories import (
 )
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """
+    Isolate tests from cached session, policy, IP rule, permission and
+    workflow rule state.
+    """
+    from apps.users.services.ip_rules import invalidate_ip_rules
+    from apps.users.services.permission_matrix import invalidate_permission_matrix
+    from apps.workflows.rule_index import invalidate_rule_index
+
+    cache.clear()
+    invalidate_ip_rules()
+    invalidate_permission_matrix()
+    invalidate_rule_index()
+    yield
+    cache.clear()
+    invalidate_ip_rules()
+    invalidate_permission_matrix()
+    invalidate_rule_index()
+
+
 @pytest.fixture
 def api_client():
     """Unauthenticated DRF APIClient."""